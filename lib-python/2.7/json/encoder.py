@@ -36,6 +36,7 @@ for i in range(0x20):
 
 INFINITY = float('inf')
 FLOAT_REPR = float.__repr__
+_DEFAULT_FLOAT_REPR = FLOAT_REPR
 
 def raw_encode_basestring(s):
     """Return a JSON representation of a Python string
@@ -206,6 +207,20 @@ class JSONEncoder(object):
         '{"foo": ["bar", "baz"]}'
 
         """
+        if type(self).iterencode.im_func is not _iterencode:
+            # a subclass customizes iterencode(): use it, like CPython does
+            chunks = self.iterencode(o, _one_shot=True)
+            if not isinstance(chunks, (list, tuple)):
+                chunks = list(chunks)
+            return ''.join(chunks)
+        if (_pypyjson_encode is not None and self.encoding == 'utf-8' and
+                FLOAT_REPR is _DEFAULT_FLOAT_REPR):
+            # the native encoder doesn't know about a patched FLOAT_REPR
+            return _pypyjson_encode(o, self.default, self.skipkeys,
+                                    self.ensure_ascii, self.check_circular,
+                                    self.allow_nan, self.sort_keys,
+                                    self.indent, self.item_separator,
+                                    self.key_separator)
         if self.check_circular:
             markers = {}
         else:
@@ -536,3 +551,8 @@ try:
     from _pypyjson import raw_encode_basestring_ascii
 except ImportError:
     pass
+_iterencode = JSONEncoder.iterencode.im_func
+try:
+    from _pypyjson import encode as _pypyjson_encode
+except ImportError:
+    _pypyjson_encode = None
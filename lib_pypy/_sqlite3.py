@@ -173,23 +173,30 @@ else:
 
 
 class _StatementCache(object):
+    """LRU cache of the prepared statements of a connection, keyed by the
+    SQL text.  'hits' and 'misses' count the lookups."""
+
     def __init__(self, connection, maxcount):
         self.connection = connection
         self.maxcount = maxcount
         self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
     def get(self, sql):
         try:
-            stat = self.cache[sql]
+            stat = self.cache.pop(sql)
         except KeyError:
+            self.misses += 1
             stat = Statement(self.connection, sql)
-            self.cache[sql] = stat
-            if len(self.cache) > self.maxcount:
-                self.cache.popitem(0)
         else:
+            self.hits += 1
             if stat._in_use:
                 stat = Statement(self.connection, sql)
-                self.cache[sql] = stat
+        # (re)insert it as the most recently used entry
+        self.cache[sql] = stat
+        while len(self.cache) > self.maxcount:
+            self.cache.popitem(last=False)
         return stat
 
 
@@ -735,76 +742,99 @@ class Cursor(object):
                 "and can no longer be fetched from.")
 
     def __build_row_cast_map(self):
-        if not self.__connection._detect_types:
+        detect_types = self.__connection._detect_types
+        if not detect_types:
+            self.__row_cast_map = None
             return
-        self.__row_cast_map = []
-        for i in xrange(_lib.sqlite3_column_count(self.__statement._statement)):
+        keys = self.__statement._get_converter_keys(detect_types)
+        row_cast_map = []
+        has_converter = False
+        for colname_key, decltype_key in keys:
             converter = None
-
-            if self.__connection._detect_types & PARSE_COLNAMES:
-                colname = _lib.sqlite3_column_name(self.__statement._statement, i)
-                if colname:
-                    colname = _ffi.string(colname).decode('utf-8')
-                    type_start = -1
-                    key = None
-                    for pos in range(len(colname)):
-                        if colname[pos] == '[':
-                            type_start = pos + 1
-                        elif colname[pos] == ']' and type_start != -1:
-                            key = colname[type_start:pos]
-                            converter = converters[key.upper()]
-
-            if converter is None and self.__connection._detect_types & PARSE_DECLTYPES:
-                decltype = _lib.sqlite3_column_decltype(self.__statement._statement, i)
-                if decltype:
-                    decltype = _ffi.string(decltype).decode('utf-8')
-                    # if multiple words, use first, eg.
-                    # "INTEGER NOT NULL" => "INTEGER"
-                    decltype = decltype.split()[0]
-                    if '(' in decltype:
-                        decltype = decltype[:decltype.index('(')]
-                    converter = converters.get(decltype.upper(), None)
-
-            self.__row_cast_map.append(converter)
+            if colname_key is not None:
+                converter = converters[colname_key]
+            if converter is None and decltype_key is not None:
+                converter = converters.get(decltype_key, None)
+            if converter is not None:
+                has_converter = True
+            row_cast_map.append(converter)
+        if has_converter:
+            self.__row_cast_map = row_cast_map
+        else:
+            self.__row_cast_map = None
 
     def __fetch_one_row(self):
-        num_cols = _lib.sqlite3_data_count(self.__statement._statement)
+        statement = self.__statement._statement
+        row_cast_map = self.__row_cast_map
+        num_cols = _lib.sqlite3_data_count(statement)
         row = newlist_hint(num_cols)
         for i in xrange(num_cols):
-            if self.__connection._detect_types:
-                converter = self.__row_cast_map[i]
+            if row_cast_map is not None:
+                converter = row_cast_map[i]
             else:
                 converter = None
 
             if converter is not None:
-                blob = _lib.sqlite3_column_blob(self.__statement._statement, i)
+                blob = _lib.sqlite3_column_blob(statement, i)
                 if not blob:
                     val = None
                 else:
-                    blob_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
+                    blob_len = _lib.sqlite3_column_bytes(statement, i)
                     val = _ffi.buffer(blob, blob_len)[:]
                     val = converter(val)
             else:
-                typ = _lib.sqlite3_column_type(self.__statement._statement, i)
+                typ = _lib.sqlite3_column_type(statement, i)
                 if typ == _lib.SQLITE_NULL:
                     val = None
                 elif typ == _lib.SQLITE_INTEGER:
-                    val = _lib.sqlite3_column_int64(self.__statement._statement, i)
+                    val = _lib.sqlite3_column_int64(statement, i)
                     val = int(val)
                 elif typ == _lib.SQLITE_FLOAT:
-                    val = _lib.sqlite3_column_double(self.__statement._statement, i)
+                    val = _lib.sqlite3_column_double(statement, i)
                 elif typ == _lib.SQLITE_TEXT:
-                    text = _lib.sqlite3_column_text(self.__statement._statement, i)
-                    text_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
+                    text = _lib.sqlite3_column_text(statement, i)
+                    text_len = _lib.sqlite3_column_bytes(statement, i)
                     val = _ffi.buffer(text, text_len)[:]
                     val = self.__connection.text_factory(val)
                 elif typ == _lib.SQLITE_BLOB:
-                    blob = _lib.sqlite3_column_blob(self.__statement._statement, i)
-                    blob_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
+                    blob = _lib.sqlite3_column_blob(statement, i)
+                    blob_len = _lib.sqlite3_column_bytes(statement, i)
                     val = _BLOB_TYPE(_ffi.buffer(blob, blob_len)[:])
             row.append(val)
         return tuple(row)
 
+    def __fetch_many(self, size):
+        # Like calling next() up to 'size' times (or until the end if
+        # size <= 0), but stepping the statement in a tight loop.
+        self.__check_cursor()
+        self.__check_reset()
+        lst = []
+        if not self.__statement:
+            return lst
+        try:
+            next_row = self.__next_row
+        except AttributeError:
+            return lst
+        del self.__next_row
+
+        row_factory = self.row_factory
+        statement = self.__statement._statement
+        while True:
+            if row_factory is not None:
+                next_row = row_factory(self, next_row)
+            lst.append(next_row)
+            ret = _lib.sqlite3_step(statement)
+            if ret != _lib.SQLITE_ROW:
+                self.__statement._reset()
+                if ret != _lib.SQLITE_DONE:
+                    raise self.__connection._get_exception(ret)
+                break
+            next_row = self.__fetch_one_row()
+            if len(lst) == size:
+                self.__next_row = next_row
+                break
+        return lst
+
     def __execute(self, multiple, sql, many_params):
         self.__locked = True
         self._reset = False
@@ -976,15 +1006,10 @@ class Cursor(object):
     def fetchmany(self, size=None):
         if size is None:
             size = self.arraysize
-        lst = []
-        for row in self:
-            lst.append(row)
-            if len(lst) == size:
-                break
-        return lst
+        return self.__fetch_many(size)
 
     def fetchall(self):
-        return list(self)
+        return self.__fetch_many(-1)
 
     def __get_connection(self):
         return self.__connection
@@ -1016,6 +1041,8 @@ class Cursor(object):
 
 class Statement(object):
     _statement = None
+    _converter_keys = None
+    _converter_keys_types = 0
 
     def __init__(self, connection, sql):
         self.__con = connection
@@ -1073,6 +1100,49 @@ class Statement(object):
         if self._statement:
             self.__con._finalize_raw_statement(self._statement)
 
+    def _get_converter_keys(self, detect_types):
+        # Return a list with, for each column, the names of the converters
+        # given by its column name and by its declared type, as requested
+        # by detect_types.  This only depends on the statement, so it is
+        # computed once and then reused by every cursor executing it ---
+        # unless sqlite re-prepared the statement after a schema change
+        # and the columns changed.
+        column_count = _lib.sqlite3_column_count(self._statement)
+        if (self._converter_keys_types == detect_types and
+                len(self._converter_keys) == column_count):
+            return self._converter_keys
+        keys = []
+        for i in xrange(column_count):
+            colname_key = None
+            decltype_key = None
+
+            if detect_types & PARSE_COLNAMES:
+                colname = _lib.sqlite3_column_name(self._statement, i)
+                if colname:
+                    colname = _ffi.string(colname).decode('utf-8')
+                    type_start = -1
+                    for pos in range(len(colname)):
+                        if colname[pos] == '[':
+                            type_start = pos + 1
+                        elif colname[pos] == ']' and type_start != -1:
+                            colname_key = colname[type_start:pos].upper()
+
+            if detect_types & PARSE_DECLTYPES:
+                decltype = _lib.sqlite3_column_decltype(self._statement, i)
+                if decltype:
+                    decltype = _ffi.string(decltype).decode('utf-8')
+                    # if multiple words, use first, eg.
+                    # "INTEGER NOT NULL" => "INTEGER"
+                    decltype = decltype.split()[0]
+                    if '(' in decltype:
+                        decltype = decltype[:decltype.index('(')]
+                    decltype_key = decltype.upper()
+
+            keys.append((colname_key, decltype_key))
+        self._converter_keys = keys
+        self._converter_keys_types = detect_types
+        return keys
+
     def _finalize(self):
         if self._statement:
             self.__con._finalize_raw_statement(self._statement)
@@ -33,10 +33,11 @@ working_modules.update([
     "_socket", "unicodedata", "mmap", "fcntl", "_locale", "pwd",
     "select", "zipimport", "_lsprof", "crypt", "signal", "_rawffi", "termios",
     "zlib", "bz2", "struct", "_hashlib", "_md5", "_sha", "_minimal_curses",
-    "cStringIO", "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
-    "binascii", "_multiprocessing", '_warnings', "_collections",
+    "cStringIO", "cPickle", "thread", "itertools", "pyexpat", "_ssl", "cpyext",
+    "array", "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "_cppyy", "_pypyjson", "_jitlog"
+    "_csv", "_cppyy", "_pypyjson", "_jitlog", "_elementtree",
+    "datetime"
 ])
 
 from rpython.jit.backend import detect_cpu
@@ -94,6 +95,8 @@ module_dependencies = {
     'cpyext': [('objspace.usemodules.array', True)],
     '_cppyy': [('objspace.usemodules.cpyext', True)],
     'faulthandler': [('objspace.usemodules._vmprof', True)],
+    '_elementtree': [('objspace.usemodules.pyexpat', True)],
+    'datetime': [('objspace.usemodules.time', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -233,6 +236,10 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "enable optimized ways to store lists of primitives ",
                    default=True),
 
+        BoolOption("withunboxedattributes",
+                   "store the int and float attributes of instances unboxed",
+                   default=False),
+
         BoolOption("withmethodcachecounter",
                    "try to cache methods and provide a counter in __pypy__. "
                    "for testing purposes only.",
@@ -270,6 +277,7 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(optimized_list_getitem=True)
         #config.objspace.std.suggest(newshortcut=True)
         config.objspace.std.suggest(withspecialisedtuple=True)
+        config.objspace.std.suggest(withunboxedattributes=True)
         #if not IS_64_BITS:
         #    config.objspace.std.suggest(withsmalllong=True)
 
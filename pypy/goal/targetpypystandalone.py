@@ -365,7 +365,7 @@ class PyPyTarget(object):
         return PyPyJitPolicy(pypy_hooks)
 
     def get_entry_point(self, config):
-        space = make_objspace(config)
+        self.space = space = make_objspace(config)
 
         # manually imports app_main.py
         filename = os.path.join(pypydir, 'interpreter', 'app_main.py')
@@ -376,9 +376,13 @@ class PyPyTarget(object):
 
         return entry_point, None, PyPyAnnotatorPolicy()
 
+    def get_gchooks(self):
+        from pypy.module.gc.hook import LowLevelGcHooks
+        return self.space.fromcache(LowLevelGcHooks)
+
     def interface(self, ns):
         for name in ['take_options', 'handle_config', 'print_help', 'target',
-                     'jitpolicy', 'get_entry_point',
+                     'jitpolicy', 'get_entry_point', 'get_gchooks',
                      'get_additional_config_options']:
             ns[name] = getattr(self, name)
 
@@ -45,6 +45,8 @@ PYTHONIOENCODING: Encoding[:errors] used for stdin/stdout/stderr.
 PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
+PYPY_JIT_WARMUP_PROFILE: file where the JIT saves the loops it compiled at
+               exit, and reads them back at startup to warm up faster.
 """
 
 try:
@@ -234,6 +236,11 @@ def set_jit_option(options, jitparam, *args):
         import pypyjit
         pypyjit.set_param(jitparam)
 
+def enable_jit_warmup_profile(filename):
+    if 'pypyjit' in sys.builtin_module_names:
+        import pypyjit
+        pypyjit.enable_warmup_profile(filename)
+
 def run_faulthandler():
     if 'faulthandler' in sys.builtin_module_names:
         import faulthandler
@@ -545,6 +552,9 @@ def parse_command_line(argv):
     if os.getenv('PYTHONFAULTHANDLER'):
         run_faulthandler()
 
+    if os.getenv('PYPY_JIT_WARMUP_PROFILE'):
+        enable_jit_warmup_profile(os.getenv('PYPY_JIT_WARMUP_PROFILE'))
+
 ##    if not we_are_translated():
 ##        for key in sorted(options):
 ##            print '%40s: %s' % (key, options[key])
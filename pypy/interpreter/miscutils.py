@@ -27,6 +27,9 @@ class ThreadLocals:
     def signals_enabled(self):
         return True
 
+    def set_switch_interval(self, space, interval):
+        pass      # no GIL
+
     def enable_signals(self, space):
         pass
 
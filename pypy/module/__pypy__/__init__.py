@@ -32,6 +32,8 @@ class ThreadModule(MixedModule):
     interpleveldefs = {
         '_signals_enter':  'interp_signal.signals_enter',
         '_signals_exit':   'interp_signal.signals_exit',
+        'gil_stats':       'interp_gil.gil_stats',
+        'reset_gil_stats': 'interp_gil.reset_gil_stats',
     }
 
 
@@ -0,0 +1,30 @@
+from rpython.rlib import rgil
+
+
+def gil_stats(space):
+    """Return a dict with statistics about the GIL, since the start of the
+    process or the last call to reset_gil_stats():
+
+    - acquisitions: number of times a thread got the GIL, except that
+      the JIT's inline fast path (taking back a free GIL after a call
+      that released it) is not counted; only slow-path acquisitions
+      are counted when JIT-compiled code releases the GIL
+    - waits: number of times a thread had to wait because another one
+      held the GIL
+    - wait_time: total time spent waiting, in seconds
+    - forced_switches: number of times the running thread had to give
+      the GIL to a waiting thread
+    """
+    w_result = space.newdict()
+    for name, value in [
+            ("acquisitions", rgil.get_stat(rgil.STAT_ACQUISITIONS)),
+            ("waits", rgil.get_stat(rgil.STAT_WAITS)),
+            ("forced_switches", rgil.get_stat(rgil.STAT_FORCED_SWITCHES))]:
+        space.setitem_str(w_result, name, space.newint(value))
+    space.setitem_str(w_result, "wait_time",
+                      space.newfloat(rgil.get_wait_time()))
+    return w_result
+
+def reset_gil_stats(space):
+    """Reset the counters returned by gil_stats() to zero."""
+    rgil.reset_stats()
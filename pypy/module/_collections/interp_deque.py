@@ -1,11 +1,14 @@
 import sys
-from rpython.rlib.objectmodel import specialize
+from rpython.rlib import rerased
+from rpython.rlib.objectmodel import specialize, import_from_mixin
 from pypy.interpreter import gateway
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef, make_weakref_descr
 from pypy.interpreter.typedef import GetSetProperty
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.error import OperationError, oefmt
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
 from rpython.rlib.debug import check_nonneg
 
 
@@ -42,14 +45,145 @@ CENTER   = ((BLOCKLEN - 1) / 2)
 
 class Block(object):
     __slots__ = ('leftlink', 'rightlink', 'data')
-    def __init__(self, leftlink, rightlink):
+    def __init__(self, leftlink, rightlink, data):
         self.leftlink = leftlink
         self.rightlink = rightlink
-        self.data = [None] * BLOCKLEN
+        self.data = data      # erased list of length BLOCKLEN, see below
 
 class Lock(object):
     pass
 
+# ------------------------------------------------------------
+# Storage strategies.  All the blocks of a deque store their items in
+# the same way, given by d.strategy: as a list of wrapped objects, or
+# unboxed as a list of ints or a list of floats, like the corresponding
+# list strategies in pypy/objspace/std/listobject.py.  Appending an
+# item of another type switches the whole deque to ObjectDequeStrategy.
+# A new or cleared deque uses EmptyDequeStrategy, whose block has no
+# storage; and whenever the deque is empty, the next item added picks
+# again the strategy.
+
+class DequeStrategy(object):
+    def __init__(self, space):
+        self.space = space
+
+    def newdata(self):
+        "Return the storage for a new block."
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_type(self, w_obj):
+        raise NotImplementedError("abstract base class")
+
+    def getitem(self, block, index):
+        raise NotImplementedError("abstract base class")
+
+    def setitem(self, block, index, w_obj):
+        raise NotImplementedError("abstract base class")
+
+    def clearitem(self, block, index):
+        raise NotImplementedError("abstract base class")
+
+    def swap(self, block1, index1, block2, index2):
+        raise NotImplementedError("abstract base class")
+
+
+class EmptyDequeStrategy(DequeStrategy):
+    erase, unerase = rerased.new_erasing_pair("empty")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def newdata(self):
+        return self.erase(None)
+
+    def is_correct_type(self, w_obj):
+        return False
+
+
+class AbstractUnwrappedDequeStrategy(object):
+
+    def newdata(self):
+        return self.erase([self._none_value] * BLOCKLEN)
+
+    def getitem(self, block, index):
+        return self.wrap(self.unerase(block.data)[index])
+
+    def setitem(self, block, index, w_obj):
+        self.unerase(block.data)[index] = self.unwrap(w_obj)
+
+    def clearitem(self, block, index):
+        self.unerase(block.data)[index] = self._none_value
+
+    def swap(self, block1, index1, block2, index2):
+        data1 = self.unerase(block1.data)
+        data2 = self.unerase(block2.data)
+        data1[index1], data2[index2] = data2[index2], data1[index1]
+
+
+class ObjectDequeStrategy(DequeStrategy):
+    import_from_mixin(AbstractUnwrappedDequeStrategy)
+
+    _none_value = None
+
+    def wrap(self, item):
+        return item
+
+    def unwrap(self, w_obj):
+        return w_obj
+
+    erase, unerase = rerased.new_erasing_pair("object")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return True
+
+
+class IntegerDequeStrategy(DequeStrategy):
+    import_from_mixin(AbstractUnwrappedDequeStrategy)
+
+    _none_value = 0
+
+    def wrap(self, intval):
+        return self.space.newint(intval)
+
+    def unwrap(self, w_int):
+        return self.space.int_w(w_int)
+
+    erase, unerase = rerased.new_erasing_pair("integer")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_IntObject
+
+
+class FloatDequeStrategy(DequeStrategy):
+    import_from_mixin(AbstractUnwrappedDequeStrategy)
+
+    _none_value = 0.0
+
+    def wrap(self, floatval):
+        return self.space.newfloat(floatval)
+
+    def unwrap(self, w_float):
+        return self.space.float_w(w_float)
+
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_FloatObject
+
+
+def get_strategy_for_item(space, w_obj):
+    if type(w_obj) is W_IntObject:
+        return space.fromcache(IntegerDequeStrategy)
+    elif type(w_obj) is W_FloatObject:
+        return space.fromcache(FloatDequeStrategy)
+    else:
+        return space.fromcache(ObjectDequeStrategy)
+
 # ------------------------------------------------------------
 
 class W_Deque(W_Root):
@@ -80,6 +214,42 @@ class W_Deque(W_Root):
             raise oefmt(self.space.w_RuntimeError,
                         "deque mutated during iteration")
 
+    def check_strategy(self, w_x):
+        # must be called before an item is stored, while the deque is
+        # still consistent
+        if not self.strategy.is_correct_type(w_x):
+            self.switch_to_strategy_for(w_x)
+
+    def switch_to_strategy_for(self, w_x):
+        space = self.space
+        if self.len == 0:
+            assert self.leftblock is self.rightblock
+            self.strategy = get_strategy_for_item(space, w_x)
+            self.leftblock.data = self.strategy.newdata()
+        else:
+            self.switch_to_object_strategy()
+
+    def switch_to_object_strategy(self):
+        old_strategy = self.strategy
+        strategy = self.space.fromcache(ObjectDequeStrategy)
+        block = self.leftblock
+        index = self.leftindex
+        while True:
+            data = [None] * BLOCKLEN
+            if block is self.rightblock:
+                stop = self.rightindex + 1
+            else:
+                stop = BLOCKLEN
+            while index < stop:
+                data[index] = old_strategy.getitem(block, index)
+                index += 1
+            block.data = strategy.erase(data)
+            if block is self.rightblock:
+                break
+            block = block.rightlink
+            index = 0
+        self.strategy = strategy
+
     def init(self, w_iterable=None, w_maxlen=None):
         space = self.space
         if space.is_none(w_maxlen):
@@ -104,35 +274,38 @@ class W_Deque(W_Root):
 
     def append(self, w_x):
         "Add an element to the right side of the deque."
+        self.check_strategy(w_x)
         ri = self.rightindex + 1
         if ri >= BLOCKLEN:
-            b = Block(self.rightblock, None)
+            b = Block(self.rightblock, None, self.strategy.newdata())
             self.rightblock.rightlink = b
             self.rightblock = b
             ri = 0
         self.rightindex = ri
-        self.rightblock.data[ri] = w_x
+        self.strategy.setitem(self.rightblock, ri, w_x)
         self.len += 1
         self.trimleft()
         self.modified()
 
     def appendleft(self, w_x):
         "Add an element to the left side of the deque."
+        self.check_strategy(w_x)
         li = self.leftindex - 1
         if li < 0:
-            b = Block(None, self.leftblock)
+            b = Block(None, self.leftblock, self.strategy.newdata())
             self.leftblock.leftlink = b
             self.leftblock = b
             li = BLOCKLEN - 1
         self.leftindex = li
-        self.leftblock.data[li] = w_x
+        self.strategy.setitem(self.leftblock, li, w_x)
         self.len += 1
         self.trimright()
         self.modified()
 
     def clear(self):
         "Remove all elements from the deque."
-        self.leftblock = Block(None, None)
+        self.strategy = self.space.fromcache(EmptyDequeStrategy)
+        self.leftblock = Block(None, None, self.strategy.newdata())
         self.rightblock = self.leftblock
         self.leftindex = CENTER + 1
         self.rightindex = CENTER
@@ -147,7 +320,7 @@ class W_Deque(W_Root):
         index = self.leftindex
         lock = self.getlock()
         for i in range(self.len):
-            w_item = block.data[index]
+            w_item = self.strategy.getitem(block, index)
             if space.eq_w(w_item, w_x):
                 result += 1
             self.checklock(lock)
@@ -203,8 +376,8 @@ class W_Deque(W_Root):
             raise oefmt(self.space.w_IndexError, "pop from an empty deque")
         self.len -= 1
         ri = self.rightindex
-        w_obj = self.rightblock.data[ri]
-        self.rightblock.data[ri] = None
+        w_obj = self.strategy.getitem(self.rightblock, ri)
+        self.strategy.clearitem(self.rightblock, ri)
         ri -= 1
         if ri < 0:
             if self.len == 0:
@@ -226,8 +399,8 @@ class W_Deque(W_Root):
             raise oefmt(self.space.w_IndexError, "pop from an empty deque")
         self.len -= 1
         li = self.leftindex
-        w_obj = self.leftblock.data[li]
-        self.leftblock.data[li] = None
+        w_obj = self.strategy.getitem(self.leftblock, li)
+        self.strategy.clearitem(self.leftblock, li)
         li += 1
         if li >= BLOCKLEN:
             if self.len == 0:
@@ -250,7 +423,7 @@ class W_Deque(W_Root):
         index = self.leftindex
         lock = self.getlock()
         for i in range(self.len):
-            w_item = block.data[index]
+            w_item = self.strategy.getitem(block, index)
             equal = space.eq_w(w_item, w_x)
             self.checklock(lock)
             if equal:
@@ -270,7 +443,7 @@ class W_Deque(W_Root):
         ri = self.rightindex
         rb = self.rightblock
         for i in range(self.len >> 1):
-            lb.data[li], rb.data[ri] = rb.data[ri], lb.data[li]
+            self.strategy.swap(lb, li, rb, ri)
             li += 1
             if li >= BLOCKLEN:
                 lb = lb.rightlink
@@ -362,7 +535,7 @@ class W_Deque(W_Root):
         start, stop, step = space.decode_index(w_index, self.len)
         if step == 0:  # index only
             b, i = self.locate(start)
-            return b.data[i]
+            return self.strategy.getitem(b, i)
         else:
             raise oefmt(space.w_TypeError, "deque[:] is not supported")
 
@@ -370,8 +543,9 @@ class W_Deque(W_Root):
         space = self.space
         start, stop, step = space.decode_index(w_index, self.len)
         if step == 0:  # index only
+            self.check_strategy(w_newobj)
             b, i = self.locate(start)
-            b.data[i] = w_newobj
+            self.strategy.setitem(b, i, w_newobj)
         else:
             raise oefmt(space.w_TypeError, "deque[:] is not supported")
 
@@ -515,7 +689,7 @@ class W_DequeIter(W_Root):
             raise OperationError(space.w_StopIteration, space.w_None)
         self.counter -= 1
         ri = self.index
-        w_x = self.block.data[ri]
+        w_x = self.deque.strategy.getitem(self.block, ri)
         ri += 1
         if ri == BLOCKLEN:
             self.block = self.block.rightlink
@@ -557,7 +731,7 @@ class W_DequeRevIter(W_Root):
             raise OperationError(space.w_StopIteration, space.w_None)
         self.counter -= 1
         ri = self.index
-        w_x = self.block.data[ri]
+        w_x = self.deque.strategy.getitem(self.block, ri)
         ri -= 1
         if ri < 0:
             self.block = self.block.leftlink
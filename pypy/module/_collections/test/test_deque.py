@@ -302,3 +302,63 @@ class AppTestBasic:
         d.pop()
         gc.collect(); gc.collect(); gc.collect()
         assert X.freed
+
+    def test_strategy_switches(self):
+        from _collections import deque
+        d = deque(xrange(100))
+        d.append(2.5)
+        d.appendleft("x")
+        assert list(d) == ["x"] + range(100) + [2.5]
+        d = deque([1.5] * 70)
+        d[65] = 7
+        assert d[65] == 7 and d[64] == 1.5 and d[66] == 1.5
+        d = deque(xrange(10))
+        d.reverse()
+        d.rotate(3)
+        assert list(d) == [2, 1, 0, 9, 8, 7, 6, 5, 4, 3]
+        assert d.count(5) == 1
+        d.remove(5)
+        assert 5 not in d
+        class MyInt(int):
+            pass
+        d = deque([1, 2])
+        d.append(MyInt(3))
+        assert type(d[2]) is MyInt
+        d.append(True)
+        assert d[3] is True
+
+    def test_strategy_switch_during_iteration(self):
+        from _collections import deque
+        d = deque(xrange(100))
+        it = iter(d)
+        assert next(it) == 0
+        d[50] = "x"
+        assert next(it) == 1
+        assert list(it)[48] == "x"
+
+
+class TestDequeStrategies:
+    spaceconfig = dict(usemodules=['_collections'])
+
+    def get_strategy(self, source):
+        w_d = self.space.appexec([], """():
+            from _collections import deque
+            return %s
+        """ % (source,))
+        return w_d.strategy.__class__.__name__
+
+    def test_strategies(self):
+        assert self.get_strategy("deque()") == 'EmptyDequeStrategy'
+        assert self.get_strategy("deque(range(100))") == 'IntegerDequeStrategy'
+        assert self.get_strategy("deque([1.5])") == 'FloatDequeStrategy'
+        assert self.get_strategy("deque(['a'])") == 'ObjectDequeStrategy'
+        assert self.get_strategy("deque([1, 1.5])") == 'ObjectDequeStrategy'
+        assert self.get_strategy("deque([1, True])") == 'ObjectDequeStrategy'
+
+    def test_strategy_of_empty_deque(self):
+        source = """(lambda d: (d.pop(), d.append(1.5), d)[-1])(deque([1]))"""
+        assert self.get_strategy(source) == 'FloatDequeStrategy'
+        source = """(lambda d: (d.clear(), d)[-1])(deque([1]))"""
+        assert self.get_strategy(source) == 'EmptyDequeStrategy'
+        source = """deque([1], maxlen=0)"""
+        assert self.get_strategy(source) == 'IntegerDequeStrategy'
@@ -0,0 +1,38 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast implementation of the ElementTree API.  Element, TreeBuilder
+and XMLParser are written at interp-level; the parser drives expat
+directly and builds the tree without calling app-level code."""
+
+    appleveldefs = {
+        'Comment': 'app_elementtree.Comment',
+        'PI': 'app_elementtree.PI',
+        'ProcessingInstruction': 'app_elementtree.PI',
+        'ElementTree': 'app_elementtree.ElementTree',
+        'parse': 'app_elementtree.parse',
+        'iterparse': 'app_elementtree.iterparse',
+        'XML': 'app_elementtree.XML',
+        'fromstring': 'app_elementtree.XML',
+        'XMLID': 'app_elementtree.XMLID',
+        'fromstringlist': 'app_elementtree.fromstringlist',
+        'ParseError': 'app_elementtree.ParseError',
+        'QName': 'app_elementtree.QName',
+        'ElementPath': 'app_elementtree.ElementPath',
+        'dump': 'app_elementtree.dump',
+        'iselement': 'app_elementtree.iselement',
+        'register_namespace': 'app_elementtree.register_namespace',
+        'tostring': 'app_elementtree.tostring',
+        'tostringlist': 'app_elementtree.tostringlist',
+    }
+
+    interpleveldefs = {
+        'Element': 'interp_element.W_Element',
+        'SubElement': 'interp_element.SubElement',
+        'TreeBuilder': 'interp_element.W_TreeBuilder',
+        'XMLParser': 'interp_parser.W_XMLParser',
+        'XMLTreeBuilder': 'interp_parser.W_XMLParser',
+        'VERSION': 'space.newtext("1.0.6")',
+        '__version__': 'space.newtext("1.0.6")',
+    }
@@ -0,0 +1,152 @@
+# The parts of _elementtree that stay at app-level, on top of the
+# interp-level Element, TreeBuilder and XMLParser.  Serialization and
+# ElementPath are shared with the pure Python xml.etree.ElementTree.
+
+from xml.etree import ElementTree as ET
+from _elementtree import Element, TreeBuilder, XMLParser
+
+ParseError = ET.ParseError
+QName = ET.QName
+ElementPath = ET.ElementPath
+dump = ET.dump
+iselement = ET.iselement
+register_namespace = ET.register_namespace
+tostring = ET.tostring
+tostringlist = ET.tostringlist
+
+
+def Comment(text=None):
+    element = Element(ET.Comment)
+    element.text = text
+    return element
+
+def PI(target, text=None):
+    element = Element(ET.ProcessingInstruction)
+    element.text = target
+    if text:
+        element.text = target + " " + text
+    return element
+
+
+class ElementTree(ET.ElementTree):
+
+    def parse(self, source, parser=None):
+        close_source = False
+        if not hasattr(source, "read"):
+            source = open(source, "rb")
+            close_source = True
+        try:
+            if parser is None:
+                # the interp-level parser reads the file by itself
+                parser = XMLParser(target=TreeBuilder())
+                self._root = parser._parse(source)
+            else:
+                while 1:
+                    data = source.read(65536)
+                    if not data:
+                        break
+                    parser.feed(data)
+                self._root = parser.close()
+            return self._root
+        finally:
+            if close_source:
+                source.close()
+
+def parse(source, parser=None):
+    tree = ElementTree()
+    tree.parse(source, parser)
+    return tree
+
+
+def iterparse(source, events=None, parser=None):
+    close_source = False
+    if not hasattr(source, "read"):
+        source = open(source, "rb")
+        close_source = True
+    try:
+        if parser is None:
+            parser = XMLParser(target=TreeBuilder())
+        return _IterParseIterator(source, events, parser, close_source)
+    except:
+        if close_source:
+            source.close()
+        raise
+
+class _IterParseIterator(object):
+    # The TreeBuilder appends the events to self._events while the
+    # parser is fed, and the list is emptied before each new chunk: the
+    # memory used only depends on the size of the chunks and of the
+    # elements that the caller keeps.  Calling elem.clear() on the "end"
+    # events releases the processed subtrees.
+
+    def __init__(self, source, events, parser, close_source=False):
+        self._file = source
+        self._close_file = close_source
+        self._events = []
+        self._index = 0
+        self._error = None
+        self.root = self._root = None
+        self._parser = parser
+        parser._setevents(self._events, events)
+
+    def next(self):
+        try:
+            while 1:
+                try:
+                    item = self._events[self._index]
+                    self._index += 1
+                    return item
+                except IndexError:
+                    pass
+                if self._error:
+                    e = self._error
+                    self._error = None
+                    raise e
+                if self._parser is None:
+                    self.root = self._root
+                    break
+                # load event buffer
+                del self._events[:]
+                self._index = 0
+                data = self._file.read(16384)
+                if data:
+                    try:
+                        self._parser.feed(data)
+                    except SyntaxError as exc:
+                        self._error = exc
+                else:
+                    self._root = self._parser.close()
+                    self._parser = None
+        except:
+            if self._close_file:
+                self._file.close()
+            raise
+        if self._close_file:
+            self._file.close()
+        raise StopIteration
+
+    def __iter__(self):
+        return self
+
+
+def XML(text, parser=None):
+    if parser is None:
+        parser = XMLParser(target=TreeBuilder())
+    parser.feed(text)
+    return parser.close()
+
+def XMLID(text, parser=None):
+    tree = XML(text, parser)
+    ids = {}
+    for elem in tree.iter():
+        id = elem.get("id")
+        if id:
+            ids[id] = elem
+    return tree, ids
+
+def fromstringlist(sequence, parser=None):
+    if parser is None:
+        parser = XMLParser(target=TreeBuilder())
+    for text in sequence:
+        parser.feed(text)
+    return parser.close()
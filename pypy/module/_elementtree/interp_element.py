@@ -0,0 +1,703 @@
+from rpython.rlib.objectmodel import specialize
+from pypy.interpreter import gateway
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+
+
+app = gateway.applevel(r'''
+def find(elem, path, namespaces):
+    from xml.etree import ElementPath
+    return ElementPath.find(elem, path, namespaces)
+
+def findtext(elem, path, default, namespaces):
+    from xml.etree import ElementPath
+    return ElementPath.findtext(elem, path, default, namespaces)
+
+def findall(elem, path, namespaces):
+    from xml.etree import ElementPath
+    return ElementPath.findall(elem, path, namespaces)
+
+def iterfind(elem, path, namespaces):
+    from xml.etree import ElementPath
+    return ElementPath.iterfind(elem, path, namespaces)
+
+def itertext(elem):
+    tag = elem.tag
+    if not isinstance(tag, basestring) and tag is not None:
+        return
+    if elem.text:
+        yield elem.text
+    for e in elem:
+        for s in e.itertext():
+            yield s
+        if e.tail:
+            yield e.tail
+
+def deepcopy(elem, memo):
+    from copy import deepcopy
+    from _elementtree import Element
+    new = Element(deepcopy(elem.tag, memo), deepcopy(dict(elem.items()), memo))
+    new.text = deepcopy(elem.text, memo)
+    new.tail = deepcopy(elem.tail, memo)
+    new.extend([deepcopy(child, memo) for child in elem])
+    return new
+''', filename=__file__)
+
+path_find = app.interphook('find')
+path_findtext = app.interphook('findtext')
+path_findall = app.interphook('findall')
+path_iterfind = app.interphook('iterfind')
+itertext = app.interphook('itertext')
+deepcopy = app.interphook('deepcopy')
+
+
+@specialize.argtype(0)
+def _is_path(path):
+    in_namespace = False
+    for c in path:
+        ch = ord(c)
+        if ch == ord('{'):
+            in_namespace = True
+        elif ch == ord('}'):
+            in_namespace = False
+        elif not in_namespace and (ch == ord('/') or ch == ord('*') or
+                                   ch == ord('[') or ch == ord('@') or
+                                   ch == ord('.')):
+            return True
+    return False
+
+def is_path(space, w_path):
+    """Return False if 'w_path' is a plain tag, which find() and friends
+    compare with the tags of the children, and True if it may be an
+    ElementPath expression."""
+    if space.isinstance_w(w_path, space.w_unicode):
+        return _is_path(space.unicode_w(w_path))
+    if space.isinstance_w(w_path, space.w_bytes):
+        return _is_path(space.bytes_w(w_path))
+    return True
+
+def attrib_from_dict(space, w_attrib):
+    """Return the attributes of the dict 'w_attrib' as a flat list
+    [key0, value0, key1, value1, ...], or None if there are none."""
+    if not space.isinstance_w(w_attrib, space.w_dict):
+        raise oefmt(space.w_TypeError, "attrib must be dict, not %T",
+                    w_attrib)
+    items_w = space.listview(space.call_method(w_attrib, 'items'))
+    if not items_w:
+        return None
+    attrib_w = []
+    for w_item in items_w:
+        w_key, w_value = space.fixedview(w_item, 2)
+        attrib_w.append(w_key)
+        attrib_w.append(w_value)
+    return attrib_w
+
+def attrib_to_dict(space, attrib_w):
+    w_attrib = space.newdict()
+    if attrib_w is not None:
+        for i in range(0, len(attrib_w), 2):
+            space.setitem(w_attrib, attrib_w[i], attrib_w[i + 1])
+    return w_attrib
+
+def parse_element_args(space, fnname, __args__, argnames):
+    """Parse the arguments of 'fnname(argnames..., attrib={}, **extra)'.
+    Return the values of 'argnames' and the attributes as a flat list."""
+    args_w, kwds_w = __args__.unpack()
+    nargs = len(argnames)
+    if len(args_w) > nargs + 1:
+        raise oefmt(space.w_TypeError,
+                    "%s() takes at most %d arguments (%d given)",
+                    fnname, nargs + 1, len(args_w))
+    values_w = args_w[:nargs]
+    for i in range(len(values_w), nargs):
+        w_value = kwds_w.pop(argnames[i], None)
+        if w_value is None:
+            raise oefmt(space.w_TypeError,
+                        "%s() takes at least %d arguments (%d given)",
+                        fnname, nargs, len(args_w))
+        values_w.append(w_value)
+    if len(args_w) > nargs:
+        w_attrib = args_w[nargs]
+    else:
+        w_attrib = kwds_w.pop('attrib', None)
+    attrib_w = None
+    if w_attrib is not None:
+        attrib_w = attrib_from_dict(space, w_attrib)
+    for key, w_value in kwds_w.items():
+        attrib_w = set_attribute(space, attrib_w, space.newtext(key),
+                                 w_value)
+    return values_w, attrib_w
+
+def find_attribute(space, attrib_w, w_key):
+    if attrib_w is not None:
+        for i in range(0, len(attrib_w), 2):
+            if space.eq_w(attrib_w[i], w_key):
+                return i
+    return -1
+
+def set_attribute(space, attrib_w, w_key, w_value):
+    i = find_attribute(space, attrib_w, w_key)
+    if i >= 0:
+        attrib_w[i + 1] = w_value
+    elif attrib_w is None:
+        attrib_w = [w_key, w_value]
+    else:
+        attrib_w.append(w_key)
+        attrib_w.append(w_value)
+    return attrib_w
+
+
+class W_Element(W_Root):
+    # Most elements have no children and few attributes, so both are
+    # stored as RPython lists that are None when empty.  The attributes
+    # are a flat list [key0, value0, key1, value1, ...] until the
+    # 'attrib' dict is asked for; then 'w_attrib' is that dict, and it
+    # is used instead of 'attrib_w' from then on.
+
+    def __init__(self, w_tag, attrib_w=None):
+        self.w_tag = w_tag
+        self.attrib_w = attrib_w
+        self.w_attrib = None
+        self.children_w = None
+        self.w_text = None
+        self.w_tail = None
+
+    def descr_init(self, space, __args__):
+        values_w, attrib_w = parse_element_args(space, 'Element', __args__,
+                                                ['tag'])
+        self.w_tag = values_w[0]
+        self.attrib_w = attrib_w
+        self.w_attrib = None
+
+    def descr_repr(self, space):
+        tag = space.text_w(space.repr(self.w_tag))
+        return space.newtext("<Element %s at 0x%s>" % (
+            tag, self.getaddrstring(space)))
+
+    def get_tag(self, space):
+        return self.w_tag
+
+    def set_tag(self, space, w_tag):
+        self.w_tag = w_tag
+
+    def get_text(self, space):
+        return self.w_text or space.w_None
+
+    def set_text(self, space, w_text):
+        self.w_text = None if space.is_w(w_text, space.w_None) else w_text
+
+    def get_tail(self, space):
+        return self.w_tail or space.w_None
+
+    def set_tail(self, space, w_tail):
+        self.w_tail = None if space.is_w(w_tail, space.w_None) else w_tail
+
+    # attributes
+
+    def get_attrib(self, space):
+        if self.w_attrib is None:
+            self.w_attrib = attrib_to_dict(space, self.attrib_w)
+            self.attrib_w = None
+        return self.w_attrib
+
+    def set_attrib(self, space, w_attrib):
+        self.w_attrib = w_attrib
+        self.attrib_w = None
+
+    def copy_attrib(self, space):
+        """Return a copy of the attributes as a flat list."""
+        if self.w_attrib is not None:
+            return attrib_from_dict(space, self.w_attrib)
+        if self.attrib_w is None:
+            return None
+        return self.attrib_w[:]
+
+    @unwrap_spec(w_default=WrappedDefault(None))
+    def descr_get(self, space, w_key, w_default):
+        if self.w_attrib is not None:
+            return space.call_method(self.w_attrib, 'get', w_key, w_default)
+        i = find_attribute(space, self.attrib_w, w_key)
+        if i < 0:
+            return w_default
+        return self.attrib_w[i + 1]
+
+    def descr_set(self, space, w_key, w_value):
+        if self.w_attrib is not None:
+            space.setitem(self.w_attrib, w_key, w_value)
+        else:
+            self.attrib_w = set_attribute(space, self.attrib_w, w_key,
+                                          w_value)
+
+    def descr_keys(self, space):
+        if self.w_attrib is not None:
+            return space.call_method(self.w_attrib, 'keys')
+        keys_w = []
+        if self.attrib_w is not None:
+            for i in range(0, len(self.attrib_w), 2):
+                keys_w.append(self.attrib_w[i])
+        return space.newlist(keys_w)
+
+    def descr_items(self, space):
+        if self.w_attrib is not None:
+            return space.call_method(self.w_attrib, 'items')
+        items_w = []
+        if self.attrib_w is not None:
+            for i in range(0, len(self.attrib_w), 2):
+                items_w.append(space.newtuple([self.attrib_w[i],
+                                               self.attrib_w[i + 1]]))
+        return space.newlist(items_w)
+
+    # children
+
+    def length(self):
+        if self.children_w is None:
+            return 0
+        return len(self.children_w)
+
+    def append_child(self, w_child):
+        if self.children_w is None:
+            self.children_w = [w_child]
+        else:
+            self.children_w.append(w_child)
+
+    def _child_index(self, space, w_index):
+        index = space.getindex_w(w_index, space.w_IndexError)
+        length = self.length()
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise oefmt(space.w_IndexError, "child index out of range")
+        return index
+
+    def descr_len(self, space):
+        return space.newint(self.length())
+
+    def descr_getitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            start, stop, step, slicelength = space.decode_index4(
+                w_index, self.length())
+            result_w = [None] * slicelength
+            for i in range(slicelength):
+                result_w[i] = self.children_w[start + i * step]
+            return space.newlist(result_w)
+        return self.children_w[self._child_index(space, w_index)]
+
+    def descr_setitem(self, space, w_index, w_value):
+        if space.isinstance_w(w_index, space.w_slice):
+            items_w = [space.interp_w(W_Element, w_item)
+                       for w_item in space.listview(w_value)]
+            length = self.length()
+            start, stop, step, slicelength = space.decode_index4(
+                w_index, length)
+            children_w = self.children_w
+            if children_w is None:
+                children_w = []
+            if step == 1:
+                stop = max(start, stop)
+                self.children_w = (children_w[:start] + items_w +
+                                   children_w[stop:])
+            elif len(items_w) != slicelength:
+                raise oefmt(space.w_ValueError,
+                            "attempt to assign sequence of size %d to "
+                            "extended slice of size %d",
+                            len(items_w), slicelength)
+            else:
+                for i in range(slicelength):
+                    children_w[start + i * step] = items_w[i]
+            return
+        index = self._child_index(space, w_index)
+        self.children_w[index] = space.interp_w(W_Element, w_value)
+
+    def descr_delitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            length = self.length()
+            start, stop, step, slicelength = space.decode_index4(
+                w_index, length)
+            if slicelength == 0:
+                return
+            if step < 0:
+                start += step * (slicelength - 1)
+                step = -step
+            children_w = self.children_w
+            result_w = []
+            for i in range(length):
+                if (i < start or (i - start) % step != 0 or
+                        (i - start) // step >= slicelength):
+                    result_w.append(children_w[i])
+            self.children_w = result_w
+            return
+        index = self._child_index(space, w_index)
+        del self.children_w[index]
+
+    def descr_iter(self, space):
+        return W_ChildIter(self)
+
+    def descr_append(self, space, w_element):
+        self.append_child(space.interp_w(W_Element, w_element))
+
+    def descr_extend(self, space, w_elements):
+        for w_element in space.listview(w_elements):
+            self.append_child(space.interp_w(W_Element, w_element))
+
+    @unwrap_spec(index=int)
+    def descr_insert(self, space, index, w_element):
+        w_element = space.interp_w(W_Element, w_element)
+        length = self.length()
+        if index < 0:
+            index = max(0, index + length)
+        elif index > length:
+            index = length
+        if self.children_w is None:
+            self.children_w = [w_element]
+        else:
+            self.children_w.insert(index, w_element)
+
+    def descr_remove(self, space, w_element):
+        if self.children_w is not None:
+            for i in range(len(self.children_w)):
+                if space.eq_w(self.children_w[i], w_element):
+                    del self.children_w[i]
+                    return
+        raise oefmt(space.w_ValueError, "list.remove(x): x not in list")
+
+    def descr_getchildren(self, space):
+        if self.children_w is None:
+            return space.newlist([])
+        return space.newlist([w_child for w_child in self.children_w])
+
+    def descr_clear(self, space):
+        self.attrib_w = None
+        self.w_attrib = None
+        self.children_w = None
+        self.w_text = None
+        self.w_tail = None
+
+    # searching
+
+    def find_child(self, space, w_tag):
+        if self.children_w is not None:
+            for w_child in self.children_w:
+                if space.eq_w(w_child.w_tag, w_tag):
+                    return w_child
+        return None
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_find(self, space, w_path, w_namespaces):
+        if not space.is_w(w_namespaces, space.w_None) or is_path(space,
+                                                                 w_path):
+            return path_find(space, self, w_path, w_namespaces)
+        return self.find_child(space, w_path) or space.w_None
+
+    @unwrap_spec(w_default=WrappedDefault(None),
+                 w_namespaces=WrappedDefault(None))
+    def descr_findtext(self, space, w_path, w_default, w_namespaces):
+        if not space.is_w(w_namespaces, space.w_None) or is_path(space,
+                                                                 w_path):
+            return path_findtext(space, self, w_path, w_default,
+                                 w_namespaces)
+        w_child = self.find_child(space, w_path)
+        if w_child is None:
+            return w_default
+        return w_child.w_text or space.newtext('')
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_findall(self, space, w_path, w_namespaces):
+        if not space.is_w(w_namespaces, space.w_None) or is_path(space,
+                                                                 w_path):
+            return path_findall(space, self, w_path, w_namespaces)
+        result_w = []
+        if self.children_w is not None:
+            for w_child in self.children_w:
+                if space.eq_w(w_child.w_tag, w_path):
+                    result_w.append(w_child)
+        return space.newlist(result_w)
+
+    @unwrap_spec(w_namespaces=WrappedDefault(None))
+    def descr_iterfind(self, space, w_path, w_namespaces):
+        return path_iterfind(space, self, w_path, w_namespaces)
+
+    @unwrap_spec(w_tag=WrappedDefault(None))
+    def descr_iter_tree(self, space, w_tag):
+        if space.eq_w(w_tag, space.newtext('*')):
+            w_tag = space.w_None
+        return W_ElementIter(self, w_tag)
+
+    @unwrap_spec(w_tag=WrappedDefault(None))
+    def descr_getiterator(self, space, w_tag):
+        return space.newlist(space.listview(self.descr_iter_tree(space,
+                                                                 w_tag)))
+
+    def descr_itertext(self, space):
+        return itertext(space, self)
+
+    # copying and pickling
+
+    def descr_makeelement(self, space, w_tag, w_attrib):
+        return W_Element(w_tag, attrib_from_dict(space, w_attrib))
+
+    def descr_copy(self, space):
+        w_new = W_Element(self.w_tag, self.copy_attrib(space))
+        if self.children_w is not None:
+            w_new.children_w = self.children_w[:]
+        w_new.w_text = self.w_text
+        w_new.w_tail = self.w_tail
+        return w_new
+
+    def descr_deepcopy(self, space, w_memo):
+        return deepcopy(space, self, w_memo)
+
+    def descr_reduce(self, space):
+        w_args = space.newtuple([self.w_tag, attrib_to_dict(
+            space, self.copy_attrib(space))])
+        w_state = space.newtuple([self.get_text(space), self.get_tail(space),
+                                  self.descr_getchildren(space)])
+        return space.newtuple([space.type(self), w_args, w_state])
+
+    def descr_setstate(self, space, w_state):
+        w_text, w_tail, w_children = space.fixedview(w_state, 3)
+        self.set_text(space, w_text)
+        self.set_tail(space, w_tail)
+        self.children_w = None
+        self.descr_extend(space, w_children)
+
+
+def descr_new_element(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_Element, w_subtype)
+    W_Element.__init__(space.interp_w(W_Element, w_self), space.w_None)
+    return w_self
+
+W_Element.typedef = TypeDef("_elementtree.Element",
+    __new__ = interp2app(descr_new_element),
+    __init__ = interp2app(W_Element.descr_init),
+    __repr__ = interp2app(W_Element.descr_repr),
+    tag = GetSetProperty(W_Element.get_tag, W_Element.set_tag),
+    text = GetSetProperty(W_Element.get_text, W_Element.set_text),
+    tail = GetSetProperty(W_Element.get_tail, W_Element.set_tail),
+    attrib = GetSetProperty(W_Element.get_attrib, W_Element.set_attrib),
+    get = interp2app(W_Element.descr_get),
+    set = interp2app(W_Element.descr_set),
+    keys = interp2app(W_Element.descr_keys),
+    items = interp2app(W_Element.descr_items),
+    __len__ = interp2app(W_Element.descr_len),
+    __getitem__ = interp2app(W_Element.descr_getitem),
+    __setitem__ = interp2app(W_Element.descr_setitem),
+    __delitem__ = interp2app(W_Element.descr_delitem),
+    __iter__ = interp2app(W_Element.descr_iter),
+    append = interp2app(W_Element.descr_append),
+    extend = interp2app(W_Element.descr_extend),
+    insert = interp2app(W_Element.descr_insert),
+    remove = interp2app(W_Element.descr_remove),
+    getchildren = interp2app(W_Element.descr_getchildren),
+    clear = interp2app(W_Element.descr_clear),
+    find = interp2app(W_Element.descr_find),
+    findtext = interp2app(W_Element.descr_findtext),
+    findall = interp2app(W_Element.descr_findall),
+    iterfind = interp2app(W_Element.descr_iterfind),
+    iter = interp2app(W_Element.descr_iter_tree),
+    getiterator = interp2app(W_Element.descr_getiterator),
+    itertext = interp2app(W_Element.descr_itertext),
+    makeelement = interp2app(W_Element.descr_makeelement),
+    copy = interp2app(W_Element.descr_copy),
+    __copy__ = interp2app(W_Element.descr_copy),
+    __deepcopy__ = interp2app(W_Element.descr_deepcopy),
+    __reduce__ = interp2app(W_Element.descr_reduce),
+    __setstate__ = interp2app(W_Element.descr_setstate),
+)
+
+
+def SubElement(space, __args__):
+    """SubElement(parent, tag, attrib={}, **extra) -> Element
+
+Create an element with the given tag and attributes, and append it to
+the parent element."""
+    values_w, attrib_w = parse_element_args(space, 'SubElement', __args__,
+                                            ['parent', 'tag'])
+    w_parent = space.interp_w(W_Element, values_w[0])
+    w_element = W_Element(values_w[1], attrib_w)
+    w_parent.append_child(w_element)
+    return w_element
+
+
+class W_ChildIter(W_Root):
+    def __init__(self, w_element):
+        self.w_element = w_element
+        self.index = 0
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        w_element = self.w_element
+        if w_element is None or self.index >= w_element.length():
+            self.w_element = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        w_child = w_element.children_w[self.index]
+        self.index += 1
+        return w_child
+
+W_ChildIter.typedef = TypeDef("_elementtree.childiterator",
+    __iter__ = interp2app(W_ChildIter.descr_iter),
+    next = interp2app(W_ChildIter.descr_next),
+)
+W_ChildIter.typedef.acceptable_as_base_class = False
+
+
+class W_ElementIter(W_Root):
+    """Iterates over a tree in document order, depth first."""
+
+    def __init__(self, w_root, w_tag):
+        self.w_match = w_tag
+        self.w_pending = w_root
+        self.parents_w = []       # the elements whose children we visit
+        self.indices = []         # the next child index in each of them
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        while True:
+            w_element = self.w_pending
+            if w_element is not None:
+                self.w_pending = None
+                self.parents_w.append(w_element)
+                self.indices.append(0)
+                if (space.is_w(self.w_match, space.w_None) or
+                        space.eq_w(w_element.w_tag, self.w_match)):
+                    return w_element
+                continue
+            if not self.parents_w:
+                raise OperationError(space.w_StopIteration, space.w_None)
+            w_parent = self.parents_w[-1]
+            index = self.indices[-1]
+            if index < w_parent.length():
+                self.indices[-1] = index + 1
+                self.w_pending = w_parent.children_w[index]
+            else:
+                self.parents_w.pop()
+                self.indices.pop()
+
+W_ElementIter.typedef = TypeDef("_elementtree.elementiterator",
+    __iter__ = interp2app(W_ElementIter.descr_iter),
+    next = interp2app(W_ElementIter.descr_next),
+)
+W_ElementIter.typedef.acceptable_as_base_class = False
+
+
+class W_TreeBuilder(W_Root):
+    def __init__(self, w_element_factory):
+        self.w_element_factory = w_element_factory   # None: W_Element
+        self.stack_w = []         # the elements that are not closed yet
+        self.w_last = None
+        self.in_tail = False      # True if the data goes to w_last.tail
+        self.data_w = []
+        # iterparse() support, set by XMLParser._setevents()
+        self.w_events = None
+        self.w_start_event = None
+        self.w_end_event = None
+        self.w_start_ns_event = None
+        self.w_end_ns_event = None
+
+    def report_event(self, space, w_event, w_item):
+        space.call_method(self.w_events, 'append',
+                          space.newtuple([w_event, w_item]))
+
+    def flush(self, space):
+        data_w = self.data_w
+        if not data_w:
+            return
+        self.data_w = []
+        w_last = self.w_last
+        if w_last is None:
+            return
+        if len(data_w) == 1:
+            w_text = data_w[0]
+        else:
+            w_text = space.call_method(space.newtext(''), 'join',
+                                       space.newlist(data_w))
+        if isinstance(w_last, W_Element):
+            if self.in_tail:
+                w_last.w_tail = w_text
+            else:
+                w_last.w_text = w_text
+        elif self.in_tail:
+            space.setattr(w_last, space.newtext('tail'), w_text)
+        else:
+            space.setattr(w_last, space.newtext('text'), w_text)
+
+    def handle_start(self, space, w_tag, attrib_w):
+        self.flush(space)
+        if self.w_element_factory is None:
+            w_element = W_Element(w_tag, attrib_w)
+        else:
+            w_element = space.call_function(self.w_element_factory, w_tag,
+                                            attrib_to_dict(space, attrib_w))
+        if self.stack_w:
+            w_parent = self.stack_w[-1]
+            if (isinstance(w_parent, W_Element) and
+                    isinstance(w_element, W_Element)):
+                w_parent.append_child(w_element)
+            else:
+                space.call_method(w_parent, 'append', w_element)
+        self.stack_w.append(w_element)
+        self.w_last = w_element
+        self.in_tail = False
+        if self.w_start_event is not None:
+            self.report_event(space, self.w_start_event, w_element)
+        return w_element
+
+    def handle_data(self, space, w_data):
+        self.data_w.append(w_data)
+
+    def handle_end(self, space, w_tag):
+        self.flush(space)
+        if not self.stack_w:
+            raise oefmt(space.w_IndexError, "pop from empty list")
+        w_element = self.stack_w.pop()
+        self.w_last = w_element
+        self.in_tail = True
+        if self.w_end_event is not None:
+            self.report_event(space, self.w_end_event, w_element)
+        return w_element
+
+    def handle_close(self, space):
+        if self.stack_w:
+            raise oefmt(space.w_AssertionError, "missing end tags")
+        if self.w_last is None:
+            raise oefmt(space.w_AssertionError, "missing toplevel element")
+        return self.w_last
+
+    def descr_start(self, space, w_tag, w_attrib):
+        return self.handle_start(space, w_tag,
+                                 attrib_from_dict(space, w_attrib))
+
+    def descr_data(self, space, w_data):
+        self.handle_data(space, w_data)
+
+    def descr_end(self, space, w_tag):
+        return self.handle_end(space, w_tag)
+
+    def descr_close(self, space):
+        return self.handle_close(space)
+
+
+@unwrap_spec(w_element_factory=WrappedDefault(None))
+def descr_new_treebuilder(space, w_subtype, w_element_factory):
+    if space.is_w(w_element_factory, space.w_None):
+        w_element_factory = None
+    w_self = space.allocate_instance(W_TreeBuilder, w_subtype)
+    W_TreeBuilder.__init__(space.interp_w(W_TreeBuilder, w_self),
+                           w_element_factory)
+    return w_self
+
+W_TreeBuilder.typedef = TypeDef("_elementtree.TreeBuilder",
+    __doc__ = """TreeBuilder(element_factory=None)
+
+Builds a tree from the start(), data() and end() calls of a parser.""",
+    __new__ = interp2app(descr_new_treebuilder),
+    start = interp2app(W_TreeBuilder.descr_start),
+    data = interp2app(W_TreeBuilder.descr_data),
+    end = interp2app(W_TreeBuilder.descr_end),
+    close = interp2app(W_TreeBuilder.descr_close),
+)
@@ -0,0 +1,487 @@
+from rpython.rlib import jit, rgc
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rweaklist import RWeakListMixin
+from rpython.rtyper.lltypesystem import rffi, lltype
+from pypy.interpreter import gateway, unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.pyexpat import interp_pyexpat as expat
+from pypy.module._elementtree.interp_element import (
+    W_TreeBuilder, attrib_to_dict)
+
+
+app = gateway.applevel(r'''
+def parse_error(msg, code, line, column):
+    from xml.etree.ElementTree import ParseError
+    err = ParseError(msg)
+    err.code = code
+    err.position = line, column
+    return err
+''', filename=__file__)
+
+parse_error = app.interphook('parse_error')
+
+XML_ERROR_UNDEFINED_ENTITY = 11
+
+
+# The callbacks of this parser are not the ones of pyexpat, so they get
+# their own XML_SetXxxHandler() functions.
+
+def _handler_setter(name, args, result=lltype.Void):
+    CALLBACK = lltype.Ptr(lltype.FuncType([rffi.VOIDP] + args, result))
+    return expat.expat_external('XML_Set' + name, [expat.XML_Parser, CALLBACK],
+                                lltype.Void)
+
+XML_SetStartElementHandler = _handler_setter(
+    'StartElementHandler', [rffi.CCHARP, rffi.CCHARPP])
+XML_SetEndElementHandler = _handler_setter(
+    'EndElementHandler', [rffi.CCHARP])
+XML_SetCharacterDataHandler = _handler_setter(
+    'CharacterDataHandler', [rffi.CCHARP, rffi.INT])
+XML_SetCommentHandler = _handler_setter(
+    'CommentHandler', [rffi.CCHARP])
+XML_SetProcessingInstructionHandler = _handler_setter(
+    'ProcessingInstructionHandler', [rffi.CCHARP, rffi.CCHARP])
+XML_SetStartNamespaceDeclHandler = _handler_setter(
+    'StartNamespaceDeclHandler', [rffi.CCHARP, rffi.CCHARP])
+XML_SetEndNamespaceDeclHandler = _handler_setter(
+    'EndNamespaceDeclHandler', [rffi.CCHARP])
+XML_SetDefaultHandlerExpand = _handler_setter(
+    'DefaultHandlerExpand', [rffi.CCHARP, rffi.INT])
+XML_SetStartDoctypeDeclHandler = _handler_setter(
+    'StartDoctypeDeclHandler', [rffi.CCHARP, rffi.CCHARP, rffi.CCHARP,
+                                rffi.INT])
+XML_SetUnknownEncodingHandler = expat.expat_external(
+    'XML_SetUnknownEncodingHandler',
+    [expat.XML_Parser,
+     lltype.Ptr(lltype.FuncType([rffi.VOIDP, rffi.CCHARP,
+                                 expat.XML_Encoding_Ptr], rffi.INT)),
+     rffi.VOIDP], lltype.Void)
+
+
+class ParserHandles(RWeakListMixin):
+    """The expat user data of each parser is its index in this list."""
+
+    def __init__(self):
+        self.initialize()
+
+parser_handles = ParserHandles()
+
+def get_parser(ll_userdata):
+    return parser_handles.fetch_handle(rffi.cast(lltype.Signed, ll_userdata))
+
+
+@jit.jit_callback('XML:ElementTree:StartElementHandler')
+def start_element_callback(ll_userdata, name, atts):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_start(name, atts)
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:EndElementHandler')
+def end_element_callback(ll_userdata, name):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_end(name)
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:CharacterDataHandler')
+def character_data_callback(ll_userdata, s, length):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        parser.handle_data(s, rffi.cast(lltype.Signed, length))
+
+@jit.jit_callback('XML:ElementTree:CommentHandler')
+def comment_callback(ll_userdata, data):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_comment(data)
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:ProcessingInstructionHandler')
+def pi_callback(ll_userdata, target, data):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_pi(target, data)
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:StartNamespaceDeclHandler')
+def start_ns_callback(ll_userdata, prefix, uri):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_start_ns(prefix, uri)
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:EndNamespaceDeclHandler')
+def end_ns_callback(ll_userdata, prefix):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_end_ns()
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:DefaultHandlerExpand')
+def default_callback(ll_userdata, s, length):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_default(s, rffi.cast(lltype.Signed, length))
+        except OperationError as e:
+            parser.stop(e)
+
+@jit.jit_callback('XML:ElementTree:StartDoctypeDeclHandler')
+def doctype_callback(ll_userdata, name, sysid, pubid, has_internal_subset):
+    parser = get_parser(ll_userdata)
+    if parser is not None and parser.operr is None:
+        try:
+            parser.handle_doctype(name, sysid, pubid)
+        except OperationError as e:
+            parser.stop(e)
+
+def unknown_encoding_callback(ll_userdata, name, info):
+    parser = get_parser(ll_userdata)
+    if parser is None:
+        return rffi.cast(rffi.INT, 0)
+    try:
+        expat.fill_encoding_info(parser.space, rffi.charp2str(name), info)
+    except OperationError as e:
+        parser.stop(e)
+        return rffi.cast(rffi.INT, 0)
+    return rffi.cast(rffi.INT, 1)
+
+
+def is_ascii(s):
+    for c in s:
+        if ord(c) >= 0x80:
+            return False
+    return True
+
+
+class W_XMLParser(W_Root):
+    itself = lltype.nullptr(expat.XML_Parser.TO)
+
+    def __init__(self, space, itself, w_target):
+        self.space = space
+        self.itself = itself
+        self.register_finalizer(space)
+        self.w_target = w_target
+        # if the target is exactly a TreeBuilder, the callbacks of expat
+        # build the tree without calling any app-level code
+        if type(w_target) is W_TreeBuilder:
+            self.treebuilder = w_target
+        else:
+            self.treebuilder = None
+        self.names = {}          # expat name -> tag or attribute name
+        self.w_entity = space.newdict()
+        self.data = None         # StringBuilder of pending character data
+        self.operr = None        # exception raised by a callback
+        self.w_start = self.target_method('start')
+        self.w_end = self.target_method('end')
+        self.w_data = self.target_method('data')
+        self.w_comment = self.target_method('comment')
+        self.w_pi = self.target_method('pi')
+        self.w_close = self.target_method('close')
+        self.w_doctype = self.target_method('doctype')
+
+        index = parser_handles.add_handle(self)
+        expat.XML_SetUserData(itself, rffi.cast(rffi.VOIDP, index))
+        XML_SetUnknownEncodingHandler(itself, unknown_encoding_callback,
+                                      rffi.cast(rffi.VOIDP, index))
+        XML_SetStartElementHandler(itself, start_element_callback)
+        XML_SetEndElementHandler(itself, end_element_callback)
+        XML_SetCharacterDataHandler(itself, character_data_callback)
+        XML_SetDefaultHandlerExpand(itself, default_callback)
+        if self.w_comment is not None:
+            XML_SetCommentHandler(itself, comment_callback)
+        if self.w_pi is not None:
+            XML_SetProcessingInstructionHandler(itself, pi_callback)
+        if self.w_doctype is not None:
+            XML_SetStartDoctypeDeclHandler(itself, doctype_callback)
+
+    def _finalize_(self):
+        if expat.XML_ParserFree: # careful with CPython interpreter shutdown
+            if self.itself:
+                expat.XML_ParserFree(self.itself)
+                self.itself = lltype.nullptr(expat.XML_Parser.TO)
+
+    def target_method(self, name):
+        if self.treebuilder is not None:
+            return None
+        space = self.space
+        return space.findattr(self.w_target, space.newtext(name))
+
+    def stop(self, operr):
+        self.operr = operr
+        expat.XML_StopParser(self.itself, expat.XML_FALSE)
+
+    # conversions: like xml.etree, give str objects for ASCII text and
+    # unicode objects otherwise
+
+    def fixtext(self, s):
+        space = self.space
+        if is_ascii(s):
+            return space.newtext(s)
+        return space.newunicode(unicodehelper.decode_utf8(space, s))
+
+    def fixtext_charp(self, data):
+        if not data:
+            return self.space.newtext('')
+        return self.fixtext(rffi.charp2str(data))
+
+    def fixname(self, ll_name):
+        key = rffi.charp2str(ll_name)
+        w_name = self.names.get(key, None)
+        if w_name is None:
+            if '}' in key:
+                # "uri}name" -> "{uri}name"
+                w_name = self.fixtext('{' + key)
+            else:
+                w_name = self.fixtext(key)
+            self.names[key] = w_name
+        return w_name
+
+    # callbacks
+
+    def flush_data(self):
+        if self.data is None:
+            return
+        w_text = self.fixtext(self.data.build())
+        self.data = None
+        if self.treebuilder is not None:
+            self.treebuilder.handle_data(self.space, w_text)
+        elif self.w_data is not None:
+            self.space.call_function(self.w_data, w_text)
+
+    def handle_start(self, ll_name, atts):
+        space = self.space
+        self.flush_data()
+        w_tag = self.fixname(ll_name)
+        attrib_w = None
+        if atts[0]:
+            attrib_w = []
+            i = 0
+            while atts[i]:
+                attrib_w.append(self.fixname(atts[i]))
+                attrib_w.append(self.fixtext_charp(atts[i + 1]))
+                i += 2
+        if self.treebuilder is not None:
+            self.treebuilder.handle_start(space, w_tag, attrib_w)
+        elif self.w_start is not None:
+            space.call_function(self.w_start, w_tag,
+                                attrib_to_dict(space, attrib_w))
+
+    def handle_end(self, ll_name):
+        space = self.space
+        self.flush_data()
+        w_tag = self.fixname(ll_name)
+        if self.treebuilder is not None:
+            self.treebuilder.handle_end(space, w_tag)
+        elif self.w_end is not None:
+            space.call_function(self.w_end, w_tag)
+
+    def handle_data(self, s, length):
+        if self.data is None:
+            self.data = StringBuilder()
+        self.data.append_charpsize(s, length)
+
+    def handle_comment(self, data):
+        self.flush_data()
+        self.space.call_function(self.w_comment, self.fixtext_charp(data))
+
+    def handle_pi(self, target, data):
+        self.flush_data()
+        self.space.call_function(self.w_pi, self.fixtext_charp(target),
+                                 self.fixtext_charp(data))
+
+    def handle_start_ns(self, prefix, uri):
+        treebuilder = self.treebuilder
+        if (treebuilder is not None and
+                treebuilder.w_start_ns_event is not None):
+            space = self.space
+            w_item = space.newtuple([self.fixtext_charp(prefix),
+                                     self.fixtext_charp(uri)])
+            treebuilder.report_event(space, treebuilder.w_start_ns_event,
+                                     w_item)
+
+    def handle_end_ns(self):
+        treebuilder = self.treebuilder
+        if (treebuilder is not None and
+                treebuilder.w_end_ns_event is not None):
+            treebuilder.report_event(self.space, treebuilder.w_end_ns_event,
+                                     self.space.w_None)
+
+    def handle_default(self, s, length):
+        # called by expat for the references to undefined entities,
+        # which can be given in the 'entity' dict
+        if length < 3 or s[0] != '&':
+            return
+        space = self.space
+        text = rffi.charpsize2str(s, length)
+        end = length - 1
+        assert end >= 1
+        w_value = space.finditem(self.w_entity, self.fixtext(text[1:end]))
+        if w_value is None:
+            line = expat.XML_GetErrorLineNumber(self.itself)
+            column = expat.XML_GetErrorColumnNumber(self.itself)
+            raise self.parse_error(
+                "undefined entity %s: line %d, column %d" % (
+                    text, line, column),
+                XML_ERROR_UNDEFINED_ENTITY, line, column)
+        self.flush_data()
+        if self.treebuilder is not None:
+            self.treebuilder.handle_data(space, w_value)
+        elif self.w_data is not None:
+            space.call_function(self.w_data, w_value)
+
+    def handle_doctype(self, name, sysid, pubid):
+        space = self.space
+        self.flush_data()
+        w_pubid = self.fixtext_charp(pubid) if pubid else space.w_None
+        w_sysid = self.fixtext_charp(sysid) if sysid else space.w_None
+        space.call_function(self.w_doctype, self.fixtext_charp(name),
+                            w_pubid, w_sysid)
+
+    # parsing
+
+    def parse_error(self, msg, code, line, column):
+        space = self.space
+        w_error = parse_error(space, space.newtext(msg), space.newint(code),
+                              space.newint(line), space.newint(column))
+        return OperationError(space.type(w_error), w_error)
+
+    def parse(self, data, isfinal):
+        res = expat.XML_Parse(self.itself, data, len(data), isfinal)
+        if self.operr is not None:
+            operr = self.operr
+            self.operr = None
+            raise operr
+        if res == 0:
+            code = rffi.cast(lltype.Signed,
+                             expat.XML_GetErrorCode(self.itself))
+            line = expat.XML_GetErrorLineNumber(self.itself)
+            column = expat.XML_GetErrorColumnNumber(self.itself)
+            err = rffi.charp2strn(expat.XML_ErrorString(code), 200)
+            raise self.parse_error(
+                "%s: line %d, column %d" % (err, line, column),
+                code, line, column)
+
+    def finish(self):
+        space = self.space
+        self.parse("", True)
+        self.flush_data()
+        if self.treebuilder is not None:
+            return self.treebuilder.handle_close(space)
+        if self.w_close is not None:
+            return space.call_function(self.w_close)
+        return space.w_None
+
+    @unwrap_spec(data='text')
+    def descr_feed(self, space, data):
+        """Feed encoded data to the parser."""
+        self.parse(data, False)
+
+    def descr_close(self, space):
+        """Finish feeding data to the parser, and return the result of
+        target.close(): with a TreeBuilder, the root element."""
+        return self.finish()
+
+    def descr_parse_file(self, space, w_file):
+        w_read = space.getattr(w_file, space.newtext('read'))
+        while True:
+            w_data = space.call_function(w_read, space.newint(64 * 1024))
+            if space.isinstance_w(w_data, space.w_unicode):
+                w_data = space.call_method(w_data, 'encode',
+                                           space.newtext('utf-8'))
+            data = space.bytes_w(w_data)
+            if not data:
+                break
+            self.parse(data, False)
+        return self.finish()
+
+    @unwrap_spec(w_event_list=WrappedDefault(None))
+    def descr_setevents(self, space, w_events, w_event_list):
+        treebuilder = self.treebuilder
+        if treebuilder is None:
+            raise oefmt(space.w_TypeError,
+                        "event handling only supported for "
+                        "_elementtree.TreeBuilder targets")
+        treebuilder.w_events = w_events
+        treebuilder.w_start_event = None
+        treebuilder.w_end_event = None
+        treebuilder.w_start_ns_event = None
+        treebuilder.w_end_ns_event = None
+        if space.is_w(w_event_list, space.w_None):
+            treebuilder.w_end_event = space.newtext('end')
+            return
+        for w_event in space.unpackiterable(w_event_list):
+            event = space.text_w(w_event)
+            if event == 'start':
+                treebuilder.w_start_event = w_event
+            elif event == 'end':
+                treebuilder.w_end_event = w_event
+            elif event == 'start-ns':
+                treebuilder.w_start_ns_event = w_event
+                XML_SetStartNamespaceDeclHandler(self.itself,
+                                                 start_ns_callback)
+            elif event == 'end-ns':
+                treebuilder.w_end_ns_event = w_event
+                XML_SetEndNamespaceDeclHandler(self.itself, end_ns_callback)
+            else:
+                raise oefmt(space.w_ValueError, "unknown event '%s'", event)
+
+    def get_target(self, space):
+        return self.w_target
+
+    def get_entity(self, space):
+        return self.w_entity
+
+    def get_version(self, space):
+        return space.newtext("Expat %d.%d.%d" % (expat.XML_MAJOR_VERSION,
+                                                 expat.XML_MINOR_VERSION,
+                                                 expat.XML_MICRO_VERSION))
+
+
+@unwrap_spec(w_html=WrappedDefault(0), w_target=WrappedDefault(None),
+             w_encoding=WrappedDefault(None))
+def descr_new_xmlparser(space, w_subtype, w_html, w_target, w_encoding):
+    if space.is_w(w_encoding, space.w_None):
+        encoding = None
+    else:
+        encoding = space.text_w(w_encoding)
+    if space.is_w(w_target, space.w_None):
+        w_target = W_TreeBuilder(None)
+    itself = expat.XML_ParserCreateNS(encoding, '}')
+    rgc.add_memory_pressure(expat.XML_Parser_SIZE + 300)
+    if not itself:
+        raise oefmt(space.w_RuntimeError, "XML_ParserCreate failed")
+    w_self = space.allocate_instance(W_XMLParser, w_subtype)
+    W_XMLParser.__init__(space.interp_w(W_XMLParser, w_self), space, itself,
+                         w_target)
+    return w_self
+
+W_XMLParser.typedef = TypeDef("_elementtree.XMLParser",
+    __doc__ = """XMLParser(html=0, target=None, encoding=None)
+
+An XML parser based on expat.  The default target is a TreeBuilder.""",
+    __new__ = interp2app(descr_new_xmlparser),
+    feed = interp2app(W_XMLParser.descr_feed),
+    close = interp2app(W_XMLParser.descr_close),
+    _parse = interp2app(W_XMLParser.descr_parse_file),
+    _setevents = interp2app(W_XMLParser.descr_setevents),
+    target = GetSetProperty(W_XMLParser.get_target),
+    entity = GetSetProperty(W_XMLParser.get_entity),
+    version = GetSetProperty(W_XMLParser.get_version),
+)
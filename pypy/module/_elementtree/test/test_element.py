@@ -0,0 +1,267 @@
+class AppTestElement:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat', 'struct',
+                                   'binascii'])
+
+    def test_attributes(self):
+        from _elementtree import Element
+        e = Element('a', {'x': '1'}, y='2')
+        assert e.tag == 'a'
+        assert e.text is None and e.tail is None
+        assert e.get('x') == '1'
+        assert e.get('y') == '2'
+        assert e.get('z') is None
+        assert e.get('z', 5) == 5
+        assert sorted(e.keys()) == ['x', 'y']
+        assert sorted(e.items()) == [('x', '1'), ('y', '2')]
+        e.set('x', '3')
+        e.set('z', '4')
+        assert sorted(e.items()) == [('x', '3'), ('y', '2'), ('z', '4')]
+        assert e.attrib == {'x': '3', 'y': '2', 'z': '4'}
+        # from now on, the attrib dict is used
+        e.attrib['w'] = '5'
+        assert e.get('w') == '5'
+        e.set('v', '6')
+        assert e.attrib['v'] == '6'
+        e.attrib = {'u': '7'}
+        assert e.items() == [('u', '7')]
+        e.text = 'hello'
+        e.tail = 'world'
+        e.tag = 'b'
+        assert (e.tag, e.text, e.tail) == ('b', 'hello', 'world')
+        e.text = None
+        assert e.text is None
+        assert Element('a', attrib={'k': 'v'}).items() == [('k', 'v')]
+        assert Element(tag='a').tag == 'a'
+        raises(TypeError, Element)
+        raises(TypeError, Element, 'a', 'not a dict')
+        raises(TypeError, Element, 'a', {}, {})
+
+    def test_attrib_dict_is_copied(self):
+        from _elementtree import Element
+        d = {'x': '1'}
+        e = Element('a', d)
+        d['x'] = '2'
+        assert e.get('x') == '1'
+
+    def test_children(self):
+        from _elementtree import Element, SubElement
+        root = Element('root')
+        assert len(root) == 0
+        a = SubElement(root, 'a', {'x': '1'}, y='2')
+        assert a.items() == [('x', '1'), ('y', '2')] or \
+               a.items() == [('y', '2'), ('x', '1')]
+        b = Element('b')
+        c = Element('c')
+        root.append(b)
+        root.extend([c])
+        assert len(root) == 3
+        assert list(root) == [a, b, c]
+        assert root[0] is a and root[-1] is c
+        assert root[1:] == [b, c]
+        assert root[::-1] == [c, b, a]
+        assert root.getchildren() == [a, b, c]
+        raises(IndexError, "root[3]")
+        raises(TypeError, root.append, 'x')
+        d = Element('d')
+        root.insert(1, d)
+        assert list(root) == [a, d, b, c]
+        root.insert(-100, d)
+        root.insert(100, d)
+        assert list(root) == [d, a, d, b, c, d]
+        root.remove(d)
+        assert list(root) == [a, d, b, c, d]
+        raises(ValueError, root.remove, Element('x'))
+        root[0] = c
+        assert list(root) == [c, d, b, c, d]
+        root[1:3] = [a]
+        assert list(root) == [c, a, c, d]
+        root[::2] = [b, b]
+        assert list(root) == [b, a, b, d]
+        raises(ValueError, "root[::2] = [a]")
+        del root[0]
+        assert list(root) == [a, b, d]
+        del root[::2]
+        assert list(root) == [b]
+        del root[:]
+        assert len(root) == 0
+
+    def test_clear(self):
+        from _elementtree import Element, SubElement
+        e = Element('a', x='1')
+        e.text = 'text'
+        e.tail = 'tail'
+        SubElement(e, 'b')
+        e.clear()
+        assert len(e) == 0
+        assert e.items() == []
+        assert e.text is None and e.tail is None
+        assert e.tag == 'a'
+
+    def test_find(self):
+        from _elementtree import Element, SubElement
+        root = Element('root')
+        a = SubElement(root, 'a')
+        a.text = 'text of a'
+        b = SubElement(root, 'b')
+        a2 = SubElement(b, 'a')
+        assert root.find('a') is a
+        assert root.find('c') is None
+        assert root.find('b/a') is a2
+        assert root.find('.//a') is a
+        assert root.findtext('a') == 'text of a'
+        assert root.findtext('b') == ''
+        assert root.findtext('c') is None
+        assert root.findtext('c', 'default') == 'default'
+        assert root.findall('a') == [a]
+        assert root.findall('.//a') == [a, a2]
+        assert list(root.iterfind('*/a')) == [a2]
+        ns = SubElement(root, '{http://x}c')
+        assert root.find('{http://x}c') is ns
+        assert root.find('x:c', {'x': 'http://x'}) is ns
+        assert root.find(u'b') is b
+
+    def test_iter(self):
+        from _elementtree import Element, SubElement
+        root = Element('root')
+        a = SubElement(root, 'a')
+        b = SubElement(a, 'b')
+        a2 = SubElement(root, 'a')
+        assert list(root.iter()) == [root, a, b, a2]
+        assert list(root.iter('*')) == [root, a, b, a2]
+        assert list(root.iter('a')) == [a, a2]
+        assert list(root.iter('x')) == []
+        assert root.getiterator('a') == [a, a2]
+        # adding elements during the iteration
+        result = []
+        for e in root.iter():
+            result.append(e.tag)
+            if e is b:
+                SubElement(root, 'c')
+        assert result == ['root', 'a', 'b', 'a', 'c']
+
+    def test_itertext(self):
+        from _elementtree import Element, SubElement
+        root = Element('root')
+        root.text = 'A'
+        a = SubElement(root, 'a')
+        a.text = 'B'
+        a.tail = 'C'
+        b = SubElement(a, 'b')
+        b.tail = 'D'
+        assert ''.join(root.itertext()) == 'ABDC'
+
+    def test_copy(self):
+        import copy
+        from _elementtree import Element, SubElement
+        root = Element('root', x='1')
+        root.text = 'text'
+        a = SubElement(root, 'a')
+        c = copy.copy(root)
+        assert c is not root
+        assert c.tag == 'root' and c.items() == [('x', '1')]
+        assert c.text == 'text'
+        assert c[0] is a
+        c.set('x', '2')
+        assert root.get('x') == '1'
+        d = copy.deepcopy(root)
+        assert d.tag == 'root' and d.items() == [('x', '1')]
+        assert d[0] is not a and d[0].tag == 'a'
+        e = root.makeelement('e', {'y': '2'})
+        assert e.tag == 'e' and e.items() == [('y', '2')]
+        assert len(root) == 1
+
+    def test_pickle(self):
+        import pickle
+        from _elementtree import Element, SubElement
+        root = Element('root', x='1')
+        root.text = 'text'
+        SubElement(root, 'a').tail = 'tail'
+        for proto in range(3):
+            e = pickle.loads(pickle.dumps(root, proto))
+            assert e.tag == 'root' and e.items() == [('x', '1')]
+            assert e.text == 'text'
+            assert len(e) == 1 and e[0].tag == 'a' and e[0].tail == 'tail'
+
+    def test_subclass(self):
+        from _elementtree import Element
+        class MyElement(Element):
+            def __init__(self, tag, attrib={}, **extra):
+                Element.__init__(self, tag.upper(), attrib, **extra)
+        e = MyElement('a', x='1')
+        assert e.tag == 'A' and e.get('x') == '1'
+        e.foo = 42
+        assert e.foo == 42
+
+    def test_repr(self):
+        from _elementtree import Element
+        assert repr(Element('a')).startswith("<Element 'a' at 0x")
+
+    def test_serialize(self):
+        from _elementtree import Element, SubElement, Comment, PI, tostring
+        root = Element('root', x='1')
+        SubElement(root, 'a').text = 'A & B'
+        root.append(Comment('comment'))
+        root.append(PI('target', 'data'))
+        assert tostring(root) == ('<root x="1"><a>A &amp; B</a>'
+                                  '<!--comment--><?target data?></root>')
+
+
+class AppTestTreeBuilder:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat'])
+
+    def test_build(self):
+        from _elementtree import TreeBuilder, Element
+        b = TreeBuilder()
+        root = b.start('root', {'x': '1'})
+        assert isinstance(root, Element)
+        b.data('a')
+        b.data('b')
+        child = b.start('child', {})
+        b.data('c')
+        assert b.end('child') is child
+        b.data('d')
+        assert b.end('root') is root
+        assert b.close() is root
+        assert root.text == 'ab'
+        assert child.text == 'c'
+        assert child.tail == 'd'
+        assert root.items() == [('x', '1')]
+        assert list(root) == [child]
+
+    def test_errors(self):
+        from _elementtree import TreeBuilder
+        b = TreeBuilder()
+        for expected in ['missing toplevel element', 'missing end tags']:
+            # the AssertionError of the test framework is not the builtin one
+            try:
+                b.close()
+            except Exception as e:
+                assert type(e).__name__ == 'AssertionError'
+                assert str(e) == expected
+            else:
+                assert False, "expected AssertionError"
+            b.start('root', {})
+
+    def test_element_factory(self):
+        from _elementtree import TreeBuilder
+        class MyElement(object):
+            def __init__(self, tag, attrib):
+                self.tag = tag
+                self.attrib = attrib
+                self.children = []
+                self.text = self.tail = None
+            def append(self, child):
+                self.children.append(child)
+        b = TreeBuilder(MyElement)
+        root = b.start('root', {'x': '1'})
+        b.data('text')
+        b.start('child', {})
+        b.end('child')
+        b.data('tail')
+        b.end('root')
+        assert b.close() is root
+        assert isinstance(root, MyElement)
+        assert root.attrib == {'x': '1'}
+        assert root.text == 'text'
+        assert [c.tag for c in root.children] == ['child']
+        assert root.children[0].tail == 'tail'
@@ -0,0 +1,231 @@
+class AppTestXMLParser:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat', 'cStringIO'])
+
+    def test_fromstring(self):
+        import _elementtree as ET
+        root = ET.fromstring(
+            '<root x="1" y="2">text<a>A</a>tail<b/><!-- c --><?pi x?></root>')
+        assert isinstance(root, ET.Element)
+        assert root.tag == 'root'
+        assert sorted(root.items()) == [('x', '1'), ('y', '2')]
+        assert root.text == 'text'
+        assert [e.tag for e in root] == ['a', 'b']
+        assert root[0].text == 'A'
+        assert root[0].tail == 'tail'
+        assert root[1].text is None and root[1].tail is None
+        assert type(root.tag) is str
+
+    def test_unicode(self):
+        import _elementtree as ET
+        root = ET.XML('<r a="\xc3\xa9">\xe2\x82\xac</r>')
+        assert root.get('a') == u'\xe9'
+        assert root.text == u'\u20ac'
+        root = ET.XML('<?xml version="1.0" encoding="iso-8859-1"?>'
+                      '<r>\xe9</r>')
+        assert root.text == u'\xe9'
+        assert type(root.tag) is str
+
+    def test_namespaces(self):
+        import _elementtree as ET
+        root = ET.XML('<r xmlns="http://a" xmlns:b="http://b">'
+                      '<b:x b:y="1"/></r>')
+        assert root.tag == '{http://a}r'
+        assert root[0].tag == '{http://b}x'
+        assert root[0].items() == [('{http://b}y', '1')]
+
+    def test_long_text(self):
+        import _elementtree as ET
+        text = 'x' * 100000 + '\n' + 'y' * 100000
+        root = ET.XML('<r>%s</r>' % text)
+        assert root.text == text
+
+    def test_feed(self):
+        import _elementtree as ET
+        parser = ET.XMLParser()
+        for c in '<root><a>text</a></root>':
+            parser.feed(c)
+        root = parser.close()
+        assert root.tag == 'root' and root[0].text == 'text'
+        assert parser.version.startswith('Expat ')
+
+    def test_parse_error(self):
+        import _elementtree as ET
+        from xml.etree.ElementTree import ParseError
+        assert ET.ParseError is ParseError
+        e = raises(ET.ParseError, ET.XML, '<a><b></a>')
+        assert e.value.code == 7     # XML_ERROR_TAG_MISMATCH
+        assert e.value.position == (1, 8)
+        raises(ET.ParseError, ET.XML, '')
+        raises(ET.ParseError, ET.XML, '<a>&unknown;</a>')
+
+    def test_entity(self):
+        import _elementtree as ET
+        xml = ('<!DOCTYPE r SYSTEM "r.dtd">'
+               '<r>a&entity;b</r>')
+        parser = ET.XMLParser()
+        parser.entity['entity'] = 'ENTITY'
+        parser.feed(xml)
+        assert parser.close().text == 'aENTITYb'
+        parser = ET.XMLParser()
+        exc = raises(ET.ParseError, parser.feed, xml)
+        assert exc.value.code == 11
+        assert 'undefined entity &entity;' in str(exc.value)
+
+    def test_custom_target(self):
+        import _elementtree as ET
+        class Target(object):
+            def __init__(self):
+                self.events = []
+            def start(self, tag, attrib):
+                self.events.append(('start', tag, attrib))
+            def end(self, tag):
+                self.events.append(('end', tag))
+            def data(self, data):
+                self.events.append(('data', data))
+            def comment(self, text):
+                self.events.append(('comment', text))
+            def pi(self, target, data):
+                self.events.append(('pi', target, data))
+            def doctype(self, name, pubid, system):
+                self.events.append(('doctype', name, pubid, system))
+            def close(self):
+                return 'closed'
+        target = Target()
+        parser = ET.XMLParser(target=target)
+        assert parser.target is target
+        parser.feed('<!DOCTYPE r PUBLIC "pub" "sys">'
+                    '<r x="1">a<!--c--><?p d?>b<s/></r>')
+        assert parser.close() == 'closed'
+        assert target.events == [
+            ('doctype', 'r', 'pub', 'sys'),
+            ('start', 'r', {'x': '1'}),
+            ('data', 'a'),
+            ('comment', 'c'),
+            ('pi', 'p', 'd'),
+            ('data', 'b'),
+            ('start', 's', {}),
+            ('end', 's'),
+            ('end', 'r')]
+
+    def test_target_without_methods(self):
+        import _elementtree as ET
+        class Target(object):
+            def end(self, tag):
+                self.last = tag
+        target = Target()
+        parser = ET.XMLParser(target=target)
+        parser.feed('<r>text<!--c--></r>')
+        assert parser.close() is None
+        assert target.last == 'r'
+
+    def test_exception_in_target(self):
+        import _elementtree as ET
+        class Target(object):
+            def start(self, tag, attrib):
+                raise ZeroDivisionError
+        parser = ET.XMLParser(target=Target())
+        raises(ZeroDivisionError, parser.feed, '<r><a/></r>')
+
+    def test_treebuilder_subclass(self):
+        import _elementtree as ET
+        class Builder(ET.TreeBuilder):
+            def start(self, tag, attrib):
+                return ET.TreeBuilder.start(self, tag.upper(), attrib)
+        parser = ET.XMLParser(target=Builder())
+        parser.feed('<r><a/></r>')
+        root = parser.close()
+        assert root.tag == 'R' and root[0].tag == 'A'
+
+    def test_element_tree(self):
+        import _elementtree as ET, cStringIO
+        f = cStringIO.StringIO('<r><a>1</a><a>2</a></r>')
+        tree = ET.parse(f)
+        assert isinstance(tree, ET.ElementTree)
+        assert tree.getroot().tag == 'r'
+        assert [e.text for e in tree.iter('a')] == ['1', '2']
+        assert tree.findtext('a') == '1'
+        out = cStringIO.StringIO()
+        tree.write(out)
+        assert out.getvalue() == '<r><a>1</a><a>2</a></r>'
+
+    def test_xmlid(self):
+        import _elementtree as ET
+        root, ids = ET.XMLID('<r><a id="x"/><b id="y"/><c/></r>')
+        assert sorted(ids) == ['x', 'y']
+        assert ids['x'] is root[0]
+        root = ET.fromstringlist(['<r>', 'text', '</r>'])
+        assert root.text == 'text'
+
+    def test_cElementTree(self):
+        from xml.etree import cElementTree
+        import _elementtree
+        assert cElementTree.Element is _elementtree.Element
+        assert cElementTree.XML('<r/>').tag == 'r'
+
+
+class AppTestIterparse:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat', 'cStringIO'])
+
+    def test_iterparse(self):
+        import _elementtree as ET, cStringIO
+        f = cStringIO.StringIO('<r><a>1</a><b><c/></b></r>')
+        it = ET.iterparse(f)
+        events = [(event, elem.tag) for event, elem in it]
+        assert events == [('end', 'a'), ('end', 'c'), ('end', 'b'),
+                          ('end', 'r')]
+        assert it.root.tag == 'r'
+        assert len(it.root) == 2
+
+    def test_events(self):
+        import _elementtree as ET, cStringIO
+        f = cStringIO.StringIO('<r xmlns:x="http://x"><x:a/></r>')
+        events = [(event, getattr(item, 'tag', item)) for event, item in
+                  ET.iterparse(f, ('start', 'end', 'start-ns', 'end-ns'))]
+        assert events == [('start-ns', ('x', 'http://x')),
+                          ('start', 'r'),
+                          ('start', '{http://x}a'),
+                          ('end', '{http://x}a'),
+                          ('end', 'r'),
+                          ('end-ns', None)]
+        raises(ValueError, ET.iterparse, f, ['bogus'])
+
+    def test_clear_processed_subtrees(self):
+        import _elementtree as ET, cStringIO
+        n = 5000
+        xml = '<feed>%s</feed>' % ''.join(
+            ['<item id="%d"><v>%d</v></item>' % (i, i) for i in range(n)])
+        total = 0
+        it = ET.iterparse(cStringIO.StringIO(xml), ('start', 'end'))
+        for event, elem in it:
+            if event == 'start' and elem.tag == 'feed':
+                root = elem
+            elif event == 'end' and elem.tag == 'item':
+                total += int(elem.findtext('v'))
+                elem.clear()
+                root.clear()
+            # the event list is emptied before each new chunk
+            assert len(it._events) < 3000
+        assert total == n * (n - 1) // 2
+        assert it.root is root and len(root) == 0
+
+    def test_iterparse_file_name(self):
+        import _elementtree as ET
+        fn = self.tmpfile
+        with open(fn, 'w') as f:
+            f.write('<r><a/></r>')
+        assert [elem.tag for event, elem in ET.iterparse(fn)] == ['a', 'r']
+
+    def test_error(self):
+        import _elementtree as ET, cStringIO
+        it = ET.iterparse(cStringIO.StringIO('<r><a/></b>'))
+        assert next(it)[1].tag == 'a'
+        raises(ET.ParseError, next, it)
+
+    def test_setevents_needs_treebuilder(self):
+        import _elementtree as ET
+        parser = ET.XMLParser(target=object())
+        raises(TypeError, parser._setevents, [], None)
+
+    def setup_class(cls):
+        from rpython.tool.udir import udir
+        cls.w_tmpfile = cls.space.wrap(str(udir.join('elementtree.xml')))
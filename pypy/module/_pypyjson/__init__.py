@@ -3,10 +3,16 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     """fast json implementation"""
 
-    appleveldefs = {}
+    appleveldefs = {
+        'iterload' : 'app_stream.iterload',
+        }
 
     interpleveldefs = {
         'loads' : 'interp_decoder.loads',
+        'StreamDecoder' : 'interp_stream.W_StreamDecoder',
+        'key_cache_stats' : 'interp_decoder.key_cache_stats',
+        'clear_key_cache' : 'interp_decoder.clear_key_cache',
+        'encode' : 'interp_encoder.encode',
         'raw_encode_basestring_ascii':
             'interp_encoder.raw_encode_basestring_ascii',
         }
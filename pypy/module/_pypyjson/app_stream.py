@@ -0,0 +1,14 @@
+def iterload(f, chunksize=65536):
+    """Iterate over the whitespace-separated JSON values (for example
+    newline-delimited records) read from the file object f, without
+    reading the whole file in memory."""
+    from _pypyjson import StreamDecoder
+    decoder = StreamDecoder()
+    while True:
+        chunk = f.read(chunksize)
+        if not chunk:
+            break
+        for value in decoder.feed(chunk):
+            yield value
+    for value in decoder.close():
+        yield value
@@ -42,17 +42,79 @@ def strslice2unicode_latin1(s, start, end):
         ll_res.chars[i] = cast_primitive(UniChar, ch)
     return hlunicode(ll_res)
 
+
+class KeyMap(object):
+    """ A node in the trie of key sequences seen so far.  The path from the
+    root to a node spells out the keys of an object in the order in which
+    they appeared in the input.  Every node owns the interned app-level
+    unicode object for its key, so that decoding a previously seen layout
+    neither allocates nor hashes the key strings again.
+    """
+    def __init__(self, key, w_key):
+        self.key = key          # the raw utf-8 bytes, as found in the input
+        self.w_key = w_key
+        self.children = {}
+        # the child we followed most recently: for lists of records which
+        # all share the same layout, checking it first is enough to avoid
+        # even slicing the key out of the input
+        self.last_child = None
+
+
+class KeyCache(object):
+    """ Per-space cache of the key sequences of decoded JSON objects.
+
+    The cache is bounded to MAX_NODES keys.  When it is full and the lookups
+    miss more often than they hit, the input is not repetitive enough to
+    benefit from it, and the cache disables itself.
+    """
+    MAX_NODES = 4096
+
+    def __init__(self, space):
+        self.root = KeyMap('', None)
+        self.num_nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+
+    def add_child(self, node, key, w_key):
+        if self.num_nodes >= self.MAX_NODES:
+            if self.misses > self.hits:
+                self.enabled = False
+            return None
+        child = KeyMap(key, w_key)
+        node.children[key] = child
+        self.num_nodes += 1
+        return child
+
+    def clear(self):
+        self.root = KeyMap('', None)
+        self.num_nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+
+
 TYPE_UNKNOWN = 0
 TYPE_STRING = 1
 class JSONDecoder(object):
-    def __init__(self, space, s):
+    def __init__(self, space, s, keycache=None, start=0, end=-1):
         self.space = space
         self.s = s
+        self.keycache = keycache
+        # we decode s[start:end]; all the positions are relative to start
+        if end < 0:
+            end = len(s)
+        assert 0 <= start <= end
+        self.offset = start
+        self.length = end - start
         # we put our string in a raw buffer so:
         # 1) we automatically get the '\0' sentinel at the end of the string,
         #    which means that we never have to check for the "end of string"
         # 2) we can pass the buffer directly to strtod
-        self.ll_chars = rffi.str2charp(s)
+        self.ll_chars = lltype.malloc(rffi.CCHARP.TO, self.length + 1,
+                                      flavor='raw')
+        rffi.str2rawmem(s, self.ll_chars, start, self.length)
+        self.ll_chars[self.length] = '\0'
         self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
         self.pos = 0
         self.last_type = TYPE_UNKNOWN
@@ -64,7 +126,7 @@ class JSONDecoder(object):
     def getslice(self, start, end):
         assert start >= 0
         assert end >= 0
-        return self.s[start:end]
+        return self.s[self.offset + start:self.offset + end]
 
     def skip_whitespace(self, i):
         while True:
@@ -255,12 +317,23 @@ class JSONDecoder(object):
             self.pos = i+1
             return w_dict
         #
+        node = None
+        if self.keycache is not None and self.keycache.enabled:
+            node = self.keycache.root
         while True:
             # parse a key: value
-            self.last_type = TYPE_UNKNOWN
-            w_name = self.decode_any(i)
-            if self.last_type != TYPE_STRING:
-                self._raise("Key name must be string for object starting at char %d", start)
+            i = self.skip_whitespace(i)
+            if node is not None and self.ll_chars[i] == '"':
+                node = self.decode_key(i+1, node)
+            else:
+                node = None
+            if node is not None:
+                w_name = node.w_key
+            else:
+                self.last_type = TYPE_UNKNOWN
+                w_name = self.decode_any(i)
+                if self.last_type != TYPE_STRING:
+                    self._raise("Key name must be string for object starting at char %d", start)
             i = self.skip_whitespace(self.pos)
             ch = self.ll_chars[i]
             if ch != ':':
@@ -284,6 +357,49 @@ class JSONDecoder(object):
                 self._raise("Unexpected '%s' when decoding object (char %d)",
                             ch, i-1)
 
+    def decode_key(self, i, node):
+        """ Look up the key starting at i (just after the opening quote)
+        among the children of 'node' in the key cache.  Return the child and
+        set self.pos after the closing quote; or return None, leaving
+        self.pos untouched, if the key contains escapes or cannot be added
+        to the cache.
+        """
+        cache = self.keycache
+        child = node.last_child
+        if child is not None and self.key_matches(i, child.key):
+            cache.hits += 1
+            self.pos = i + len(child.key) + 1
+            return child
+        start = i
+        while True:
+            ch = self.ll_chars[i]
+            if ch == '"':
+                break
+            elif ch == '\\' or ch < '\x20':
+                return None
+            i += 1
+        key = self.getslice(start, i)
+        child = node.children.get(key, None)
+        if child is not None:
+            cache.hits += 1
+        else:
+            cache.misses += 1
+            w_key = self.space.newunicode(
+                unicodehelper.decode_utf8(self.space, key))
+            child = cache.add_child(node, key, w_key)
+            if child is None:
+                return None
+        node.last_child = child
+        self.pos = i + 1
+        return child
+
+    def key_matches(self, i, key):
+        # the cached keys contain neither quotes nor escapes, so it is
+        # enough to compare the raw bytes up to the closing quote
+        for j in range(len(key)):
+            if self.ll_chars[i+j] != key[j]:
+                return False
+        return self.ll_chars[i+len(key)] == '"'
 
     def decode_string(self, i):
         start = i
@@ -303,7 +419,8 @@ class JSONDecoder(object):
                     # ascii only, fast path (ascii is a strict subset of
                     # latin1, and we already checked that all the chars are <
                     # 128)
-                    content_unicode = strslice2unicode_latin1(self.s, start, i-1)
+                    content_unicode = strslice2unicode_latin1(
+                        self.s, self.offset + start, self.offset + i - 1)
                 self.last_type = TYPE_STRING
                 self.pos = i
                 return self.space.newunicode(content_unicode)
@@ -317,7 +434,7 @@ class JSONDecoder(object):
         builder = StringBuilder((i - start) * 2) # just an estimate
         assert start >= 0
         assert i >= 0
-        builder.append_slice(self.s, start, i)
+        builder.append_slice(self.s, self.offset + start, self.offset + i)
         while True:
             ch = self.ll_chars[i]
             i += 1
@@ -392,15 +509,33 @@ def loads(space, w_s):
         raise oefmt(space.w_TypeError,
                     "Expected utf8-encoded str, got unicode")
     s = space.bytes_w(w_s)
-    decoder = JSONDecoder(space, s)
+    return decode_document(space, s)
+
+def decode_document(space, s, start=0, end=-1):
+    """Decode the string s[start:end], which must contain exactly one
+    JSON value surrounded by optional whitespace."""
+    decoder = JSONDecoder(space, s, space.fromcache(KeyCache), start, end)
     try:
         w_res = decoder.decode_any(0)
         i = decoder.skip_whitespace(decoder.pos)
-        if i < len(s):
+        if i < decoder.length:
             start = i
-            end = len(s) - 1
+            end = decoder.length - 1
             raise oefmt(space.w_ValueError,
                         "Extra data: char %d - %d", start, end)
         return w_res
     finally:
         decoder.close()
+
+def key_cache_stats(space):
+    """Return a tuple (hits, misses, size, enabled) describing the cache of
+    object key sequences used by loads()."""
+    cache = space.fromcache(KeyCache)
+    return space.newtuple([space.newint(cache.hits),
+                           space.newint(cache.misses),
+                           space.newint(cache.num_nodes),
+                           space.newbool(cache.enabled)])
+
+def clear_key_cache(space):
+    """Empty the cache of object key sequences and re-enable it."""
+    space.fromcache(KeyCache).clear()
@@ -1,6 +1,10 @@
 from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rfloat import isfinite, isinf
 from rpython.rlib.runicode import str_decode_utf_8
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.floatobject import float2string
 
 
 HEX = '0123456789abcdef'
@@ -48,6 +52,11 @@ def raw_encode_basestring_ascii(space, w_string):
         sb = StringBuilder(len(u))
         first = 0
 
+    escape_unicode_ascii(u, first, sb)
+    res = sb.build()
+    return space.newtext(res)
+
+def escape_unicode_ascii(u, first, sb):
     for i in range(first, len(u)):
         c = u[i]
         if c <= u'~':
@@ -78,5 +87,238 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
-    res = sb.build()
-    return space.newtext(res)
+def escape_bytes(s, sb):
+    """ Escape the special chars of s, leaving the non-ascii ones alone
+    (like raw_encode_basestring in json/encoder.py) """
+    start = 0
+    for i in range(len(s)):
+        c = s[i]
+        if c == '"' or c == '\\' or c < ' ':
+            sb.append_slice(s, start, i)
+            if c < ' ':
+                sb.append(ESCAPE_BEFORE_SPACE[ord(c)])
+            else:
+                sb.append('\\')
+                sb.append(c)
+            start = i + 1
+    sb.append_slice(s, start, len(s))
+
+
+class JSONEncoder(object):
+    """ Walks a tree of dicts, lists, tuples, strings, numbers, booleans and
+    None, writing its JSON representation to a single StringBuilder.  Other
+    objects are first converted by calling the app-level 'default' hook,
+    exactly like json.JSONEncoder does.
+
+    With ensure_ascii=False the output is built as utf-8, and turned into
+    unicode at the end if any unicode string was encoded.
+    """
+
+    def __init__(self, space, w_default, skipkeys, ensure_ascii,
+                 check_circular, allow_nan, sort_keys, indent,
+                 item_separator, key_separator):
+        self.space = space
+        self.w_default = w_default
+        self.skipkeys = skipkeys
+        self.ensure_ascii = ensure_ascii
+        self.allow_nan = allow_nan
+        self.sort_keys = sort_keys
+        self.indent = indent            # -1 means no indentation
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        if check_circular:
+            self.markers = {}
+        else:
+            self.markers = None
+        self.has_unicode = False
+        self.sb = StringBuilder()
+
+    def build(self):
+        space = self.space
+        res = self.sb.build()
+        if self.has_unicode:
+            return space.newunicode(unicodehelper.decode_utf8(space, res))
+        return space.newbytes(res)
+
+    def mark(self, w_obj):
+        if self.markers is not None:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.markers is not None:
+            del self.markers[w_obj]
+
+    def emit_string(self, w_string):
+        space = self.space
+        sb = self.sb
+        sb.append('"')
+        if self.ensure_ascii:
+            w_res = raw_encode_basestring_ascii(space, w_string)
+            sb.append(space.bytes_w(w_res))
+        elif space.isinstance_w(w_string, space.w_bytes):
+            escape_bytes(space.bytes_w(w_string), sb)
+        else:
+            self.has_unicode = True
+            u = space.unicode_w(w_string)
+            escape_bytes(unicodehelper.encode_utf8(space, u), sb)
+        sb.append('"')
+
+    def floatstr(self, w_float):
+        x = self.space.float_w(w_float)
+        if isfinite(x):
+            return float2string(x, 'r', 0)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%R", w_float)
+        if isinf(x):
+            if x > 0.0:
+                return 'Infinity'
+            return '-Infinity'
+        return 'NaN'
+
+    def newline_indent(self, level):
+        self.sb.append('\n')
+        self.sb.append(' ' * (self.indent * level))
+
+    def encode(self, w_obj, level):
+        space = self.space
+        if space.isinstance_w(w_obj, space.w_basestring):
+            self.emit_string(w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            self.sb.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            self.sb.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            self.sb.append('false')
+        elif space.is_w(space.type(w_obj), space.w_int):
+            self.sb.append(str(space.int_w(w_obj)))
+        elif (space.isinstance_w(w_obj, space.w_int) or
+              space.isinstance_w(w_obj, space.w_long)):
+            self.sb.append(space.text_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            self.sb.append(self.floatstr(w_obj))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+              space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(w_obj, level)
+        else:
+            self.mark(w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode(w_res, level)
+            self.unmark(w_obj)
+
+    def encode_list(self, w_list, level):
+        space = self.space
+        if space.len_w(w_list) == 0:
+            self.sb.append('[]')
+            return
+        self.mark(w_list)
+        self.sb.append('[')
+        if self.indent >= 0:
+            level += 1
+            self.newline_indent(level)
+        # iterate instead of taking a fixedview: the 'default' function
+        # may mutate the list while we are encoding it
+        w_iter = space.iter(w_list)
+        first = True
+        while True:
+            try:
+                w_item = space.next(w_iter)
+            except OperationError as e:
+                if not e.match(space, space.w_StopIteration):
+                    raise
+                break
+            if first:
+                first = False
+            else:
+                self.sb.append(self.item_separator)
+                if self.indent >= 0:
+                    self.newline_indent(level)
+            self.encode(w_item, level)
+        if self.indent >= 0:
+            self.newline_indent(level - 1)
+        self.sb.append(']')
+        self.unmark(w_list)
+
+    def encode_dict(self, w_dict, level):
+        space = self.space
+        w_items = space.call_method(w_dict, 'items')
+        if self.sort_keys:
+            # the keys are all different, so sorting the (key, value)
+            # tuples is the same as sorting them by key
+            space.call_method(w_items, 'sort')
+        items_w = space.listview(w_items)
+        if not items_w:
+            self.sb.append('{}')
+            return
+        self.mark(w_dict)
+        self.sb.append('{')
+        if self.indent >= 0:
+            level += 1
+            self.newline_indent(level)
+        first = True
+        for w_item in items_w:
+            w_key, w_value = space.fixedview(w_item, 2)
+            if space.isinstance_w(w_key, space.w_basestring):
+                key = None
+            # JavaScript is weakly typed for these, so it makes sense to
+            # also allow them.  Many encoders seem to do something like this.
+            elif space.isinstance_w(w_key, space.w_float):
+                key = self.floatstr(w_key)
+            elif space.is_w(w_key, space.w_True):
+                key = 'true'
+            elif space.is_w(w_key, space.w_False):
+                key = 'false'
+            elif space.is_w(w_key, space.w_None):
+                key = 'null'
+            elif (space.isinstance_w(w_key, space.w_int) or
+                  space.isinstance_w(w_key, space.w_long)):
+                key = space.text_w(space.str(w_key))
+            elif self.skipkeys:
+                continue
+            else:
+                raise oefmt(space.w_TypeError, "key %R is not a string",
+                            w_key)
+            if first:
+                first = False
+            else:
+                self.sb.append(self.item_separator)
+                if self.indent >= 0:
+                    self.newline_indent(level)
+            if key is None:
+                self.emit_string(w_key)
+            else:
+                self.sb.append('"')
+                self.sb.append(key)
+                self.sb.append('"')
+            self.sb.append(self.key_separator)
+            self.encode(w_value, level)
+        if self.indent >= 0:
+            self.newline_indent(level - 1)
+        self.sb.append('}')
+        self.unmark(w_dict)
+
+
+@unwrap_spec(skipkeys=bool, ensure_ascii=bool, check_circular=bool,
+             allow_nan=bool, sort_keys=bool, item_separator='text',
+             key_separator='text')
+def encode(space, w_obj, w_default, skipkeys, ensure_ascii, check_circular,
+           allow_nan, sort_keys, w_indent, item_separator, key_separator):
+    """Return the JSON representation of obj, like json.JSONEncoder.encode();
+default(o) is called for the objects which are not natively supported."""
+    if space.is_none(w_indent):
+        indent = -1
+    else:
+        indent = space.int_w(w_indent)
+        if indent < 0:
+            indent = 0
+    encoder = JSONEncoder(space, w_default, skipkeys, ensure_ascii,
+                          check_circular, allow_nan, sort_keys, indent,
+                          item_separator, key_separator)
+    encoder.encode(w_obj, 0)
+    return encoder.build()
@@ -0,0 +1,192 @@
+from rpython.rlib.rstring import StringBuilder
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef
+from pypy.module._pypyjson.interp_decoder import (is_whitespace,
+    decode_document)
+
+
+class W_StreamDecoder(W_Root):
+    """ Incremental decoder for a stream of whitespace-separated JSON values
+    (which includes newline-delimited records).
+
+    feed() only scans the new bytes for the end of the current top-level
+    value, keeping track of the nesting depth and of string literals; the
+    values are then decoded one by one, as soon as they are complete.  The
+    decoder only keeps the chunks which hold the incomplete value: a value
+    which lies within a single chunk is decoded in place, and one which
+    spans several chunks is copied once to join its pieces.
+
+    Each decoded value is stored in 'ready' before the next one is
+    scanned.  If a value is invalid, it is dropped and the rest of the
+    chunk is still decoded; the error is raised at the end of feed(), and
+    the values decoded so far are returned by the next call.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.pending = []      # the chunks holding the incomplete value
+        self.valuestart = 0    # where the value starts in pending[0]
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.closed = False
+        self.ready = []        # the values decoded but not returned yet
+        self.error = None      # the first error, raised at the end of feed()
+
+    def descr__new__(space, w_subtype):
+        return W_StreamDecoder(space)
+
+    def _check_closed(self, space):
+        if self.closed:
+            raise oefmt(space.w_ValueError, "StreamDecoder is closed")
+
+    def descr_feed(self, space, w_data):
+        """feed(data) -> list of the values completed by this chunk.
+Raises ValueError if the chunk holds an invalid value; the other values
+are then returned by the next call to feed() or close()."""
+        self._check_closed(space)
+        data = space.bytes_w(w_data)
+        self._scan(data)
+        return self._flush(space)
+
+    def descr_close(self, space):
+        """close() -> list of the values still pending at the end of the
+stream.  Raises ValueError if the stream ends in the middle of a value."""
+        self._check_closed(space)
+        if self.pending:
+            if self.depth > 0 or self.in_string:
+                self.pending = []
+                self.depth = 0
+                self.in_string = False
+                self.escape = False
+                self._set_error(oefmt(space.w_ValueError,
+                            "Unterminated JSON value at end of stream"))
+            else:
+                # a top-level number or constant is only terminated by the
+                # end of the stream
+                self._commit_value('', 0, 0)
+        # after an error, close() can be called again to get the values
+        # which were decoded before it
+        self.closed = self.error is None
+        return self._flush(space)
+
+    def _flush(self, space):
+        operr = self.error
+        if operr is not None:
+            self.error = None
+            raise operr
+        values_w = self.ready
+        self.ready = []
+        return space.newlist(values_w)
+
+    def _set_error(self, operr):
+        if self.error is None:
+            self.error = operr
+
+    def _commit_value(self, data, start, end):
+        """Decode the value ending at data[end] and add it to the values
+        ready to be returned.  An invalid value is dropped."""
+        try:
+            w_value = self._decode_value(data, start, end)
+        except OperationError as e:
+            if not e.match(self.space, self.space.w_ValueError):
+                raise
+            self._set_error(e)
+        else:
+            self.ready.append(w_value)
+
+    def _decode_value(self, data, start, end):
+        """Decode the value ending at data[end].  It starts at data[start],
+        unless it started in one of the pending chunks."""
+        assert start >= 0
+        assert end >= start
+        if not self.pending:
+            return decode_document(self.space, data, start, end)
+        pending = self.pending
+        self.pending = []
+        first = pending[0]
+        size = len(first) - self.valuestart + end
+        for i in range(1, len(pending)):
+            size += len(pending[i])
+        builder = StringBuilder(size)
+        builder.append_slice(first, self.valuestart, len(first))
+        for i in range(1, len(pending)):
+            builder.append(pending[i])
+        builder.append_slice(data, 0, end)
+        return decode_document(self.space, builder.build())
+
+    def _scan(self, data):
+        in_value = len(self.pending) > 0
+        start = 0
+        depth = self.depth
+        in_string = self.in_string
+        escape = self.escape
+        i = 0
+        while i < len(data):
+            ch = data[i]
+            i += 1
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == '\\':
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+                    if depth == 0:
+                        self._commit_value(data, start, i)
+                        in_value = False
+            elif not in_value:
+                # between two values
+                if is_whitespace(ch):
+                    continue
+                in_value = True
+                start = i - 1
+                if ch == '"':
+                    in_string = True
+                elif ch == '[' or ch == '{':
+                    depth = 1
+            elif depth > 0:
+                if ch == '"':
+                    in_string = True
+                elif ch == '[' or ch == '{':
+                    depth += 1
+                elif ch == ']' or ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        self._commit_value(data, start, i)
+                        in_value = False
+            elif is_whitespace(ch):
+                # end of a top-level number or constant
+                self._commit_value(data, start, i - 1)
+                in_value = False
+            elif ch == '"' or ch == '[' or ch == '{':
+                # a top-level number or constant must be followed by
+                # whitespace: '1[2]' is an error, not 1 and [2].  Drop it
+                # and go on with the value which starts here.
+                self.pending = []
+                self._set_error(oefmt(self.space.w_ValueError,
+                    "Expected whitespace after a top-level number or "
+                    "constant"))
+                start = i - 1
+                if ch == '"':
+                    in_string = True
+                else:
+                    depth = 1
+        # keep the chunk only if it holds part of an incomplete value
+        if in_value:
+            if not self.pending:
+                self.valuestart = start
+            self.pending.append(data)
+        self.depth = depth
+        self.in_string = in_string
+        self.escape = escape
+
+
+W_StreamDecoder.typedef = TypeDef("StreamDecoder",
+    __new__ = interp2app(W_StreamDecoder.descr__new__.im_func),
+    feed = interp2app(W_StreamDecoder.descr_feed),
+    close = interp2app(W_StreamDecoder.descr_close),
+)
+W_StreamDecoder.typedef.acceptable_as_base_class = False
@@ -53,9 +53,19 @@ class FakeSpace(object):
     w_int = W_Int
     w_float = W_Float
 
+    def __init__(self):
+        self._caches = {}
+
     def newtuple(self, items):
         return None
 
+    def fromcache(self, cls):
+        try:
+            return self._caches[cls]
+        except KeyError:
+            res = self._caches[cls] = cls(self)
+            return res
+
     def newdict(self):
         return W_Dict()
 
@@ -1,5 +1,5 @@
 # -*- encoding: utf-8 -*-
-from pypy.module._pypyjson.interp_decoder import JSONDecoder
+from pypy.module._pypyjson.interp_decoder import JSONDecoder, KeyCache
 
 def test_skip_whitespace():
     s = '   hello   '
@@ -10,10 +10,27 @@ def test_skip_whitespace():
     assert dec.skip_whitespace(8) == len(s)
     dec.close()
 
-    
+def test_key_cache_disables_itself():
+    cache = KeyCache('fake space')
+    cache.MAX_NODES = 2
+    root = cache.root
+    assert cache.add_child(root, 'a', None) is not None
+    assert cache.add_child(root, 'b', None) is not None
+    cache.hits = 5
+    cache.misses = 3
+    assert cache.add_child(root, 'c', None) is None
+    assert cache.enabled
+    cache.misses = 6
+    assert cache.add_child(root, 'c', None) is None
+    assert not cache.enabled
+    cache.clear()
+    assert cache.enabled
+    assert cache.num_nodes == 0
+
+
 
 class AppTest(object):
-    spaceconfig = {"objspace.usemodules._pypyjson": True}
+    spaceconfig = {"usemodules": ["_pypyjson", "struct"]}
 
     def test_raise_on_unicode(self):
         import _pypyjson
@@ -164,6 +181,31 @@ class AppTest(object):
         raises(ValueError, _pypyjson.loads, '{"key"')
         raises(ValueError, _pypyjson.loads, '{"key": 42')
 
+    def test_decode_object_key_cache(self):
+        import _pypyjson
+        _pypyjson.clear_key_cache()
+        s = '[{"x": 1, "y": 2}, {"x": 3, "y": 4}, {"x": 5, "z": 6}]'
+        res = _pypyjson.loads(s)
+        assert res == [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}, {'x': 5, 'z': 6}]
+        hits, misses, size, enabled = _pypyjson.key_cache_stats()
+        assert (hits, misses, size, enabled) == (3, 3, 3, True)
+        res2 = _pypyjson.loads(s)
+        assert res2 == res
+        assert _pypyjson.key_cache_stats() == (9, 3, 3, True)
+        k1, = [k for k in res[0] if k == 'x']
+        k2, = [k for k in res2[1] if k == 'x']
+        assert k1 is k2
+
+    def test_decode_object_key_cache_escapes(self):
+        import _pypyjson
+        _pypyjson.clear_key_cache()
+        s = '{"a\\nb": 1, "c": 2, "\xc3\xa0": 3}'
+        assert _pypyjson.loads(s) == {u'a\nb': 1, u'c': 2, u'\xe0': 3}
+        assert _pypyjson.loads(s) == {u'a\nb': 1, u'c': 2, u'\xe0': 3}
+        assert _pypyjson.loads('{"c": 1, "c": 2}') == {u'c': 2}
+        raises(ValueError, _pypyjson.loads, '{"c": 1, "c" 2}')
+        raises(ValueError, _pypyjson.loads, '{"c')
+
     def test_decode_object_nonstring_key(self):
         import _pypyjson
         raises(ValueError, "_pypyjson.loads('{42: 43}')")
@@ -196,6 +238,80 @@ class AppTest(object):
         s = '["\ttab\tcharacter\tin\tstring\t"]'
         raises(ValueError, "_pypyjson.loads(s)")
 
+    def test_stream_decoder(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('{"a": [1, 2') == []
+        assert dec.feed(', "]}"]}\n{"b"') == [{u'a': [1, 2, u']}']}]
+        assert dec.feed(': null}\n"x\\"y"  ') == [{u'b': None}, u'x"y']
+        assert dec.feed('42') == []
+        assert dec.feed('\n') == [42]
+        assert dec.feed(' true') == []
+        assert dec.close() == [True]
+        raises(ValueError, dec.feed, '1')
+
+    def test_stream_decoder_close(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('1 2 3.5') == [1, 2]
+        assert dec.close() == [3.5]
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('[1, 2') == []
+        raises(ValueError, dec.close)
+        dec = _pypyjson.StreamDecoder()
+        raises(ValueError, dec.feed, '[1, 2,] ')
+
+    def test_stream_decoder_small_chunks(self):
+        import _pypyjson
+        s = '[1, "a\\"b", {"c": [2.5, null]}] "\\u1234" 17 {"d": 3} '
+        dec = _pypyjson.StreamDecoder()
+        res = []
+        for c in s:
+            res += dec.feed(c)
+        expected = [[1, u'a"b', {u'c': [2.5, None]}], u'\u1234', 17,
+                    {u'd': 3}]
+        assert res == expected
+        assert dec.close() == []
+        # values starting in the middle of a chunk
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('1 [2, ') == [1]
+        assert dec.feed('3') == []
+        assert dec.feed('] [4] 5') == [[2, 3], [4]]
+        assert dec.feed('6') == []
+        assert dec.close() == [56]
+
+    def test_stream_decoder_error_keeps_values(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        raises(ValueError, dec.feed, '[1] {"a": } [2] 3')
+        assert dec.feed(' ') == [[1], [2], 3]
+        raises(ValueError, dec.feed, '[4] 1[5, ')
+        assert dec.feed('6]\n') == [[4], [5, 6]]
+        assert dec.feed('[7') == []
+        raises(ValueError, dec.close)
+        assert dec.close() == []
+        raises(ValueError, dec.close)
+
+    def test_stream_decoder_number_then_bracket(self):
+        import _pypyjson
+        for s in ['1[2] ', '12{"a": 3} ', 'true[2] ', '1"x" ']:
+            dec = _pypyjson.StreamDecoder()
+            raises(ValueError, dec.feed, s)
+            assert len(dec.feed('')) == 1
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('[0] 1') == [[0]]
+        raises(ValueError, dec.feed, '2[3, 4]\n')
+        assert dec.close() == [[3, 4]]
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('1 [2]{"a": 3}') == [1, [2], {u'a': 3}]
+
+    def test_iterload(self):
+        import _pypyjson
+        from StringIO import StringIO
+        f = StringIO('{"id": 1}\n{"id": 2}\n[3, {"x": "\\u1234"}]\n4')
+        res = list(_pypyjson.iterload(f, chunksize=3))
+        assert res == [{u'id': 1}, {u'id': 2}, [3, {u'x': u'\u1234'}], 4]
+
     def test_raw_encode_basestring_ascii(self):
         import _pypyjson
         def check(s):
@@ -215,6 +331,79 @@ class AppTest(object):
         assert check("\\\"\b\f\n\r\t") == '\\\\\\"\\b\\f\\n\\r\\t'
         assert check("\x07") == "\\u0007"
 
+    def test_encode(self):
+        import _pypyjson
+        def encode(obj, default=None, skipkeys=False, ensure_ascii=True,
+                   check_circular=True, allow_nan=True, sort_keys=False,
+                   indent=None, separators=(', ', ': ')):
+            return _pypyjson.encode(obj, default, skipkeys, ensure_ascii,
+                                    check_circular, allow_nan, sort_keys,
+                                    indent, separators[0], separators[1])
+        assert encode([1, 2L, 3.5, None, True, False, u'x', 'y']) == (
+            '[1, 2, 3.5, null, true, false, "x", "y"]')
+        assert encode((), indent=2) == '[]'
+        assert encode({}) == '{}'
+        assert encode({'a': (1, 2)}, indent=2) == (
+            '{\n  "a": [\n    1, \n    2\n  ]\n}')
+        assert encode({'b': 1, 'a': 2, 3: 4}, sort_keys=True,
+                      separators=(',', ':')) == '{"3":4,"a":2,"b":1}'
+        assert encode({1.5: 1, None: 2, True: 3}, sort_keys=True) == (
+            '{"null": 2, "true": 3, "1.5": 1}')
+        raises(TypeError, encode, {(1,): 2})
+        assert encode({(1,): 2, 'a': 1}, skipkeys=True) == '{"a": 1}'
+        assert encode(float('inf')) == 'Infinity'
+        assert encode([float('nan')]) == '[NaN]'
+        raises(ValueError, encode, float('-inf'), allow_nan=False)
+        assert encode(u'\xe9"\n') == '"\\u00e9\\"\\n"'
+        res = encode([u'\xe9', '\t'], ensure_ascii=False)
+        assert res == u'["\xe9", "\\t"]'
+        assert type(res) is unicode
+        res = encode(['\xc3\xa9'], ensure_ascii=False)
+        assert res == '["\xc3\xa9"]'
+        assert type(res) is str
+        #
+        class Point(object):
+            pass
+        def default(o):
+            if isinstance(o, Point):
+                return {'p': 1}
+            raise TypeError(repr(o) + " is not JSON serializable")
+        assert encode([Point()], default) == '[{"p": 1}]'
+        raises(TypeError, encode, [object()], default)
+        l = []
+        l.append(l)
+        raises(ValueError, encode, l)
+        class MyInt(int):
+            def __str__(self):
+                return '42'
+        assert encode(MyInt(1)) == '42'
+        a = [object()] * 10
+        def crasher(obj):
+            del a[-1]
+        assert encode(a, crasher) == '[null, null, null, null, null]'
+
+    def test_json_encoder_float_repr(self):
+        import json
+        from json import encoder
+        assert json.dumps([1.5]) == '[1.5]'
+        old = encoder.FLOAT_REPR
+        encoder.FLOAT_REPR = lambda f: '%.1f' % f
+        try:
+            assert json.dumps([0.25, {'a': 1.0}]) == '[0.2, {"a": 1.0}]'
+        finally:
+            encoder.FLOAT_REPR = old
+        assert json.dumps([0.25]) == '[0.25]'
+
+    def test_json_encoder_iterencode_override(self):
+        import json
+        class MyEncoder(json.JSONEncoder):
+            def iterencode(self, o, _one_shot=False):
+                for chunk in json.JSONEncoder.iterencode(self, o):
+                    yield chunk.upper()
+        assert MyEncoder().encode({'a': [True]}) == '{"A": [TRUE]}'
+        assert json.dumps(['x'], cls=MyEncoder) == '["X"]'
+        assert json.JSONEncoder().encode({'a': [True]}) == '{"a": [true]}'
+
     def test_error_position(self):
         import _pypyjson
         test_cases = [
@@ -9,6 +9,7 @@ class Module(MixedModule):
         'CODESIZE':       'space.newint(interp_sre.CODESIZE)',
         'MAGIC':          'space.newint(20031017)',
         'MAXREPEAT':      'space.newint(interp_sre.MAXREPEAT)',
+        'LINEAR':         'space.newint(interp_sre.LINEAR)',
         'compile':        'interp_sre.W_SRE_Pattern',
         'getlower':       'interp_sre.w_getlower',
         'getcodesize':    'interp_sre.w_getcodesize',
@@ -13,9 +13,14 @@ from rpython.rlib.rstring import StringBuilder, UnicodeBuilder
 #
 # Constants and exposed functions
 
-from rpython.rlib.rsre import rsre_core
+from rpython.rlib.rsre import rsre_core, rsre_nfa
 from rpython.rlib.rsre.rsre_char import CODESIZE, MAXREPEAT, getlower, set_unicode_db
 
+# PyPy extension: a flag that forces the use of the linear-time matcher
+# of rsre_nfa, which is otherwise only used for the patterns with nested
+# repetitions, like '(a|aa)*' or '(a+)+'
+LINEAR = 0x10000
+
 
 @unwrap_spec(char_ord=int, flags=int)
 def w_getlower(space, char_ord, flags):
@@ -77,13 +82,17 @@ def import_re(space):
     w_import = space.getattr(w_builtin, space.newtext("__import__"))
     return space.call_function(w_import, space.newtext("re"))
 
-def matchcontext(space, ctx):
+def matchcontext(space, ctx, nfa):
+    if nfa is not None:
+        return rsre_nfa.nfa_match_context(ctx, nfa)
     try:
         return rsre_core.match_context(ctx)
     except rsre_core.Error as e:
         raise OperationError(space.w_RuntimeError, space.newtext(e.msg))
 
-def searchcontext(space, ctx):
+def searchcontext(space, ctx, nfa):
+    if nfa is not None:
+        return rsre_nfa.nfa_search_context(ctx, nfa)
     try:
         return rsre_core.search_context(ctx)
     except rsre_core.Error as e:
@@ -94,7 +103,8 @@ def searchcontext(space, ctx):
 # SRE_Pattern class
 
 class W_SRE_Pattern(W_Root):
-    _immutable_fields_ = ["code", "flags", "num_groups", "w_groupindex"]
+    _immutable_fields_ = ["code", "flags", "num_groups", "w_groupindex",
+                          "nfa", "prefilter"]
 
     def cannot_copy_w(self):
         space = self.space
@@ -103,6 +113,11 @@ class W_SRE_Pattern(W_Root):
     def make_ctx(self, w_string, pos=0, endpos=sys.maxint):
         """Make a StrMatchContext, BufMatchContext or a UnicodeMatchContext for
         searching in the given w_string object."""
+        ctx = self._make_ctx(w_string, pos, endpos)
+        ctx.prefilter = self.prefilter
+        return ctx
+
+    def _make_ctx(self, w_string, pos, endpos):
         space = self.space
         if pos < 0:
             pos = 0
@@ -144,12 +159,12 @@ class W_SRE_Pattern(W_Root):
     @unwrap_spec(pos=int, endpos=int)
     def match_w(self, w_string, pos=0, endpos=sys.maxint):
         ctx = self.make_ctx(w_string, pos, endpos)
-        return self.getmatch(ctx, matchcontext(self.space, ctx))
+        return self.getmatch(ctx, matchcontext(self.space, ctx, self.nfa))
 
     @unwrap_spec(pos=int, endpos=int)
     def search_w(self, w_string, pos=0, endpos=sys.maxint):
         ctx = self.make_ctx(w_string, pos, endpos)
-        return self.getmatch(ctx, searchcontext(self.space, ctx))
+        return self.getmatch(ctx, searchcontext(self.space, ctx, self.nfa))
 
     @unwrap_spec(pos=int, endpos=int)
     def findall_w(self, w_string, pos=0, endpos=sys.maxint):
@@ -157,7 +172,7 @@ class W_SRE_Pattern(W_Root):
         matchlist_w = []
         ctx = self.make_ctx(w_string, pos, endpos)
         while ctx.match_start <= ctx.end:
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, self.nfa):
                 break
             num_groups = self.num_groups
             w_emptystr = space.newtext("")
@@ -193,7 +208,7 @@ class W_SRE_Pattern(W_Root):
         last = 0
         ctx = self.make_ctx(w_string)
         while not maxsplit or n < maxsplit:
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, self.nfa):
                 break
             if ctx.match_start == ctx.match_end:     # zero-width match
                 if ctx.match_start == ctx.end:       # or end of string
@@ -291,7 +306,7 @@ class W_SRE_Pattern(W_Root):
                 n=n, last_pos=last_pos, sublist_w=sublist_w
                 )
             space = self.space
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, self.nfa):
                 break
             if last_pos < ctx.match_start:
                 _sub_append_slice(
@@ -379,13 +394,23 @@ def SRE_Pattern__new__(space, w_subtype, w_pattern, flags, w_code,
     n = space.len_w(w_code)
     code = [intmask(space.uint_w(space.getitem(w_code, space.newint(i))))
             for i in range(n)]
+    nfa = rsre_nfa.compile_nfa(code)
+    if flags & LINEAR:
+        if nfa is None:
+            raise oefmt(space.w_ValueError,
+                        "this pattern cannot be matched in linear time")
+    elif nfa is not None and not nfa.nested_repeat:
+        # the JIT-friendly backtracking matcher is faster in this case
+        nfa = None
     #
     w_srepat = space.allocate_instance(W_SRE_Pattern, w_subtype)
     srepat = space.interp_w(W_SRE_Pattern, w_srepat)
     srepat.space = space
     srepat.w_pattern = w_pattern      # the original uncompiled pattern
-    srepat.flags = flags
+    srepat.flags = flags & ~LINEAR    # LINEAR only selects the matcher
     srepat.code = code
+    srepat.nfa = nfa
+    srepat.prefilter = rsre_core.compute_prefilter(code)
     srepat.num_groups = groups
     srepat.w_groupindex = w_groupindex
     srepat.w_indexgroup = w_indexgroup
@@ -619,19 +644,21 @@ class W_SRE_Scanner(W_Root):
     def next_w(self):
         if self.ctx.match_start > self.ctx.end:
             raise OperationError(self.space.w_StopIteration, self.space.w_None)
-        if not searchcontext(self.space, self.ctx):
+        if not searchcontext(self.space, self.ctx, self.srepat.nfa):
             raise OperationError(self.space.w_StopIteration, self.space.w_None)
         return self.getmatch(True)
 
     def match_w(self):
         if self.ctx.match_start > self.ctx.end:
             return self.space.w_None
-        return self.getmatch(matchcontext(self.space, self.ctx))
+        return self.getmatch(matchcontext(self.space, self.ctx,
+                                          self.srepat.nfa))
 
     def search_w(self):
         if self.ctx.match_start > self.ctx.end:
             return self.space.w_None
-        return self.getmatch(searchcontext(self.space, self.ctx))
+        return self.getmatch(searchcontext(self.space, self.ctx,
+                                           self.srepat.nfa))
 
     def getmatch(self, found):
         if found:
@@ -363,6 +363,26 @@ class AppTestSreScanner:
         assert None == p.search()
 
 
+class TestSreScanner:
+    def test_scanner_keeps_prefilter(self):
+        from pypy.module._sre.interp_sre import W_SRE_Scanner
+        space = self.space
+        w_scanner = space.appexec([], """():
+            import re
+            p = re.compile(r'\\w+@example\\.com')
+            return p.scanner('a@example.com, bc@example.com')
+        """)
+        scanner = space.interp_w(W_SRE_Scanner, w_scanner)
+        assert scanner.ctx.prefilter is not None
+        w_match = space.call_method(w_scanner, "search")
+        assert space.text_w(space.call_method(w_match, "group")) == (
+            'a@example.com')
+        assert scanner.ctx.prefilter is not None
+        w_match = space.call_method(w_scanner, "search")
+        assert space.text_w(space.call_method(w_match, "group")) == (
+            'bc@example.com')
+
+
 class AppTestGetlower:
     spaceconfig = dict(usemodules=('_locale',))
 
@@ -999,3 +1019,64 @@ class AppTestOptimizations:
         import re
         assert re.search(".+ab", "wowowowawoabwowo")
         assert None == re.search(".+ab", "wowowaowowo")
+
+    def test_required_literal_search(self):
+        import re
+        r = re.compile(r"\w+@example\.com")
+        assert r.search("mail joe@example.com now").span() == (5, 20)
+        assert r.search(u"mail joe@example.com now").span() == (5, 20)
+        assert r.search(buffer("to: a@example.com")).span() == (4, 17)
+        assert r.search("joe@example.co") is None
+        assert r.findall("a@example.com b@example.com @example.com") == [
+            "a@example.com", "b@example.com"]
+        assert re.search(r"\d\d?-abc", "x" * 50 + "123-abc").span() == (
+            51, 57)
+        assert re.search(r".*ERROR.*", "INFO\nxx ERROR yy\n").group() == (
+            "xx ERROR yy")
+
+
+class AppTestLinear:
+
+    def test_linear_flag(self):
+        import re, _sre
+        r = re.compile(r"(a|ab)(c|bcd)(d*)", _sre.LINEAR)
+        m = r.match("abcd")
+        assert m.groups() == ("a", "bcd", "")
+        assert m.lastindex == 3
+        assert r.findall("abcd acd") == [("a", "bcd", ""), ("a", "c", "d")]
+        assert r.sub("-", "xabcdyacd") == "x-y-"
+        assert r.split("xabcdy") == ["x", "a", "bcd", "", "y"]
+        assert [m.span() for m in r.finditer("abcd acd")] == [(0, 4), (5, 8)]
+        r = re.compile(r"a+", _sre.LINEAR)
+        assert r.match("baa") is None
+        assert r.search("baa").span() == (1, 3)
+        assert r.search(u"baa").span() == (1, 3)
+
+    def test_linear_flag_unsupported(self):
+        import re, _sre
+        raises(ValueError, re.compile, r"(a)\1", _sre.LINEAR)
+        raises(ValueError, re.compile, r"a(?=b)", _sre.LINEAR)
+        # the repeated item can match the empty string
+        raises(ValueError, re.compile, r"(a*|b)*c", _sre.LINEAR)
+
+    def test_linear_flag_not_in_flags(self):
+        import re, _sre
+        r = re.compile(r"a+", _sre.LINEAR | re.I)
+        assert r.flags == re.I
+
+    def test_nested_repeat(self):
+        import re
+        # these would take forever with backtracking
+        s = "a" * 1000
+        assert re.match(r"(a|aa)*b", s) is None
+        assert re.search(r"(a+)+b", s) is None
+        assert re.match(r"(a|aa)*b", s + "b").group(1) == "a"
+        assert re.match(r"(x+x+)+y", "x" * 1000) is None
+
+    def test_nested_empty_repeat(self):
+        import re
+        # the backtracking matcher is used for these
+        m = re.match(r"(a*|b)*c", "aabc")
+        assert m.groups() == ("",)
+        assert m.span() == (0, 4)
+        assert re.match(r"(?:(a)|b|())*c", "abc").groups() == ("a", "")
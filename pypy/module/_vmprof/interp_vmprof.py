@@ -5,6 +5,7 @@ from pypy.interpreter.pycode import PyCode
 from pypy.interpreter.baseobjspace import W_Root
 from rpython.rlib import rvmprof, jit
 from pypy.interpreter.error import oefmt
+from pypy.module.gc.hook import LowLevelGcHooks
 
 # ____________________________________________________________
 
@@ -70,6 +71,19 @@ def enable(space, fileno, period, memory, lines, native, real_time):
     except rvmprof.VMProfError as e:
         raise VMProfError(space, e)
 
+@unwrap_spec(fileno=int, period=int, memory=int)
+def enable_allocation_sampling(space, fileno, period, memory=0):
+    """Enable vmprof in allocation sampling mode.  Instead of sampling
+    at regular time intervals, the current stack is written every time
+    the program allocated 'period' more bytes.  The file has the same
+    format as with enable(); call disable() to stop.
+    """
+    try:
+        rvmprof.enable_allocation_sampling(fileno, period, memory)
+    except rvmprof.VMProfError as e:
+        raise VMProfError(space, e)
+    space.fromcache(LowLevelGcHooks).alloc_sample_period = period
+
 def write_all_code_objects(space):
     """ Needed on cpython, just empty function here
     """
@@ -79,6 +93,7 @@ def disable(space):
     """Disable vmprof.  Remember to close the file descriptor afterwards
     if necessary.
     """
+    space.fromcache(LowLevelGcHooks).alloc_sample_period = 0
     try:
         rvmprof.disable()
     except rvmprof.VMProfError as e:
@@ -115,3 +115,18 @@ class AppTestVMProf(object):
                 assert fd1.read() == tmpfile.read()
         _vmprof.disable()
         assert _vmprof.get_profile_path() is None
+
+    def test_enable_allocation_sampling(self):
+        import _vmprof
+        tmpfile = open(self.tmpfilename, 'wb')
+        raises(_vmprof.VMProfError, _vmprof.enable_allocation_sampling,
+               tmpfile.fileno(), 0)
+        _vmprof.enable_allocation_sampling(tmpfile.fileno(), 65536)
+        assert _vmprof.is_enabled() is True
+        raises(_vmprof.VMProfError, _vmprof.enable, tmpfile.fileno(),
+               0.01, 0, 0, 0, 0)
+        l = [[i] for i in range(10000)]
+        _vmprof.disable()
+        assert _vmprof.is_enabled() is False
+        s = open(self.tmpfilename, 'rb').read()
+        assert "py:test_enable_allocation_sampling:" in s
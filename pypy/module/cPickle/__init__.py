@@ -0,0 +1,28 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """C implementation and optimization of the Python pickle module."""
+
+    appleveldefs = {
+        'PickleError':        'app_cpickle.PickleError',
+        'PicklingError':      'app_cpickle.PicklingError',
+        'UnpicklingError':    'app_cpickle.UnpicklingError',
+        'BadPickleGet':       'app_cpickle.BadPickleGet',
+        'UnpickleableError':  'app_cpickle.UnpickleableError',
+        'format_version':     'app_cpickle.format_version',
+        'compatible_formats': 'app_cpickle.compatible_formats',
+        }
+
+    interpleveldefs = {
+        '__version__':      'space.wrap("1.71")',
+        'HIGHEST_PROTOCOL': 'space.wrap(interp_pickle.HIGHEST_PROTOCOL)',
+
+        'Pickler':   'interp_pickle.W_Pickler',
+        'dump':      'interp_pickle.dump',
+        'dumps':     'interp_pickle.dumps',
+
+        'Unpickler': 'interp_unpickle.W_Unpickler',
+        'load':      'interp_unpickle.load',
+        'loads':     'interp_unpickle.loads',
+        }
@@ -0,0 +1,14 @@
+# The exceptions are the ones of pickle.py, like in lib_pypy/cPickle.py
+from pickle import PickleError, PicklingError, UnpicklingError
+
+BadPickleGet = KeyError
+UnpickleableError = PicklingError
+
+# These are purely informational; no code uses these.
+format_version = "2.0"                  # File format version we write
+compatible_formats = ["1.0",            # Original protocol 0
+                      "1.1",            # Protocol 0 with INST added
+                      "1.2",            # Original protocol 1
+                      "1.3",            # Protocol 1 with BINFLOAT added
+                      "2.0",            # Protocol 2
+                      ]                 # Old format versions we can read
@@ -0,0 +1,854 @@
+from rpython.rlib import objectmodel
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rstruct.ieee import float_pack
+from pypy.interpreter import gateway, unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.__builtin__.interp_classobj import W_InstanceObject
+from pypy.module.cStringIO.interp_stringio import W_OutputType
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+
+
+HIGHEST_PROTOCOL = 2
+
+# the opcodes of protocols 0 to 2, see pickletools.py
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+# number of items written by a single APPENDS or SETITEMS
+BATCHSIZE = 1000
+
+# when pickling to a file, the data is written to it in chunks of about
+# this size
+FLUSH_SIZE = 65536
+
+HEXDIGITS = '0123456789abcdef'
+
+
+def append_int32(builder, value):
+    builder.append(chr(value & 0xff))
+    builder.append(chr((value >> 8) & 0xff))
+    builder.append(chr((value >> 16) & 0xff))
+    builder.append(chr((value >> 24) & 0xff))
+
+def append_raw_unicode_escape(builder, uni):
+    # like uni.encode('raw-unicode-escape'), but also escaping the
+    # backslashes and newlines, which the UNICODE opcode cannot contain
+    for ch in uni:
+        code = ord(ch)
+        if code >= 0x10000:
+            builder.append('\\U')
+            ndigits = 8
+        elif code >= 0x100 or ch == u'\\' or ch == u'\n':
+            builder.append('\\u')
+            ndigits = 4
+        else:
+            builder.append(chr(code))
+            continue
+        while ndigits > 0:
+            ndigits -= 1
+            builder.append(HEXDIGITS[(code >> (ndigits * 4)) & 0xf])
+
+def encode_long(bigint):
+    # like pickle.encode_long(): the shortest two's complement
+    # little-endian representation, or '' for 0
+    if bigint.sign == 0:
+        return ''
+    nbytes = (bigint.abs().bit_length() >> 3) + 1
+    data = bigint.tobytes(nbytes, 'little', True)
+    if (bigint.sign < 0 and nbytes > 1 and data[nbytes - 1] == '\xff' and
+            ord(data[nbytes - 2]) & 0x80):
+        end = nbytes - 1
+        assert end >= 0
+        data = data[:end]
+    return data
+
+@objectmodel.dont_inline
+def pickling_error(space, msg):
+    w_module = space.getbuiltinmodule('cPickle')
+    w_error = space.getattr(w_module, space.newtext('PicklingError'))
+    return OperationError(w_error, space.newtext(msg))
+
+
+app = gateway.applevel('''
+    from types import (ClassType, FunctionType, BuiltinFunctionType,
+                       TypeType, TupleType, StringType)
+    import sys
+
+    def reduce_value(obj, proto):
+        """Return None if obj must be pickled as a global, or else the
+        result of reducing obj: a string or a tuple of 2 to 5 items."""
+        from copy_reg import dispatch_table
+        from pickle import PicklingError
+        t = type(obj)
+        if (t is ClassType or t is FunctionType or
+                t is BuiltinFunctionType or t is TypeType):
+            return None
+        reduce = dispatch_table.get(t)
+        if reduce:
+            rv = reduce(obj)
+        else:
+            if issubclass(t, TypeType):
+                return None
+            reduce = getattr(obj, "__reduce_ex__", None)
+            if reduce:
+                rv = reduce(proto)
+            else:
+                reduce = getattr(obj, "__reduce__", None)
+                if reduce:
+                    rv = reduce()
+                else:
+                    raise PicklingError("Can't pickle %r object: %r" %
+                                        (t.__name__, obj))
+        if type(rv) is StringType:
+            return rv
+        if type(rv) is not TupleType:
+            raise PicklingError("%s must return string or tuple" % reduce)
+        if not (2 <= len(rv) <= 5):
+            raise PicklingError("Tuple returned by %s must have "
+                                "two to five elements" % reduce)
+        return rv
+
+    def global_name(obj, name, proto):
+        """Return (module, name, extension code or 0) to pickle obj
+        as a global."""
+        from copy_reg import _extension_registry
+        from pickle import PicklingError, whichmodule
+        if name is None:
+            name = obj.__name__
+        module = getattr(obj, "__module__", None)
+        if module is None:
+            module = whichmodule(obj, name)
+        try:
+            __import__(module)
+            mod = sys.modules[module]
+            klass = getattr(mod, name)
+        except (ImportError, KeyError, AttributeError):
+            raise PicklingError(
+                "Can't pickle %r: it's not found as %s.%s" %
+                (obj, module, name))
+        if klass is not obj:
+            raise PicklingError(
+                "Can't pickle %r: it's not the same object as %s.%s" %
+                (obj, module, name))
+        code = 0
+        if proto >= 2:
+            code = _extension_registry.get((module, name), 0)
+        return module, name, code
+
+    def inst_reduce(obj):
+        """Return (class, initargs, state) for an old-style instance."""
+        cls = obj.__class__
+        if hasattr(obj, '__getinitargs__'):
+            args = tuple(obj.__getinitargs__())
+        else:
+            args = ()
+        try:
+            getstate = obj.__getstate__
+        except AttributeError:
+            state = obj.__dict__
+        else:
+            state = getstate()
+        return cls, args, state
+''', filename=__file__)
+
+reduce_value = app.interphook('reduce_value')
+global_name = app.interphook('global_name')
+inst_reduce = app.interphook('inst_reduce')
+
+
+class W_Pickler(W_Root):
+    def __init__(self, space, w_file, proto):
+        self.space = space
+        self.proto = proto
+        self.fast = False
+        self.w_persistent_id = None
+        # {W_Root: memo index}, by identity.  Following cPickle, the
+        # indices start at 1.
+        self.memo = {}
+        # objects that must stay alive while they are in the memo
+        self.keepalive_w = []
+        self.builder = StringBuilder()
+        self.w_file = w_file
+        self.w_write = None
+        if w_file is not None and not isinstance(w_file, W_OutputType):
+            self.w_write = space.findattr(w_file, space.newtext('write'))
+            if self.w_write is None:
+                raise oefmt(space.w_TypeError,
+                            "argument must have 'write' attribute")
+
+    def flush(self):
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        if isinstance(self.w_file, W_OutputType):
+            self.w_file.check_closed()
+            self.w_file.write(data)
+        else:
+            self.space.call_function(self.w_write, self.space.newbytes(data))
+
+    def dump(self, w_obj):
+        "Write a pickled representation of obj to the open file."
+        space = self.space
+        self.w_persistent_id = space.findattr(self,
+                                              space.newtext('persistent_id'))
+        if space.is_w(self.w_persistent_id, space.w_None):
+            self.w_persistent_id = None
+        if self.proto >= 2:
+            self.builder.append(PROTO)
+            self.builder.append(chr(self.proto))
+        self.save(w_obj)
+        self.builder.append(STOP)
+        if self.w_file is not None:
+            self.flush()
+
+    def clear_memo(self):
+        "Clear the picklers's memo."
+        self.memo.clear()
+        del self.keepalive_w[:]
+
+    @unwrap_spec(clear=int)
+    def getvalue(self, clear=1):
+        "Return the data written so far, if the pickler has no file."
+        space = self.space
+        if self.w_file is not None:
+            raise oefmt(space.w_TypeError,
+                        "Attempt to getvalue() a non-list-based pickler")
+        data = self.builder.build()
+        if clear:
+            self.builder = StringBuilder()
+        return space.newbytes(data)
+
+    # ____________________________________________________________
+
+    def memoize(self, w_obj):
+        if self.fast:
+            return
+        index = len(self.memo) + 1
+        self.memo[w_obj] = index
+        self.write_memo_opcode(PUT, BINPUT, LONG_BINPUT, index)
+
+    def write_get(self, index):
+        self.write_memo_opcode(GET, BINGET, LONG_BINGET, index)
+
+    def write_memo_opcode(self, textop, shortop, longop, index):
+        builder = self.builder
+        if self.proto == 0:
+            builder.append(textop)
+            builder.append(str(index))
+            builder.append('\n')
+        elif index < 256:
+            builder.append(shortop)
+            builder.append(chr(index))
+        else:
+            builder.append(longop)
+            append_int32(builder, index)
+
+    def save(self, w_obj):
+        space = self.space
+        if self.w_write is not None and self.builder.getlength() >= FLUSH_SIZE:
+            self.flush()
+        #
+        if self.w_persistent_id is not None:
+            w_pid = space.call_function(self.w_persistent_id, w_obj)
+            if not space.is_w(w_pid, space.w_None):
+                self.save_pers(w_pid)
+                return
+        #
+        w_type = space.type(w_obj)
+        if w_type is space.w_int:
+            self.save_int(space.int_w(w_obj))
+            return
+        if w_type is space.w_float:
+            self.save_float(w_obj)
+            return
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append(NONE)
+            return
+        if w_type is space.w_bool:
+            self.save_bool(space.is_true(w_obj))
+            return
+        if w_type is space.w_long:
+            self.save_long(w_obj)
+            return
+        #
+        if not self.fast:
+            index = self.memo.get(w_obj, 0)
+            if index != 0:
+                self.write_get(index)
+                return
+        #
+        if w_type is space.w_bytes:
+            self.save_bytes(w_obj)
+        elif w_type is space.w_unicode:
+            self.save_unicode(w_obj)
+        elif w_type is space.w_tuple:
+            self.save_tuple(w_obj)
+        elif w_type is space.w_list:
+            self.save_list(w_obj)
+        elif w_type is space.w_dict:
+            self.save_dict(w_obj)
+        elif isinstance(w_obj, W_InstanceObject):
+            self.save_inst(w_obj)
+        else:
+            self.save_reduce_value(w_obj)
+
+    def save_pers(self, w_pid):
+        if self.proto == 0:
+            space = self.space
+            self.builder.append(PERSID)
+            self.builder.append(space.text_w(space.str(w_pid)))
+            self.builder.append('\n')
+        else:
+            self.save(w_pid)
+            self.builder.append(BINPERSID)
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            self.builder.append(NEWTRUE if value else NEWFALSE)
+        else:
+            self.builder.append('I01\n' if value else 'I00\n')
+
+    def save_int(self, value):
+        builder = self.builder
+        if self.proto > 0:
+            if 0 <= value <= 0xff:
+                builder.append(BININT1)
+                builder.append(chr(value))
+                return
+            if 0 <= value <= 0xffff:
+                builder.append(BININT2)
+                builder.append(chr(value & 0xff))
+                builder.append(chr(value >> 8))
+                return
+            high_bits = value >> 31
+            if high_bits == 0 or high_bits == -1:
+                builder.append(BININT)
+                append_int32(builder, value)
+                return
+        builder.append(INT)
+        builder.append(str(value))
+        builder.append('\n')
+
+    def save_long(self, w_obj):
+        bigint = self.space.bigint_w(w_obj)
+        builder = self.builder
+        if self.proto >= 2:
+            data = encode_long(bigint)
+            if len(data) < 256:
+                builder.append(LONG1)
+                builder.append(chr(len(data)))
+            else:
+                builder.append(LONG4)
+                append_int32(builder, len(data))
+            builder.append(data)
+        else:
+            builder.append(LONG)
+            builder.append(bigint.str())
+            builder.append('L\n')
+
+    def save_float(self, w_obj):
+        space = self.space
+        builder = self.builder
+        if self.proto > 0:
+            value = float_pack(space.float_w(w_obj), 8)
+            builder.append(BINFLOAT)
+            for i in range(7, -1, -1):
+                builder.append(chr(intmask((value >> (i * 8)) & 0xff)))
+        else:
+            builder.append(FLOAT)
+            builder.append(space.text_w(space.repr(w_obj)))
+            builder.append('\n')
+
+    def save_bytes(self, w_obj):
+        space = self.space
+        builder = self.builder
+        if self.proto > 0:
+            s = space.bytes_w(w_obj)
+            if len(s) < 256:
+                builder.append(SHORT_BINSTRING)
+                builder.append(chr(len(s)))
+            else:
+                builder.append(BINSTRING)
+                append_int32(builder, len(s))
+            builder.append(s)
+        else:
+            builder.append(STRING)
+            builder.append(space.text_w(space.repr(w_obj)))
+            builder.append('\n')
+        if space.len_w(w_obj) > 1:     # like cPickle
+            self.memoize(w_obj)
+
+    def save_unicode(self, w_obj):
+        space = self.space
+        uni = space.unicode_w(w_obj)
+        builder = self.builder
+        if self.proto > 0:
+            s = unicodehelper.encode_utf8(space, uni)
+            builder.append(BINUNICODE)
+            append_int32(builder, len(s))
+            builder.append(s)
+        else:
+            builder.append(UNICODE)
+            append_raw_unicode_escape(builder, uni)
+            builder.append('\n')
+        self.memoize(w_obj)
+
+    def save_tuple(self, w_tuple):
+        space = self.space
+        items_w = space.fixedview(w_tuple)
+        n = len(items_w)
+        if n == 0:
+            if self.proto > 0:
+                self.builder.append(EMPTY_TUPLE)
+            else:
+                self.builder.append(MARK)
+                self.builder.append(TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            # subtle: the tuple may have been memoized while saving its
+            # items, if it is recursive
+            index = self.memo.get(w_tuple, 0)
+            if index != 0:
+                self.builder.append_multiple_char(POP, n)
+                self.write_get(index)
+            else:
+                self.builder.append(TUPLESIZE2CODE[n])
+                self.memoize(w_tuple)
+            return
+        self.builder.append(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_tuple, 0)
+        if index != 0:
+            if self.proto > 0:
+                self.builder.append(POP_MARK)
+            else:
+                self.builder.append_multiple_char(POP, n + 1)
+            self.write_get(index)
+        else:
+            self.builder.append(TUPLE)
+            self.memoize(w_tuple)
+
+    def save_list(self, w_list):
+        if self.proto > 0:
+            self.builder.append(EMPTY_LIST)
+        else:
+            self.builder.append(MARK)
+            self.builder.append(LIST)
+        self.memoize(w_list)
+        if self.w_persistent_id is None:
+            # fast path: a list of ints does not run any app-level code
+            # while it is saved, so it cannot change
+            intlist = self.space.listview_int(w_list)
+            if intlist is not None:
+                self.batch_appends_int(intlist)
+                return
+        self.batch_appends_list(w_list)
+
+    def batch_appends_int(self, intlist):
+        builder = self.builder
+        if self.proto == 0:
+            for value in intlist:
+                self.save_int(value)
+                builder.append(APPEND)
+            return
+        start = 0
+        while start < len(intlist):
+            stop = min(start + BATCHSIZE, len(intlist))
+            if stop - start == 1:
+                self.save_int(intlist[start])
+                builder.append(APPEND)
+            else:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save_int(intlist[i])
+                builder.append(APPENDS)
+            start = stop
+            if self.w_write is not None and builder.getlength() >= FLUSH_SIZE:
+                self.flush()
+                builder = self.builder
+
+    def batch_appends_list(self, w_list):
+        # the list can be modified by the app-level code that we call,
+        # so like pickle.py, we save the items that it contains when we
+        # reach them
+        space = self.space
+        i = 0
+        if self.proto == 0:
+            while i < space.len_w(w_list):
+                self.save(space.getitem(w_list, space.newint(i)))
+                self.builder.append(APPEND)
+                i += 1
+            return
+        while i < space.len_w(w_list):
+            stop = min(i + BATCHSIZE, space.len_w(w_list))
+            if stop - i == 1:
+                self.save(space.getitem(w_list, space.newint(i)))
+                self.builder.append(APPEND)
+                i += 1
+            else:
+                self.builder.append(MARK)
+                while i < stop and i < space.len_w(w_list):
+                    self.save(space.getitem(w_list, space.newint(i)))
+                    i += 1
+                self.builder.append(APPENDS)
+
+    def batch_appends_iter(self, w_iter):
+        while True:
+            items_w = []
+            while len(items_w) < BATCHSIZE:
+                w_item = self.next_or_none(w_iter)
+                if w_item is None:
+                    break
+                items_w.append(w_item)
+            self.write_appends(items_w)
+            if len(items_w) < BATCHSIZE:
+                break
+
+    def write_appends(self, items_w):
+        if self.proto == 0 or len(items_w) == 1:
+            for w_item in items_w:
+                self.save(w_item)
+                self.builder.append(APPEND)
+        elif len(items_w) > 1:
+            self.builder.append(MARK)
+            for w_item in items_w:
+                self.save(w_item)
+            self.builder.append(APPENDS)
+
+    def next_or_none(self, w_iter):
+        space = self.space
+        try:
+            return space.next(w_iter)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            return None
+
+    def save_dict(self, w_dict):
+        assert isinstance(w_dict, W_DictMultiObject)
+        if self.proto > 0:
+            self.builder.append(EMPTY_DICT)
+        else:
+            self.builder.append(MARK)
+            self.builder.append(DICT)
+        self.memoize(w_dict)
+        iteritems = w_dict.iteritems()
+        while True:
+            items_w = []     # keys and values, alternating
+            while len(items_w) < 2 * BATCHSIZE:
+                w_key, w_value = iteritems.next_item()
+                if w_key is None:
+                    break
+                items_w.append(w_key)
+                items_w.append(w_value)
+            self.write_setitems(items_w)
+            if len(items_w) < 2 * BATCHSIZE:
+                break
+
+    def batch_setitems_iter(self, w_iter):
+        space = self.space
+        while True:
+            items_w = []
+            while len(items_w) < 2 * BATCHSIZE:
+                w_item = self.next_or_none(w_iter)
+                if w_item is None:
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                items_w.append(w_key)
+                items_w.append(w_value)
+            self.write_setitems(items_w)
+            if len(items_w) < 2 * BATCHSIZE:
+                break
+
+    def write_setitems(self, items_w):
+        if self.proto == 0 or len(items_w) == 2:
+            for i in range(0, len(items_w), 2):
+                self.save(items_w[i])
+                self.save(items_w[i + 1])
+                self.builder.append(SETITEM)
+        elif len(items_w) > 2:
+            self.builder.append(MARK)
+            for w_item in items_w:
+                self.save(w_item)
+            self.builder.append(SETITEMS)
+
+    def save_inst(self, w_obj):
+        space = self.space
+        w_result = inst_reduce(space, w_obj)
+        w_cls, w_args, w_state = space.fixedview(w_result, 3)
+        self.keepalive_w.append(w_args)
+        args_w = space.fixedview(w_args)
+        self.builder.append(MARK)
+        if self.proto > 0:
+            self.save(w_cls)
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.builder.append(OBJ)
+        else:
+            for w_arg in args_w:
+                self.save(w_arg)
+            w_module = space.getattr(w_cls, space.newtext('__module__'))
+            w_name = space.getattr(w_cls, space.newtext('__name__'))
+            self.builder.append(INST)
+            self.builder.append(space.text_w(w_module))
+            self.builder.append('\n')
+            self.builder.append(space.text_w(w_name))
+            self.builder.append('\n')
+        self.memoize(w_obj)
+        self.keepalive_w.append(w_state)
+        self.save(w_state)
+        self.builder.append(BUILD)
+
+    def save_global(self, w_obj, w_name):
+        space = self.space
+        w_result = global_name(space, w_obj, w_name, space.newint(self.proto))
+        w_module, w_name, w_code = space.fixedview(w_result, 3)
+        code = space.int_w(w_code)
+        builder = self.builder
+        if code > 0:
+            if code <= 0xff:
+                builder.append(EXT1)
+                builder.append(chr(code))
+            elif code <= 0xffff:
+                builder.append(EXT2)
+                builder.append(chr(code & 0xff))
+                builder.append(chr(code >> 8))
+            else:
+                builder.append(EXT4)
+                append_int32(builder, code)
+            return
+        builder.append(GLOBAL)
+        builder.append(space.text_w(w_module))
+        builder.append('\n')
+        builder.append(space.text_w(w_name))
+        builder.append('\n')
+        self.memoize(w_obj)
+
+    def save_reduce_value(self, w_obj):
+        space = self.space
+        w_rv = reduce_value(space, w_obj, space.newint(self.proto))
+        if space.is_w(w_rv, space.w_None):
+            self.save_global(w_obj, space.w_None)
+        elif space.isinstance_w(w_rv, space.w_bytes):
+            self.save_global(w_obj, w_rv)
+        else:
+            rv_w = space.fixedview(w_rv)
+            w_state = w_listitems = w_dictitems = None
+            if len(rv_w) > 2:
+                w_state = rv_w[2]
+            if len(rv_w) > 3:
+                w_listitems = rv_w[3]
+            if len(rv_w) > 4:
+                w_dictitems = rv_w[4]
+            self.save_reduce(rv_w[0], rv_w[1], w_state, w_listitems,
+                             w_dictitems, w_obj)
+
+    def save_reduce(self, w_func, w_args, w_state, w_listitems, w_dictitems,
+                    w_obj):
+        space = self.space
+        if not space.isinstance_w(w_args, space.w_tuple):
+            raise pickling_error(space, "args from reduce() should be a tuple")
+        if space.findattr(w_func, space.newtext('__call__')) is None:
+            raise pickling_error(space, "func from reduce should be callable")
+        if self.proto >= 2 and self.is_newobj(w_func):
+            args_w = space.fixedview(w_args)
+            if len(args_w) == 0:
+                raise oefmt(space.w_IndexError, "tuple index out of range")
+            w_cls = args_w[0]
+            if space.findattr(w_cls, space.newtext('__new__')) is None:
+                raise pickling_error(space,
+                                     "args[0] from __newobj__ args has no "
+                                     "__new__")
+            if not space.is_w(w_cls, space.getattr(w_obj,
+                                                   space.newtext('__class__'))):
+                raise pickling_error(space,
+                                     "args[0] from __newobj__ args has the "
+                                     "wrong class")
+            self.save(w_cls)
+            self.save(space.newtuple(args_w[1:]))
+            self.builder.append(NEWOBJ)
+        else:
+            self.save(w_func)
+            self.save(w_args)
+            self.builder.append(REDUCE)
+        #
+        # if the object is already in the memo, it is recursive: throw
+        # away what we put on the stack and fetch it back from the memo
+        index = self.memo.get(w_obj, 0)
+        if index != 0:
+            self.builder.append(POP)
+            self.write_get(index)
+        else:
+            self.memoize(w_obj)
+        #
+        if w_listitems is not None and not space.is_w(w_listitems,
+                                                      space.w_None):
+            self.batch_appends_iter(space.iter(w_listitems))
+        if w_dictitems is not None and not space.is_w(w_dictitems,
+                                                      space.w_None):
+            self.batch_setitems_iter(space.iter(w_dictitems))
+        if w_state is not None and not space.is_w(w_state, space.w_None):
+            self.save(w_state)
+            self.builder.append(BUILD)
+
+    def is_newobj(self, w_func):
+        space = self.space
+        w_name = space.findattr(w_func, space.newtext('__name__'))
+        return (w_name is not None and
+                space.isinstance_w(w_name, space.w_bytes) and
+                space.bytes_w(w_name) == '__newobj__')
+
+    # ____________________________________________________________
+
+    def get_persistent_id(self, space):
+        if self.w_persistent_id is None:
+            raise oefmt(space.w_AttributeError, "persistent_id")
+        return self.w_persistent_id
+
+    def set_persistent_id(self, space, w_value):
+        self.w_persistent_id = w_value
+
+    def get_fast(self, space):
+        return space.newint(int(self.fast))
+
+    def set_fast(self, space, w_value):
+        self.fast = space.is_true(w_value)
+
+    def get_binary(self, space):
+        return space.newint(int(self.proto > 0))
+
+    def get_memo(self, space):
+        w_memo = space.newdict()
+        for w_obj, index in self.memo.items():
+            space.setitem(w_memo, space.id(w_obj),
+                          space.newtuple([space.newint(index), w_obj]))
+        return w_memo
+
+
+def check_protocol(space, w_protocol):
+    if space.is_none(w_protocol):
+        return 0
+    proto = space.int_w(w_protocol)
+    if proto < 0:
+        return HIGHEST_PROTOCOL
+    if proto > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError, "pickle protocol must be <= %d",
+                    HIGHEST_PROTOCOL)
+    return proto
+
+def descr_new_pickler(space, w_subtype, w_file=None, w_protocol=None):
+    """Pickler(file, protocol=0) -- Create a pickler.
+
+This takes a file-like object for writing a pickle data stream.
+The optional proto argument tells the pickler to use the given
+protocol; supported protocols are 0, 1, 2.  The default
+protocol is 0, to be backwards compatible.  (Protocol 0 is the
+only protocol that can be written to a file opened in text
+mode and read back successfully.  When using a protocol higher
+than 0, make sure the file is opened in binary mode, both when
+pickling and unpickling.)
+
+If the file argument is omitted or is an int, the data is kept and
+returned by getvalue().
+"""
+    if w_file is not None and w_protocol is None and (
+            space.isinstance_w(w_file, space.w_int) or
+            space.is_w(w_file, space.w_None)):
+        w_protocol = w_file
+        w_file = None
+    if w_file is not None and space.is_w(w_file, space.w_None):
+        w_file = None
+    proto = check_protocol(space, w_protocol)
+    w_self = space.allocate_instance(W_Pickler, w_subtype)
+    W_Pickler.__init__(space.interp_w(W_Pickler, w_self), space, w_file,
+                       proto)
+    return w_self
+
+W_Pickler.typedef = TypeDef("Pickler",
+    __module__ = "cPickle",
+    __new__ = interp2app(descr_new_pickler),
+    __doc__ = descr_new_pickler.__doc__,
+    dump = interp2app(W_Pickler.dump),
+    clear_memo = interp2app(W_Pickler.clear_memo),
+    getvalue = interp2app(W_Pickler.getvalue),
+    persistent_id = GetSetProperty(W_Pickler.get_persistent_id,
+                                   W_Pickler.set_persistent_id),
+    fast = GetSetProperty(W_Pickler.get_fast, W_Pickler.set_fast),
+    binary = GetSetProperty(W_Pickler.get_binary),
+    memo = GetSetProperty(W_Pickler.get_memo),
+)
+
+
+@unwrap_spec(w_protocol=WrappedDefault(None))
+def dump(space, w_obj, w_file, w_protocol):
+    """dump(obj, file, protocol=0) -- Write an object in pickle format to
+the given file."""
+    pickler = W_Pickler(space, w_file, check_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+
+@unwrap_spec(w_protocol=WrappedDefault(None))
+def dumps(space, w_obj, w_protocol):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+pickle format."""
+    pickler = W_Pickler(space, None, check_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+    return space.newbytes(pickler.builder.build())
@@ -0,0 +1,605 @@
+from rpython.rlib import objectmodel
+from rpython.rlib.rarithmetic import string_to_int
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rfloat import string_to_float
+from rpython.rlib.rstring import ParseStringError, ParseStringOverflowError
+from rpython.rlib.rstruct.ieee import unpack_float
+from pypy.interpreter import gateway, unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.cStringIO.interp_stringio import W_InputType
+from pypy.module.cPickle.interp_pickle import HIGHEST_PROTOCOL
+from pypy.module.cPickle import interp_pickle as op
+
+
+@objectmodel.dont_inline
+def unpickling_error(space, msg):
+    w_module = space.getbuiltinmodule('cPickle')
+    w_error = space.getattr(w_module, space.newtext('UnpicklingError'))
+    return OperationError(w_error, space.newtext(msg))
+
+def eof_error(space):
+    return OperationError(space.w_EOFError, space.w_None)
+
+
+app = gateway.applevel('''
+    from types import ClassType
+    import sys
+
+    def find_global(module, name):
+        __import__(module)
+        mod = sys.modules[module]
+        return getattr(mod, name)
+
+    def instantiate(klass, args):
+        from pickle import _EmptyClass
+        if (not args and type(klass) is ClassType and
+                not hasattr(klass, "__getinitargs__")):
+            value = _EmptyClass()
+            value.__class__ = klass
+            return value
+        try:
+            return klass(*args)
+        except TypeError, err:
+            raise TypeError, "in constructor for %s: %s" % (
+                klass.__name__, str(err)), sys.exc_info()[2]
+
+    def get_extension(code):
+        """Return (obj, None) if the extension code is in the cache, and
+        (None, (module, name)) otherwise."""
+        from copy_reg import _inverted_registry, _extension_cache
+        nil = []
+        obj = _extension_cache.get(code, nil)
+        if obj is not nil:
+            return obj, None
+        key = _inverted_registry.get(code)
+        if not key:
+            raise ValueError("unregistered extension code %d" % code)
+        return None, key
+
+    def cache_extension(code, obj):
+        from copy_reg import _extension_cache
+        _extension_cache[code] = obj
+''', filename=__file__)
+
+find_global = app.interphook('find_global')
+instantiate = app.interphook('instantiate')
+get_extension = app.interphook('get_extension')
+cache_extension = app.interphook('cache_extension')
+
+
+class Reader(object):
+    """Abstract base class: where the Unpickler reads the pickle from."""
+
+    def read(self, n):
+        "Return exactly n bytes, or raise EOFError."
+        raise NotImplementedError
+
+    def readline(self):
+        "Return a line, without its final newline, or raise EOFError."
+        raise NotImplementedError
+
+    def readchar(self):
+        return self.read(1)[0]
+
+    def done(self):
+        pass
+
+
+class StringReader(Reader):
+    """Parses the pickle directly from a string."""
+
+    def __init__(self, space, data, pos=0):
+        self.space = space
+        self.data = data
+        self.pos = pos
+
+    def read(self, n):
+        pos = self.pos
+        end = pos + n
+        if end > len(self.data):
+            self.pos = len(self.data)
+            raise eof_error(self.space)
+        self.pos = end
+        assert pos >= 0
+        return self.data[pos:end]
+
+    def readline(self):
+        pos = self.pos
+        end = self.data.find('\n', pos)
+        if end < 0:
+            self.pos = len(self.data)
+            raise eof_error(self.space)
+        self.pos = end + 1
+        assert pos >= 0
+        return self.data[pos:end]
+
+    def readchar(self):
+        pos = self.pos
+        if pos >= len(self.data):
+            raise eof_error(self.space)
+        self.pos = pos + 1
+        return self.data[pos]
+
+
+class StringIOReader(StringReader):
+    """Parses the pickle directly from the string of a cStringIO input
+    object, and updates its position when done."""
+
+    def __init__(self, space, w_file):
+        w_file.check_closed()
+        pos = min(w_file.pos, len(w_file.string))
+        StringReader.__init__(self, space, w_file.string, pos)
+        self.w_file = w_file
+
+    def done(self):
+        self.w_file.pos = self.pos
+
+
+class FileReader(Reader):
+    """Calls the read() and readline() methods of a file-like object."""
+
+    def __init__(self, space, w_read, w_readline):
+        self.space = space
+        self.w_read = w_read
+        self.w_readline = w_readline
+
+    def read(self, n):
+        space = self.space
+        data = space.bytes_w(space.call_function(self.w_read,
+                                                 space.newint(n)))
+        if len(data) < n:
+            raise eof_error(space)
+        return data
+
+    def readline(self):
+        space = self.space
+        data = space.bytes_w(space.call_function(self.w_readline))
+        if not data.endswith('\n'):
+            raise eof_error(space)
+        end = len(data) - 1
+        assert end >= 0
+        return data[:end]
+
+
+def make_reader(space, w_file):
+    if isinstance(w_file, W_InputType):
+        return StringIOReader(space, w_file)
+    w_read = space.findattr(w_file, space.newtext('read'))
+    w_readline = space.findattr(w_file, space.newtext('readline'))
+    if w_read is None or w_readline is None:
+        raise oefmt(space.w_TypeError,
+                    "argument must have 'read' and 'readline' attributes")
+    return FileReader(space, w_read, w_readline)
+
+
+def decode_int32(s):
+    high = ord(s[3])
+    if high >= 0x80:
+        high -= 0x100
+    return ord(s[0]) | (ord(s[1]) << 8) | (ord(s[2]) << 16) | (high << 24)
+
+
+class W_Unpickler(W_Root):
+    def __init__(self, space, reader):
+        self.space = space
+        self.reader = reader
+        self.memo = {}              # {index: W_Root}
+        self.stack_w = []
+        self.marks = []             # the positions of the marks in stack_w
+        self.w_find_global = None
+        self.w_persistent_load = None
+
+    def load(self):
+        """Read a pickled object representation from the open file.
+
+Return the reconstituted object hierarchy specified in the file."""
+        space = self.space
+        # look up these attributes only once, but still allow them to be
+        # overridden in a subclass
+        self.w_find_global = space.findattr(self, space.newtext('find_global'))
+        self.w_persistent_load = space.findattr(
+            self, space.newtext('persistent_load'))
+        self.stack_w = []
+        self.marks = []
+        try:
+            self.load_loop()
+        finally:
+            self.reader.done()
+        return self.pop()
+
+    def load_loop(self):
+        reader = self.reader
+        while True:
+            opcode = reader.readchar()
+            if opcode == op.STOP:
+                break
+            self.dispatch(opcode)
+
+    # ____________________________________________________________
+    # the stack
+
+    def push(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if len(self.stack_w) <= self.marker_limit():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if len(self.stack_w) <= self.marker_limit():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def settop(self, w_obj):
+        self.stack_w[-1] = w_obj
+
+    def marker_limit(self):
+        if self.marks:
+            return self.marks[-1]
+        return 0
+
+    def pop_mark(self):
+        "Remove the topmost mark and return the items above it."
+        if not self.marks:
+            raise unpickling_error(self.space, "could not find MARK")
+        k = self.marks.pop()
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    def pop_items(self, n):
+        stop = len(self.stack_w)
+        start = stop - n
+        if start < self.marker_limit():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        assert start >= 0
+        items_w = self.stack_w[start:stop]
+        del self.stack_w[start:stop]
+        return items_w
+
+    # ____________________________________________________________
+
+    def dispatch(self, opcode):
+        space = self.space
+        reader = self.reader
+        if opcode == op.BINPUT:
+            self.memo[ord(reader.readchar())] = self.top()
+        elif opcode == op.BINGET:
+            self.load_get(ord(reader.readchar()))
+        elif opcode == op.BININT1:
+            self.push(space.newint(ord(reader.readchar())))
+        elif opcode == op.BININT2:
+            s = reader.read(2)
+            self.push(space.newint(ord(s[0]) | (ord(s[1]) << 8)))
+        elif opcode == op.BININT:
+            self.push(space.newint(decode_int32(reader.read(4))))
+        elif opcode == op.SHORT_BINSTRING:
+            n = ord(reader.readchar())
+            self.push(space.newbytes(reader.read(n)))
+        elif opcode == op.BINSTRING:
+            n = decode_int32(reader.read(4))
+            if n < 0:
+                raise unpickling_error(space, "BINSTRING pickle has negative "
+                                              "byte count")
+            self.push(space.newbytes(reader.read(n)))
+        elif opcode == op.BINUNICODE:
+            n = decode_int32(reader.read(4))
+            if n < 0:
+                raise unpickling_error(space, "BINUNICODE pickle has "
+                                              "negative byte count")
+            data = reader.read(n)
+            self.push(space.newunicode(unicodehelper.decode_utf8(space,
+                                                                 data)))
+        elif opcode == op.BINFLOAT:
+            self.push(space.newfloat(unpack_float(reader.read(8), True)))
+        elif opcode == op.NONE:
+            self.push(space.w_None)
+        elif opcode == op.NEWTRUE:
+            self.push(space.w_True)
+        elif opcode == op.NEWFALSE:
+            self.push(space.w_False)
+        elif opcode == op.MARK:
+            self.marks.append(len(self.stack_w))
+        elif opcode == op.EMPTY_TUPLE:
+            self.push(space.newtuple([]))
+        elif opcode == op.TUPLE1:
+            self.push(space.newtuple(self.pop_items(1)))
+        elif opcode == op.TUPLE2:
+            self.push(space.newtuple(self.pop_items(2)))
+        elif opcode == op.TUPLE3:
+            self.push(space.newtuple(self.pop_items(3)))
+        elif opcode == op.TUPLE:
+            self.push(space.newtuple(self.pop_mark()))
+        elif opcode == op.EMPTY_LIST:
+            self.push(space.newlist([]))
+        elif opcode == op.LIST:
+            self.push(space.newlist(self.pop_mark()))
+        elif opcode == op.EMPTY_DICT:
+            self.push(space.newdict())
+        elif opcode == op.DICT:
+            items_w = self.pop_mark()
+            w_dict = space.newdict()
+            for i in range(0, len(items_w) - 1, 2):
+                space.setitem(w_dict, items_w[i], items_w[i + 1])
+            self.push(w_dict)
+        elif opcode == op.APPEND:
+            w_item = self.pop()
+            self.append_items(self.top(), [w_item])
+        elif opcode == op.APPENDS:
+            items_w = self.pop_mark()
+            self.append_items(self.top(), items_w)
+        elif opcode == op.SETITEM:
+            w_value = self.pop()
+            w_key = self.pop()
+            space.setitem(self.top(), w_key, w_value)
+        elif opcode == op.SETITEMS:
+            items_w = self.pop_mark()
+            w_dict = self.top()
+            for i in range(0, len(items_w) - 1, 2):
+                space.setitem(w_dict, items_w[i], items_w[i + 1])
+        elif opcode == op.LONG_BINPUT:
+            self.memo[decode_int32(reader.read(4))] = self.top()
+        elif opcode == op.LONG_BINGET:
+            self.load_get(decode_int32(reader.read(4)))
+        elif opcode == op.PUT:
+            self.memo[self.parse_index(reader.readline())] = self.top()
+        elif opcode == op.GET:
+            self.load_get(self.parse_index(reader.readline()))
+        elif opcode == op.LONG1:
+            n = ord(reader.readchar())
+            self.push(self.decode_long(reader.read(n)))
+        elif opcode == op.LONG4:
+            n = decode_int32(reader.read(4))
+            if n < 0:
+                raise unpickling_error(space, "LONG pickle has negative "
+                                              "byte count")
+            self.push(self.decode_long(reader.read(n)))
+        elif opcode == op.INT:
+            self.load_int(reader.readline())
+        elif opcode == op.LONG:
+            w_long = space.call_function(space.w_long,
+                                         space.newbytes(reader.readline()),
+                                         space.newint(0))
+            self.push(w_long)
+        elif opcode == op.FLOAT:
+            self.load_float(reader.readline())
+        elif opcode == op.STRING:
+            self.load_string(reader.readline())
+        elif opcode == op.UNICODE:
+            data = reader.readline()
+            self.push(space.newunicode(
+                unicodehelper.decode_raw_unicode_escape(space, data)))
+        elif opcode == op.GLOBAL:
+            module = reader.readline()
+            name = reader.readline()
+            self.push(self.find_class(module, name))
+        elif opcode == op.REDUCE:
+            w_args = self.pop()
+            w_func = self.top()
+            self.settop(space.call(w_func, w_args))
+        elif opcode == op.NEWOBJ:
+            w_args = self.pop()
+            w_cls = self.top()
+            w_new = space.getattr(w_cls, space.newtext('__new__'))
+            args_w = [w_cls] + space.fixedview(w_args)
+            self.settop(space.call(w_new, space.newtuple(args_w)))
+        elif opcode == op.BUILD:
+            w_state = self.pop()
+            self.load_build(self.top(), w_state)
+        elif opcode == op.OBJ:
+            items_w = self.pop_mark()
+            if len(items_w) == 0:
+                raise unpickling_error(space, "unpickling stack underflow")
+            self.push(instantiate(space, items_w[0],
+                                  space.newtuple(items_w[1:])))
+        elif opcode == op.INST:
+            module = reader.readline()
+            name = reader.readline()
+            w_klass = self.find_class(module, name)
+            self.push(instantiate(space, w_klass,
+                                  space.newtuple(self.pop_mark())))
+        elif opcode == op.EXT1:
+            self.load_extension(ord(reader.readchar()))
+        elif opcode == op.EXT2:
+            s = reader.read(2)
+            self.load_extension(ord(s[0]) | (ord(s[1]) << 8))
+        elif opcode == op.EXT4:
+            self.load_extension(decode_int32(reader.read(4)))
+        elif opcode == op.PERSID:
+            self.push(self.persistent_load(space.newbytes(reader.readline())))
+        elif opcode == op.BINPERSID:
+            w_pid = self.pop()
+            self.push(self.persistent_load(w_pid))
+        elif opcode == op.POP:
+            # the mark stack and the object stack are separate: pop
+            # from the right one
+            if self.marks and self.marks[-1] == len(self.stack_w):
+                self.marks.pop()
+            else:
+                self.pop()
+        elif opcode == op.POP_MARK:
+            self.pop_mark()
+        elif opcode == op.DUP:
+            self.push(self.top())
+        elif opcode == op.PROTO:
+            proto = ord(reader.readchar())
+            if proto > HIGHEST_PROTOCOL:
+                raise oefmt(space.w_ValueError,
+                            "unsupported pickle protocol: %d", proto)
+        else:
+            raise unpickling_error(space, "invalid load key, '%s'." % (
+                opcode,))
+
+    def load_get(self, index):
+        try:
+            w_obj = self.memo[index]
+        except KeyError:
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.newint(index))
+        self.push(w_obj)
+
+    def parse_index(self, line):
+        try:
+            return string_to_int(line)
+        except ParseStringError as e:
+            raise OperationError(self.space.w_ValueError,
+                                 self.space.newtext(e.msg))
+        except ParseStringOverflowError:
+            raise oefmt(self.space.w_ValueError,
+                        "memo index out of range: %s", line)
+
+    def decode_long(self, data):
+        return self.space.newlong_from_rbigint(
+            rbigint.frombytes(data, 'little', True))
+
+    def load_int(self, line):
+        space = self.space
+        if line == '00':
+            self.push(space.w_False)
+        elif line == '01':
+            self.push(space.w_True)
+        else:
+            self.push(space.call_function(space.w_int, space.newbytes(line)))
+
+    def load_float(self, line):
+        try:
+            value = string_to_float(line)
+        except ParseStringError as e:
+            raise OperationError(self.space.w_ValueError,
+                                 self.space.newtext(e.msg))
+        self.push(self.space.newfloat(value))
+
+    def load_string(self, line):
+        space = self.space
+        n = len(line)
+        if n < 2 or line[0] != line[n - 1] or (line[0] != "'" and
+                                               line[0] != '"'):
+            raise oefmt(space.w_ValueError, "insecure string pickle")
+        end = n - 1
+        assert end >= 1
+        w_data = space.newbytes(line[1:end])
+        self.push(space.call_method(w_data, 'decode',
+                                    space.newtext('string-escape')))
+
+    def append_items(self, w_list, items_w):
+        space = self.space
+        if len(items_w) == 1:
+            space.call_method(w_list, 'append', items_w[0])
+        else:
+            space.call_method(w_list, 'extend', space.newlist(items_w))
+
+    def load_build(self, w_inst, w_state):
+        space = self.space
+        w_setstate = space.findattr(w_inst, space.newtext('__setstate__'))
+        if w_setstate is not None:
+            space.call_function(w_setstate, w_state)
+            return
+        w_slotstate = None
+        if (space.isinstance_w(w_state, space.w_tuple) and
+                space.len_w(w_state) == 2):
+            w_state, w_slotstate = space.fixedview(w_state, 2)
+        if space.is_true(w_state):
+            w_dict = space.getattr(w_inst, space.newtext('__dict__'))
+            space.call_method(w_dict, 'update', w_state)
+        if w_slotstate is not None and space.is_true(w_slotstate):
+            w_items = space.call_method(w_slotstate, 'items')
+            for w_item in space.listview(w_items):
+                w_key, w_value = space.fixedview(w_item, 2)
+                space.setattr(w_inst, w_key, w_value)
+
+    def find_class(self, module, name):
+        space = self.space
+        w_module = space.newtext(module)
+        w_name = space.newtext(name)
+        if self.w_find_global is None:
+            return find_global(space, w_module, w_name)
+        if space.is_w(self.w_find_global, space.w_None):
+            raise unpickling_error(space, "Global and instance pickles are "
+                                          "not supported.")
+        return space.call_function(self.w_find_global, w_module, w_name)
+
+    def load_extension(self, code):
+        space = self.space
+        w_result = get_extension(space, space.newint(code))
+        w_obj, w_key = space.fixedview(w_result, 2)
+        if not space.is_w(w_key, space.w_None):
+            w_module, w_name = space.fixedview(w_key, 2)
+            w_obj = self.find_class(space.text_w(w_module),
+                                    space.text_w(w_name))
+            cache_extension(space, space.newint(code), w_obj)
+        self.push(w_obj)
+
+    def persistent_load(self, w_pid):
+        space = self.space
+        if (self.w_persistent_load is None or
+                space.is_w(self.w_persistent_load, space.w_None)):
+            raise unpickling_error(space, "A load persistent id instruction "
+                                   "was encountered, but no persistent_load "
+                                   "function was specified.")
+        return space.call_function(self.w_persistent_load, w_pid)
+
+    # ____________________________________________________________
+
+    def get_find_global(self, space):
+        if self.w_find_global is None:
+            raise oefmt(space.w_AttributeError, "find_global")
+        return self.w_find_global
+
+    def set_find_global(self, space, w_value):
+        self.w_find_global = w_value
+
+    def get_persistent_load(self, space):
+        if self.w_persistent_load is None:
+            raise oefmt(space.w_AttributeError, "persistent_load")
+        return self.w_persistent_load
+
+    def set_persistent_load(self, space, w_value):
+        self.w_persistent_load = w_value
+
+    def get_memo(self, space):
+        w_memo = space.newdict()
+        for index, w_obj in self.memo.items():
+            space.setitem(w_memo, space.newint(index), w_obj)
+        return w_memo
+
+
+def descr_new_unpickler(space, w_subtype, w_file):
+    """Unpickler(file) -- Create an unpickler.
+
+This takes a file-like object for reading a pickle data stream.
+The protocol version of the pickle is detected automatically.
+The file-like object must have two methods, a read() method that
+takes an integer argument, and a readline() method that requires no
+arguments.  Both methods should return a string."""
+    reader = make_reader(space, w_file)
+    w_self = space.allocate_instance(W_Unpickler, w_subtype)
+    W_Unpickler.__init__(space.interp_w(W_Unpickler, w_self), space, reader)
+    return w_self
+
+W_Unpickler.typedef = TypeDef("Unpickler",
+    __module__ = "cPickle",
+    __new__ = interp2app(descr_new_unpickler),
+    __doc__ = descr_new_unpickler.__doc__,
+    load = interp2app(W_Unpickler.load),
+    find_global = GetSetProperty(W_Unpickler.get_find_global,
+                                 W_Unpickler.set_find_global),
+    persistent_load = GetSetProperty(W_Unpickler.get_persistent_load,
+                                     W_Unpickler.set_persistent_load),
+    memo = GetSetProperty(W_Unpickler.get_memo),
+)
+
+
+def load(space, w_file):
+    """load(file) -- Load a pickle from the given file"""
+    unpickler = W_Unpickler(space, make_reader(space, w_file))
+    return unpickler.load()
+
+def loads(space, w_data):
+    """loads(string) -- Load a pickle from the given string"""
+    data = space.getarg_w('s*', w_data).as_str()
+    unpickler = W_Unpickler(space, StringReader(space, data))
+    return unpickler.load()
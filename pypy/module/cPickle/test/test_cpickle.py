@@ -0,0 +1,204 @@
+class AppTestCPickle:
+    spaceconfig = dict(usemodules=['cPickle', 'struct', 'binascii',
+                                   'cStringIO'])
+
+    def setup_class(cls):
+        cls.w_samples = cls.space.appexec([], """():
+            class C:
+                def __init__(self, x):
+                    self.x = x
+                def __eq__(self, other):
+                    return self.__dict__ == other.__dict__
+            import sys, types
+            mod = types.ModuleType('test_cpickle_samples')
+            sys.modules['test_cpickle_samples'] = mod
+            mod.C = C
+            C.__module__ = 'test_cpickle_samples'
+            return [None, True, False, 0, 1, -1, 255, 256, 65535, 65536,
+                    2**31 - 1, -2**31, 2**31, -2**31 - 1, 2**62, 2**63,
+                    -2**63, 2**100, -2**100, 0L, -1L, 255L, 1.5, -0.0,
+                    1e300, '', 'abc', 'x' * 300, 'a\\nb\\\\c\\x00\\xff',
+                    u'', u'abc', u'\\u1234\\n\\\\\\U00012345\\xe9',
+                    (), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4), [], [1, 2],
+                    range(2500), [1.5, 2.5], ['a', 'b'] * 1500, {},
+                    {1: 2}, dict.fromkeys(range(2500), 'x'),
+                    set([1, 2]), frozenset(['a']), 3j,
+                    C, len, C(1), C([C(2)])]
+        """)
+
+    def test_roundtrip(self):
+        import cPickle
+        for proto in range(cPickle.HIGHEST_PROTOCOL + 1):
+            for obj in self.samples:
+                s = cPickle.dumps(obj, proto)
+                obj2 = cPickle.loads(s)
+                assert obj2 == obj, (proto, obj)
+                assert type(obj2) is type(obj)
+
+    def test_compatible_with_pickle(self):
+        import cPickle, pickle
+        for proto in range(cPickle.HIGHEST_PROTOCOL + 1):
+            for obj in self.samples:
+                assert pickle.loads(cPickle.dumps(obj, proto)) == obj
+                assert cPickle.loads(pickle.dumps(obj, proto)) == obj
+
+    def test_same_output_as_cpython(self):
+        import cPickle
+        assert cPickle.dumps(1) == 'I1\n.'
+        assert cPickle.dumps(True) == 'I01\n.'
+        assert cPickle.dumps([1, 'a']) == "(lp1\nI1\naS'a'\na."
+        assert cPickle.dumps([1, 'ab'], 1) == (
+            ']q\x01(K\x01U\x02abq\x02e.')
+        assert cPickle.dumps((1, 2), 2) == '\x80\x02K\x01K\x02\x86q\x01.'
+        assert cPickle.dumps({'a': 1.5}, 2) == (
+            '\x80\x02}q\x01U\x01aG?\xf8\x00\x00\x00\x00\x00\x00s.')
+        assert cPickle.dumps(-1L, 2) == '\x80\x02\x8a\x01\xff.'
+        assert cPickle.dumps(255L, 2) == '\x80\x02\x8a\x02\xff\x00.'
+        assert cPickle.dumps(-256L, 2) == '\x80\x02\x8a\x02\x00\xff.'
+
+    def test_shared_and_recursive(self):
+        import cPickle
+        for proto in range(3):
+            a = [1]
+            b = [a, a]
+            b2 = cPickle.loads(cPickle.dumps(b, proto))
+            assert b2 == b and b2[0] is b2[1]
+            l = []
+            l.append(l)
+            l2 = cPickle.loads(cPickle.dumps(l, proto))
+            assert l2[0] is l2
+            d = {}
+            t = (d, 5)
+            d['t'] = t
+            t2 = cPickle.loads(cPickle.dumps(t, proto))
+            assert t2[0]['t'] is t2
+
+    def test_new_style_instances(self):
+        import cPickle
+        class C(object):
+            pass
+        class D(C):
+            __slots__ = ('a',)
+        class E(C):
+            def __getstate__(self):
+                return 42
+            def __setstate__(self, state):
+                self.state = state
+        import sys, types
+        mod = sys.modules['test_cpickle_mod'] = types.ModuleType('mod')
+        mod.C = C; mod.D = D; mod.E = E
+        C.__module__ = D.__module__ = E.__module__ = 'test_cpickle_mod'
+        try:
+            for proto in range(3):
+                c = C()
+                c.x = [1, 2]
+                c2 = cPickle.loads(cPickle.dumps(c, proto))
+                assert type(c2) is C and c2.x == [1, 2]
+                if proto >= 2:
+                    d = D()
+                    d.a = 5
+                    d.b = 6
+                    d2 = cPickle.loads(cPickle.dumps(d, proto))
+                    assert d2.a == 5 and d2.b == 6
+                e2 = cPickle.loads(cPickle.dumps(E(), proto))
+                assert e2.state == 42
+        finally:
+            del sys.modules['test_cpickle_mod']
+
+    def test_pickler_unpickler_on_files(self):
+        import cPickle, cStringIO, StringIO
+        for cls in [cStringIO.StringIO, StringIO.StringIO]:
+            f = cls()
+            p = cPickle.Pickler(f, 2)
+            p.dump([1, 2])
+            p.dump('abc')
+            cPickle.dump({'x': 1}, f)
+            f = cls(f.getvalue())
+            u = cPickle.Unpickler(f)
+            assert u.load() == [1, 2]
+            assert u.load() == 'abc'
+            assert cPickle.load(f) == {'x': 1}
+            raises(EOFError, cPickle.load, f)
+
+    def test_pickler_memo_across_dumps(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        l = [1]
+        p.dump(l)
+        p.dump(l)
+        assert len(p.memo) == 1
+        u = cPickle.Unpickler(cStringIO.StringIO(f.getvalue()))
+        assert u.load() is u.load()
+        p.clear_memo()
+        assert p.memo == {}
+
+    def test_getvalue(self):
+        import cPickle
+        p = cPickle.Pickler(1)
+        p.dump((1, 2))
+        assert cPickle.loads(p.getvalue()) == (1, 2)
+        import cStringIO
+        raises(TypeError, cPickle.Pickler(cStringIO.StringIO()).getvalue)
+        raises(TypeError, cPickle.Pickler, object())
+
+    def test_persistent_id(self):
+        import cPickle, cStringIO
+        for proto in range(3):
+            f = cStringIO.StringIO()
+            p = cPickle.Pickler(f, proto)
+            p.persistent_id = lambda obj: (str(obj) if isinstance(obj, int)
+                                           else None)
+            p.dump([1, 'a', 2])
+            u = cPickle.Unpickler(cStringIO.StringIO(f.getvalue()))
+            u.persistent_load = lambda pid: 'pid' + pid
+            assert u.load() == ['pid1', 'a', 'pid2']
+            u = cPickle.Unpickler(cStringIO.StringIO(f.getvalue()))
+            raises(cPickle.UnpicklingError, u.load)
+
+    def test_find_global(self):
+        import cPickle, cStringIO
+        s = cPickle.dumps(len)
+        u = cPickle.Unpickler(cStringIO.StringIO(s))
+        u.find_global = lambda module, name: (module, name)
+        assert u.load() == ('__builtin__', 'len')
+        u = cPickle.Unpickler(cStringIO.StringIO(s))
+        u.find_global = None
+        raises(cPickle.UnpicklingError, u.load)
+
+    def test_copy_reg(self):
+        import cPickle, copy_reg
+        class C(object):
+            def __init__(self, x):
+                self.x = x
+        def reduce_c(c):
+            return (complex, (c.x, 0))
+        copy_reg.pickle(C, reduce_c)
+        try:
+            assert cPickle.loads(cPickle.dumps(C(5))) == 5 + 0j
+        finally:
+            del copy_reg.dispatch_table[C]
+        copy_reg.add_extension('__builtin__', 'len', 240)
+        try:
+            s = cPickle.dumps(len, 2)
+            assert s == '\x80\x02\x82\xf0.'
+            assert cPickle.loads(s) is len
+        finally:
+            copy_reg.remove_extension('__builtin__', 'len', 240)
+
+    def test_errors(self):
+        import cPickle
+        raises(cPickle.PicklingError, cPickle.dumps, lambda: 1)
+        raises(ValueError, cPickle.dumps, 1, 3)
+        raises(EOFError, cPickle.loads, '')
+        raises(EOFError, cPickle.loads, 'I1')
+        raises(cPickle.UnpicklingError, cPickle.loads, 'z')
+        raises(cPickle.UnpicklingError, cPickle.loads, '.')
+        raises(cPickle.UnpicklingError, cPickle.loads, 'a.')
+        raises(ValueError, cPickle.loads, "S'abc\n.")
+        raises(ValueError, cPickle.loads, '\x80\x03.')
+        raises(KeyError, cPickle.loads, 'h\x05.')
+        raises(ValueError, cPickle.loads, 'Np99999999999999999999999\n.')
+        raises(ValueError, cPickle.loads, 'g99999999999999999999999\n.')
+        assert issubclass(cPickle.PicklingError, cPickle.PickleError)
+        assert cPickle.BadPickleGet is KeyError
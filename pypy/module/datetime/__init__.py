@@ -0,0 +1,21 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast implementation of the datetime module.  The date, time and
+datetime objects store their fields packed in a few integers; arithmetic,
+comparison, hashing, isoformat(), fromtimestamp() and simple strptime()
+formats are written at interp-level, while the tzinfo methods are always
+called at app-level."""
+
+    appleveldefs = {}
+
+    interpleveldefs = {
+        'timedelta': 'interp_timedelta.W_TimeDelta',
+        'date': 'interp_date.W_Date',
+        'datetime': 'interp_date.W_DateTime',
+        'time': 'interp_time.W_Time',
+        'tzinfo': 'interp_tzinfo.W_TZInfo',
+        'MINYEAR': 'space.newint(1)',
+        'MAXYEAR': 'space.newint(9999)',
+    }
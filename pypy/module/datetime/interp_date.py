@@ -0,0 +1,872 @@
+import math
+import time as pytime
+
+from rpython.rlib.rarithmetic import intmask, ovfcheck_float_to_longlong
+from rpython.rtyper.lltypesystem import lltype, rffi
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, applevel
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.time.interp_time import (
+    c_localtime, _get_error_msg, _get_inttime, _get_module_object)
+from pypy.module.datetime.interp_timedelta import W_TimeDelta, new_timedelta
+from pypy.module.datetime.interp_time import W_Time
+from pypy.module.datetime.interp_tzinfo import (
+    W_TZInfo, NO_OFFSET, check_tzinfo_arg, check_state_tzinfo, call_offset,
+    offset_as_timedelta, call_tzname)
+from pypy.module.datetime import interp_strftime
+from pypy.module.datetime.support import (
+    MAXYEAR, US_PER_SECOND, SECONDS_PER_DAY, MAX_ORDINAL, EPOCH_ORDINAL,
+    MONTHNAMES, DAYNAMES, NOT_COMPARABLE, NOT_IMPLEMENTED,
+    days_before_month, ymd_to_ord, ord_to_ymd, isoweek1monday,
+    normalize_pair, pack_date, unpack_year, unpack_month, unpack_day,
+    pack_hms, unpack_hour, unpack_minute, unpack_second, hms_to_seconds,
+    seconds_to_hms, hash_combine, check_int_field, optional_field,
+    replace_field, check_date_fields, check_time_fields, zfill, format_time,
+    format_offset, cmp_int, has_timetuple, make_comparisons)
+
+
+class W_Date(W_Root):
+    """A date, with the year, month and day packed in 'ymd'."""
+    _immutable_fields_ = ['ymd']
+
+    def __init__(self, ymd):
+        self.ymd = ymd
+
+    def toordinal(self):
+        return ymd_to_ord(unpack_year(self.ymd), unpack_month(self.ymd),
+                          unpack_day(self.ymd))
+
+    def get_year(self, space):
+        return space.newint(unpack_year(self.ymd))
+
+    def get_month(self, space):
+        return space.newint(unpack_month(self.ymd))
+
+    def get_day(self, space):
+        return space.newint(unpack_day(self.ymd))
+
+    def type_name(self, space, w_exact_type, exact_name):
+        w_type = space.type(self)
+        if space.is_w(w_type, w_exact_type):
+            return exact_name
+        return w_type.getname(space)
+
+    def descr_repr(self, space):
+        name = self.type_name(space, space.gettypeobject(W_Date.typedef),
+                              'datetime.date')
+        return space.newtext('%s(%d, %d, %d)' % (
+            name, unpack_year(self.ymd), unpack_month(self.ymd),
+            unpack_day(self.ymd)))
+
+    def format_date(self):
+        return '%s-%s-%s' % (zfill(unpack_year(self.ymd), 4),
+                             zfill(unpack_month(self.ymd), 2),
+                             zfill(unpack_day(self.ymd), 2))
+
+    def format_ctime(self, hms):
+        day = unpack_day(self.ymd)
+        return '%s %s %s %s %s' % (
+            DAYNAMES[self.toordinal() % 7 or 7],
+            MONTHNAMES[unpack_month(self.ymd)],
+            ' ' + str(day) if day < 10 else str(day),
+            format_time(hms, 0), zfill(unpack_year(self.ymd), 4))
+
+    def descr_isoformat(self, space):
+        """Return the date formatted according to ISO.
+
+        This is 'YYYY-MM-DD'."""
+        return space.newtext(self.format_date())
+
+    def descr_ctime(self, space):
+        """Return ctime() style string."""
+        return space.newtext(self.format_ctime(0))
+
+    def descr_strftime(self, space, w_format):
+        """Format using strftime()."""
+        return interp_strftime.wrap_strftime(space, self, w_format,
+                                             self.descr_timetuple(space))
+
+    def descr_format(self, space, w_fmt):
+        return interp_strftime.format_object(space, self, w_fmt)
+
+    def descr_timetuple(self, space):
+        """Return local time tuple compatible with time.localtime()."""
+        return build_struct_time(space, self.ymd, 0, -1)
+
+    def descr_toordinal(self, space):
+        """Return proleptic Gregorian ordinal.  January 1 of year 1 is
+        day 1."""
+        return space.newint(self.toordinal())
+
+    def descr_weekday(self, space):
+        """Return day of the week, where Monday == 0 ... Sunday == 6."""
+        return space.newint((self.toordinal() + 6) % 7)
+
+    def descr_isoweekday(self, space):
+        """Return day of the week, where Monday == 1 ... Sunday == 7."""
+        return space.newint(self.toordinal() % 7 or 7)
+
+    def descr_isocalendar(self, space):
+        """Return a 3-tuple containing ISO year, week number, and
+        weekday."""
+        year = unpack_year(self.ymd)
+        week1monday = isoweek1monday(year)
+        today = self.toordinal()
+        week = (today - week1monday) // 7
+        day = (today - week1monday) % 7
+        if week < 0:
+            year -= 1
+            week1monday = isoweek1monday(year)
+            week = (today - week1monday) // 7
+            day = (today - week1monday) % 7
+        elif week >= 52:
+            if today >= isoweek1monday(year + 1):
+                year += 1
+                week = 0
+        return space.newtuple([space.newint(year), space.newint(week + 1),
+                               space.newint(day + 1)])
+
+    def descr_replace(self, space, w_year=None, w_month=None, w_day=None):
+        """Return a new date with new values for the specified fields."""
+        year = replace_field(space, w_year, unpack_year(self.ymd))
+        month = replace_field(space, w_month, unpack_month(self.ymd))
+        day = replace_field(space, w_day, unpack_day(self.ymd))
+        check_date_fields(space, year, month, day)
+        return new_date(space, space.type(self), pack_date(year, month, day))
+
+    def compare_to(self, space, w_other):
+        if isinstance(w_other, W_Date):
+            return cmp_int(self.ymd, w_other.ymd)
+        if has_timetuple(space, w_other):
+            return NOT_IMPLEMENTED
+        return NOT_COMPARABLE
+
+    def descr_hash(self, space):
+        return space.newint(self.ymd)
+
+    def descr_add(self, space, w_other):
+        """Add a date to a timedelta."""
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return W_Date(date_from_ordinal(space,
+                                        self.toordinal() + w_other.days))
+
+    def descr_sub(self, space, w_other):
+        """Subtract two dates, or a date and a timedelta."""
+        if isinstance(w_other, W_Date):
+            return new_timedelta(space,
+                                 self.toordinal() - w_other.toordinal(), 0, 0)
+        if isinstance(w_other, W_TimeDelta):
+            return W_Date(date_from_ordinal(space,
+                                            self.toordinal() - w_other.days))
+        return space.w_NotImplemented
+
+    def date_state(self):
+        year = unpack_year(self.ymd)
+        return ''.join([chr(year >> 8), chr(year & 0xff),
+                        chr(unpack_month(self.ymd)),
+                        chr(unpack_day(self.ymd))])
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self), space.newtuple([
+            space.newbytes(self.date_state())])])
+
+make_comparisons(W_Date)
+
+
+def new_date(space, w_subtype, ymd):
+    w_self = space.allocate_instance(W_Date, w_subtype)
+    W_Date.__init__(w_self, ymd)
+    return w_self
+
+def make_date(space, w_cls, year, month, day):
+    # build a date as 'cls(year, month, day)' would do
+    if space.is_w(w_cls, space.gettypeobject(W_Date.typedef)):
+        check_date_fields(space, year, month, day)
+        return W_Date(pack_date(year, month, day))
+    return space.call_function(w_cls, space.newint(year),
+                               space.newint(month), space.newint(day))
+
+def date_from_ordinal(space, ordinal):
+    if not 1 <= ordinal <= MAX_ORDINAL:
+        raise oefmt(space.w_OverflowError, "date value out of range")
+    year, month, day = ord_to_ymd(ordinal)
+    return pack_date(year, month, day)
+
+def build_struct_time(space, ymd, hms, dstflag):
+    year = unpack_year(ymd)
+    month = unpack_month(ymd)
+    day = unpack_day(ymd)
+    wday = (ymd_to_ord(year, month, day) + 6) % 7
+    yday = days_before_month(year, month) + day
+    w_struct_time = _get_module_object(space, 'struct_time')
+    return space.call_function(w_struct_time, space.newtuple([
+        space.newint(year), space.newint(month), space.newint(day),
+        space.newint(unpack_hour(hms)), space.newint(unpack_minute(hms)),
+        space.newint(unpack_second(hms)), space.newint(wday),
+        space.newint(yday), space.newint(dstflag)]))
+
+def localtime_fields(space, seconds):
+    """Return (year, month, day, hms) for the local time 'seconds'."""
+    t_ref = lltype.malloc(rffi.TIME_TP.TO, 1, flavor='raw')
+    t_ref[0] = seconds
+    p = c_localtime(t_ref)
+    lltype.free(t_ref, flavor='raw')
+    if not p:
+        raise OperationError(space.w_ValueError,
+                             space.newtext(_get_error_msg()))
+    # clamp out leap seconds if the platform has them
+    second = min(rffi.getintfield(p, 'c_tm_sec'), 59)
+    return (rffi.getintfield(p, 'c_tm_year') + 1900,
+            rffi.getintfield(p, 'c_tm_mon') + 1,
+            rffi.getintfield(p, 'c_tm_mday'),
+            pack_hms(rffi.getintfield(p, 'c_tm_hour'),
+                     rffi.getintfield(p, 'c_tm_min'), second))
+
+def utc_fields(space, seconds):
+    """Return (year, month, day, hms) for the UTC time 'seconds'; this
+    does not depend on the range of the platform's time_t."""
+    days = seconds // SECONDS_PER_DAY
+    if not 1 - EPOCH_ORDINAL <= days <= MAX_ORDINAL - EPOCH_ORDINAL:
+        raise oefmt(space.w_ValueError, "year is out of range")
+    year, month, day = ord_to_ymd(EPOCH_ORDINAL + intmask(days))
+    return year, month, day, seconds_to_hms(
+        intmask(seconds - days * SECONDS_PER_DAY))
+
+def round_half_away(x):
+    if x >= 0.0:
+        return int(math.floor(x + 0.5))
+    return int(math.ceil(x - 0.5))
+
+def split_timestamp(space, timestamp):
+    """Return the timestamp as whole seconds (a long long) and
+    microseconds, rounded like lib_pypy/datetime.py does."""
+    floor = math.floor(timestamp)
+    try:
+        seconds = ovfcheck_float_to_longlong(floor)
+    except OverflowError:
+        raise oefmt(space.w_ValueError,
+                    "timestamp out of range for platform time_t")
+    us = round_half_away((timestamp - floor) * 1e6)
+    if us == US_PER_SECOND:
+        seconds += 1
+        us = 0
+    return seconds, us
+
+def to_time_t(space, seconds):
+    t = rffi.cast(rffi.TIME_T, seconds)
+    if rffi.cast(lltype.SignedLongLong, t) != seconds:
+        raise oefmt(space.w_ValueError,
+                    "timestamp out of range for platform time_t")
+    return t
+
+
+@unwrap_spec(n=int)
+def date_fromordinal(space, w_cls, n):
+    """int -> date corresponding to a proleptic Gregorian ordinal."""
+    if n < 1:
+        raise oefmt(space.w_ValueError, "ordinal must be >= 1")
+    year, month, day = ord_to_ymd(n)
+    return make_date(space, w_cls, year, month, day)
+
+def date_fromtimestamp(space, w_cls, w_timestamp):
+    """timestamp -> local date from a POSIX timestamp (like
+    time.time())."""
+    year, month, day, hms = localtime_fields(
+        space, _get_inttime(space, w_timestamp))
+    return make_date(space, w_cls, year, month, day)
+
+def date_today(space, w_cls):
+    """Current date or datetime:  same as
+    self.__class__.fromtimestamp(time.time())."""
+    w_now = space.newfloat(pytime.time())
+    if space.is_w(w_cls, space.gettypeobject(W_Date.typedef)):
+        return date_fromtimestamp(space, w_cls, w_now)
+    return space.call_method(w_cls, 'fromtimestamp', w_now)
+
+def _required(space, w_value):
+    if w_value is None:
+        w_value = space.w_None
+    return check_int_field(space, w_value)
+
+def _get_state(space, w_arg, length):
+    # the state string when unpickling, or None
+    if (space.isinstance_w(w_arg, space.w_bytes) and
+            space.len_w(w_arg) == length):
+        s = space.bytes_w(w_arg)
+        if 1 <= ord(s[2]) <= 12:
+            return s
+    return None
+
+def descr_new_date(space, w_subtype, w_year, w_month=None, w_day=None):
+    if w_month is None:
+        s = _get_state(space, w_year, 4)
+        if s is not None:
+            # pickle support
+            return new_date(space, w_subtype, pack_date(
+                (ord(s[0]) << 8) | ord(s[1]), ord(s[2]), ord(s[3])))
+    year = _required(space, w_year)
+    month = _required(space, w_month)
+    day = _required(space, w_day)
+    check_date_fields(space, year, month, day)
+    return new_date(space, w_subtype, pack_date(year, month, day))
+
+
+W_Date.typedef = TypeDef("datetime.date",
+    __doc__ = """date(year, month, day) --> date object""",
+    __new__ = interp2app(descr_new_date),
+    fromtimestamp = interp2app(date_fromtimestamp, as_classmethod=True),
+    today = interp2app(date_today, as_classmethod=True),
+    fromordinal = interp2app(date_fromordinal, as_classmethod=True),
+    year = GetSetProperty(W_Date.get_year, doc="year (1-9999)"),
+    month = GetSetProperty(W_Date.get_month, doc="month (1-12)"),
+    day = GetSetProperty(W_Date.get_day, doc="day (1-31)"),
+    __repr__ = interp2app(W_Date.descr_repr),
+    __str__ = interp2app(W_Date.descr_isoformat),
+    isoformat = interp2app(W_Date.descr_isoformat),
+    ctime = interp2app(W_Date.descr_ctime),
+    strftime = interp2app(W_Date.descr_strftime),
+    __format__ = interp2app(W_Date.descr_format),
+    timetuple = interp2app(W_Date.descr_timetuple),
+    toordinal = interp2app(W_Date.descr_toordinal),
+    weekday = interp2app(W_Date.descr_weekday),
+    isoweekday = interp2app(W_Date.descr_isoweekday),
+    isocalendar = interp2app(W_Date.descr_isocalendar),
+    replace = interp2app(W_Date.descr_replace),
+    __eq__ = interp2app(W_Date.descr_eq),
+    __ne__ = interp2app(W_Date.descr_ne),
+    __lt__ = interp2app(W_Date.descr_lt),
+    __le__ = interp2app(W_Date.descr_le),
+    __gt__ = interp2app(W_Date.descr_gt),
+    __ge__ = interp2app(W_Date.descr_ge),
+    __hash__ = interp2app(W_Date.descr_hash),
+    __add__ = interp2app(W_Date.descr_add),
+    __radd__ = interp2app(W_Date.descr_add),
+    __sub__ = interp2app(W_Date.descr_sub),
+    __reduce__ = interp2app(W_Date.descr_reduce),
+)
+W_Date.typedef.add_entries(
+    min = W_Date(pack_date(1, 1, 1)),
+    max = W_Date(pack_date(MAXYEAR, 12, 31)),
+    resolution = W_TimeDelta(1, 0, 0),
+)
+
+# ____________________________________________________________
+
+
+class W_DateTime(W_Date):
+    """A date and a time of the day, packed like in W_Date and W_Time."""
+    _immutable_fields_ = ['hms', 'microsecond', 'w_tzinfo']
+
+    def __init__(self, ymd, hms, microsecond, w_tzinfo):
+        W_Date.__init__(self, ymd)
+        self.hms = hms
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, 'utcoffset', self)
+
+    def utc_days_seconds(self, offset):
+        # the (ordinal, seconds) of this datetime minus 'offset' minutes
+        return normalize_pair(self.toordinal(),
+                              hms_to_seconds(self.hms) - offset * 60,
+                              SECONDS_PER_DAY)
+
+    def get_hour(self, space):
+        return space.newint(unpack_hour(self.hms))
+
+    def get_minute(self, space):
+        return space.newint(unpack_minute(self.hms))
+
+    def get_second(self, space):
+        return space.newint(unpack_second(self.hms))
+
+    def get_microsecond(self, space):
+        return space.newint(self.microsecond)
+
+    def get_tzinfo(self, space):
+        if self.w_tzinfo is None:
+            return space.w_None
+        return self.w_tzinfo
+
+    def descr_repr(self, space):
+        name = self.type_name(space, space.gettypeobject(W_DateTime.typedef),
+                              'datetime.datetime')
+        s = '%s(%d, %d, %d, %d, %d' % (
+            name, unpack_year(self.ymd), unpack_month(self.ymd),
+            unpack_day(self.ymd), unpack_hour(self.hms),
+            unpack_minute(self.hms))
+        if self.microsecond:
+            s += ', %d, %d' % (unpack_second(self.hms), self.microsecond)
+        elif unpack_second(self.hms):
+            s += ', %d' % (unpack_second(self.hms),)
+        if self.w_tzinfo is not None:
+            s += ', tzinfo=%s' % space.text_w(space.repr(self.w_tzinfo))
+        return space.newtext(s + ')')
+
+    def format_iso(self, space, sep):
+        s = '%s%s%s' % (self.format_date(), sep,
+                        format_time(self.hms, self.microsecond))
+        offset = self.utcoffset_minutes(space)
+        if offset != NO_OFFSET:
+            s += format_offset(offset, ':')
+        return space.newtext(s)
+
+    def descr_isoformat(self, space, w_sep=None):
+        """[sep] -> string in ISO 8601 format,
+        YYYY-MM-DDTHH:MM:SS[.mmmmmm][+HH:MM].
+
+        sep is used to separate the year from the time, and defaults
+        to 'T'."""
+        if w_sep is None:
+            return self.format_iso(space, 'T')
+        sep = space.text_w(w_sep)
+        if len(sep) != 1:
+            raise oefmt(space.w_TypeError,
+                        "isoformat() argument 1 must be char, not str")
+        return self.format_iso(space, sep)
+
+    def descr_str(self, space):
+        return self.format_iso(space, ' ')
+
+    def descr_ctime(self, space):
+        """Return ctime() style string."""
+        return space.newtext(self.format_ctime(self.hms))
+
+    def descr_timetuple(self, space):
+        """Return local time tuple compatible with time.localtime()."""
+        dst = call_offset(space, self.w_tzinfo, 'dst', self)
+        if dst == NO_OFFSET:
+            dstflag = -1
+        elif dst:
+            dstflag = 1
+        else:
+            dstflag = 0
+        return build_struct_time(space, self.ymd, self.hms, dstflag)
+
+    def descr_utctimetuple(self, space):
+        """Return UTC time tuple compatible with time.gmtime()."""
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET or offset == 0:
+            return build_struct_time(space, self.ymd, self.hms, 0)
+        # the result may be out of range by one day, as in CPython
+        days, seconds = self.utc_days_seconds(offset)
+        year, month, day = ord_to_ymd(days)
+        return build_struct_time(space, pack_date(year, month, day),
+                                 seconds_to_hms(seconds), 0)
+
+    def descr_date(self, space):
+        """Return the date part."""
+        return W_Date(self.ymd)
+
+    def descr_time(self, space):
+        """Return the time part, with tzinfo None."""
+        return W_Time(self.hms, self.microsecond, None)
+
+    def descr_timetz(self, space):
+        """Return the time part, with same tzinfo."""
+        return W_Time(self.hms, self.microsecond, self.w_tzinfo)
+
+    def descr_utcoffset(self, space):
+        """Return the timezone offset as a timedelta, or None."""
+        return offset_as_timedelta(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        """Return the DST offset as a timedelta, or None."""
+        return offset_as_timedelta(space, call_offset(
+            space, self.w_tzinfo, 'dst', self))
+
+    def descr_tzname(self, space):
+        """Return the timezone name, or None."""
+        return call_tzname(space, self.w_tzinfo, self)
+
+    def descr_replace(self, space, w_year=None, w_month=None, w_day=None,
+                      w_hour=None, w_minute=None, w_second=None,
+                      w_microsecond=None, w_tzinfo=None):
+        """Return a new datetime with new values for the specified
+        fields."""
+        year = replace_field(space, w_year, unpack_year(self.ymd))
+        month = replace_field(space, w_month, unpack_month(self.ymd))
+        day = replace_field(space, w_day, unpack_day(self.ymd))
+        hour = replace_field(space, w_hour, unpack_hour(self.hms))
+        minute = replace_field(space, w_minute, unpack_minute(self.hms))
+        second = replace_field(space, w_second, unpack_second(self.hms))
+        microsecond = replace_field(space, w_microsecond,
+                                    self.microsecond)
+        check_date_fields(space, year, month, day)
+        check_time_fields(space, hour, minute, second, microsecond)
+        if w_tzinfo is None:
+            w_tz = self.w_tzinfo
+        else:
+            w_tz = check_tzinfo_arg(space, w_tzinfo)
+        return new_datetime(space, space.type(self),
+                            pack_date(year, month, day),
+                            pack_hms(hour, minute, second), microsecond, w_tz)
+
+    def descr_astimezone(self, space, w_tz):
+        """tz -> convert to local time in new timezone tz"""
+        if not isinstance(w_tz, W_TZInfo):
+            raise oefmt(space.w_TypeError,
+                        "tz argument must be an instance of tzinfo")
+        if self.w_tzinfo is None:
+            raise oefmt(space.w_ValueError,
+                        "astimezone() requires an aware datetime")
+        if w_tz is self.w_tzinfo:
+            return self
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            raise oefmt(space.w_ValueError,
+                        "astimezone() requires an aware datetime")
+        w_utc = self.add_delta(space, 0, -offset * 60, 0, w_tz)
+        return space.call_method(w_tz, 'fromutc', w_utc)
+
+    def compare_to(self, space, w_other):
+        if not isinstance(w_other, W_DateTime):
+            if isinstance(w_other, W_Date) or not has_timetuple(space,
+                                                                w_other):
+                return NOT_COMPARABLE
+            return NOT_IMPLEMENTED
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            myoff = self.utcoffset_minutes(space)
+            otoff = w_other.utcoffset_minutes(space)
+            if myoff != otoff:
+                if myoff == NO_OFFSET or otoff == NO_OFFSET:
+                    raise oefmt(space.w_TypeError,
+                                "can't compare offset-naive and "
+                                "offset-aware datetimes")
+                mydays, myseconds = self.utc_days_seconds(myoff)
+                otdays, otseconds = w_other.utc_days_seconds(otoff)
+                c = cmp_int(mydays, otdays)
+                if c == 0:
+                    c = cmp_int(myseconds, otseconds)
+                    if c == 0:
+                        c = cmp_int(self.microsecond, w_other.microsecond)
+                return c
+        c = cmp_int(self.ymd, w_other.ymd)
+        if c == 0:
+            c = cmp_int(self.hms, w_other.hms)
+            if c == 0:
+                c = cmp_int(self.microsecond, w_other.microsecond)
+        return c
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        days, seconds = self.utc_days_seconds(offset)
+        return space.newint(hash_combine(hash_combine(days, seconds),
+                                         self.microsecond))
+
+    def add_delta(self, space, days, seconds, microseconds, w_tzinfo):
+        seconds, us = normalize_pair(hms_to_seconds(self.hms) + seconds,
+                                     self.microsecond + microseconds,
+                                     US_PER_SECOND)
+        ordinal, seconds = normalize_pair(self.toordinal() + days, seconds,
+                                          SECONDS_PER_DAY)
+        return W_DateTime(date_from_ordinal(space, ordinal),
+                          seconds_to_hms(seconds), us, w_tzinfo)
+
+    def descr_add(self, space, w_other):
+        """Add a datetime and a timedelta."""
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return self.add_delta(space, w_other.days, w_other.seconds,
+                              w_other.microseconds, self.w_tzinfo)
+
+    def descr_sub(self, space, w_other):
+        """Subtract two datetimes, or a datetime and a timedelta."""
+        if isinstance(w_other, W_TimeDelta):
+            return self.add_delta(space, -w_other.days, -w_other.seconds,
+                                  -w_other.microseconds, self.w_tzinfo)
+        if not isinstance(w_other, W_DateTime):
+            return space.w_NotImplemented
+        days = self.toordinal() - w_other.toordinal()
+        seconds = hms_to_seconds(self.hms) - hms_to_seconds(w_other.hms)
+        us = self.microsecond - w_other.microsecond
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            myoff = self.utcoffset_minutes(space)
+            otoff = w_other.utcoffset_minutes(space)
+            if myoff != otoff:
+                if myoff == NO_OFFSET or otoff == NO_OFFSET:
+                    raise oefmt(space.w_TypeError,
+                                "can't subtract offset-naive and "
+                                "offset-aware datetimes")
+                seconds += (otoff - myoff) * 60
+        return new_timedelta(space, days, seconds, us)
+
+    def descr_reduce(self, space):
+        us = self.microsecond
+        basestate = ''.join([self.date_state(),
+                             chr(unpack_hour(self.hms)),
+                             chr(unpack_minute(self.hms)),
+                             chr(unpack_second(self.hms)),
+                             chr(us >> 16), chr((us >> 8) & 0xff),
+                             chr(us & 0xff)])
+        if self.w_tzinfo is None:
+            w_state = space.newtuple([space.newbytes(basestate)])
+        else:
+            w_state = space.newtuple([space.newbytes(basestate),
+                                      self.w_tzinfo])
+        return space.newtuple([space.type(self), w_state])
+
+make_comparisons(W_DateTime)
+
+
+def new_datetime(space, w_subtype, ymd, hms, microsecond, w_tzinfo):
+    w_self = space.allocate_instance(W_DateTime, w_subtype)
+    W_DateTime.__init__(w_self, ymd, hms, microsecond, w_tzinfo)
+    return w_self
+
+def make_datetime(space, w_cls, year, month, day, hms, microsecond,
+                  w_tzinfo):
+    # build a datetime as 'cls(year, month, ..., tzinfo)' would do
+    if space.is_w(w_cls, space.gettypeobject(W_DateTime.typedef)):
+        check_date_fields(space, year, month, day)
+        return W_DateTime(pack_date(year, month, day), hms, microsecond,
+                          w_tzinfo)
+    if w_tzinfo is None:
+        w_tz = space.w_None
+    else:
+        w_tz = w_tzinfo
+    return space.call_function(w_cls, space.newint(year),
+                               space.newint(month), space.newint(day),
+                               space.newint(unpack_hour(hms)),
+                               space.newint(unpack_minute(hms)),
+                               space.newint(unpack_second(hms)),
+                               space.newint(microsecond), w_tz)
+
+def datetime_from_timestamp(space, w_cls, timestamp, w_tzinfo):
+    seconds, us = split_timestamp(space, timestamp)
+    if w_tzinfo is None:
+        year, month, day, hms = localtime_fields(space,
+                                                 to_time_t(space, seconds))
+        return make_datetime(space, w_cls, year, month, day, hms, us, None)
+    year, month, day, hms = utc_fields(space, seconds)
+    w_dt = make_datetime(space, w_cls, year, month, day, hms, us, w_tzinfo)
+    return space.call_method(w_tzinfo, 'fromutc', w_dt)
+
+@unwrap_spec(timestamp=float)
+def datetime_fromtimestamp(space, w_cls, timestamp, w_tz=None):
+    """timestamp[, tz] -> tz's local time from POSIX timestamp."""
+    return datetime_from_timestamp(space, w_cls, timestamp,
+                                   check_tzinfo_arg(space, w_tz))
+
+@unwrap_spec(timestamp=float)
+def datetime_utcfromtimestamp(space, w_cls, timestamp):
+    """timestamp -> UTC datetime from a POSIX timestamp (like
+    time.time())."""
+    seconds, us = split_timestamp(space, timestamp)
+    year, month, day, hms = utc_fields(space, seconds)
+    return make_datetime(space, w_cls, year, month, day, hms, us, None)
+
+def datetime_now(space, w_cls, w_tz=None):
+    """[tz] -> new datetime with tz's local day and time."""
+    if space.is_w(w_cls, space.gettypeobject(W_DateTime.typedef)):
+        return datetime_from_timestamp(space, w_cls, pytime.time(),
+                                       check_tzinfo_arg(space, w_tz))
+    if w_tz is None:
+        w_tz = space.w_None
+    return space.call_method(w_cls, 'fromtimestamp',
+                             space.newfloat(pytime.time()), w_tz)
+
+def datetime_utcnow(space, w_cls):
+    """Return a new datetime representing UTC day and time."""
+    w_now = space.newfloat(pytime.time())
+    if space.is_w(w_cls, space.gettypeobject(W_DateTime.typedef)):
+        return datetime_utcfromtimestamp(space, w_cls, space.float_w(w_now))
+    return space.call_method(w_cls, 'utcfromtimestamp', w_now)
+
+def datetime_combine(space, w_cls, w_date, w_time):
+    """date, time -> datetime with same date and time fields"""
+    if not isinstance(w_date, W_Date):
+        raise oefmt(space.w_TypeError, "date argument must be a date instance")
+    if not isinstance(w_time, W_Time):
+        raise oefmt(space.w_TypeError, "time argument must be a time instance")
+    return make_datetime(space, w_cls, unpack_year(w_date.ymd),
+                         unpack_month(w_date.ymd), unpack_day(w_date.ymd),
+                         w_time.hms, w_time.microsecond, w_time.w_tzinfo)
+
+# ____________________________________________________________
+# strptime
+
+# The numeric directives handled by parse_fast(), in the order of the
+# fields of a datetime, and their maximum number of digits.
+FAST_DIRECTIVES = 'YmdHMSf'
+FAST_WIDTHS = [4, 2, 2, 2, 2, 2, 6]
+FAST_MIN = [0, 1, 1, 0, 0, 0, 0]
+FAST_MAX = [9999, 12, 31, 23, 59, 59, 999999]
+
+def _isspace(c):
+    return c == ' ' or '\t' <= c <= '\r'
+
+def parse_fast(string, format):
+    """Parse 'string' with a format made only of %Y %m %d %H %M %S %f, %%
+    and literal characters, where every directive is followed by a
+    non-digit character.  Returns the seven fields of the datetime, or
+    None if _strptime() must be used instead: either the format is not
+    supported, or the string does not match it and the error message
+    comes from _strptime()."""
+    # the defaults of _strptime()
+    fields = [1900, 1, 1, 0, 0, 0, 0]
+    seen = 0
+    i = 0
+    j = 0
+    while i < len(format):
+        c = format[i]
+        i += 1
+        if c == '%':
+            if i == len(format):
+                return None
+            c = format[i]
+            i += 1
+            if c == '%':
+                if j == len(string) or string[j] != '%':
+                    return None
+                j += 1
+                continue
+            index = FAST_DIRECTIVES.find(c)
+            if index < 0 or seen & (1 << index):
+                return None
+            seen |= 1 << index
+            if i < len(format) and (format[i] == '%' or
+                                    format[i].isdigit()):
+                return None
+            start = j
+            stop = min(j + FAST_WIDTHS[index], len(string))
+            while j < stop and string[j].isdigit():
+                j += 1
+            if j == start or (c == 'Y' and j - start != 4):
+                return None
+            value = int(string[start:j])
+            if c == 'f':
+                for k in range(6 - (j - start)):
+                    value *= 10
+            if not FAST_MIN[index] <= value <= FAST_MAX[index]:
+                return None
+            fields[index] = value
+        elif _isspace(c):
+            # like in _strptime(), whitespace matches one or more
+            # whitespace characters
+            while i < len(format) and _isspace(format[i]):
+                i += 1
+            if j == len(string) or not _isspace(string[j]):
+                return None
+            while j < len(string) and _isspace(string[j]):
+                j += 1
+        else:
+            # _strptime() ignores the case
+            if j == len(string) or string[j].lower() != c.lower():
+                return None
+            j += 1
+    if j != len(string):
+        return None
+    return fields
+
+app = applevel(r'''
+    def strptime(cls, date_string, format):
+        from _strptime import _strptime
+        struct, micros = _strptime(date_string, format)
+        return cls(*(struct[0:6] + (micros,)))
+''', filename=__file__)
+
+app_strptime = app.interphook('strptime')
+
+def datetime_strptime(space, w_cls, w_string, w_format):
+    """string, format -> new datetime parsed from a string (like
+    time.strptime())."""
+    if (space.is_w(space.type(w_string), space.w_bytes) and
+            space.is_w(space.type(w_format), space.w_bytes)):
+        fields = parse_fast(space.bytes_w(w_string),
+                            space.bytes_w(w_format))
+        if fields is not None:
+            return make_datetime(space, w_cls, fields[0], fields[1],
+                                 fields[2],
+                                 pack_hms(fields[3], fields[4], fields[5]),
+                                 fields[6], None)
+    return app_strptime(space, w_cls, w_string, w_format)
+
+# ____________________________________________________________
+
+def descr_new_datetime(space, w_subtype, w_year, w_month=None, w_day=None,
+                       w_hour=None, w_minute=None, w_second=None,
+                       w_microsecond=None, w_tzinfo=None):
+    s = _get_state(space, w_year, 10)
+    if s is not None:
+        # pickle support
+        w_tz = check_state_tzinfo(space, w_month)
+        return new_datetime(space, w_subtype, pack_date(
+            (ord(s[0]) << 8) | ord(s[1]), ord(s[2]), ord(s[3])),
+            pack_hms(ord(s[4]), ord(s[5]), ord(s[6])),
+            (ord(s[7]) << 16) | (ord(s[8]) << 8) | ord(s[9]), w_tz)
+    year = _required(space, w_year)
+    month = _required(space, w_month)
+    day = _required(space, w_day)
+    hour = optional_field(space, w_hour, 0)
+    minute = optional_field(space, w_minute, 0)
+    second = optional_field(space, w_second, 0)
+    microsecond = optional_field(space, w_microsecond, 0)
+    check_date_fields(space, year, month, day)
+    check_time_fields(space, hour, minute, second, microsecond)
+    w_tz = check_tzinfo_arg(space, w_tzinfo)
+    return new_datetime(space, w_subtype, pack_date(year, month, day),
+                        pack_hms(hour, minute, second), microsecond, w_tz)
+
+
+W_DateTime.typedef = TypeDef("datetime.datetime", W_Date.typedef,
+    __doc__ = """datetime(year, month, day[, hour[, minute[, second[, \
+microsecond[,tzinfo]]]]])
+
+The year, month and day arguments are required. tzinfo may be None, or an
+instance of a tzinfo subclass. The remaining arguments may be ints or
+longs.""",
+    __new__ = interp2app(descr_new_datetime),
+    fromtimestamp = interp2app(datetime_fromtimestamp, as_classmethod=True),
+    utcfromtimestamp = interp2app(datetime_utcfromtimestamp,
+                                  as_classmethod=True),
+    now = interp2app(datetime_now, as_classmethod=True),
+    utcnow = interp2app(datetime_utcnow, as_classmethod=True),
+    combine = interp2app(datetime_combine, as_classmethod=True),
+    strptime = interp2app(datetime_strptime, as_classmethod=True),
+    hour = GetSetProperty(W_DateTime.get_hour, doc="hour (0-23)"),
+    minute = GetSetProperty(W_DateTime.get_minute, doc="minute (0-59)"),
+    second = GetSetProperty(W_DateTime.get_second, doc="second (0-59)"),
+    microsecond = GetSetProperty(W_DateTime.get_microsecond,
+                                 doc="microsecond (0-999999)"),
+    tzinfo = GetSetProperty(W_DateTime.get_tzinfo,
+                            doc="timezone info object"),
+    __repr__ = interp2app(W_DateTime.descr_repr),
+    __str__ = interp2app(W_DateTime.descr_str),
+    isoformat = interp2app(W_DateTime.descr_isoformat),
+    ctime = interp2app(W_DateTime.descr_ctime),
+    strftime = interp2app(W_DateTime.descr_strftime),
+    timetuple = interp2app(W_DateTime.descr_timetuple),
+    utctimetuple = interp2app(W_DateTime.descr_utctimetuple),
+    date = interp2app(W_DateTime.descr_date),
+    time = interp2app(W_DateTime.descr_time),
+    timetz = interp2app(W_DateTime.descr_timetz),
+    utcoffset = interp2app(W_DateTime.descr_utcoffset),
+    dst = interp2app(W_DateTime.descr_dst),
+    tzname = interp2app(W_DateTime.descr_tzname),
+    replace = interp2app(W_DateTime.descr_replace),
+    astimezone = interp2app(W_DateTime.descr_astimezone),
+    __eq__ = interp2app(W_DateTime.descr_eq),
+    __ne__ = interp2app(W_DateTime.descr_ne),
+    __lt__ = interp2app(W_DateTime.descr_lt),
+    __le__ = interp2app(W_DateTime.descr_le),
+    __gt__ = interp2app(W_DateTime.descr_gt),
+    __ge__ = interp2app(W_DateTime.descr_ge),
+    __hash__ = interp2app(W_DateTime.descr_hash),
+    __add__ = interp2app(W_DateTime.descr_add),
+    __radd__ = interp2app(W_DateTime.descr_add),
+    __sub__ = interp2app(W_DateTime.descr_sub),
+    __reduce__ = interp2app(W_DateTime.descr_reduce),
+)
+W_DateTime.typedef.add_entries(
+    min = W_DateTime(pack_date(1, 1, 1), 0, 0, None),
+    max = W_DateTime(pack_date(MAXYEAR, 12, 31), pack_hms(23, 59, 59),
+                     999999, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
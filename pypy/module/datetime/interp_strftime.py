@@ -0,0 +1,79 @@
+from pypy.interpreter.gateway import applevel
+
+
+app = applevel(r'''
+    import time as _time
+
+    def wrap_strftime(object, format, timetuple):
+        """Substitute %f, %z and %Z in the format, and call time.strftime()
+        with the rest.  Taken from lib_pypy/datetime.py."""
+        year = timetuple[0]
+        if year < 1900:
+            raise ValueError("year=%d is before 1900; the datetime strftime() "
+                             "methods require year >= 1900" % year)
+        # Don't call utcoffset() or tzname() unless actually needed.
+        freplace = None  # the string to use for %f
+        zreplace = None  # the string to use for %z
+        Zreplace = None  # the string to use for %Z
+
+        newformat = []
+        push = newformat.append
+        i, n = 0, len(format)
+        while i < n:
+            ch = format[i]
+            i += 1
+            if ch == '%':
+                if i < n:
+                    ch = format[i]
+                    i += 1
+                    if ch == 'f':
+                        if freplace is None:
+                            freplace = '%06d' % getattr(object,
+                                                        'microsecond', 0)
+                        newformat.append(freplace)
+                    elif ch == 'z':
+                        if zreplace is None:
+                            zreplace = ""
+                            if hasattr(object, "utcoffset"):
+                                offset = object.utcoffset()
+                                if offset is not None:
+                                    offset = (offset.days * 86400 +
+                                              offset.seconds) // 60
+                                    sign = '+'
+                                    if offset < 0:
+                                        offset = -offset
+                                        sign = '-'
+                                    h, m = divmod(offset, 60)
+                                    zreplace = '%c%02d%02d' % (sign, h, m)
+                        newformat.append(zreplace)
+                    elif ch == 'Z':
+                        if Zreplace is None:
+                            Zreplace = ""
+                            if hasattr(object, "tzname"):
+                                s = object.tzname()
+                                if s is not None:
+                                    # strftime is going to have at this:
+                                    # escape %
+                                    Zreplace = s.replace('%', '%%')
+                        newformat.append(Zreplace)
+                    else:
+                        push('%')
+                        push(ch)
+                else:
+                    push('%')
+            else:
+                push(ch)
+        newformat = "".join(newformat)
+        return _time.strftime(newformat, timetuple)
+
+    def format(object, fmt):
+        if not isinstance(fmt, (str, unicode)):
+            raise ValueError("__format__ expects str or unicode, not %s" %
+                             fmt.__class__.__name__)
+        if len(fmt) != 0:
+            return object.strftime(fmt)
+        return str(object)
+''', filename=__file__)
+
+wrap_strftime = app.interphook('wrap_strftime')
+format_object = app.interphook('format')
@@ -0,0 +1,239 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.datetime.interp_timedelta import W_TimeDelta
+from pypy.module.datetime.interp_tzinfo import (
+    NO_OFFSET, check_tzinfo_arg, check_state_tzinfo, call_offset,
+    offset_as_timedelta, call_tzname)
+from pypy.module.datetime import interp_strftime
+from pypy.module.datetime.support import (
+    NOT_COMPARABLE, pack_hms, unpack_hour, unpack_minute, unpack_second,
+    optional_field, replace_field, check_time_fields, cmp_int, hash_combine,
+    format_time, format_offset, make_comparisons)
+
+
+class W_Time(W_Root):
+    """A time of the day, with the hour, minute and second packed in
+    'hms', and an optional tzinfo."""
+    _immutable_fields_ = ['hms', 'microsecond', 'w_tzinfo']
+
+    def __init__(self, hms, microsecond, w_tzinfo):
+        self.hms = hms
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, 'utcoffset', space.w_None)
+
+    def get_hour(self, space):
+        return space.newint(unpack_hour(self.hms))
+
+    def get_minute(self, space):
+        return space.newint(unpack_minute(self.hms))
+
+    def get_second(self, space):
+        return space.newint(unpack_second(self.hms))
+
+    def get_microsecond(self, space):
+        return space.newint(self.microsecond)
+
+    def get_tzinfo(self, space):
+        if self.w_tzinfo is None:
+            return space.w_None
+        return self.w_tzinfo
+
+    def descr_repr(self, space):
+        w_type = space.type(self)
+        if space.is_w(w_type, space.gettypeobject(W_Time.typedef)):
+            name = 'datetime.time'
+        else:
+            name = w_type.getname(space)
+        s = '%s(%d, %d' % (name, unpack_hour(self.hms),
+                           unpack_minute(self.hms))
+        if self.microsecond:
+            s += ', %d, %d' % (unpack_second(self.hms), self.microsecond)
+        elif unpack_second(self.hms):
+            s += ', %d' % (unpack_second(self.hms),)
+        if self.w_tzinfo is not None:
+            s += ', tzinfo=%s' % space.text_w(space.repr(self.w_tzinfo))
+        return space.newtext(s + ')')
+
+    def descr_isoformat(self, space):
+        """Return the time formatted according to ISO.
+
+        This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
+        self.microsecond == 0."""
+        s = format_time(self.hms, self.microsecond)
+        offset = self.utcoffset_minutes(space)
+        if offset != NO_OFFSET:
+            s += format_offset(offset, ':')
+        return space.newtext(s)
+
+    def descr_strftime(self, space, w_format):
+        """Format using strftime().  The date part of the timestamp passed
+        to underlying strftime should not be used."""
+        w_timetuple = space.newtuple([
+            space.newint(1900), space.newint(1), space.newint(1),
+            space.newint(unpack_hour(self.hms)),
+            space.newint(unpack_minute(self.hms)),
+            space.newint(unpack_second(self.hms)),
+            space.newint(0), space.newint(1), space.newint(-1)])
+        return interp_strftime.wrap_strftime(space, self, w_format,
+                                             w_timetuple)
+
+    def descr_format(self, space, w_fmt):
+        return interp_strftime.format_object(space, self, w_fmt)
+
+    def descr_utcoffset(self, space):
+        """Return the timezone offset as a timedelta, or None."""
+        return offset_as_timedelta(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        """Return the DST offset as a timedelta, or None."""
+        return offset_as_timedelta(space, call_offset(
+            space, self.w_tzinfo, 'dst', space.w_None))
+
+    def descr_tzname(self, space):
+        """Return the timezone name, or None."""
+        return call_tzname(space, self.w_tzinfo, space.w_None)
+
+    def descr_replace(self, space, w_hour=None, w_minute=None, w_second=None,
+                      w_microsecond=None, w_tzinfo=None):
+        """Return a new time with new values for the specified fields."""
+        hour = replace_field(space, w_hour, unpack_hour(self.hms))
+        minute = replace_field(space, w_minute, unpack_minute(self.hms))
+        second = replace_field(space, w_second, unpack_second(self.hms))
+        microsecond = replace_field(space, w_microsecond,
+                                    self.microsecond)
+        check_time_fields(space, hour, minute, second, microsecond)
+        if w_tzinfo is None:
+            w_tz = self.w_tzinfo
+        else:
+            w_tz = check_tzinfo_arg(space, w_tzinfo)
+        return new_time(space, space.type(self),
+                        pack_hms(hour, minute, second), microsecond, w_tz)
+
+    def compare_to(self, space, w_other):
+        if not isinstance(w_other, W_Time):
+            return NOT_COMPARABLE
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            myoff = self.utcoffset_minutes(space)
+            otoff = w_other.utcoffset_minutes(space)
+            if myoff != otoff:
+                if myoff == NO_OFFSET or otoff == NO_OFFSET:
+                    raise oefmt(space.w_TypeError,
+                                "can't compare offset-naive and "
+                                "offset-aware times")
+                c = cmp_int(self.minutes() - myoff, w_other.minutes() - otoff)
+                if c == 0:
+                    c = cmp_int(unpack_second(self.hms),
+                                unpack_second(w_other.hms))
+                    if c == 0:
+                        c = cmp_int(self.microsecond, w_other.microsecond)
+                return c
+        c = cmp_int(self.hms, w_other.hms)
+        if c == 0:
+            c = cmp_int(self.microsecond, w_other.microsecond)
+        return c
+
+    def minutes(self):
+        return unpack_hour(self.hms) * 60 + unpack_minute(self.hms)
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.newint(hash_combine(
+            hash_combine(self.minutes() - offset, unpack_second(self.hms)),
+            self.microsecond))
+
+    def descr_nonzero(self, space):
+        if unpack_second(self.hms) or self.microsecond:
+            return space.w_True
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.newbool(self.minutes() != offset)
+
+    def getstate(self, space):
+        us = self.microsecond
+        basestate = ''.join([chr(unpack_hour(self.hms)),
+                             chr(unpack_minute(self.hms)),
+                             chr(unpack_second(self.hms)),
+                             chr(us >> 16), chr((us >> 8) & 0xff),
+                             chr(us & 0xff)])
+        if self.w_tzinfo is None:
+            return space.newtuple([space.newbytes(basestate)])
+        return space.newtuple([space.newbytes(basestate), self.w_tzinfo])
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self), self.getstate(space)])
+
+make_comparisons(W_Time)
+
+
+def new_time(space, w_subtype, hms, microsecond, w_tzinfo):
+    w_self = space.allocate_instance(W_Time, w_subtype)
+    W_Time.__init__(w_self, hms, microsecond, w_tzinfo)
+    return w_self
+
+def descr_new_time(space, w_subtype, w_hour=None, w_minute=None,
+                   w_second=None, w_microsecond=None, w_tzinfo=None):
+    if (w_hour is not None and space.isinstance_w(w_hour, space.w_bytes) and
+            space.len_w(w_hour) == 6):
+        s = space.bytes_w(w_hour)
+        if ord(s[0]) < 24:
+            # pickle support
+            w_tz = check_state_tzinfo(space, w_minute)
+            return new_time(space, w_subtype,
+                            pack_hms(ord(s[0]), ord(s[1]), ord(s[2])),
+                            (ord(s[3]) << 16) | (ord(s[4]) << 8) | ord(s[5]),
+                            w_tz)
+    hour = optional_field(space, w_hour, 0)
+    minute = optional_field(space, w_minute, 0)
+    second = optional_field(space, w_second, 0)
+    microsecond = optional_field(space, w_microsecond, 0)
+    check_time_fields(space, hour, minute, second, microsecond)
+    w_tz = check_tzinfo_arg(space, w_tzinfo)
+    return new_time(space, w_subtype, pack_hms(hour, minute, second),
+                    microsecond, w_tz)
+
+
+W_Time.typedef = TypeDef("datetime.time",
+    __doc__ = """time([hour[, minute[, second[, microsecond[, tzinfo]]]]])
+--> a time object
+
+All arguments are optional. tzinfo may be None, or an instance of
+a tzinfo subclass. The remaining arguments may be ints or longs.""",
+    __new__ = interp2app(descr_new_time),
+    hour = GetSetProperty(W_Time.get_hour, doc="hour (0-23)"),
+    minute = GetSetProperty(W_Time.get_minute, doc="minute (0-59)"),
+    second = GetSetProperty(W_Time.get_second, doc="second (0-59)"),
+    microsecond = GetSetProperty(W_Time.get_microsecond,
+                                 doc="microsecond (0-999999)"),
+    tzinfo = GetSetProperty(W_Time.get_tzinfo, doc="timezone info object"),
+    __repr__ = interp2app(W_Time.descr_repr),
+    __str__ = interp2app(W_Time.descr_isoformat),
+    isoformat = interp2app(W_Time.descr_isoformat),
+    strftime = interp2app(W_Time.descr_strftime),
+    __format__ = interp2app(W_Time.descr_format),
+    utcoffset = interp2app(W_Time.descr_utcoffset),
+    dst = interp2app(W_Time.descr_dst),
+    tzname = interp2app(W_Time.descr_tzname),
+    replace = interp2app(W_Time.descr_replace),
+    __eq__ = interp2app(W_Time.descr_eq),
+    __ne__ = interp2app(W_Time.descr_ne),
+    __lt__ = interp2app(W_Time.descr_lt),
+    __le__ = interp2app(W_Time.descr_le),
+    __gt__ = interp2app(W_Time.descr_gt),
+    __ge__ = interp2app(W_Time.descr_ge),
+    __hash__ = interp2app(W_Time.descr_hash),
+    __nonzero__ = interp2app(W_Time.descr_nonzero),
+    __reduce__ = interp2app(W_Time.descr_reduce),
+)
+W_Time.typedef.add_entries(
+    min = W_Time(0, 0, None),
+    max = W_Time(pack_hms(23, 59, 59), 999999, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
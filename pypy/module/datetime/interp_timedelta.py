@@ -0,0 +1,308 @@
+import math
+
+from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rbigint import rbigint
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.datetime.support import (
+    MAX_DELTA_DAYS, US_PER_SECOND, SECONDS_PER_DAY, NOT_COMPARABLE,
+    normalize_pair, cmp_int, hash_combine, zfill, make_comparisons)
+
+
+class W_TimeDelta(W_Root):
+    """The difference between two datetime objects, normalized so that
+    0 <= seconds < 24*3600 and 0 <= microseconds < 1000000."""
+    _immutable_fields_ = ['days', 'seconds', 'microseconds']
+
+    def __init__(self, days, seconds, microseconds):
+        self.days = days
+        self.seconds = seconds
+        self.microseconds = microseconds
+
+    def to_microseconds_big(self):
+        return (rbigint.fromint(self.days).int_mul(SECONDS_PER_DAY)
+                .int_add(self.seconds).int_mul(US_PER_SECOND)
+                .int_add(self.microseconds))
+
+    def descr_repr(self, space):
+        w_type = space.type(self)
+        if space.is_w(w_type, space.gettypeobject(W_TimeDelta.typedef)):
+            name = 'datetime.timedelta'
+        else:
+            name = w_type.getname(space)
+        if self.microseconds:
+            args = '%d, %d, %d' % (self.days, self.seconds, self.microseconds)
+        elif self.seconds:
+            args = '%d, %d' % (self.days, self.seconds)
+        else:
+            args = '%d' % (self.days,)
+        return space.newtext('%s(%s)' % (name, args))
+
+    def descr_str(self, space):
+        minutes = self.seconds // 60
+        s = '%d:%s:%s' % (minutes // 60, zfill(minutes % 60, 2),
+                          zfill(self.seconds % 60, 2))
+        if self.days:
+            plural = '' if self.days == 1 or self.days == -1 else 's'
+            s = '%d day%s, %s' % (self.days, plural, s)
+        if self.microseconds:
+            s += '.' + zfill(self.microseconds, 6)
+        return space.newtext(s)
+
+    def descr_total_seconds(self, space):
+        """Total seconds in the duration."""
+        if -EXACT_FLOAT_DAYS <= self.days <= EXACT_FLOAT_DAYS:
+            # the number of microseconds is exact as a float
+            us = ((float(self.days) * SECONDS_PER_DAY + self.seconds) *
+                  US_PER_SECOND + self.microseconds)
+            return space.newfloat(us / US_PER_SECOND)
+        return space.newfloat(
+            self.to_microseconds_big().truediv(BIG_US_PER_SECOND))
+
+    def get_days(self, space):
+        return space.newint(self.days)
+
+    def get_seconds(self, space):
+        return space.newint(self.seconds)
+
+    def get_microseconds(self, space):
+        return space.newint(self.microseconds)
+
+    # arithmetic, always returning real timedeltas like CPython
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return new_timedelta(space, self.days + w_other.days,
+                             self.seconds + w_other.seconds,
+                             self.microseconds + w_other.microseconds)
+
+    def descr_sub(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return new_timedelta(space, self.days - w_other.days,
+                             self.seconds - w_other.seconds,
+                             self.microseconds - w_other.microseconds)
+
+    def descr_neg(self, space):
+        return new_timedelta(space, -self.days, -self.seconds,
+                             -self.microseconds)
+
+    def descr_pos(self, space):
+        return W_TimeDelta(self.days, self.seconds, self.microseconds)
+
+    def descr_abs(self, space):
+        if self.days < 0:
+            return self.descr_neg(space)
+        return self
+
+    def descr_mul(self, space, w_other):
+        if not (space.isinstance_w(w_other, space.w_int) or
+                space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        return timedelta_from_microseconds(
+            space, self.to_microseconds_big().mul(space.bigint_w(w_other)))
+
+    def descr_div(self, space, w_other):
+        if not (space.isinstance_w(w_other, space.w_int) or
+                space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        try:
+            us = self.to_microseconds_big().floordiv(space.bigint_w(w_other))
+        except ZeroDivisionError:
+            raise oefmt(space.w_ZeroDivisionError,
+                        "integer division or modulo by zero")
+        return timedelta_from_microseconds(space, us)
+
+    def compare_to(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return NOT_COMPARABLE
+        c = cmp_int(self.days, w_other.days)
+        if c == 0:
+            c = cmp_int(self.seconds, w_other.seconds)
+            if c == 0:
+                c = cmp_int(self.microseconds, w_other.microseconds)
+        return c
+
+    def descr_hash(self, space):
+        return space.newint(hash_combine(
+            hash_combine(self.days, self.seconds), self.microseconds))
+
+    def descr_nonzero(self, space):
+        return space.newbool(self.days != 0 or self.seconds != 0 or
+                             self.microseconds != 0)
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self), space.newtuple([
+            space.newint(self.days), space.newint(self.seconds),
+            space.newint(self.microseconds)])])
+
+make_comparisons(W_TimeDelta)
+
+# the largest number of days for which the number of microseconds is
+# below 2**53
+EXACT_FLOAT_DAYS = 104249
+BIG_US_PER_SECOND = rbigint.fromint(US_PER_SECOND)
+BIG_SECONDS_PER_DAY = rbigint.fromint(SECONDS_PER_DAY)
+
+
+def check_delta_days(space, days):
+    if not -MAX_DELTA_DAYS <= days <= MAX_DELTA_DAYS:
+        raise oefmt(space.w_OverflowError,
+                    "days=%d; must have magnitude <= %d", days,
+                    MAX_DELTA_DAYS)
+
+def new_timedelta(space, days, seconds, microseconds):
+    seconds, microseconds = normalize_pair(seconds, microseconds,
+                                           US_PER_SECOND)
+    days, seconds = normalize_pair(days, seconds, SECONDS_PER_DAY)
+    check_delta_days(space, days)
+    return W_TimeDelta(days, seconds, microseconds)
+
+def timedelta_from_microseconds(space, us, w_subtype=None):
+    seconds, us = us.divmod(BIG_US_PER_SECOND)
+    days, seconds = seconds.divmod(BIG_SECONDS_PER_DAY)
+    try:
+        d = days.toint()
+    except OverflowError:
+        raise oefmt(space.w_OverflowError,
+                    "days=%s; must have magnitude <= %d", days.str(),
+                    MAX_DELTA_DAYS)
+    check_delta_days(space, d)
+    if w_subtype is None:
+        return W_TimeDelta(d, seconds.toint(), us.toint())
+    w_self = space.allocate_instance(W_TimeDelta, w_subtype)
+    W_TimeDelta.__init__(w_self, d, seconds.toint(), us.toint())
+    return w_self
+
+
+def _is_exact_int(space, w_obj):
+    return w_obj is None or space.is_w(space.type(w_obj), space.w_int)
+
+def _int_arg(space, w_obj):
+    if w_obj is None:
+        return 0
+    return space.int_w(w_obj)
+
+def _accum(space, tag, sofar, w_num, factor, leftover):
+    # the same algorithm as in lib_pypy/datetime.py: integral parts
+    # are exact, fractional parts are summed up and rounded at the end
+    if (space.isinstance_w(w_num, space.w_int) or
+            space.isinstance_w(w_num, space.w_long)):
+        return sofar.add(space.bigint_w(w_num).int_mul(factor)), leftover
+    if space.isinstance_w(w_num, space.w_float):
+        fracpart, intpart = math.modf(space.float_w(w_num))
+        try:
+            rsum = sofar.add(rbigint.fromfloat(intpart).int_mul(factor))
+        except OverflowError:
+            raise oefmt(space.w_OverflowError,
+                        "cannot convert float infinity to integer")
+        except ValueError:
+            raise oefmt(space.w_ValueError,
+                        "cannot convert float NaN to integer")
+        if fracpart == 0.0:
+            return rsum, leftover
+        fracpart, intpart = math.modf(factor * fracpart)
+        rsum = rsum.add(rbigint.fromfloat(intpart))
+        return rsum, leftover + fracpart
+    raise oefmt(space.w_TypeError,
+                "unsupported type for timedelta %s component: %T", tag, w_num)
+
+def _round(x):
+    if x >= 0.0:
+        return int(math.floor(x + 0.5))
+    return int(math.ceil(x - 0.5))
+
+def descr_new_timedelta(space, w_subtype, w_days=None, w_seconds=None,
+                        w_microseconds=None, w_milliseconds=None,
+                        w_minutes=None, w_hours=None, w_weeks=None):
+    if (_is_exact_int(space, w_days) and _is_exact_int(space, w_seconds) and
+            _is_exact_int(space, w_microseconds) and
+            _is_exact_int(space, w_milliseconds) and
+            _is_exact_int(space, w_minutes) and
+            _is_exact_int(space, w_hours) and _is_exact_int(space, w_weeks)):
+        # fast path for int arguments
+        try:
+            days = ovfcheck(_int_arg(space, w_days) +
+                            ovfcheck(_int_arg(space, w_weeks) * 7))
+            seconds = ovfcheck(
+                ovfcheck(_int_arg(space, w_seconds) +
+                         ovfcheck(_int_arg(space, w_minutes) * 60)) +
+                ovfcheck(_int_arg(space, w_hours) * 3600))
+            us = ovfcheck(_int_arg(space, w_microseconds) +
+                          ovfcheck(_int_arg(space, w_milliseconds) * 1000))
+        except OverflowError:
+            pass
+        else:
+            seconds, us = normalize_pair(seconds, us, US_PER_SECOND)
+            days, seconds = normalize_pair(days, seconds, SECONDS_PER_DAY)
+            check_delta_days(space, days)
+            w_self = space.allocate_instance(W_TimeDelta, w_subtype)
+            W_TimeDelta.__init__(w_self, days, seconds, us)
+            return w_self
+    x = rbigint.fromint(0)
+    leftover = 0.0
+    if w_microseconds is not None:
+        x, leftover = _accum(space, "microseconds", x, w_microseconds, 1,
+                             leftover)
+    if w_milliseconds is not None:
+        x, leftover = _accum(space, "milliseconds", x, w_milliseconds, 1000,
+                             leftover)
+    if w_seconds is not None:
+        x, leftover = _accum(space, "seconds", x, w_seconds, US_PER_SECOND,
+                             leftover)
+    if w_minutes is not None:
+        x, leftover = _accum(space, "minutes", x, w_minutes,
+                             60 * US_PER_SECOND, leftover)
+    if w_hours is not None:
+        x, leftover = _accum(space, "hours", x, w_hours,
+                             3600 * US_PER_SECOND, leftover)
+    if w_days is not None:
+        x, leftover = _accum(space, "days", x, w_days,
+                             SECONDS_PER_DAY * US_PER_SECOND, leftover)
+    if w_weeks is not None:
+        x, leftover = _accum(space, "weeks", x, w_weeks,
+                             7 * SECONDS_PER_DAY * US_PER_SECOND, leftover)
+    if leftover != 0.0:
+        x = x.int_add(_round(leftover))
+    return timedelta_from_microseconds(space, x, w_subtype)
+
+
+W_TimeDelta.typedef = TypeDef("datetime.timedelta",
+    __doc__ = """Difference between two datetime values.""",
+    __new__ = interp2app(descr_new_timedelta),
+    __repr__ = interp2app(W_TimeDelta.descr_repr),
+    __str__ = interp2app(W_TimeDelta.descr_str),
+    total_seconds = interp2app(W_TimeDelta.descr_total_seconds),
+    days = GetSetProperty(W_TimeDelta.get_days, doc="days"),
+    seconds = GetSetProperty(W_TimeDelta.get_seconds, doc="seconds"),
+    microseconds = GetSetProperty(W_TimeDelta.get_microseconds,
+                                  doc="microseconds"),
+    __add__ = interp2app(W_TimeDelta.descr_add),
+    __radd__ = interp2app(W_TimeDelta.descr_add),
+    __sub__ = interp2app(W_TimeDelta.descr_sub),
+    __neg__ = interp2app(W_TimeDelta.descr_neg),
+    __pos__ = interp2app(W_TimeDelta.descr_pos),
+    __abs__ = interp2app(W_TimeDelta.descr_abs),
+    __mul__ = interp2app(W_TimeDelta.descr_mul),
+    __rmul__ = interp2app(W_TimeDelta.descr_mul),
+    __div__ = interp2app(W_TimeDelta.descr_div),
+    __floordiv__ = interp2app(W_TimeDelta.descr_div),
+    __eq__ = interp2app(W_TimeDelta.descr_eq),
+    __ne__ = interp2app(W_TimeDelta.descr_ne),
+    __lt__ = interp2app(W_TimeDelta.descr_lt),
+    __le__ = interp2app(W_TimeDelta.descr_le),
+    __gt__ = interp2app(W_TimeDelta.descr_gt),
+    __ge__ = interp2app(W_TimeDelta.descr_ge),
+    __hash__ = interp2app(W_TimeDelta.descr_hash),
+    __nonzero__ = interp2app(W_TimeDelta.descr_nonzero),
+    __reduce__ = interp2app(W_TimeDelta.descr_reduce),
+)
+W_TimeDelta.typedef.add_entries(
+    min = W_TimeDelta(-MAX_DELTA_DAYS, 0, 0),
+    max = W_TimeDelta(MAX_DELTA_DAYS, SECONDS_PER_DAY - 1, US_PER_SECOND - 1),
+    resolution = W_TimeDelta(0, 0, 1),
+)
@@ -0,0 +1,155 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app, applevel
+from pypy.interpreter.typedef import TypeDef
+from pypy.module.datetime.interp_timedelta import W_TimeDelta, new_timedelta
+
+
+class W_TZInfo(W_Root):
+    """Abstract base class for time zone info classes."""
+
+    def descr_tzname(self, space, w_dt):
+        raise oefmt(space.w_NotImplementedError,
+                    "tzinfo subclass must override tzname()")
+
+    def descr_utcoffset(self, space, w_dt):
+        raise oefmt(space.w_NotImplementedError,
+                    "tzinfo subclass must override utcoffset()")
+
+    def descr_dst(self, space, w_dt):
+        raise oefmt(space.w_NotImplementedError,
+                    "tzinfo subclass must override dst()")
+
+    def descr_fromutc(self, space, w_dt):
+        return app_fromutc(space, self, w_dt)
+
+    def descr_reduce(self, space):
+        return app_reduce(space, self)
+
+def descr_new_tzinfo(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_TZInfo, w_subtype)
+    W_TZInfo.__init__(w_self)
+    return w_self
+
+app = applevel(r'''
+    def fromutc(self, dt):
+        "datetime in UTC -> datetime in local time."
+        from datetime import datetime
+        if not isinstance(dt, datetime):
+            raise TypeError("fromutc() requires a datetime argument")
+        if dt.tzinfo is not self:
+            raise ValueError("dt.tzinfo is not self")
+
+        dtoff = dt.utcoffset()
+        if dtoff is None:
+            raise ValueError("fromutc() requires a non-None utcoffset() "
+                             "result")
+        dtdst = dt.dst()
+        if dtdst is None:
+            raise ValueError("fromutc() requires a non-None dst() result")
+        delta = dtoff - dtdst
+        if delta:
+            dt += delta
+            dtdst = dt.dst()
+            if dtdst is None:
+                raise ValueError("fromutc(): dt.dst gave inconsistent "
+                                 "results; cannot convert")
+        if dtdst:
+            return dt + dtdst
+        else:
+            return dt
+
+    def reduce(self):
+        getinitargs = getattr(self, "__getinitargs__", None)
+        if getinitargs:
+            args = getinitargs()
+        else:
+            args = ()
+        getstate = getattr(self, "__getstate__", None)
+        if getstate:
+            state = getstate()
+        else:
+            state = getattr(self, "__dict__", None) or None
+        if state is None:
+            return (self.__class__, args)
+        else:
+            return (self.__class__, args, state)
+''', filename=__file__)
+
+app_fromutc = app.interphook('fromutc')
+app_reduce = app.interphook('reduce')
+
+W_TZInfo.typedef = TypeDef("datetime.tzinfo",
+    __doc__ = """Abstract base class for time zone info objects.""",
+    __new__ = interp2app(descr_new_tzinfo),
+    tzname = interp2app(W_TZInfo.descr_tzname),
+    utcoffset = interp2app(W_TZInfo.descr_utcoffset),
+    dst = interp2app(W_TZInfo.descr_dst),
+    fromutc = interp2app(W_TZInfo.descr_fromutc),
+    __reduce__ = interp2app(W_TZInfo.descr_reduce),
+)
+
+# ____________________________________________________________
+
+# the result of call_offset() when the method returned None; real
+# offsets are in -1439..1439 minutes
+NO_OFFSET = -1440
+
+def check_tzinfo_arg(space, w_tzinfo):
+    """Return the tzinfo argument as a W_TZInfo, or None."""
+    if w_tzinfo is None or space.is_w(w_tzinfo, space.w_None):
+        return None
+    if not isinstance(w_tzinfo, W_TZInfo):
+        raise oefmt(space.w_TypeError,
+                    "tzinfo argument must be None or of a tzinfo subclass")
+    return w_tzinfo
+
+def check_state_tzinfo(space, w_tzinfo):
+    # the tzinfo argument when unpickling
+    if w_tzinfo is None or space.is_w(w_tzinfo, space.w_None):
+        return None
+    if not isinstance(w_tzinfo, W_TZInfo):
+        raise oefmt(space.w_TypeError, "bad tzinfo state arg")
+    return w_tzinfo
+
+def call_offset(space, w_tzinfo, name, w_arg):
+    """Call the 'utcoffset' or 'dst' method of w_tzinfo and check the
+    result.  Returns the offset in minutes, or NO_OFFSET."""
+    if w_tzinfo is None:
+        return NO_OFFSET
+    w_offset = space.call_method(w_tzinfo, name, w_arg)
+    if space.is_w(w_offset, space.w_None):
+        return NO_OFFSET
+    if not isinstance(w_offset, W_TimeDelta):
+        raise oefmt(space.w_TypeError,
+                    "tzinfo.%s() must return None or timedelta, not '%T'",
+                    name, w_offset)
+    if w_offset.days < -1 or w_offset.days > 0:
+        offset = 1440     # out of range
+    else:
+        seconds = w_offset.days * 86400 + w_offset.seconds
+        if seconds % 60 or w_offset.microseconds:
+            raise oefmt(space.w_ValueError,
+                        "tzinfo.%s() must return a whole number of minutes",
+                        name)
+        offset = seconds // 60
+    if not -1440 < offset < 1440:
+        raise oefmt(space.w_ValueError, "%s()=%d, must be in -1439..1439",
+                    name, offset)
+    return offset
+
+def offset_as_timedelta(space, offset):
+    if offset == NO_OFFSET:
+        return space.w_None
+    return new_timedelta(space, 0, offset * 60, 0)
+
+def call_tzname(space, w_tzinfo, w_arg):
+    if w_tzinfo is None:
+        return space.w_None
+    w_name = space.call_method(w_tzinfo, 'tzname', w_arg)
+    if not (space.is_w(w_name, space.w_None) or
+            space.isinstance_w(w_name, space.w_bytes)):
+        raise oefmt(space.w_TypeError,
+                    "tzinfo.tzname() must return None or string, not '%T'",
+                    w_name)
+    return w_name
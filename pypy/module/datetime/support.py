@@ -0,0 +1,287 @@
+"""Calendar arithmetic and argument checking shared by the datetime types.
+
+The calendar is the proleptic Gregorian one, extended indefinitely in
+both directions; the ordinal of 01-Jan-0001 is 1.  Dates are packed in
+a single integer year << 9 | month << 5 | day, and times of the day in
+hour << 12 | minute << 6 | second plus the microseconds, so that
+comparing the packed integers compares the fields in order.
+"""
+
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.tool.sourcetools import func_with_new_name
+
+from pypy.interpreter.error import OperationError, oefmt
+
+
+MINYEAR = 1
+MAXYEAR = 9999
+MAX_DELTA_DAYS = 999999999
+
+US_PER_SECOND = 1000000
+SECONDS_PER_DAY = 24 * 3600
+
+DAYS_IN_MONTH = [-1, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+DAYS_BEFORE_MONTH = [-1, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304,
+                     334]
+
+MONTHNAMES = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+DAYNAMES = ["", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def days_before_year(year):
+    y = year - 1
+    return y * 365 + y // 4 - y // 100 + y // 400
+
+def days_in_month(year, month):
+    if month == 2 and is_leap(year):
+        return 29
+    return DAYS_IN_MONTH[month]
+
+def days_before_month(year, month):
+    if month > 2 and is_leap(year):
+        return DAYS_BEFORE_MONTH[month] + 1
+    return DAYS_BEFORE_MONTH[month]
+
+def ymd_to_ord(year, month, day):
+    return days_before_year(year) + days_before_month(year, month) + day
+
+DI400Y = days_before_year(401)    # number of days in 400 years
+DI100Y = days_before_year(101)    #    "    "   "   " 100   "
+DI4Y = days_before_year(5)        #    "    "   "   "   4   "
+
+MAX_ORDINAL = ymd_to_ord(MAXYEAR, 12, 31)
+EPOCH_ORDINAL = ymd_to_ord(1970, 1, 1)
+
+def ord_to_ymd(n):
+    """ordinal -> (year, month, day).  See lib_pypy/datetime.py for the
+    description of the algorithm."""
+    n -= 1
+    n400 = n // DI400Y
+    n -= n400 * DI400Y
+    year = n400 * 400 + 1
+    n100 = n // DI100Y
+    n -= n100 * DI100Y
+    n4 = n // DI4Y
+    n -= n4 * DI4Y
+    n1 = n // 365
+    n -= n1 * 365
+    year += n100 * 100 + n4 * 4 + n1
+    if n1 == 4 or n100 == 4:
+        return year - 1, 12, 31
+    leapyear = n1 == 3 and (n4 != 24 or n100 == 3)
+    month = (n + 50) >> 5
+    preceding = DAYS_BEFORE_MONTH[month]
+    if month > 2 and leapyear:
+        preceding += 1
+    if preceding > n:    # estimate is too large
+        month -= 1
+        preceding -= DAYS_IN_MONTH[month]
+        if month == 2 and leapyear:
+            preceding -= 1
+    return year, month, n - preceding + 1
+
+def isoweek1monday(year):
+    # the ordinal of the Monday starting week 1 of the ISO year
+    firstday = ymd_to_ord(year, 1, 1)
+    firstweekday = (firstday + 6) % 7
+    week1monday = firstday - firstweekday
+    if firstweekday > 3:    # Thursday
+        week1monday += 7
+    return week1monday
+
+def normalize_pair(hi, lo, factor):
+    if not 0 <= lo < factor:
+        inc = lo // factor
+        hi += inc
+        lo -= inc * factor
+    return hi, lo
+
+# ____________________________________________________________
+# packed fields
+
+def pack_date(year, month, day):
+    return (year << 9) | (month << 5) | day
+
+def unpack_year(ymd):
+    return ymd >> 9
+
+def unpack_month(ymd):
+    return (ymd >> 5) & 0xf
+
+def unpack_day(ymd):
+    return ymd & 0x1f
+
+def pack_hms(hour, minute, second):
+    return (hour << 12) | (minute << 6) | second
+
+def unpack_hour(hms):
+    return hms >> 12
+
+def unpack_minute(hms):
+    return (hms >> 6) & 0x3f
+
+def unpack_second(hms):
+    return hms & 0x3f
+
+def hms_to_seconds(hms):
+    return (unpack_hour(hms) * 3600 + unpack_minute(hms) * 60 +
+            unpack_second(hms))
+
+def seconds_to_hms(seconds):
+    minutes = seconds // 60
+    return pack_hms(minutes // 60, minutes % 60, seconds % 60)
+
+def hash_combine(x, y):
+    return intmask((r_uint(x) * r_uint(1000003)) ^ r_uint(y))
+
+# ____________________________________________________________
+# arguments
+
+def check_int_field(space, w_value):
+    if space.isinstance_w(w_value, space.w_int):
+        return space.int_w(w_value)
+    if space.isinstance_w(w_value, space.w_float):
+        raise oefmt(space.w_TypeError, "integer argument expected, got float")
+    if not space.isinstance_w(w_value, space.w_long):
+        w_int = space.findattr(w_value, space.newtext('__int__'))
+        if w_int is None:
+            raise oefmt(space.w_TypeError, "an integer is required")
+        w_value = space.call_function(w_int)
+        if not (space.isinstance_w(w_value, space.w_int) or
+                space.isinstance_w(w_value, space.w_long)):
+            raise oefmt(space.w_TypeError,
+                        "__int__ method should return an integer")
+    return space.int_w(w_value)
+
+def optional_field(space, w_value, default):
+    if w_value is None:
+        return default
+    return check_int_field(space, w_value)
+
+def replace_field(space, w_value, default):
+    # as in lib_pypy/datetime.py, replace() also keeps the fields given
+    # as None
+    if space.is_none(w_value):
+        return default
+    return check_int_field(space, w_value)
+
+def field_error(space, msg, value):
+    # like lib_pypy/datetime.py, the bad value is the second argument
+    return space.call_function(space.w_ValueError, space.newtext(msg),
+                               space.newint(value))
+
+def check_date_fields(space, year, month, day):
+    if not MINYEAR <= year <= MAXYEAR:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'year must be in %d..%d' % (MINYEAR, MAXYEAR), year))
+    if not 1 <= month <= 12:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'month must be in 1..12', month))
+    dim = days_in_month(year, month)
+    if not 1 <= day <= dim:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'day must be in 1..%d' % dim, day))
+
+def check_time_fields(space, hour, minute, second, microsecond):
+    if not 0 <= hour <= 23:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'hour must be in 0..23', hour))
+    if not 0 <= minute <= 59:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'minute must be in 0..59', minute))
+    if not 0 <= second <= 59:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'second must be in 0..59', second))
+    if not 0 <= microsecond <= 999999:
+        raise OperationError(space.w_ValueError, field_error(
+            space, 'microsecond must be in 0..999999', microsecond))
+
+# ____________________________________________________________
+# formatting
+
+def zfill(n, width):
+    s = str(n)
+    if len(s) < width:
+        s = '0' * (width - len(s)) + s
+    return s
+
+def format_time(hms, microsecond):
+    # skip the microseconds when they are 0
+    s = '%s:%s:%s' % (zfill(unpack_hour(hms), 2),
+                      zfill(unpack_minute(hms), 2),
+                      zfill(unpack_second(hms), 2))
+    if microsecond:
+        s += '.' + zfill(microsecond, 6)
+    return s
+
+def format_offset(offset, sep):
+    # 'offset' is in minutes
+    if offset < 0:
+        sign = '-'
+        offset = -offset
+    else:
+        sign = '+'
+    return '%s%s%s%s' % (sign, zfill(offset // 60, 2), sep,
+                         zfill(offset % 60, 2))
+
+# ____________________________________________________________
+# comparisons
+
+# The compare_to() method of the datetime types returns -1, 0 or 1, or
+# NOT_COMPARABLE if the other object is not of a type it knows about:
+# as in CPython, == and != are then False and True, and the ordering
+# comparisons raise TypeError.  Date and datetime return NOT_IMPLEMENTED
+# instead for other objects with a 'timetuple' attribute, to give them a
+# chance to handle the comparison.
+NOT_COMPARABLE = 2
+NOT_IMPLEMENTED = 3
+
+def cmp_int(x, y):
+    if x < y:
+        return -1
+    if x > y:
+        return 1
+    return 0
+
+def has_timetuple(space, w_obj):
+    return space.findattr(w_obj, space.newtext('timetuple')) is not None
+
+def _make_comparison(W_Class, opname):
+    def descr_compare(self, space, w_other):
+        c = self.compare_to(space, w_other)
+        if c == NOT_IMPLEMENTED:
+            return space.w_NotImplemented
+        if c == NOT_COMPARABLE:
+            if opname == 'eq':
+                return space.w_False
+            if opname == 'ne':
+                return space.w_True
+            raise oefmt(space.w_TypeError, "can't compare '%T' to '%T'",
+                        self, w_other)
+        if opname == 'eq':
+            res = c == 0
+        elif opname == 'ne':
+            res = c != 0
+        elif opname == 'lt':
+            res = c < 0
+        elif opname == 'le':
+            res = c <= 0
+        elif opname == 'gt':
+            res = c > 0
+        else:
+            res = c >= 0
+        return space.newbool(res)
+    return func_with_new_name(descr_compare, 'descr_%s_%s' % (
+        W_Class.__name__, opname))
+
+def make_comparisons(W_Class):
+    """Add descr_eq() ... descr_ge() to W_Class, on top of its
+    compare_to() method.  Every class gets its own functions, so that
+    subclasses like datetime get their __eq__ called first when they
+    are the right operand."""
+    for opname in ['eq', 'ne', 'lt', 'le', 'gt', 'ge']:
+        setattr(W_Class, 'descr_' + opname, _make_comparison(W_Class, opname))
@@ -0,0 +1,639 @@
+from pypy.module.datetime.interp_date import parse_fast
+
+
+def test_parse_fast():
+    assert parse_fast('2004-12-01 13:02:47', '%Y-%m-%d %H:%M:%S') == [
+        2004, 12, 1, 13, 2, 47, 0]
+    assert parse_fast('1/2/2003 \t 4:5.25', '%d/%m/%Y %H:%M.%f') == [
+        2003, 2, 1, 4, 5, 0, 250000]
+    assert parse_fast('T12 %', 't%H %%') == [1900, 1, 1, 12, 0, 0, 0]
+    # formats that are left to _strptime()
+    assert parse_fast('20040102', '%Y%m%d') is None
+    assert parse_fast('Dec 2004', '%b %Y') is None
+    assert parse_fast('1 1', '%H %H') is None
+    # strings that don't match, for the error message of _strptime()
+    assert parse_fast('2004-13-01', '%Y-%m-%d') is None
+    assert parse_fast('04-12-01', '%Y-%m-%d') is None
+    assert parse_fast('2004-12-01 ', '%Y-%m-%d') is None
+    assert parse_fast('2004-12', '%Y-%m-%d') is None
+    assert parse_fast('12:60', '%H:%M') is None
+
+
+class AppTestTimeDelta:
+    spaceconfig = dict(usemodules=['datetime', 'time', 'struct',
+                                   'binascii'])
+
+    def test_builtin(self):
+        import datetime
+        assert not hasattr(datetime, '__file__')
+        assert datetime.timedelta.__module__ == 'datetime'
+        assert datetime.MINYEAR == 1 and datetime.MAXYEAR == 9999
+
+    def test_normalize(self):
+        from datetime import timedelta
+        td = timedelta(1, 2, 3, 4, 5, 6, 7)
+        assert (td.days, td.seconds, td.microseconds) == (50, 21902, 4003)
+        td = timedelta(microseconds=-1)
+        assert (td.days, td.seconds, td.microseconds) == (-1, 86399, 999999)
+        td = timedelta(hours=-25)
+        assert (td.days, td.seconds, td.microseconds) == (-2, 82800, 0)
+        assert timedelta(1.5, hours=2) == timedelta(1, 50400)
+        assert timedelta(seconds=0.5) == timedelta(0, 0, 500000)
+        assert timedelta(microseconds=0.5) == timedelta(0, 0, 1)
+        assert timedelta(microseconds=-0.5) == timedelta(0, 0, -1)
+        assert timedelta(days=1L) == timedelta(1)
+        td = timedelta(microseconds=20000000000000000000)
+        assert (td.days, td.seconds) == (231481481, 41600)
+        raises(TypeError, timedelta, 'x')
+        raises(OverflowError, timedelta, 1000000000)
+        import sys
+        raises(OverflowError, timedelta, weeks=sys.maxint)
+        raises(OverflowError, timedelta, float('inf'))
+
+    def test_repr_str(self):
+        from datetime import timedelta
+        assert repr(timedelta(1)) == 'datetime.timedelta(1)'
+        assert repr(timedelta(1, 2)) == 'datetime.timedelta(1, 2)'
+        assert repr(timedelta(1, 2, 3)) == 'datetime.timedelta(1, 2, 3)'
+        assert repr(timedelta(0, 0, 3)) == 'datetime.timedelta(0, 0, 3)'
+        assert str(timedelta(0)) == '0:00:00'
+        assert str(timedelta(1, 3661)) == '1 day, 1:01:01'
+        assert str(timedelta(-2, 3661, 5)) == '-2 days, 1:01:01.000005'
+        class td(timedelta):
+            pass
+        assert repr(td(1, 2)) == 'td(1, 2)'
+
+    def test_arithmetic(self):
+        from datetime import timedelta
+        a = timedelta(1, 2, 3)
+        b = timedelta(0, 86399, 999999)
+        assert a + b == timedelta(2, 2, 2)
+        assert a - b == timedelta(0, 2, 4)
+        assert -a == timedelta(-2, 86397, 999997)
+        assert +a == a and abs(-a) == a
+        assert a * 2 == 2 * a == timedelta(2, 4, 6)
+        assert a * 10L ** 3 == timedelta(1000, 2000, 3000)
+        assert a / 2 == a // 2 == timedelta(0, 43201, 1)
+        assert timedelta(-1) / 3 == timedelta(-1, 57600)
+        raises(ZeroDivisionError, "a / 0")
+        raises(TypeError, "a * 1.5")
+        raises(TypeError, "a + 1")
+        raises(OverflowError, "timedelta.max + timedelta.resolution")
+        class td(timedelta):
+            pass
+        assert type(+td(1)) is timedelta
+        assert type(td(1) + td(1)) is timedelta
+
+    def test_total_seconds(self):
+        from datetime import timedelta
+        assert timedelta(1, 2, 3).total_seconds() == 86402.000003
+        assert timedelta(-1).total_seconds() == -86400.0
+        assert type(timedelta(5).total_seconds()) is float
+        big = timedelta(999999999, 86399, 999999)
+        assert big.total_seconds() == 86399999999999.999999
+
+    def test_compare_hash(self):
+        from datetime import timedelta
+        a = timedelta(1, 2, 3)
+        assert a == timedelta(1, 2, 3)
+        assert a != timedelta(1, 2, 4)
+        assert a < timedelta(1, 3) and a <= a and a >= a
+        assert not (a > timedelta(2))
+        assert hash(a) == hash(timedelta(0, 86402, 3))
+        assert len(set([timedelta(1), timedelta(0, 86400),
+                        timedelta(2)])) == 2
+        assert (a == 5) is False and (a != 5) is True
+        raises(TypeError, "a < 5")
+        assert bool(timedelta(0)) is False
+        assert bool(timedelta(0, 0, 1)) is True
+
+    def test_constants(self):
+        from datetime import timedelta
+        assert timedelta.min == timedelta(-999999999)
+        assert timedelta.max == timedelta(999999999, 86399, 999999)
+        assert timedelta.resolution == timedelta(0, 0, 1)
+
+    def test_pickle(self):
+        import pickle
+        from datetime import timedelta
+        for td in [timedelta(1, 2, 3), timedelta.min, timedelta.max]:
+            for proto in range(3):
+                assert pickle.loads(pickle.dumps(td, proto)) == td
+
+
+class AppTestDate:
+    spaceconfig = dict(usemodules=['datetime', 'time', 'struct',
+                                   'binascii'])
+
+    def test_fields(self):
+        from datetime import date
+        d = date(2015, 6, 8)
+        assert (d.year, d.month, d.day) == (2015, 6, 8)
+        assert repr(d) == 'datetime.date(2015, 6, 8)'
+        assert str(d) == d.isoformat() == '2015-06-08'
+        assert str(date(5, 1, 1)) == '0005-01-01'
+        assert d.ctime() == 'Mon Jun  8 00:00:00 2015'
+        e = raises(ValueError, date, 2015, 2, 29)
+        assert e.value.args == ('day must be in 1..28', 29)
+        e = raises(ValueError, date, 10000, 1, 1)
+        assert e.value.args == ('year must be in 1..9999', 10000)
+        e = raises(ValueError, date, 1, 13, 1)
+        assert e.value.args == ('month must be in 1..12', 13)
+        assert date(2016, 2, 29).day == 29
+        raises(TypeError, date, 2015)
+        raises(TypeError, date, 2015.0, 1, 1)
+        e = raises(TypeError, date, '123')
+        assert str(e.value) == 'an integer is required'
+        raises(AttributeError, "d.abc = 1")
+
+    def test_ordinals(self):
+        from datetime import date
+        assert date(1, 1, 1).toordinal() == 1
+        assert date(1970, 1, 1).toordinal() == 719163
+        assert date(9999, 12, 31).toordinal() == 3652059
+        for n in [1, 59, 60, 365, 366, 719163, 730119, 730120, 3652059]:
+            assert date.fromordinal(n).toordinal() == n
+        assert date.fromordinal(730120) == date(2000, 1, 1)
+        raises(ValueError, date.fromordinal, 0)
+        raises(ValueError, date.fromordinal, 3652060)
+        d = date(2015, 6, 8)
+        assert d.weekday() == 0
+        assert d.isoweekday() == 1
+        assert d.isocalendar() == (2015, 24, 1)
+        assert date(2010, 1, 3).isocalendar() == (2009, 53, 7)
+        assert date(2008, 12, 29).isocalendar() == (2009, 1, 1)
+
+    def test_arithmetic(self):
+        from datetime import date, timedelta
+        d = date(2015, 12, 31)
+        assert d + timedelta(1) == date(2016, 1, 1)
+        assert timedelta(1) + d == date(2016, 1, 1)
+        assert d - timedelta(365) == date(2014, 12, 31)
+        assert d + timedelta(0, 86399) == d
+        assert d - date(2015, 1, 1) == timedelta(364)
+        raises(OverflowError, "date.max + timedelta(1)")
+        raises(OverflowError, "date.min - timedelta(1)")
+        raises(TypeError, "d + 1")
+        class X(object):
+            def __radd__(self, other):
+                return "radd"
+        assert d + X() == "radd"
+
+    def test_compare_hash(self):
+        from datetime import date, datetime
+        a = date(2015, 6, 8)
+        assert a == date(2015, 6, 8)
+        assert a < date(2015, 6, 9) < date(2015, 7, 1) < date(2016, 1, 1)
+        assert hash(a) == hash(date(2015, 6, 8))
+        assert (a == 5) is False
+        raises(TypeError, "a < 5")
+        assert (a == datetime(2015, 6, 8)) is False
+        raises(TypeError, "a < datetime(2015, 6, 8)")
+        class Other(object):
+            def timetuple(self):
+                pass
+            def __eq__(self, other):
+                return "other"
+            __req__ = __eq__
+        assert (a == Other()) == "other"
+
+    def test_timetuple_strftime(self):
+        from datetime import date
+        d = date(2015, 6, 8)
+        assert tuple(d.timetuple()) == (2015, 6, 8, 0, 0, 0, 0, 159, -1)
+        assert d.strftime('%Y/%m/%d %f %z %Z') == '2015/06/08 000000  '
+        assert format(d, '%d.%m') == '08.06'
+        assert format(d, '') == '2015-06-08'
+        raises(ValueError, date(1800, 1, 1).strftime, '%Y')
+
+    def test_replace_subclass(self):
+        from datetime import date
+        class MyDate(date):
+            forbidden = False
+            def __new__(cls):
+                if cls.forbidden: FAIL
+                return date.__new__(cls, 2016, 2, 3)
+        d = MyDate()
+        assert repr(d) == 'MyDate(2016, 2, 3)'
+        d.forbidden = True
+        d2 = d.replace(day=5)
+        assert type(d2) is MyDate
+        assert d2 == date(2016, 2, 5)
+        assert d.replace(month=None) == d
+        raises(ValueError, d.replace, day=31)
+        class D2(date):
+            pass
+        assert type(D2.fromordinal(1)) is D2
+        assert type(D2.today()) is D2
+
+    def test_fromtimestamp(self):
+        import time
+        from datetime import date
+        t = time.time()
+        assert date.fromtimestamp(t) == date(*time.localtime(t)[:3])
+        assert date.today() == date(*time.localtime()[:3]) or \
+               date.today() == date(*time.localtime()[:3])
+
+    def test_pickle(self):
+        import pickle
+        from datetime import date
+        d = date(2015, 6, 8)
+        for proto in range(3):
+            assert pickle.loads(pickle.dumps(d, proto)) == d
+        assert date(*d.__reduce__()[1]) == d
+
+
+class AppTestTime:
+    spaceconfig = dict(usemodules=['datetime', 'time', 'struct',
+                                   'binascii'])
+
+    def test_fields(self):
+        from datetime import time
+        t = time(12, 34, 56, 789)
+        assert (t.hour, t.minute, t.second, t.microsecond) == (12, 34, 56, 789)
+        assert t.tzinfo is None
+        assert repr(t) == 'datetime.time(12, 34, 56, 789)'
+        assert repr(time(12, 34)) == 'datetime.time(12, 34)'
+        assert repr(time(12, 34, 5)) == 'datetime.time(12, 34, 5)'
+        assert str(t) == t.isoformat() == '12:34:56.000789'
+        assert str(time(1, 2)) == '01:02:00'
+        assert time() == time(0, 0, 0, 0)
+        e = raises(ValueError, time, 24)
+        assert e.value.args == ('hour must be in 0..23', 24)
+        raises(ValueError, time, 0, 0, 60)
+        raises(ValueError, time, 0, 0, 0, 1000000)
+        raises(TypeError, time, 1.0)
+        e = raises(TypeError, time, 0, tzinfo=5)
+        assert str(e.value) == ('tzinfo argument must be None or of a '
+                                'tzinfo subclass')
+
+    def test_compare_hash(self):
+        from datetime import time
+        a = time(1, 2, 3, 4)
+        assert a == time(1, 2, 3, 4)
+        assert a < time(1, 2, 3, 5) < time(1, 2, 4) < time(1, 3) < time(2)
+        assert hash(a) == hash(time(1, 2, 3, 4))
+        assert (a == 5) is False
+        raises(TypeError, "a < 5")
+        assert bool(time(0)) is False
+        assert bool(time(0, 0, 0, 1)) is True
+
+    def test_strftime(self):
+        from datetime import time
+        t = time(1, 2, 3, 4)
+        assert t.strftime('%H:%M:%S.%f') == '01:02:03.000004'
+        assert format(t, '%H') == '01'
+
+    def test_replace(self):
+        from datetime import time
+        t = time(1, 2, 3, 4)
+        assert t.replace(hour=5) == time(5, 2, 3, 4)
+        assert t.replace(microsecond=0, second=None) == time(1, 2, 3)
+        raises(ValueError, t.replace, minute=60)
+
+    def test_constants(self):
+        from datetime import time, timedelta
+        assert time.min == time(0)
+        assert time.max == time(23, 59, 59, 999999)
+        assert time.resolution == timedelta(microseconds=1)
+
+    def test_pickle(self):
+        import pickle
+        from datetime import time
+        t = time(12, 34, 56, 654321)
+        for proto in range(3):
+            assert pickle.loads(pickle.dumps(t, proto)) == t
+        time('\x01' * 6, None)
+        e = raises(TypeError, time, '\x01' * 6, 123)
+        assert str(e.value) == "bad tzinfo state arg"
+
+
+class AppTestDateTime:
+    spaceconfig = dict(usemodules=['datetime', 'time', 'struct',
+                                   'binascii'])
+
+    def test_fields(self):
+        from datetime import datetime, date
+        dt = datetime(2015, 6, 8, 12, 34, 56, 789)
+        assert isinstance(dt, date)
+        assert (dt.year, dt.month, dt.day) == (2015, 6, 8)
+        assert (dt.hour, dt.minute, dt.second, dt.microsecond) == (
+            12, 34, 56, 789)
+        assert repr(dt) == 'datetime.datetime(2015, 6, 8, 12, 34, 56, 789)'
+        assert repr(datetime(2015, 6, 8)) == (
+            'datetime.datetime(2015, 6, 8, 0, 0)')
+        assert str(dt) == '2015-06-08 12:34:56.000789'
+        assert dt.isoformat() == '2015-06-08T12:34:56.000789'
+        assert dt.isoformat('_') == '2015-06-08_12:34:56.000789'
+        assert dt.ctime() == 'Mon Jun  8 12:34:56 2015'
+        assert dt.date() == date(2015, 6, 8)
+        assert type(dt.date()) is date
+        assert dt.time().microsecond == 789
+        raises(TypeError, datetime, 2015)
+        raises(TypeError, datetime, 2015, 6)
+        raises(ValueError, datetime, 2015, 6, 8, 24)
+        raises(TypeError, datetime, 10, 10, 10, 10, 10, 10, 10.)
+        e = raises(TypeError, datetime, '123')
+        assert str(e.value) == 'an integer is required'
+
+    def test_check_arg_types(self):
+        import decimal
+        from datetime import datetime
+        class Number:
+            def __init__(self, value):
+                self.value = value
+            def __int__(self):
+                return self.value
+        class SubInt(int): pass
+        dt10 = datetime(10, 10, 10, 10, 10, 10, 10)
+        for xx in [10L, decimal.Decimal('10.9'), Number(10), SubInt(10)]:
+            assert datetime(xx, xx, xx, xx, xx, xx, xx) == dt10
+        e = raises(TypeError, datetime, 10, 10, Number(10.9))
+        assert str(e.value) == '__int__ method should return an integer'
+        class Float(float):
+            pass
+        e = raises(TypeError, datetime, 10, 10, Float(10.9))
+        assert str(e.value) == 'integer argument expected, got float'
+
+    def test_arithmetic(self):
+        from datetime import datetime, timedelta
+        dt = datetime(2015, 12, 31, 23, 59, 59, 999999)
+        assert dt + timedelta(microseconds=1) == datetime(2016, 1, 1)
+        assert timedelta(0, 1) + dt == datetime(2016, 1, 1, 0, 0, 0, 999999)
+        assert dt - timedelta(days=365, hours=24) == datetime(
+            2014, 12, 30, 23, 59, 59, 999999)
+        assert dt - datetime(2015, 12, 31) == timedelta(0, 86399, 999999)
+        assert datetime(2015, 12, 31) - dt == timedelta(-1, 0, 1)
+        raises(OverflowError, "datetime.max + timedelta.resolution")
+        raises(OverflowError, "datetime.min - timedelta.resolution")
+        raises(TypeError, "dt + 1")
+        raises(TypeError, "dt - 1")
+
+    def test_compare_hash(self):
+        from datetime import datetime, date
+        a = datetime(2015, 6, 8, 12, 34, 56, 789)
+        assert a == datetime(2015, 6, 8, 12, 34, 56, 789)
+        assert a < datetime(2015, 6, 8, 12, 34, 56, 790)
+        assert a < datetime(2015, 6, 8, 12, 35) < datetime(2015, 6, 9)
+        assert hash(a) == hash(datetime(2015, 6, 8, 12, 34, 56, 789))
+        assert (a == date(2015, 6, 8)) is False
+        assert (date(2015, 6, 8) == a) is False
+        raises(TypeError, "a < date(2015, 6, 8)")
+        raises(TypeError, "date(2015, 6, 8) < a")
+        assert (a == 5) is False
+        raises(TypeError, "a < 5")
+
+    def test_timetuple(self):
+        from datetime import datetime
+        dt = datetime(2015, 6, 8, 12, 34, 56, 789)
+        assert tuple(dt.timetuple()) == (2015, 6, 8, 12, 34, 56, 0, 159, -1)
+        assert tuple(dt.utctimetuple()) == (2015, 6, 8, 12, 34, 56, 0, 159, 0)
+        assert dt.strftime('%Y-%m-%d %H:%M:%S.%f') == (
+            '2015-06-08 12:34:56.000789')
+
+    def test_combine(self):
+        from datetime import datetime, date, time
+        dt = datetime.combine(date(2015, 6, 8), time(1, 2, 3, 4))
+        assert dt == datetime(2015, 6, 8, 1, 2, 3, 4)
+        assert datetime.combine(dt, time(5)) == datetime(2015, 6, 8, 5)
+        raises(TypeError, datetime.combine, 5, time(5))
+        raises(TypeError, datetime.combine, date(2015, 6, 8), 5)
+
+    def test_utcfromtimestamp(self):
+        from datetime import datetime
+        expected_results = {
+            -1000.0: 'datetime.datetime(1969, 12, 31, 23, 43, 20)',
+            -999.9999996: 'datetime.datetime(1969, 12, 31, 23, 43, 20)',
+            -999.4: 'datetime.datetime(1969, 12, 31, 23, 43, 20, 600000)',
+            -999.0000004: 'datetime.datetime(1969, 12, 31, 23, 43, 21)',
+            -0.4: 'datetime.datetime(1969, 12, 31, 23, 59, 59, 600000)',
+            -0.0000004: 'datetime.datetime(1970, 1, 1, 0, 0)',
+            0.0: 'datetime.datetime(1970, 1, 1, 0, 0)',
+            0.4: 'datetime.datetime(1970, 1, 1, 0, 0, 0, 400000)',
+            0.9999996: 'datetime.datetime(1970, 1, 1, 0, 0, 1)',
+            1000.9999996: 'datetime.datetime(1970, 1, 1, 0, 16, 41)',
+            1293843661.191: 'datetime.datetime(2011, 1, 1, 1, 1, 1, 191000)',
+            4102444800.0: 'datetime.datetime(2100, 1, 1, 0, 0)',
+            -62135596800.0: 'datetime.datetime(1, 1, 1, 0, 0)',
+            }
+        for t in sorted(expected_results):
+            dt = datetime.utcfromtimestamp(t)
+            assert repr(dt) == expected_results[t]
+        assert type(datetime.utcfromtimestamp(0).microsecond) is int
+        raises(ValueError, datetime.utcfromtimestamp, -62135596801.0)
+        raises(ValueError, datetime.utcfromtimestamp, 1e20)
+        raises(ValueError, datetime.utcfromtimestamp, float('nan'))
+
+    def test_fromtimestamp(self):
+        import time
+        from datetime import datetime
+        for t in [0.0, 1000.5, 1431216000, time.time()]:
+            dt = datetime.fromtimestamp(t)
+            assert tuple(dt.timetuple())[:6] == time.localtime(int(t))[:6]
+        now = datetime.now()
+        assert abs(now - datetime.fromtimestamp(time.time())).seconds < 10
+        utcnow = datetime.utcnow()
+        assert abs(utcnow - datetime.utcfromtimestamp(time.time())
+                   ).seconds < 10
+        class DT(datetime):
+            pass
+        assert type(DT.fromtimestamp(0)) is DT
+        assert type(DT.utcfromtimestamp(0)) is DT
+        assert type(DT.now()) is DT
+
+    def test_strptime(self):
+        import time
+        from datetime import datetime
+        for string, format in [
+                ('2004-12-01 13:02:47', '%Y-%m-%d %H:%M:%S'),
+                ('2004-12-01T13:02:47', '%Y-%m-%dt%H:%M:%S'),
+                ('1/2/2003  4:5', '%d/%m/%Y %H:%M'),
+                ('20040102', '%Y%m%d'),
+                ('12 Dec 2004', '%d %b %Y'),
+                ('2004%12', '%Y%%%m')]:
+            expected = datetime(*(time.strptime(string, format)[0:6]))
+            assert datetime.strptime(string, format) == expected
+        assert datetime.strptime('1.5', '%S.%f').microsecond == 500000
+        assert datetime.strptime('1.000005', '%S.%f').microsecond == 5
+        for string, format in [('2004-13-01', '%Y-%m-%d'),
+                               ('2004-12-01 ', '%Y-%m-%d'),
+                               ('2004-02-30', '%Y-%m-%d'),
+                               ('04-12-01', '%Y-%m-%d'),
+                               ('2004-12-01', '%Y-%m-%d-'),
+                               ('12:60', '%H:%M'),
+                               ('1:2', '%H:%M:%S')]:
+            raises(ValueError, datetime.strptime, string, format)
+        class DT(datetime):
+            pass
+        dt = DT.strptime('2004-12-01', '%Y-%m-%d')
+        assert type(dt) is DT and dt == datetime(2004, 12, 1)
+        assert datetime.strptime(u'2004', u'%Y') == datetime(2004, 1, 1)
+
+    def test_replace_subclass(self):
+        from datetime import datetime
+        class MyDatetime(datetime):
+            forbidden = False
+            def __new__(cls):
+                if cls.forbidden: FAIL
+                return datetime.__new__(cls, 2016, 4, 5, 1, 2, 3)
+        d = MyDatetime()
+        assert repr(d) == 'MyDatetime(2016, 4, 5, 1, 2, 3)'
+        d.forbidden = True
+        d2 = d.replace(hour=7)
+        assert type(d2) is MyDatetime
+        assert d2 == datetime(2016, 4, 5, 7, 2, 3)
+
+    def test_constants(self):
+        from datetime import datetime, timedelta
+        assert datetime.min == datetime(1, 1, 1)
+        assert datetime.max == datetime(9999, 12, 31, 23, 59, 59, 999999)
+        assert datetime.resolution == timedelta(microseconds=1)
+
+    def test_pickle(self):
+        import pickle
+        from datetime import datetime
+        dt = datetime(2015, 6, 8, 12, 34, 56, 654321)
+        for proto in range(3):
+            assert pickle.loads(pickle.dumps(dt, proto)) == dt
+        datetime('\x01' * 10, None)
+        e = raises(TypeError, datetime, '\x01' * 10, 123)
+        assert str(e.value) == "bad tzinfo state arg"
+
+
+class AppTestTZInfo:
+    spaceconfig = dict(usemodules=['datetime', 'time', 'struct',
+                                   'binascii'])
+
+    def setup_class(cls):
+        cls.w_FixedOffset = cls.space.appexec([], """():
+            from datetime import tzinfo, timedelta
+            class FixedOffset(tzinfo):
+                def __init__(self, minutes, name, dst=0):
+                    self.offset = timedelta(minutes=minutes)
+                    self.name = name
+                    self.dstoffset = timedelta(minutes=dst)
+                def utcoffset(self, dt):
+                    return self.offset
+                def tzname(self, dt):
+                    return self.name
+                def dst(self, dt):
+                    return self.dstoffset
+                def __repr__(self):
+                    return 'FixedOffset(%r)' % (self.name,)
+            return FixedOffset
+        """)
+
+    def test_abstract(self):
+        from datetime import tzinfo, datetime
+        tz = tzinfo()
+        for name in ['utcoffset', 'tzname', 'dst']:
+            e = raises(NotImplementedError, getattr(tz, name), None)
+            assert str(e.value) == (
+                'tzinfo subclass must override %s()' % name)
+        raises(AttributeError, "tz.abc = 1")
+        raises(TypeError, tz.fromutc, 5)
+        raises(ValueError, tz.fromutc, datetime(2000, 1, 1))
+
+    def test_aware_time(self):
+        from datetime import time, timedelta
+        est = self.FixedOffset(-300, 'EST')
+        utc = self.FixedOffset(0, 'UTC')
+        t = time(12, 0, tzinfo=est)
+        assert t.tzinfo is est
+        assert t.utcoffset() == timedelta(hours=-5)
+        assert t.tzname() == 'EST'
+        assert t.dst() == timedelta(0)
+        assert str(t) == '12:00:00-05:00'
+        assert repr(t) == "datetime.time(12, 0, tzinfo=FixedOffset('EST'))"
+        assert t == time(17, 0, tzinfo=utc)
+        assert hash(t) == hash(time(17, 0, tzinfo=utc))
+        assert t < time(17, 1, tzinfo=utc)
+        assert bool(time(5, 0, tzinfo=self.FixedOffset(300, 'X'))) is False
+        assert t.strftime('%H %z %Z') == '12 -0500 EST'
+        assert t.replace(tzinfo=None).tzinfo is None
+        e = raises(TypeError, "time(7, 32, 12) == t")
+        assert str(e.value) == (
+            "can't compare offset-naive and offset-aware times")
+
+    def test_aware_datetime(self):
+        from datetime import datetime, timedelta
+        est = self.FixedOffset(-300, 'EST')
+        utc = self.FixedOffset(0, 'UTC')
+        dt = datetime(2015, 1, 1, 2, 0, tzinfo=est)
+        assert str(dt) == '2015-01-01 02:00:00-05:00'
+        assert dt.utcoffset() == timedelta(hours=-5)
+        assert dt == datetime(2015, 1, 1, 7, 0, tzinfo=utc)
+        assert hash(dt) == hash(datetime(2015, 1, 1, 7, 0, tzinfo=utc))
+        assert dt > datetime(2015, 1, 1, 6, 59, tzinfo=utc)
+        assert dt - datetime(2015, 1, 1, 2, 0, tzinfo=utc) == timedelta(
+            hours=5)
+        assert (dt + timedelta(1)).tzinfo is est
+        assert tuple(dt.utctimetuple())[:6] == (2015, 1, 1, 7, 0, 0)
+        assert dt.timetuple().tm_isdst == 0
+        assert dt.strftime('%Y %z %Z') == '2015 -0500 EST'
+        naive = datetime(2015, 1, 1)
+        e = raises(TypeError, "naive == dt")
+        assert str(e.value) == (
+            "can't compare offset-naive and offset-aware datetimes")
+        e = raises(TypeError, "naive - dt")
+        assert str(e.value) == (
+            "can't subtract offset-naive and offset-aware datetimes")
+
+    def test_astimezone(self):
+        from datetime import datetime
+        est = self.FixedOffset(-300, 'EST')
+        utc = self.FixedOffset(0, 'UTC')
+        dt = datetime(2015, 1, 1, 2, 0, tzinfo=est)
+        u = dt.astimezone(utc)
+        assert u.tzinfo is utc
+        assert (u.year, u.month, u.day, u.hour) == (2015, 1, 1, 7)
+        assert dt.astimezone(est) is dt
+        raises(ValueError, datetime(2015, 1, 1).astimezone, utc)
+        raises(TypeError, dt.astimezone, 5)
+
+    def test_fromtimestamp_tz(self):
+        from datetime import datetime
+        est = self.FixedOffset(-300, 'EST')
+        dt = datetime.fromtimestamp(0, est)
+        assert dt.tzinfo is est
+        assert str(dt) == '1969-12-31 19:00:00-05:00'
+        assert datetime.now(est).tzinfo is est
+
+    def test_bad_offsets(self):
+        from datetime import datetime, timedelta, tzinfo
+        class Bad(tzinfo):
+            def __init__(self, offset):
+                self.offset = offset
+            def utcoffset(self, dt):
+                return self.offset
+            def tzname(self, dt):
+                return self.offset
+        dt = datetime(2015, 1, 1, tzinfo=Bad(5))
+        e = raises(TypeError, dt.utcoffset)
+        assert str(e.value) == ("tzinfo.utcoffset() must return None or "
+                                "timedelta, not 'int'")
+        raises(TypeError, dt.tzname)
+        dt = datetime(2015, 1, 1, tzinfo=Bad(timedelta(seconds=30)))
+        e = raises(ValueError, dt.utcoffset)
+        assert str(e.value) == ("tzinfo.utcoffset() must return a whole "
+                                "number of minutes")
+        dt = datetime(2015, 1, 1, tzinfo=Bad(timedelta(1)))
+        e = raises(ValueError, dt.utcoffset)
+        assert str(e.value) == "utcoffset()=1440, must be in -1439..1439"
+        dt = datetime(2015, 1, 1, tzinfo=Bad(None))
+        assert dt.utcoffset() is None
+        assert dt.isoformat() == '2015-01-01T00:00:00'
+
+    def test_pickle(self):
+        import pickle
+        from datetime import datetime, time, tzinfo
+        dt = datetime(2015, 1, 1, 2, 0, tzinfo=self.FixedOffset(60, 'CET'))
+        assert type(tzinfo().__reduce__()) is tuple
+        state = dt.__reduce__()
+        assert state[0] is datetime
+        assert state[1][1] is dt.tzinfo
+        dt2 = datetime(*state[1])
+        assert dt2 == dt and dt2.tzinfo is dt.tzinfo
+        t = dt.timetz()
+        t2 = time(*t.__reduce__()[1])
+        assert t2 == t and t2.tzinfo is dt.tzinfo
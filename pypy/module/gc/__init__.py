@@ -4,12 +4,18 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     interpleveldefs = {
         'collect': 'interp_gc.collect',
+        'collect_step': 'interp_gc.collect_step',
         'enable': 'interp_gc.enable',
         'disable': 'interp_gc.disable',
         'isenabled': 'interp_gc.isenabled',
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage': 'space.newlist([])',
+        'get_stats': 'interp_stats.get_stats',
+        'GcStats': 'interp_stats.W_GcStats',
+        'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
+        'GC_STATES': 'hook.get_gc_states(space)',
+        'GcCollectStepStats': 'hook.W_GcCollectStepStats',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {}
@@ -34,3 +40,10 @@ class Module(MixedModule):
                 'GcRef': 'referents.W_GcRef',
                 })
         MixedModule.__init__(self, space, w_name)
+        from pypy.module.gc.hook import GcHooksAction
+        space.actionflag.register_periodic_action(GcHooksAction(space),
+                                                  use_bytecode_counter=False)
+
+    def startup(self, space):
+        from pypy.module.gc.interp_stats import TimestampCalibration
+        space.fromcache(TimestampCalibration).startup()
@@ -0,0 +1,319 @@
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc import incminimark
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib import rvmprof
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
+    interp_attrproperty)
+from pypy.module.gc.interp_stats import TimestampCalibration
+
+
+class LowLevelGcHooks(GcHooks):
+    """
+    The hooks called directly by the GC.  They cannot do much: they only
+    accumulate the events and ask for GcHooksAction to run before the next
+    bytecode.  The app-level callbacks are invoked from there, never from
+    inside the collector, and receive all the events that occurred since
+    the previous call.
+
+    This is a singleton created by space.fromcache(), which the GC gets
+    from targetpypystandalone.get_gchooks().
+    """
+
+    def __init__(self, space):
+        GcHooks.__init__(self)
+        self.space = space
+        self.pending = False
+        self.minor = GcMinorEvents()
+        self.collect_step = GcCollectStepEvents()
+        self.collect = GcCollectEvents()
+
+    def on_gc_minor(self, duration, total_memory_used, promoted,
+                    pinned_objects):
+        self.minor.record(duration, total_memory_used, promoted,
+                          pinned_objects)
+        self._fire()
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.collect_step.record(duration, oldstate, newstate)
+        self._fire()
+
+    def on_gc_collect(self, num_major_collects,
+                      memory_before, memory_after,
+                      rawmalloced_before, rawmalloced_after,
+                      arena_memory, threshold):
+        self.collect.record(num_major_collects, memory_before, memory_after,
+                            rawmalloced_before, rawmalloced_after,
+                            arena_memory, threshold)
+        self._fire()
+
+    def on_gc_alloc_sample(self, nbytes):
+        # enabled by _vmprof.enable_allocation_sampling(): write the
+        # current stack to the profile, right now
+        if self.space.config.objspace.usemodules._vmprof:
+            rvmprof.sample_allocation(nbytes)
+
+    def _fire(self):
+        # can't use AsyncAction.fire(), which may allocate
+        self.pending = True
+        self.space.actionflag.reset_ticker(-1)
+
+
+class GcEvents(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.duration = 0.0
+        self.duration_min = 0.0
+        self.duration_max = 0.0
+
+    def record_duration(self, duration):
+        duration = float(duration)
+        if self.count == 0 or duration < self.duration_min:
+            self.duration_min = duration
+        if duration > self.duration_max:
+            self.duration_max = duration
+        self.duration += duration
+        self.count += 1
+
+
+class GcMinorEvents(GcEvents):
+    def reset(self):
+        GcEvents.reset(self)
+        self.total_memory_used = 0
+        self.promoted = 0
+        self.pinned_objects = 0
+
+    def record(self, duration, total_memory_used, promoted, pinned_objects):
+        self.record_duration(duration)
+        self.total_memory_used = intmask(total_memory_used)
+        self.promoted += intmask(promoted)
+        self.pinned_objects = pinned_objects
+
+
+class GcCollectStepEvents(GcEvents):
+    def reset(self):
+        GcEvents.reset(self)
+        self.oldstate = 0
+        self.newstate = 0
+
+    def record(self, duration, oldstate, newstate):
+        self.record_duration(duration)
+        self.oldstate = oldstate
+        self.newstate = newstate
+
+
+class GcCollectEvents(GcEvents):
+    def reset(self):
+        GcEvents.reset(self)
+        self.num_major_collects = 0
+        self.memory_before = 0
+        self.memory_after = 0
+        self.rawmalloced_before = 0
+        self.rawmalloced_after = 0
+        self.arena_memory = 0
+        self.major_collection_threshold = 0
+
+    def record(self, num_major_collects, memory_before, memory_after,
+               rawmalloced_before, rawmalloced_after, arena_memory,
+               threshold):
+        # full major collections have no duration of their own: see
+        # the steps for that
+        self.count += 1
+        self.num_major_collects = num_major_collects
+        self.memory_before = intmask(memory_before)
+        self.memory_after = intmask(memory_after)
+        self.rawmalloced_before = intmask(rawmalloced_before)
+        self.rawmalloced_after = intmask(rawmalloced_after)
+        self.arena_memory = intmask(arena_memory)
+        self.major_collection_threshold = threshold
+
+
+class GcHooksAction(PeriodicAsyncAction):
+    """Invokes the app-level callbacks with the events accumulated by
+    LowLevelGcHooks."""
+
+    def perform(self, executioncontext, frame):
+        space = self.space
+        hooks = space.fromcache(LowLevelGcHooks)
+        if not hooks.pending:
+            return
+        hooks.pending = False
+        w_hooks = space.fromcache(W_AppLevelHooks)
+        factor = space.fromcache(TimestampCalibration).get_factor()
+        if hooks.minor.count > 0:
+            w_stats = W_GcMinorStats(hooks.minor, factor)
+            hooks.minor.reset()
+            w_hooks.call(w_hooks.w_on_gc_minor, w_stats)
+        if hooks.collect_step.count > 0:
+            w_stats = W_GcCollectStepStats(hooks.collect_step, factor)
+            hooks.collect_step.reset()
+            w_hooks.call(w_hooks.w_on_gc_collect_step, w_stats)
+        if hooks.collect.count > 0:
+            w_stats = W_GcCollectStats(hooks.collect)
+            hooks.collect.reset()
+            w_hooks.call(w_hooks.w_on_gc_collect, w_stats)
+
+
+class W_AppLevelHooks(W_Root):
+
+    def __init__(self, space):
+        self.space = space
+        self.w_on_gc_minor = space.w_None
+        self.w_on_gc_collect_step = space.w_None
+        self.w_on_gc_collect = space.w_None
+
+    def call(self, w_callback, w_stats):
+        space = self.space
+        if space.is_none(w_callback):
+            return      # the hook was removed after the event
+        try:
+            space.call_function(w_callback, w_stats)
+        except OperationError as e:
+            e.write_unraisable(space, "gc hook ", w_callback)
+
+    def descr_get_on_gc_minor(self, space):
+        return self.w_on_gc_minor
+
+    def descr_set_on_gc_minor(self, space, w_obj):
+        hooks = space.fromcache(LowLevelGcHooks)
+        hooks.gc_minor_enabled = not space.is_none(w_obj)
+        hooks.minor.reset()
+        self.w_on_gc_minor = w_obj
+
+    def descr_get_on_gc_collect_step(self, space):
+        return self.w_on_gc_collect_step
+
+    def descr_set_on_gc_collect_step(self, space, w_obj):
+        hooks = space.fromcache(LowLevelGcHooks)
+        hooks.gc_collect_step_enabled = not space.is_none(w_obj)
+        hooks.collect_step.reset()
+        self.w_on_gc_collect_step = w_obj
+
+    def descr_get_on_gc_collect(self, space):
+        return self.w_on_gc_collect
+
+    def descr_set_on_gc_collect(self, space, w_obj):
+        hooks = space.fromcache(LowLevelGcHooks)
+        hooks.gc_collect_enabled = not space.is_none(w_obj)
+        hooks.collect.reset()
+        self.w_on_gc_collect = w_obj
+
+    def descr_set(self, space, w_obj):
+        """set(obj): install the methods on_gc_minor, on_gc_collect_step
+        and on_gc_collect of 'obj' as hooks.  The missing ones are
+        removed."""
+        self.descr_set_on_gc_minor(space,
+            _getattr_or_none(space, w_obj, 'on_gc_minor'))
+        self.descr_set_on_gc_collect_step(space,
+            _getattr_or_none(space, w_obj, 'on_gc_collect_step'))
+        self.descr_set_on_gc_collect(space,
+            _getattr_or_none(space, w_obj, 'on_gc_collect'))
+
+    def descr_reset(self, space):
+        """reset(): remove all the hooks."""
+        self.descr_set_on_gc_minor(space, space.w_None)
+        self.descr_set_on_gc_collect_step(space, space.w_None)
+        self.descr_set_on_gc_collect(space, space.w_None)
+
+
+def _getattr_or_none(space, w_obj, name):
+    w_value = space.findattr(w_obj, space.newtext(name))
+    if w_value is None:
+        return space.w_None
+    return w_value
+
+W_AppLevelHooks.typedef = TypeDef("GcHooks",
+    __module__ = "gc",
+    on_gc_minor = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_minor,
+        W_AppLevelHooks.descr_set_on_gc_minor),
+    on_gc_collect_step = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect_step,
+        W_AppLevelHooks.descr_set_on_gc_collect_step),
+    on_gc_collect = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect,
+        W_AppLevelHooks.descr_set_on_gc_collect),
+    set = interp2app(W_AppLevelHooks.descr_set),
+    reset = interp2app(W_AppLevelHooks.descr_reset),
+)
+W_AppLevelHooks.typedef.acceptable_as_base_class = False
+
+
+class W_GcMinorStats(W_Root):
+    def __init__(self, events, factor):
+        self.count = events.count
+        self.duration = events.duration * factor
+        self.duration_min = events.duration_min * factor
+        self.duration_max = events.duration_max * factor
+        self.total_memory_used = events.total_memory_used
+        self.promoted = events.promoted
+        self.pinned_objects = events.pinned_objects
+
+
+class W_GcCollectStepStats(W_Root):
+    def __init__(self, events, factor):
+        self.count = events.count
+        self.duration = events.duration * factor
+        self.duration_min = events.duration_min * factor
+        self.duration_max = events.duration_max * factor
+        self.oldstate = events.oldstate
+        self.newstate = events.newstate
+
+    def descr_get_major_is_done(self, space):
+        return space.newbool(self.newstate == incminimark.STATE_SCANNING)
+
+
+class W_GcCollectStats(W_Root):
+    def __init__(self, events):
+        self.count = events.count
+        self.num_major_collects = events.num_major_collects
+        self.memory_before = events.memory_before
+        self.memory_after = events.memory_after
+        self.rawmalloced_before = events.rawmalloced_before
+        self.rawmalloced_after = events.rawmalloced_after
+        self.arena_memory = events.arena_memory
+        self.major_collection_threshold = events.major_collection_threshold
+
+
+def _make_stats_typedef(name, W_Class, int_fields, float_fields, **fields):
+    "NOT_RPYTHON"
+    for fieldname in int_fields:
+        fields[fieldname] = interp_attrproperty(fieldname, cls=W_Class,
+                                                wrapfn="newint")
+    for fieldname in float_fields:
+        fields[fieldname] = interp_attrproperty(fieldname, cls=W_Class,
+                                                wrapfn="newfloat")
+    typedef = TypeDef(name, __module__ = "gc", **fields)
+    typedef.acceptable_as_base_class = False
+    return typedef
+
+_duration_fields = ['duration', 'duration_min', 'duration_max']
+
+W_GcMinorStats.typedef = _make_stats_typedef("GcMinorStats",
+    W_GcMinorStats,
+    ['count', 'total_memory_used', 'promoted', 'pinned_objects'],
+    _duration_fields)
+W_GcCollectStepStats.typedef = _make_stats_typedef("GcCollectStepStats",
+    W_GcCollectStepStats,
+    ['count', 'oldstate', 'newstate'],
+    _duration_fields,
+    major_is_done = GetSetProperty(
+        W_GcCollectStepStats.descr_get_major_is_done))
+W_GcCollectStats.typedef = _make_stats_typedef("GcCollectStats",
+    W_GcCollectStats,
+    ['count', 'num_major_collects', 'memory_before', 'memory_after',
+     'rawmalloced_before', 'rawmalloced_after', 'arena_memory',
+     'major_collection_threshold'],
+    [])
+
+
+def get_gc_states(space):
+    return space.newtuple([space.newtext(state)
+                           for state in incminimark.GC_STATES])
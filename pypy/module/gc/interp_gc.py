@@ -1,6 +1,7 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import oefmt
 from rpython.rlib import rgc
+from rpython.rlib.rtimer import read_timestamp
 
 
 @unwrap_spec(generation=int)
@@ -38,19 +39,42 @@ def collect(space, generation=0):
 
     return space.newint(0)
 
+def collect_step(space):
+    """If the GC is incremental, run a single step of the current major
+    collection, starting a new one if needed; otherwise, run a full
+    collection.  This is done even if the GC is disabled.  Returns a
+    GcCollectStepStats object; its attribute 'major_is_done' tells if
+    the major collection is now finished.
+    """
+    from pypy.module.gc.hook import GcCollectStepEvents, W_GcCollectStepStats
+    from pypy.module.gc.interp_stats import TimestampCalibration
+    start = read_timestamp()
+    states = rgc.collect_step()
+    duration = read_timestamp() - start
+    events = GcCollectStepEvents()
+    events.record(float(duration), rgc.old_state(states),
+                  rgc.new_state(states))
+    factor = space.fromcache(TimestampCalibration).get_factor()
+    return W_GcCollectStepStats(events, factor)
+
 def enable(space):
-    """Non-recursive version.  Enable finalizers now.
+    """Non-recursive version.  Enable finalizers and the automatic major
+    collections now.
     If they were already enabled, no-op.
     If they were disabled even several times, enable them anyway.
     """
+    rgc.enable()
     if not space.user_del_action.enabled_at_app_level:
         space.user_del_action.enabled_at_app_level = True
         enable_finalizers(space)
 
 def disable(space):
-    """Non-recursive version.  Disable finalizers now.  Several calls
-    to this function are ignored.
+    """Non-recursive version.  Disable finalizers and the automatic major
+    collections now: minor collections still occur, but the memory used
+    by old objects is only reclaimed by explicit calls to gc.collect()
+    or gc.collect_step().  Several calls to this function are ignored.
     """
+    rgc.disable()
     if space.user_del_action.enabled_at_app_level:
         space.user_del_action.enabled_at_app_level = False
         disable_finalizers(space)
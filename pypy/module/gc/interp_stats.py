@@ -0,0 +1,128 @@
+import time
+
+from rpython.rlib import rgc, jit_hooks
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rtimer import read_timestamp
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+
+
+class TimestampCalibration(object):
+    """The GC measures its pauses with read_timestamp(), whose unit is not
+    known.  We convert to seconds by comparing with the real time elapsed
+    since the process started."""
+
+    def __init__(self, space):
+        self.startup()
+
+    def startup(self):
+        self.start_time = time.time()
+        self.start_timestamp = read_timestamp()
+
+    def get_factor(self):
+        elapsed = read_timestamp() - self.start_timestamp
+        if elapsed <= 0:
+            return 0.0
+        return (time.time() - self.start_time) / float(elapsed)
+
+
+class W_GcStats(W_Root):
+    def __init__(self, space):
+        self.total_gc_memory = rgc.get_stats(rgc.TOTAL_MEMORY)
+        self.peak_gc_memory = rgc.get_stats(rgc.PEAK_MEMORY)
+        self.total_arena_memory = rgc.get_stats(rgc.TOTAL_ARENA_MEMORY)
+        self.total_rawmalloced_memory = rgc.get_stats(
+            rgc.TOTAL_RAWMALLOCED_MEMORY)
+        self.peak_rawmalloced_memory = rgc.get_stats(
+            rgc.PEAK_RAWMALLOCED_MEMORY)
+        self.nursery_size = rgc.get_stats(rgc.NURSERY_SIZE)
+        self.major_collection_threshold = rgc.get_stats(
+            rgc.MAJOR_COLLECTION_THRESHOLD)
+        #
+        self.jit_backend_allocated = 0
+        self.jit_backend_used = 0
+        if we_are_translated() and space.config.translation.jit:
+            self.jit_backend_allocated = intmask(
+                jit_hooks.stats_asmmemmgr_allocated(None))
+            self.jit_backend_used = intmask(
+                jit_hooks.stats_asmmemmgr_used(None))
+        #
+        factor = space.fromcache(TimestampCalibration).get_factor()
+        self.minor_collections = rgc.get_stats(rgc.MINOR_COLLECTIONS)
+        self.minor_collections_time = factor * rgc.get_stats(
+            rgc.MINOR_COLLECTIONS_TIME)
+        self.minor_collections_max_time = factor * rgc.get_stats(
+            rgc.MINOR_COLLECTIONS_MAX_TIME)
+        self.major_collection_steps = rgc.get_stats(
+            rgc.MAJOR_COLLECTION_STEPS)
+        self.major_collection_steps_time = factor * rgc.get_stats(
+            rgc.MAJOR_COLLECTION_STEPS_TIME)
+        self.major_collection_steps_max_time = factor * rgc.get_stats(
+            rgc.MAJOR_COLLECTION_STEPS_MAX_TIME)
+        self.major_collections = rgc.get_stats(rgc.MAJOR_COLLECTIONS)
+
+    def descr_repr(self, space):
+        return space.newtext(
+            "<GcStats: memory %d bytes (peak %d), raw-malloced %d bytes, "
+            "%d minor collections, %d major collections>" % (
+                self.total_gc_memory, self.peak_gc_memory,
+                self.total_rawmalloced_memory, self.minor_collections,
+                self.major_collections))
+
+
+def _int_property(name, doc):
+    return interp_attrproperty(name, cls=W_GcStats, wrapfn="newint", doc=doc)
+
+def _float_property(name, doc):
+    return interp_attrproperty(name, cls=W_GcStats, wrapfn="newfloat",
+                               doc=doc)
+
+W_GcStats.typedef = TypeDef("GcStats",
+    __module__ = "gc",
+    __repr__ = interp2app(W_GcStats.descr_repr),
+    total_gc_memory = _int_property("total_gc_memory",
+        "bytes used by the GC objects outside the nursery"),
+    peak_gc_memory = _int_property("peak_gc_memory",
+        "peak of total_gc_memory, sampled after each collection"),
+    total_arena_memory = _int_property("total_arena_memory",
+        "bytes allocated from the OS for the arenas of small objects"),
+    total_rawmalloced_memory = _int_property("total_rawmalloced_memory",
+        "bytes used by the large objects, which are raw-malloced"),
+    peak_rawmalloced_memory = _int_property("peak_rawmalloced_memory",
+        "peak of total_rawmalloced_memory, sampled after each collection"),
+    nursery_size = _int_property("nursery_size",
+        "size of the nursery in bytes"),
+    major_collection_threshold = _int_property("major_collection_threshold",
+        "total_gc_memory at which the next major collection starts"),
+    jit_backend_allocated = _int_property("jit_backend_allocated",
+        "bytes of machine code memory allocated by the JIT"),
+    jit_backend_used = _int_property("jit_backend_used",
+        "bytes of machine code memory in use by the JIT"),
+    minor_collections = _int_property("minor_collections",
+        "number of minor collections"),
+    minor_collections_time = _float_property("minor_collections_time",
+        "total time spent in minor collections, in seconds"),
+    minor_collections_max_time = _float_property("minor_collections_max_time",
+        "longest minor collection, in seconds"),
+    major_collection_steps = _int_property("major_collection_steps",
+        "number of incremental steps of major collections"),
+    major_collection_steps_time = _float_property(
+        "major_collection_steps_time",
+        "total time spent in major collection steps, in seconds"),
+    major_collection_steps_max_time = _float_property(
+        "major_collection_steps_max_time",
+        "longest major collection step, in seconds"),
+    major_collections = _int_property("major_collections",
+        "number of completed major collections"),
+)
+W_GcStats.typedef.acceptable_as_base_class = False
+
+
+def get_stats(space):
+    """Return a GcStats object with the current memory usage of the GC,
+    the number of collections and the time they took.  Gathering the
+    statistics is cheap: they are counters maintained by the GC."""
+    return W_GcStats(space)
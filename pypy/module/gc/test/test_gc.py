@@ -83,6 +83,42 @@ class AppTestGC(object):
         assert deleted == [1]
         gc.enable()
 
+    def test_collect_step(self):
+        import gc
+        stats = gc.collect_step()
+        assert isinstance(stats, gc.GcCollectStepStats)
+        assert stats.count == 1
+        assert stats.duration >= 0.0
+        assert 0 <= stats.oldstate < len(gc.GC_STATES)
+        assert 0 <= stats.newstate < len(gc.GC_STATES)
+        # a full collection is done when running untranslated
+        assert stats.major_is_done
+        gc.disable()
+        try:
+            assert gc.collect_step().major_is_done
+        finally:
+            gc.enable()
+
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        assert isinstance(stats, gc.GcStats)
+        for name in ['total_gc_memory', 'peak_gc_memory',
+                     'total_arena_memory', 'total_rawmalloced_memory',
+                     'peak_rawmalloced_memory', 'nursery_size',
+                     'major_collection_threshold', 'jit_backend_allocated',
+                     'jit_backend_used', 'minor_collections',
+                     'major_collection_steps', 'major_collections']:
+            assert isinstance(getattr(stats, name), int)
+        for name in ['minor_collections_time', 'minor_collections_max_time',
+                     'major_collection_steps_time',
+                     'major_collection_steps_max_time']:
+            assert isinstance(getattr(stats, name), float)
+        assert stats.minor_collections_max_time <= stats.minor_collections_time
+        assert repr(stats).startswith('<GcStats: ')
+        raises(TypeError, "stats.nursery_size = 5")
+        raises(TypeError, "class X(gc.GcStats): pass")
+
 
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
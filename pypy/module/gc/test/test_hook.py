@@ -0,0 +1,130 @@
+from rpython.memory.gc import incminimark
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.module.gc.hook import LowLevelGcHooks
+
+
+class AppTestGcHooks(object):
+
+    def setup_class(cls):
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        @unwrap_spec(count=int, duration=int, total_memory_used=int,
+                     promoted=int, pinned_objects=int)
+        def fire_gc_minor(space, count, duration, total_memory_used,
+                          promoted, pinned_objects):
+            for i in range(count):
+                gchooks.fire_gc_minor(duration, total_memory_used, promoted,
+                                      pinned_objects)
+
+        @unwrap_spec(duration=int, oldstate=int, newstate=int)
+        def fire_gc_collect_step(space, duration, oldstate, newstate):
+            gchooks.fire_gc_collect_step(duration, oldstate, newstate)
+
+        @unwrap_spec(num_major_collects=int, memory_before=int,
+                     memory_after=int, threshold=int)
+        def fire_gc_collect(space, num_major_collects, memory_before,
+                            memory_after, threshold):
+            gchooks.fire_gc_collect(num_major_collects, memory_before,
+                                    memory_after, 100, 50, 4096, threshold)
+
+        cls.w_fire_gc_minor = space.wrap(interp2app(fire_gc_minor))
+        cls.w_fire_gc_collect_step = space.wrap(
+            interp2app(fire_gc_collect_step))
+        cls.w_fire_gc_collect = space.wrap(interp2app(fire_gc_collect))
+        cls.w_STATE_SCANNING = space.wrap(incminimark.STATE_SCANNING)
+        cls.w_STATE_MARKING = space.wrap(incminimark.STATE_MARKING)
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import gc
+            gc.hooks.reset()
+        """)
+
+    def test_default(self):
+        import gc
+        assert gc.hooks.on_gc_minor is None
+        assert gc.hooks.on_gc_collect_step is None
+        assert gc.hooks.on_gc_collect is None
+        assert gc.GC_STATES == ('SCANNING', 'MARKING', 'SWEEPING',
+                                'FINALIZING')
+        self.fire_gc_minor(1, 10, 20, 30, 40)     # no hook, nothing happens
+
+    def test_on_gc_minor(self):
+        import gc
+        lst = []
+        def on_gc_minor(stats):
+            lst.append((stats.count, stats.total_memory_used, stats.promoted,
+                        stats.pinned_objects))
+            assert 0.0 < stats.duration_min <= stats.duration_max
+            assert stats.duration_max <= stats.duration
+        gc.hooks.on_gc_minor = on_gc_minor
+        assert gc.hooks.on_gc_minor is on_gc_minor
+        self.fire_gc_minor(3, 10, 20, 30, 1)
+        # all the events since the previous call are batched together
+        assert lst == [(3, 20, 90, 1)]
+        self.fire_gc_minor(1, 10, 25, 5, 0)
+        assert lst == [(3, 20, 90, 1), (1, 25, 5, 0)]
+        gc.hooks.on_gc_minor = None
+        self.fire_gc_minor(1, 10, 20, 30, 40)
+        assert len(lst) == 2
+
+    def test_on_gc_collect_step(self):
+        import gc
+        lst = []
+        def on_gc_collect_step(stats):
+            lst.append((stats.count, stats.oldstate, stats.newstate))
+        gc.hooks.on_gc_collect_step = on_gc_collect_step
+        self.fire_gc_collect_step(10, self.STATE_SCANNING,
+                                  self.STATE_MARKING)
+        assert lst == [(1, self.STATE_SCANNING, self.STATE_MARKING)]
+        assert gc.GC_STATES[lst[0][2]] == 'MARKING'
+
+    def test_on_gc_collect(self):
+        import gc
+        lst = []
+        def on_gc_collect(stats):
+            lst.append((stats.count, stats.num_major_collects,
+                        stats.memory_before, stats.memory_after,
+                        stats.rawmalloced_before, stats.rawmalloced_after,
+                        stats.arena_memory, stats.major_collection_threshold))
+        gc.hooks.on_gc_collect = on_gc_collect
+        self.fire_gc_collect(3, 1000, 600, 1200)
+        assert lst == [(1, 3, 1000, 600, 100, 50, 4096, 1200)]
+
+    def test_set_and_reset(self):
+        import gc
+        class MyHooks(object):
+            def __init__(self):
+                self.minors = []
+                self.collects = []
+            def on_gc_minor(self, stats):
+                self.minors.append(stats.count)
+            def on_gc_collect(self, stats):
+                self.collects.append(stats.num_major_collects)
+        myhooks = MyHooks()
+        gc.hooks.set(myhooks)
+        assert gc.hooks.on_gc_collect_step is None
+        self.fire_gc_minor(2, 10, 20, 30, 40)
+        self.fire_gc_collect(5, 1000, 600, 1200)
+        assert myhooks.minors == [2]
+        assert myhooks.collects == [5]
+        gc.hooks.reset()
+        assert gc.hooks.on_gc_minor is None
+        self.fire_gc_minor(2, 10, 20, 30, 40)
+        assert myhooks.minors == [2]
+
+    def test_exception_in_hook(self):
+        import gc, sys, StringIO
+        def on_gc_minor(stats):
+            raise ValueError("oops")
+        gc.hooks.on_gc_minor = on_gc_minor
+        prev = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            self.fire_gc_minor(1, 10, 20, 30, 40)
+            x = 1     # the hook runs before the next bytecode
+        finally:
+            err = sys.stderr.getvalue()
+            sys.stderr = prev
+        assert 'oops' in err
@@ -31,6 +31,7 @@ class Module(MixedModule):
         'is_builtin':      'interp_imp.is_builtin',
         'is_frozen':       'interp_imp.is_frozen',
         'reload':          'importing.reload',
+        'invalidate_caches': 'importing.invalidate_caches',          # pypy
         'NullImporter':    'importing.W_NullImporter',
 
         'lock_held':       'interp_imp.lock_held',
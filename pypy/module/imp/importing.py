@@ -63,12 +63,17 @@ def log_pyverbose(space, level, message):
         w_stderr = space.sys.get('stderr')
         space.call_method(w_stderr, "write", space.newtext(message))
 
-def file_exists(path):
-    "Test whether the given path is an existing regular file."
+def file_exists(path, listing=None):
+    """Test whether the given path is an existing regular file.  'listing'
+    is the optional DirectoryListing of the directory containing it."""
+    if listing is not None and not listing.contains(path):
+        return False
     return os.path.isfile(path) and case_ok(path)
 
-def path_exists(path):
+def path_exists(path, listing=None):
     "Test whether the given path exists."
+    if listing is not None and not listing.contains(path):
+        return False
     return os.path.exists(path) and case_ok(path)
 
 def has_so_extension(space):
@@ -77,27 +82,30 @@ def has_so_extension(space):
 
 def has_init_module(space, filepart):
     "Return True if the directory filepart qualifies as a package."
+    listing = get_directory_listing(space, filepart)
     init = os.path.join(filepart, "__init__")
-    if path_exists(init + ".py"):
+    if path_exists(init + ".py", listing):
         return True
-    if space.config.objspace.lonepycfiles and path_exists(init + ".pyc"):
+    if (space.config.objspace.lonepycfiles and
+            path_exists(init + ".pyc", listing)):
         return True
     return False
 
-def find_modtype(space, filepart):
+def find_modtype(space, filepart, listing=None):
     """Check which kind of module to import for the given filepart,
     which is a path without extension.  Returns PY_SOURCE, PY_COMPILED or
-    SEARCH_ERROR.
+    SEARCH_ERROR.  'listing' is the optional DirectoryListing of the
+    directory containing filepart.
     """
     # check the .py file
     pyfile = filepart + ".py"
-    if file_exists(pyfile):
+    if file_exists(pyfile, listing):
         return PY_SOURCE, ".py", "U"
 
     # on Windows, also check for a .pyw file
     if _WIN32:
         pyfile = filepart + ".pyw"
-        if file_exists(pyfile):
+        if file_exists(pyfile, listing):
             return PY_SOURCE, ".pyw", "U"
 
     # The .py file does not exist.  By default on PyPy, lonepycfiles
@@ -108,14 +116,14 @@ def find_modtype(space, filepart):
     # check the .pyc file
     if space.config.objspace.lonepycfiles:
         pycfile = filepart + ".pyc"
-        if file_exists(pycfile):
+        if file_exists(pycfile, listing):
             # existing .pyc file
             return PY_COMPILED, ".pyc", "rb"
 
     if has_so_extension(space):
         so_extension = get_so_extension(space)
         pydfile = filepart + so_extension
-        if file_exists(pydfile):
+        if file_exists(pydfile, listing):
             return C_EXTENSION, so_extension, "rb"
 
     return SEARCH_ERROR, None, None
@@ -140,6 +148,70 @@ else:
         except OSError:
             return False
 
+class DirectoryListing(object):
+    def __init__(self, st, names):
+        self.mtime = st.st_mtime
+        self.ino = st.st_ino
+        self.dev = st.st_dev
+        self.names = {}
+        for name in names:
+            self.names[name] = None
+
+    def is_valid(self, st):
+        return (self.mtime == st.st_mtime and self.ino == st.st_ino and
+                self.dev == st.st_dev)
+
+    def contains(self, path):
+        "Test whether the basename of 'path' is in this directory."
+        start = path.rfind(os.sep) + 1
+        if os.altsep is not None:
+            start = max(start, path.rfind(os.altsep) + 1)
+        assert start >= 0
+        return path[start:] in self.names
+
+
+class DirectoryListingCache(object):
+    """The contents of the directories searched by the import machinery.
+    With it, looking for a module in a directory costs a single stat() of
+    the directory, instead of one stat() per candidate file name.  A
+    listing is refreshed as soon as the mtime of its directory changes;
+    imp.invalidate_caches() forgets all of them.
+    """
+    def __init__(self, space):
+        self.listings = {}
+
+    def get_listing(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode):
+            return None
+        listing = self.listings.get(path, None)
+        if listing is not None and listing.is_valid(st):
+            return listing
+        try:
+            names = os.listdir(path)
+        except OSError:
+            return None
+        listing = DirectoryListing(st, names)
+        self.listings[path] = listing
+        return listing
+
+    def invalidate(self):
+        self.listings = {}
+
+def get_directory_listing(space, path):
+    """Return the DirectoryListing of 'path', or None if it is not a
+    readable directory."""
+    if not path:
+        path = os.curdir
+    return space.fromcache(DirectoryListingCache).get_listing(path)
+
+def invalidate_caches(space):
+    """Forget the cached directory listings used to find modules."""
+    space.fromcache(DirectoryListingCache).invalidate()
+
 def try_getattr(space, w_obj, w_name):
     try:
         return space.getattr(w_obj, w_name)
@@ -574,14 +646,16 @@ def find_module(space, modulename, w_modulename, partname, w_path,
             path = space.fsencode_w(w_pathitem)
             filepart = os.path.join(path, partname)
             log_pyverbose(space, 2, "# trying %s\n" % (filepart,))
-            if os.path.isdir(filepart) and case_ok(filepart):
+            listing = get_directory_listing(space, path)
+            if ((listing is None or listing.contains(filepart)) and
+                    os.path.isdir(filepart) and case_ok(filepart)):
                 if has_init_module(space, filepart):
                     return FindInfo(PKG_DIRECTORY, filepart, None)
                 else:
                     msg = ("Not importing directory '%s' missing __init__.py" %
                            (filepart,))
                     space.warn(space.newtext(msg), space.w_ImportWarning)
-            modtype, suffix, filemode = find_modtype(space, filepart)
+            modtype, suffix, filemode = find_modtype(space, filepart, listing)
             try:
                 if modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
                     assert suffix is not None
@@ -858,6 +858,40 @@ def _testfilesource(source="x=42"):
     f.close()
     return pathname
 
+class TestDirectoryListingCache:
+    def test_listing(self):
+        d = udir.ensure('listingcache', dir=1)
+        d.join('x.py').write('')
+        cache = importing.DirectoryListingCache(None)
+        listing = cache.get_listing(str(d))
+        assert listing.contains(str(d.join('x.py')))
+        assert not listing.contains(str(d.join('y.py')))
+        assert cache.get_listing(str(d)) is listing
+        assert cache.get_listing(str(d.join('x.py'))) is None
+        assert cache.get_listing(str(d.join('missing'))) is None
+        #
+        # adding a file changes the mtime of the directory
+        os.utime(str(d), (1, 1))
+        listing = cache.get_listing(str(d))
+        d.join('y.py').write('')
+        os.utime(str(d), (2, 2))
+        listing2 = cache.get_listing(str(d))
+        assert listing2 is not listing
+        assert listing2.contains(str(d.join('y.py')))
+        #
+        cache.invalidate()
+        assert cache.get_listing(str(d)) is not listing2
+
+    def test_file_exists(self):
+        d = udir.ensure('listingcache2', dir=1)
+        d.join('x.py').write('')
+        d.ensure('z.py', dir=1)
+        listing = importing.DirectoryListingCache(None).get_listing(str(d))
+        assert importing.file_exists(str(d.join('x.py')), listing)
+        assert not importing.file_exists(str(d.join('y.py')), listing)
+        assert not importing.file_exists(str(d.join('z.py')), listing)
+
+
 class TestPycStuff:
     # ___________________ .pyc related stuff _________________
 
@@ -35,6 +35,8 @@ class MultiArrayModule(MixedModule):
         'broadcast': 'broadcast.W_Broadcast',
 
         'set_docstring': 'support.descr_set_docstring',
+        'set_num_threads': 'parallel.set_num_threads',
+        'set_parallel_threshold': 'parallel.set_parallel_threshold',
         'VisibleDeprecationWarning': 'support.W_VisibleDeprecationWarning',
     }
     for c in ['MAXDIMS', 'CLIP', 'WRAP', 'RAISE']:
@@ -11,7 +11,7 @@ from rpython.rlib.rarithmetic import ovfcheck
 from rpython.rtyper.lltypesystem import rffi
 from rpython.tool.sourcetools import func_with_new_name
 from pypy.module.micronumpy import descriptor, ufuncs, boxes, arrayops, loop, \
-    support, constants as NPY
+    parallel, support, constants as NPY
 from pypy.module.micronumpy.appbridge import get_appbridge_cache
 from pypy.module.micronumpy.arrayops import repeat, choose, put
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array, \
@@ -1204,6 +1204,8 @@ class __extend__(W_NDimArray):
         else:
             w_res = W_NDimArray.from_shape(space, out_shape, dtype, w_instance=self)
         # This is the place to add fpypy and blas
+        if parallel.dot(space, self, other, w_res):
+            return w_res
         return loop.multidim_dot(space, self, other, w_res, dtype,
                                  other_critical_dim)
 
@@ -0,0 +1,327 @@
+/* A pool of worker threads for the simplest loops of micronumpy: the
+ * elementwise arithmetic on contiguous arrays, the sum of a contiguous
+ * array, and the dot product of contiguous float64 arrays.
+ *
+ * The work is split into one contiguous chunk per thread.  The calling
+ * thread does the first chunk itself, and waits for the workers to be
+ * done with the other ones.  Only one job runs at a time.  The worker
+ * threads are started on demand and never stop.
+ *
+ * These functions are called without the GIL.  They must not touch any
+ * GC object.
+ */
+
+#include <stdlib.h>
+#include "src/precommondefs.h"
+#include "parallel.h"
+
+#ifndef _WIN32
+#  include <pthread.h>
+#  define PYPY_NP_HAVE_THREADS
+#endif
+
+
+struct job {
+    void (*run)(struct job *, long, long);
+    long total;                 /* number of units of work */
+    int nchunks;
+    int op, kind;
+    char *left, *right, *out;
+    long left_step, right_step;
+    long rs, cs, ncols, k;      /* for dot */
+    union {
+        double f;
+        float f32;
+        unsigned long long i;
+        unsigned int i32;
+    } partial[PYPY_NP_MAX_THREADS];
+};
+
+static void run_chunk(struct job *job, int index)
+{
+    long chunk = (job->total + job->nchunks - 1) / job->nchunks;
+    long start = chunk * index;
+    long stop = start + chunk;
+    if (stop > job->total)
+        stop = job->total;
+    if (start < stop)
+        job->run(job, start, stop);
+}
+
+#ifdef PYPY_NP_HAVE_THREADS
+
+static pthread_mutex_t pool_job_lock = PTHREAD_MUTEX_INITIALIZER;
+static pthread_mutex_t pool_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t pool_cond_start = PTHREAD_COND_INITIALIZER;
+static pthread_cond_t pool_cond_done = PTHREAD_COND_INITIALIZER;
+static int pool_size = 0;               /* number of worker threads */
+static int pool_atfork_installed = 0;
+static unsigned long pool_generation = 0;
+static int pool_pending = 0;
+static struct job *pool_job = NULL;
+
+static void *pool_worker(void *arg)
+{
+    int index = (int)(long)arg;
+    unsigned long seen;
+    struct job *job;
+
+    /* the workers are only started by run_job(), just before it
+       increments pool_generation: a new worker must run that job */
+    seen = 0;
+    pthread_mutex_lock(&pool_mutex);
+    while (1) {
+        while (pool_generation == seen)
+            pthread_cond_wait(&pool_cond_start, &pool_mutex);
+        seen = pool_generation;
+        job = pool_job;
+        pthread_mutex_unlock(&pool_mutex);
+
+        if (index < job->nchunks)
+            run_chunk(job, index);
+
+        pthread_mutex_lock(&pool_mutex);
+        pool_pending--;
+        if (pool_pending == 0)
+            pthread_cond_signal(&pool_cond_done);
+    }
+    return NULL;
+}
+
+static void pool_after_fork_child(void)
+{
+    /* the worker threads don't exist in the child process */
+    pthread_mutex_init(&pool_job_lock, NULL);
+    pthread_mutex_init(&pool_mutex, NULL);
+    pthread_cond_init(&pool_cond_start, NULL);
+    pthread_cond_init(&pool_cond_done, NULL);
+    pool_size = 0;
+    pool_pending = 0;
+    pool_job = NULL;
+}
+
+static int pool_start_workers(int count)
+{
+    /* must be called with pool_mutex held; returns the number of
+       worker threads actually available */
+    pthread_t thread;
+    pthread_attr_t attr;
+
+    if (!pool_atfork_installed) {
+        if (pthread_atfork(NULL, NULL, pool_after_fork_child) != 0)
+            return pool_size;
+        pool_atfork_installed = 1;
+    }
+    pthread_attr_init(&attr);
+    pthread_attr_setdetachstate(&attr, PTHREAD_CREATE_DETACHED);
+    while (pool_size < count) {
+        /* the worker number 'i' runs the chunk number 'i' */
+        if (pthread_create(&thread, &attr, pool_worker,
+                           (void *)(long)(pool_size + 1)) != 0)
+            break;
+        pool_size++;
+    }
+    pthread_attr_destroy(&attr);
+    return pool_size;
+}
+
+static void run_job(struct job *job, int nthreads)
+{
+    int workers;
+
+    pthread_mutex_lock(&pool_job_lock);
+    pthread_mutex_lock(&pool_mutex);
+    workers = pool_start_workers(nthreads - 1);
+    if (workers > nthreads - 1)
+        workers = nthreads - 1;
+    job->nchunks = workers + 1;
+    pool_job = job;
+    pool_pending = pool_size;
+    pool_generation++;
+    pthread_cond_broadcast(&pool_cond_start);
+    pthread_mutex_unlock(&pool_mutex);
+
+    run_chunk(job, 0);
+
+    pthread_mutex_lock(&pool_mutex);
+    while (pool_pending > 0)
+        pthread_cond_wait(&pool_cond_done, &pool_mutex);
+    pool_job = NULL;
+    pthread_mutex_unlock(&pool_mutex);
+    pthread_mutex_unlock(&pool_job_lock);
+}
+
+#else   /* !PYPY_NP_HAVE_THREADS */
+
+static void run_job(struct job *job, int nthreads)
+{
+    job->nchunks = 1;
+    run_chunk(job, 0);
+}
+
+#endif
+
+static int start_job(struct job *job, int nthreads)
+{
+    if (nthreads > PYPY_NP_MAX_THREADS)
+        nthreads = PYPY_NP_MAX_THREADS;
+    if (nthreads < 1)
+        nthreads = 1;
+    if (nthreads == 1) {
+        job->nchunks = 1;
+        run_chunk(job, 0);
+    }
+    else
+        run_job(job, nthreads);
+    return job->nchunks;
+}
+
+/* ____________________________________________________________ */
+/* elementwise operations                                        */
+
+/* the integers are computed as unsigned, to get the wrap-around
+   behavior of the non-parallel loops */
+#define BINOP_LOOP(T, EXPR)                                     \
+    {                                                           \
+        T *a = (T *)job->left, *b = (T *)job->right;            \
+        T *o = (T *)job->out;                                   \
+        long sa = job->left_step, sb = job->right_step, i;      \
+        for (i = start; i < stop; i++) {                        \
+            T x = a[i * sa], y = b[i * sb];                     \
+            o[i] = EXPR;                                        \
+        }                                                       \
+    }
+
+#define BINOP_CASES(T)                                          \
+    switch (job->op) {                                          \
+    case PYPY_NP_ADD:      BINOP_LOOP(T, x + y) break;          \
+    case PYPY_NP_SUBTRACT: BINOP_LOOP(T, x - y) break;          \
+    case PYPY_NP_MULTIPLY: BINOP_LOOP(T, x * y) break;          \
+    }
+
+static void run_binop(struct job *job, long start, long stop)
+{
+    switch (job->kind) {
+    case PYPY_NP_FLOAT64:
+        BINOP_CASES(double)
+        break;
+    case PYPY_NP_FLOAT32:
+        BINOP_CASES(float)
+        break;
+    case PYPY_NP_INT64:
+        BINOP_CASES(unsigned long long)
+        break;
+    case PYPY_NP_INT32:
+        BINOP_CASES(unsigned int)
+        break;
+    }
+}
+
+int pypy_numpy_binop(int op, int kind, char *left, long left_step,
+                     char *right, long right_step, char *out,
+                     long n, int nthreads)
+{
+    struct job job;
+    job.run = run_binop;
+    job.total = n;
+    job.op = op;
+    job.kind = kind;
+    job.left = left;
+    job.left_step = left_step;
+    job.right = right;
+    job.right_step = right_step;
+    job.out = out;
+    return start_job(&job, nthreads);
+}
+
+/* ____________________________________________________________ */
+/* sum                                                           */
+
+#define SUM_LOOP(T, FIELD)                                      \
+    {                                                           \
+        T *a = (T *)job->left, acc = 0;                         \
+        long i;                                                 \
+        for (i = start; i < stop; i++)                          \
+            acc = acc + a[i];                                   \
+        job->partial[index].FIELD = acc;                        \
+    }
+
+static void run_sum(struct job *job, long start, long stop)
+{
+    long chunk = (job->total + job->nchunks - 1) / job->nchunks;
+    int index = (int)(start / chunk);
+    switch (job->kind) {
+    case PYPY_NP_FLOAT64:  SUM_LOOP(double, f)              break;
+    case PYPY_NP_FLOAT32:  SUM_LOOP(float, f32)             break;
+    case PYPY_NP_INT64:    SUM_LOOP(unsigned long long, i)  break;
+    case PYPY_NP_INT32:    SUM_LOOP(unsigned int, i32)      break;
+    }
+}
+
+#define SUM_RESULT(T, FIELD)                                    \
+    {                                                           \
+        T acc = 0;                                              \
+        for (i = 0; i < nchunks; i++)                           \
+            acc = acc + job.partial[i].FIELD;                   \
+        *(T *)result = acc;                                     \
+    }
+
+int pypy_numpy_sum(int kind, char *data, long n, int nthreads, char *result)
+{
+    struct job job;
+    int i, nchunks;
+    job.run = run_sum;
+    job.total = n;
+    job.kind = kind;
+    job.left = data;
+    for (i = 0; i < PYPY_NP_MAX_THREADS; i++)
+        job.partial[i].i = 0;
+    nchunks = start_job(&job, nthreads);
+    switch (kind) {
+    case PYPY_NP_FLOAT64:  SUM_RESULT(double, f)              break;
+    case PYPY_NP_FLOAT32:  SUM_RESULT(float, f32)             break;
+    case PYPY_NP_INT64:    SUM_RESULT(unsigned long long, i)  break;
+    case PYPY_NP_INT32:    SUM_RESULT(unsigned int, i32)      break;
+    }
+    return nchunks;
+}
+
+/* ____________________________________________________________ */
+/* dot                                                           */
+
+/* out[r, j] += sum(left[r, i] * right[i, j] for i in range(k)), in the
+   same order as the non-parallel loop.  The rows of 'out' are split
+   between the threads. */
+static void run_dot(struct job *job, long start, long stop)
+{
+    double *left = (double *)job->left, *right = (double *)job->right;
+    double *out = (double *)job->out;
+    long rs = job->rs, cs = job->cs, ncols = job->ncols, k = job->k;
+    long r, j, i;
+    for (r = start; r < stop; r++) {
+        double *lrow = left + r * k;
+        for (j = 0; j < ncols; j++) {
+            double acc = out[r * ncols + j];
+            double *rcol = right + j * cs;
+            for (i = 0; i < k; i++)
+                acc = acc + lrow[i] * rcol[i * rs];
+            out[r * ncols + j] = acc;
+        }
+    }
+}
+
+int pypy_numpy_dot(double *left, double *right, long rs, long cs,
+                   double *out, long nrows, long ncols, long k, int nthreads)
+{
+    struct job job;
+    job.run = run_dot;
+    job.total = nrows;
+    job.left = (char *)left;
+    job.right = (char *)right;
+    job.out = (char *)out;
+    job.rs = rs;
+    job.cs = cs;
+    job.ncols = ncols;
+    job.k = k;
+    return start_job(&job, nthreads);
+}
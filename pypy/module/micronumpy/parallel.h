@@ -0,0 +1,20 @@
+/* keep in sync with parallel.py */
+#define PYPY_NP_ADD         0
+#define PYPY_NP_SUBTRACT    1
+#define PYPY_NP_MULTIPLY    2
+
+#define PYPY_NP_FLOAT64     0
+#define PYPY_NP_FLOAT32     1
+#define PYPY_NP_INT64       2
+#define PYPY_NP_INT32       3
+
+#define PYPY_NP_MAX_THREADS 64
+
+RPY_EXTERN int pypy_numpy_binop(int op, int kind, char *left, long left_step,
+                                char *right, long right_step, char *out,
+                                long n, int nthreads);
+RPY_EXTERN int pypy_numpy_sum(int kind, char *data, long n, int nthreads,
+                              char *result);
+RPY_EXTERN int pypy_numpy_dot(double *left, double *right, long rs, long cs,
+                              double *out, long nrows, long ncols, long k,
+                              int nthreads);
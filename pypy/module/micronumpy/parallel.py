@@ -0,0 +1,270 @@
+"""
+Multithreaded versions of the simplest loops of loop.py, written in C
+(see parallel.c): the elementwise add, subtract and multiply of
+contiguous arrays, the sum of a contiguous array, and the dot product of
+contiguous float64 arrays.  The GIL is released while they run.
+
+They are only used if set_num_threads() was called with a value larger
+than 1, and for arrays with at least 'threshold' elements; all the other
+cases use the serial loops.  The functions here return False when they
+cannot handle their arguments, and the caller then falls back to loop.py.
+"""
+import py
+import sys
+
+from rpython.rlib import jit
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.translator import cdir
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.micronumpy import constants as NPY
+from pypy.module.micronumpy.base import W_NDimArray
+
+cwd = py.path.local(__file__).dirpath()
+eci = ExternalCompilationInfo(
+    includes=[cwd.join('parallel.h')],
+    include_dirs=[str(cwd), cdir],
+    separate_module_files=[cwd.join('parallel.c')],
+    libraries=['pthread'] if sys.platform != 'win32' else [])
+
+
+def llexternal(*args, **kwargs):
+    kwargs.setdefault('compilation_info', eci)
+    kwargs.setdefault('releasegil', True)
+    return rffi.llexternal(*args, **kwargs)
+
+pypy_numpy_binop = llexternal(
+    'pypy_numpy_binop',
+    [rffi.INT, rffi.INT, rffi.CCHARP, rffi.LONG, rffi.CCHARP, rffi.LONG,
+     rffi.CCHARP, rffi.LONG, rffi.INT],
+    rffi.INT)
+pypy_numpy_sum = llexternal(
+    'pypy_numpy_sum',
+    [rffi.INT, rffi.CCHARP, rffi.LONG, rffi.INT, rffi.CCHARP],
+    rffi.INT)
+pypy_numpy_dot = llexternal(
+    'pypy_numpy_dot',
+    [rffi.DOUBLEP, rffi.DOUBLEP, rffi.LONG, rffi.LONG, rffi.DOUBLEP,
+     rffi.LONG, rffi.LONG, rffi.LONG, rffi.INT],
+    rffi.INT)
+
+# keep in sync with parallel.h
+ADD = 0
+SUBTRACT = 1
+MULTIPLY = 2
+
+FLOAT64 = 0
+FLOAT32 = 1
+INT64 = 2
+INT32 = 3
+
+MAX_THREADS = 64
+DEFAULT_THRESHOLD = 1 << 17
+
+
+def get_op(ufunc_name):
+    if ufunc_name == 'add':
+        return ADD
+    if ufunc_name == 'subtract':
+        return SUBTRACT
+    if ufunc_name == 'multiply':
+        return MULTIPLY
+    return -1
+
+
+class ParallelState(object):
+    def __init__(self, space):
+        self.num_threads = 1
+        self.threshold = DEFAULT_THRESHOLD
+
+    def use_threads(self, size):
+        return self.num_threads > 1 and size >= self.threshold
+
+
+@unwrap_spec(num_threads=int)
+def set_num_threads(space, num_threads):
+    """set_num_threads(n) -> previous value
+
+    Use up to 'n' threads for the elementwise add, subtract and multiply
+    of large contiguous arrays, for their sum, and for the dot product of
+    float64 matrices.  The default is 1, i.e. no threads.  Note that a sum
+    computed with several threads is added in a different order, which
+    may change the rounding of float results."""
+    if num_threads < 1:
+        raise oefmt(space.w_ValueError, "the number of threads must be >= 1")
+    state = space.fromcache(ParallelState)
+    previous = state.num_threads
+    state.num_threads = min(num_threads, MAX_THREADS)
+    return space.newint(previous)
+
+@unwrap_spec(threshold=int)
+def set_parallel_threshold(space, threshold):
+    """set_parallel_threshold(n) -> previous value
+
+    Only use threads for arrays with at least 'n' elements (for the dot
+    product, 'n' is the number of multiplications).  Smaller arrays are
+    faster to handle with a single thread."""
+    if threshold < 0:
+        raise oefmt(space.w_ValueError, "the threshold must be >= 0")
+    state = space.fromcache(ParallelState)
+    previous = state.threshold
+    state.threshold = threshold
+    return space.newint(previous)
+
+
+def _get_kind(dtype):
+    if not dtype.is_native() or dtype.is_record():
+        return -1
+    if dtype.num == NPY.DOUBLE:
+        return FLOAT64
+    if dtype.num == NPY.FLOAT:
+        return FLOAT32
+    if dtype.kind == NPY.SIGNEDLTR or dtype.kind == NPY.UNSIGNEDLTR:
+        if dtype.elsize == 8:
+            return INT64
+        if dtype.elsize == 4:
+            return INT32
+    return -1
+
+def _same_type(dtype1, dtype2):
+    # the C kernels only handle the native byte order
+    return (dtype1.kind == dtype2.kind and dtype1.elsize == dtype2.elsize and
+            dtype1.is_native() and dtype2.is_native())
+
+def _is_contiguous(impl):
+    return bool(impl.flags & NPY.ARRAY_C_CONTIGUOUS)
+
+def _get_pointer(impl):
+    return rffi.ptradd(rffi.cast(rffi.CCHARP, impl.storage), impl.start)
+
+def _overlaps(impl1, impl2):
+    # only an exact match of the elements is safe: the serial loops
+    # would see the partial results in other cases
+    return impl1.storage == impl2.storage and impl1.start != impl2.start
+
+
+def call2(space, op, calc_dtype, w_lhs, w_rhs, out):
+    state = space.fromcache(ParallelState)
+    if op < 0 or not state.use_threads(out.get_size()):
+        return False
+    return _call2(space, state.num_threads, op, calc_dtype, w_lhs, w_rhs, out)
+
+@jit.dont_look_inside
+def _call2(space, num_threads, op, calc_dtype, w_lhs, w_rhs, out):
+    kind = _get_kind(calc_dtype)
+    out_impl = out.implementation
+    if (kind < 0 or not _same_type(out.get_dtype(), calc_dtype) or
+            not _is_contiguous(out_impl)):
+        return False
+    w_lhs = _prepare_operand(space, calc_dtype, w_lhs, out)
+    w_rhs = _prepare_operand(space, calc_dtype, w_rhs, out)
+    if w_lhs is None or w_rhs is None:
+        return False
+    left_impl = w_lhs.implementation
+    right_impl = w_rhs.implementation
+    left_step = 0 if w_lhs.get_size() == 1 else 1
+    right_step = 0 if w_rhs.get_size() == 1 else 1
+    pypy_numpy_binop(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+                     _get_pointer(left_impl), left_step,
+                     _get_pointer(right_impl), right_step,
+                     _get_pointer(out_impl), out.get_size(),
+                     rffi.cast(rffi.INT, num_threads))
+    keepalive_until_here(left_impl)
+    keepalive_until_here(right_impl)
+    keepalive_until_here(out_impl)
+    return True
+
+def _prepare_operand(space, calc_dtype, w_arr, out):
+    """Return an array of 'calc_dtype' with the values of 'w_arr' which
+    can be passed to pypy_numpy_binop(), or None."""
+    if w_arr.get_size() == 1:
+        # a scalar, which we convert in advance
+        w_value = w_arr.get_scalar_value().convert_to(space, calc_dtype)
+        w_arr = W_NDimArray.from_shape(space, [], calc_dtype)
+        w_arr.set_scalar_value(w_value)
+        return w_arr
+    impl = w_arr.implementation
+    if (not _same_type(w_arr.get_dtype(), calc_dtype) or
+            not _is_contiguous(impl) or
+            w_arr.get_shape() != out.get_shape() or
+            _overlaps(impl, out.implementation)):
+        return None
+    return w_arr
+
+
+def reduce_sum(space, w_arr, calc_dtype):
+    """Return the sum of all the items of 'w_arr' as a box of
+    'calc_dtype', or None."""
+    state = space.fromcache(ParallelState)
+    if not state.use_threads(w_arr.get_size()):
+        return None
+    return _reduce_sum(space, state.num_threads, w_arr, calc_dtype)
+
+@jit.dont_look_inside
+def _reduce_sum(space, num_threads, w_arr, calc_dtype):
+    kind = _get_kind(calc_dtype)
+    impl = w_arr.implementation
+    if (kind < 0 or not _same_type(w_arr.get_dtype(), calc_dtype) or
+            not _is_contiguous(impl)):
+        return None
+    w_res = W_NDimArray.from_shape(space, [], calc_dtype)
+    res_impl = w_res.implementation
+    pypy_numpy_sum(rffi.cast(rffi.INT, kind), _get_pointer(impl),
+                   w_arr.get_size(), rffi.cast(rffi.INT, num_threads),
+                   _get_pointer(res_impl))
+    keepalive_until_here(impl)
+    keepalive_until_here(res_impl)
+    return w_res.get_scalar_value()
+
+
+def dot(space, left, right, result):
+    """Compute the dot product of the float64 arrays 'left' and 'right'
+    into 'result', which must be zero-filled.  At least one of 'left'
+    and 'right' is 2-dimensional and the other one 1- or 2-dimensional."""
+    state = space.fromcache(ParallelState)
+    left_shape = left.get_shape()
+    right_shape = right.get_shape()
+    k = left_shape[-1]
+    if not state.use_threads(result.get_size() * k):
+        return False
+    return _dot(space, state.num_threads, left, right, result)
+
+@jit.dont_look_inside
+def _dot(space, num_threads, left, right, result):
+    left_impl = left.implementation
+    right_impl = right.implementation
+    result_impl = result.implementation
+    for w_arr in [left, right, result]:
+        if _get_kind(w_arr.get_dtype()) != FLOAT64:
+            return False
+        if not _is_contiguous(w_arr.implementation):
+            return False
+    if (left_impl.storage == result_impl.storage or
+            right_impl.storage == result_impl.storage):
+        return False
+    left_shape = left.get_shape()
+    right_shape = right.get_shape()
+    if len(left_shape) > 2 or len(right_shape) > 2:
+        return False
+    k = left_shape[-1]
+    nrows = left_shape[0] if len(left_shape) == 2 else 1
+    if len(right_shape) == 2:
+        ncols = right_shape[1]
+        rs = ncols
+        cs = 1
+    else:
+        ncols = 1
+        rs = 1
+        cs = 0
+    pypy_numpy_dot(rffi.cast(rffi.DOUBLEP, _get_pointer(left_impl)),
+                   rffi.cast(rffi.DOUBLEP, _get_pointer(right_impl)),
+                   rs, cs,
+                   rffi.cast(rffi.DOUBLEP, _get_pointer(result_impl)),
+                   nrows, ncols, k, rffi.cast(rffi.INT, num_threads))
+    keepalive_until_here(left_impl)
+    keepalive_until_here(right_impl)
+    keepalive_until_here(result_impl)
+    return True
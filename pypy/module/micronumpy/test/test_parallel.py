@@ -0,0 +1,122 @@
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+
+
+class AppTestParallel(BaseNumpyAppTest):
+
+    def setup_method(self, meth):
+        self.space.appexec([], """():
+            from _numpypy.multiarray import set_num_threads
+            from _numpypy.multiarray import set_parallel_threshold
+            set_num_threads(4)
+            set_parallel_threshold(10)
+        """)
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            from _numpypy.multiarray import set_num_threads
+            from _numpypy.multiarray import set_parallel_threshold
+            set_num_threads(1)
+            set_parallel_threshold(1 << 17)
+        """)
+
+    def w_serial(self, func):
+        from _numpypy.multiarray import set_num_threads
+        prev = set_num_threads(1)
+        try:
+            return func()
+        finally:
+            set_num_threads(prev)
+
+    def test_settings(self):
+        from _numpypy.multiarray import set_num_threads
+        from _numpypy.multiarray import set_parallel_threshold
+        assert set_num_threads(2) == 4
+        assert set_num_threads(1000) == 2
+        assert set_num_threads(4) == 64
+        raises(ValueError, set_num_threads, 0)
+        assert set_parallel_threshold(5) == 10
+        raises(ValueError, set_parallel_threshold, -1)
+
+    def test_binop(self):
+        import numpy as np
+        for dtype in ['float64', 'float32', 'int64', 'int32', 'uint32']:
+            a = np.arange(101, dtype=dtype)
+            b = np.arange(101, dtype=dtype)[::-1].copy()
+            for op in [np.add, np.subtract, np.multiply]:
+                res = op(a, b)
+                expected = self.serial(lambda: op(a, b))
+                assert res.dtype == expected.dtype
+                assert (res == expected).all()
+        a = np.arange(100, dtype='int32')
+        assert (np.multiply(a, 1 << 30) ==
+                self.serial(lambda: np.multiply(a, 1 << 30))).all()
+
+    def test_binop_scalar(self):
+        import numpy as np
+        a = np.arange(100.0)
+        assert ((a + 2)[[0, 50, 99]] == [2.0, 52.0, 101.0]).all()
+        assert ((3 - a)[[0, 50, 99]] == [3.0, -47.0, -96.0]).all()
+        assert ((a * 0.5)[[0, 50, 99]] == [0.0, 25.0, 49.5]).all()
+
+    def test_binop_inplace(self):
+        import numpy as np
+        a = np.arange(100.0)
+        a += a
+        assert a[99] == 198.0
+        a = np.arange(100)
+        a[1:] += a[:-1]
+        b = np.arange(100)
+        b = self.serial(lambda: np.add(b[1:], b[:-1], out=b[1:]))
+        assert (a[1:] == b).all()
+
+    def test_binop_not_contiguous(self):
+        import numpy as np
+        a = np.arange(200.0)[::2]
+        b = np.arange(100.0).reshape(10, 10).T
+        c = a.reshape(10, 10) + b
+        assert c[1, 0] == 20.0 + 1.0
+        assert c[0, 1] == 2.0 + 10.0
+
+    def test_sum(self):
+        import numpy as np
+        for dtype in ['float64', 'float32', 'int64', 'int32']:
+            a = np.arange(1000, dtype=dtype)
+            res = a.sum()
+            assert res == 499500
+            assert res.dtype == self.serial(lambda: a.sum()).dtype
+        a = np.arange(1000, dtype='int32')
+        assert np.add.reduce(a) == 499500
+        assert a.reshape(10, 100).sum() == 499500
+        assert a.reshape(10, 100).T.sum() == 499500
+
+    def test_non_native_byte_order(self):
+        import numpy as np
+        import sys
+        if sys.byteorder == 'little':
+            other = '>'
+        else:
+            other = '<'
+        a = np.arange(100, dtype=other + 'f8')
+        b = np.arange(100, dtype='f8')
+        assert (a + b == 2 * b).all()
+        assert (b + a == 2 * b).all()
+        out = np.empty(100, dtype=other + 'f8')
+        np.add(b, b, out=out)
+        assert (out == 2 * b).all()
+        assert a.sum() == 4950
+        assert np.arange(100, dtype=other + 'i8').sum() == 4950
+
+    def test_dot(self):
+        import numpy as np
+        a = np.arange(30.0).reshape(5, 6) / 7.0
+        b = np.arange(24.0).reshape(6, 4) / 3.0
+        v = np.arange(6.0)
+        w = np.arange(5.0)
+        for x, y in [(a, b), (a, v), (w, a), (a, b.T.copy().T)]:
+            res = np.dot(x, y)
+            expected = self.serial(lambda: np.dot(x, y))
+            assert res.shape == expected.shape
+            assert (res == expected).all()
+        out = np.empty((5, 4))
+        np.dot(a, b, out=out)
+        assert (out == self.serial(lambda: np.dot(a, b))).all()
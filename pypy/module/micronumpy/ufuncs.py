@@ -11,7 +11,7 @@ from rpython.rlib.rawstorage import (
 from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rlib.objectmodel import keepalive_until_here, specialize
 
-from pypy.module.micronumpy import loop, constants as NPY
+from pypy.module.micronumpy import loop, parallel, constants as NPY
 from pypy.module.micronumpy.descriptor import (
     get_dtype_cache, decode_w_dtype, num2dtype)
 from pypy.module.micronumpy.base import convert_to_array, W_NDimArray
@@ -88,7 +88,7 @@ class W_Ufunc(W_Root):
     _immutable_fields_ = [
         "name", "promote_to_largest", "promote_to_float", "promote_bools", "nin",
         "identity", "int_only", "allow_bool", "allow_complex",
-        "complex_to_float", "nargs", "nout", "signature"
+        "complex_to_float", "nargs", "nout", "signature", "parallel_op"
     ]
     w_doc = None
 
@@ -103,6 +103,7 @@ class W_Ufunc(W_Root):
         self.allow_bool = allow_bool
         self.allow_complex = allow_complex
         self.complex_to_float = complex_to_float
+        self.parallel_op = parallel.get_op(name)
 
     def descr_get_name(self, space):
         return space.newtext(self.name)
@@ -295,8 +296,12 @@ class W_Ufunc(W_Root):
                                 "output parameter for reduction operation %s has "
                                 "too many dimensions", self.name)
                 dtype = out.get_dtype()
-            res = loop.reduce_flat(
-                space, self.func, obj, dtype, self.done_func, self.identity)
+            res = None
+            if self.parallel_op == parallel.ADD:
+                res = parallel.reduce_sum(space, obj, dtype)
+            if res is None:
+                res = loop.reduce_flat(space, self.func, obj, dtype,
+                                       self.done_func, self.identity)
             if out:
                 out.set_scalar_value(res)
                 return out
@@ -636,8 +641,10 @@ class W_Ufunc2(W_Ufunc):
                                            w_instance=out_subtype)
         else:
             w_res = out
-        w_res = loop.call2(space, new_shape, self.func, calc_dtype,
-                           w_lhs, w_rhs, w_res)
+        if not parallel.call2(space, self.parallel_op, calc_dtype,
+                              w_lhs, w_rhs, w_res):
+            w_res = loop.call2(space, new_shape, self.func, calc_dtype,
+                               w_lhs, w_rhs, w_res)
         if out is None:
             if w_res.is_scalar():
                 return w_res.get_scalar_value()
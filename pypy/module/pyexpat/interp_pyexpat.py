@@ -417,6 +417,31 @@ def get_expat_version_info(space):
         space.newint(XML_MINOR_VERSION),
         space.newint(XML_MICRO_VERSION)])
 
+all_chars = ''.join(chr(i) for i in range(256))
+
+def fill_encoding_info(space, name, info):
+    """Fill the XML_Encoding 'info' for the encoding 'name', for the
+    UnknownEncodingHandler of expat."""
+    # Yes, supports only 8bit encodings
+    translationmap = space.unicode_w(
+        space.call_method(
+            space.newbytes(all_chars), "decode",
+            space.newtext(name), space.newtext("replace")))
+
+    if len(translationmap) != 256:
+        raise oefmt(space.w_ValueError,
+                    "multi-byte encodings are not supported")
+
+    for i in range(256):
+        c = translationmap[i]
+        if c == u'\ufffd':
+            info.c_map[i] = rffi.cast(rffi.INT, -1)
+        else:
+            info.c_map[i] = rffi.cast(rffi.INT, c)
+    info.c_data = lltype.nullptr(rffi.VOIDP.TO)
+    info.c_convert = lltype.nullptr(rffi.VOIDP.TO)
+    info.c_release = lltype.nullptr(rffi.VOIDP.TO)
+
 class Cache:
     def __init__(self, space):
         self.w_error = space.new_exception_class("pyexpat.ExpatError")
@@ -586,28 +611,8 @@ getting the advantage of providing document type information to the parser.
         self.handlers[index] = w_handler
         setter(self.itself, handler)
 
-    all_chars = ''.join(chr(i) for i in range(256))
-
     def UnknownEncodingHandler(self, space, name, info):
-        # Yes, supports only 8bit encodings
-        translationmap = space.unicode_w(
-            space.call_method(
-                space.newbytes(self.all_chars), "decode",
-                space.newtext(name), space.newtext("replace")))
-
-        if len(translationmap) != 256:
-            raise oefmt(space.w_ValueError,
-                        "multi-byte encodings are not supported")
-
-        for i in range(256):
-            c = translationmap[i]
-            if c == u'\ufffd':
-                info.c_map[i] = rffi.cast(rffi.INT, -1)
-            else:
-                info.c_map[i] = rffi.cast(rffi.INT, c)
-        info.c_data = lltype.nullptr(rffi.VOIDP.TO)
-        info.c_convert = lltype.nullptr(rffi.VOIDP.TO)
-        info.c_release = lltype.nullptr(rffi.VOIDP.TO)
+        fill_encoding_info(space, name, info)
         return True
 
 
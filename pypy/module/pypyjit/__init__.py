@@ -12,11 +12,16 @@ class Module(MixedModule):
         'dont_trace_here': 'interp_jit.dont_trace_here',
         'trace_next_iteration': 'interp_jit.trace_next_iteration',
         'trace_next_iteration_hash': 'interp_jit.trace_next_iteration_hash',
+        'enable_warmup_profile': 'interp_jit.enable_warmup_profile',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'get_stats_memmgr': 'interp_resop.get_stats_memmgr',
+        'enable_guard_stats': 'interp_resop.enable_guard_stats',
+        'disable_guard_stats': 'interp_resop.disable_guard_stats',
+        'get_guard_stats': 'interp_resop.get_guard_stats',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -27,6 +32,7 @@ class Module(MixedModule):
         'GuardOp': 'interp_resop.GuardOp',
         'DebugMergePoint': 'interp_resop.DebugMergePoint',
         'JitLoopInfo': 'interp_resop.W_JitLoopInfo',
+        'GuardStat': 'interp_resop.W_GuardStat',
         'PARAMETER_DOCS': 'space.wrap(rpython.rlib.jit.PARAMETER_DOCS)',
     }
 
@@ -41,3 +47,11 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(self, space.newtext('defaults'), w_obj)
         pypy_hooks.space = space
+
+    def shutdown(self, space):
+        from pypy.module.pypyjit.warmup import WarmupProfile
+        space.fromcache(WarmupProfile).save()
+
+
+# Force PyCode._init_warmup to be replaced before the annotator sees it
+import pypy.module.pypyjit.warmup
@@ -4,7 +4,9 @@ from rpython.rlib.jit import JitHookInterface, Counters
 
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
-    WrappedOp, W_JitLoopInfo, wrap_oplist)
+    WrappedOp, W_JitLoopInfo, wrap_oplist, unwrap_pycode_greenkey,
+    GuardStats)
+from pypy.module.pypyjit.warmup import WarmupProfile
 
 class PyPyJitIface(JitHookInterface):
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -46,9 +48,12 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        self._record_warmup(debug_info)
+        self._record_guards(debug_info, is_bridge=False)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
+        self._record_guards(debug_info, is_bridge=True)
         self._compile_hook(debug_info, is_bridge=True)
 
     def before_compile(self, debug_info):
@@ -57,6 +62,22 @@ class PyPyJitIface(JitHookInterface):
     def before_compile_bridge(self, debug_info):
         pass
 
+    def _record_warmup(self, debug_info):
+        profile = self.space.fromcache(WarmupProfile)
+        if profile.filename is None:
+            return
+        if (debug_info.get_jitdriver().name != 'pypyjit' or
+                debug_info.greenkey is None):
+            return
+        pycode, next_instr, is_being_profiled = unwrap_pycode_greenkey(
+            debug_info.greenkey)
+        profile.record(pycode, next_instr, is_being_profiled)
+
+    def _record_guards(self, debug_info, is_bridge):
+        guard_stats = self.space.fromcache(GuardStats)
+        if guard_stats.enabled:
+            guard_stats.record_loop(self.space, debug_info, is_bridge)
+
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
         cache = space.fromcache(Cache)
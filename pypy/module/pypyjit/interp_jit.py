@@ -238,6 +238,17 @@ def trace_next_iteration_hash(space, hash):
     jit_hooks.trace_next_iteration_hash('pypyjit', hash)
     return space.w_None
 
+@unwrap_spec(filename='fsencode')
+def enable_warmup_profile(space, filename):
+    """Record the loops compiled by the JIT in the given file when the
+    process exits.  If the file already contains such a profile, the
+    loops listed in it are traced as soon as they are entered, instead
+    of after the usual warmup.
+    """
+    from pypy.module.pypyjit.warmup import WarmupProfile
+    space.fromcache(WarmupProfile).enable(filename)
+    return space.w_None
+
 # class Cache(object):
 #     in_recursion = False
 
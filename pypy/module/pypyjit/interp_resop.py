@@ -1,4 +1,6 @@
 
+import weakref
+
 from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
      interp_attrproperty, interp_attrproperty_w)
 from pypy.interpreter.baseobjspace import W_Root
@@ -29,16 +31,22 @@ class Cache(object):
         self.no += 1
         return self.no - 1
 
+def unwrap_pycode_greenkey(greenkey):
+    # the greenkey of the 'pypyjit' driver
+    next_instr = greenkey[0].getint()
+    is_being_profiled = greenkey[1].getint()
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+    return pycode, next_instr, is_being_profiled
+
 def wrap_greenkey(space, jitdriver, greenkey, greenkey_repr):
     if greenkey is None:
         return space.w_None
     jitdriver_name = jitdriver.name
     if jitdriver_name == 'pypyjit':
-        next_instr = greenkey[0].getint()
-        is_being_profiled = greenkey[1].getint()
-        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
-                                         greenkey[2].getref_base())
-        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        pycode, next_instr, is_being_profiled = unwrap_pycode_greenkey(
+            greenkey)
         return space.newtuple([pycode, space.newint(next_instr),
                                space.newbool(bool(is_being_profiled))])
     else:
@@ -388,6 +396,315 @@ def get_stats_asmmemmgr(space):
     m2 = jit_hooks.stats_asmmemmgr_used(None)
     return space.newtuple([space.newint(m1), space.newint(m2)])
 
+def get_stats_memmgr(space):
+    """Returns statistics about the loops kept alive by the JIT, as a
+    dict: 'loops' and 'code_size' are the number of live loops and the
+    size of their machine code, bridges included; 'evicted_loops' and
+    'evicted_code_size' count the loops freed so far because of the
+    'max_code_size' limit."""
+    w_stats = space.newdict()
+    for name, value in [
+            ('loops', jit_hooks.stats_memmgr_alive_loops(None)),
+            ('code_size', jit_hooks.stats_memmgr_alive_code_size(None)),
+            ('evicted_loops', jit_hooks.stats_memmgr_evicted_loops(None)),
+            ('evicted_code_size',
+             jit_hooks.stats_memmgr_evicted_code_size(None))]:
+        space.setitem_str(w_stats, name, space.newint(value))
+    return w_stats
+
+# ____________________________________________________________
+# guard failure statistics
+
+class GuardStats(object):
+    """Where the guards of the loops and bridges compiled while the guard
+    statistics are enabled come from, by the unique id of their descr.
+    The entries only hold a weakref to the descr: when the loop is freed,
+    the unique id can be reused, and prune() drops them."""
+
+    MIN_PRUNE = 1000
+
+    def __init__(self, space):
+        self.enabled = False
+        self.guards = {}
+        self.bridges = {}    # bridge_no -> BridgeInfo, compiled while enabled
+        # the bridge numbers that may also have the counter of an older
+        # bridge: one from before enable_guard_stats(), or a freed one
+        self.stale_bridges = {}
+        self.next_prune = self.MIN_PRUNE
+
+    def clear(self):
+        self.guards.clear()
+        self.bridges.clear()
+        self.stale_bridges.clear()
+        self.next_prune = self.MIN_PRUNE
+
+    def get_guard(self, guard_no):
+        """The GuardInfo of the guard, or None if it was not recorded or
+        if its loop was freed."""
+        info = self.guards.get(guard_no, None)
+        if info is not None and info.descr() is None:
+            del self.guards[guard_no]
+            info = None
+        return info
+
+    def get_bridge(self, bridge_no):
+        """The BridgeInfo of the bridge, or None if it was not recorded or
+        if it was freed."""
+        info = self.bridges.get(bridge_no, None)
+        if info is not None and info.descr() is None:
+            del self.bridges[bridge_no]
+            # its counter is still reported by the backend
+            self.stale_bridges[bridge_no] = None
+            info = None
+        return info
+
+    def prune(self):
+        """Forget the guards and bridges of the loops that were freed."""
+        for guard_no in self.guards.keys():
+            self.get_guard(guard_no)
+        for bridge_no in self.bridges.keys():
+            self.get_bridge(bridge_no)
+        self.next_prune = max(2 * (len(self.guards) + len(self.bridges)),
+                              self.MIN_PRUNE)
+
+    def record_loop(self, space, debug_info, is_bridge):
+        from rpython.jit.metainterp.resoperation import rop
+        if len(self.guards) + len(self.bridges) >= self.next_prune:
+            self.prune()
+        loop_no = debug_info.looptoken.number
+        if is_bridge:
+            fail_descr = debug_info.fail_descr
+            bridge_no = compute_unique_id(fail_descr)
+            self.record_bridge(bridge_no, fail_descr)
+            # until the first debug_merge_point, the guards of a bridge
+            # are at the location of the guard it is attached to
+            parent = self.get_guard(bridge_no)
+            if parent is not None and parent.descr() is fail_descr:
+                w_greenkey = parent.w_greenkey
+                location = parent.location
+            else:
+                w_greenkey = space.w_None
+                location = ''
+        else:
+            bridge_no = -1
+            location = debug_info.get_greenkey_repr()
+            w_greenkey = wrap_greenkey(space, debug_info.get_jitdriver(),
+                                       debug_info.greenkey, location)
+        jitdrivers_sd = debug_info.logger.metainterp_sd.jitdrivers_sd
+        last_dmp = None
+        for op in debug_info.operations:
+            if op.getopnum() == rop.DEBUG_MERGE_POINT:
+                last_dmp = op
+            elif op.is_guard():
+                if last_dmp is not None:
+                    # only wrap the greenkeys that have guards
+                    jd_sd = jitdrivers_sd[last_dmp.getarg(0).getint()]
+                    greenkey = last_dmp.getarglist()[3:]
+                    location = jd_sd.warmstate.get_location_str(greenkey)
+                    w_greenkey = wrap_greenkey(space, jd_sd.jitdriver,
+                                               greenkey, location)
+                    last_dmp = None
+                descr = op.getdescr()
+                guard_no = compute_unique_id(descr)
+                self.guards[guard_no] = GuardInfo(descr, loop_no, bridge_no,
+                    op.getopname(), w_greenkey, location)
+
+    def record_bridge(self, bridge_no, fail_descr):
+        # the counter of the new bridge starts at 0, but the backend
+        # reports the sum of all the counters with the same number
+        baseline = 0
+        if (self.get_bridge(bridge_no) is not None or
+                bridge_no in self.stale_bridges):
+            baseline = bridge_counter(bridge_no)
+        self.bridges[bridge_no] = BridgeInfo(fail_descr, baseline)
+
+    def start(self):
+        self.clear()
+        ll_times = jit_hooks.stats_get_loop_run_times(None)
+        if ll_times:
+            for i in range(len(ll_times)):
+                if ll_times[i].type == 'b':
+                    self.stale_bridges[ll_times[i].number] = None
+
+def bridge_counter(bridge_no):
+    result = 0
+    ll_times = jit_hooks.stats_get_loop_run_times(None)
+    if ll_times:
+        for i in range(len(ll_times)):
+            if ll_times[i].type == 'b' and ll_times[i].number == bridge_no:
+                result += ll_times[i].counter
+    return result
+
+class GuardInfo(object):
+    def __init__(self, descr, loop_no, bridge_no, name, w_greenkey,
+                 location):
+        self.descr = weakref.ref(descr)
+        self.loop_no = loop_no
+        self.bridge_no = bridge_no
+        self.name = name
+        self.w_greenkey = w_greenkey
+        self.location = location
+
+class BridgeInfo(object):
+    def __init__(self, fail_descr, baseline):
+        self.descr = weakref.ref(fail_descr)
+        self.baseline = baseline
+
+
+class W_GuardStat(W_Root):
+    """ Failure counts of a single guard
+    """
+    def __init__(self, guard_no, info, failures, bridge_entries):
+        self.guard_no = guard_no
+        self.failures = failures
+        self.bridge_entries = bridge_entries
+        if info is None:
+            # compiled before the statistics were enabled
+            self.loop_no = -1
+            self.bridge_no = -1
+            self.name = ''
+            self.w_greenkey = None
+            self.location = ''
+        else:
+            self.loop_no = info.loop_no
+            self.bridge_no = info.bridge_no
+            self.name = info.name
+            self.w_greenkey = info.w_greenkey
+            self.location = info.location
+
+    def descr_get_greenkey(self, space):
+        if self.w_greenkey is None:
+            return space.w_None
+        return self.w_greenkey
+
+    def descr_repr(self, space):
+        return space.newtext('<GuardStat %s in loop %d at %s: %d failures>' %
+                             (self.name, self.loop_no, self.location,
+                              self.failures))
+
+W_GuardStat.typedef = TypeDef(
+    'GuardStat',
+    __doc__ = W_GuardStat.__doc__,
+    guard_no = interp_attrproperty('guard_no', cls=W_GuardStat,
+                  doc="Unique number of the guard, also the bridge_no of "
+                      "the bridge attached to it", wrapfn="newint"),
+    loop_no = interp_attrproperty('loop_no', cls=W_GuardStat,
+                  doc="Number of the loop containing the guard, or -1 if it "
+                      "was compiled before enable_guard_stats() or freed",
+                  wrapfn="newint"),
+    bridge_no = interp_attrproperty('bridge_no', cls=W_GuardStat,
+                  doc="Number of the bridge containing the guard, or -1 if "
+                      "it is in the loop itself", wrapfn="newint"),
+    name = interp_attrproperty('name', cls=W_GuardStat,
+                  doc="Name of the guard operation", wrapfn="newtext"),
+    greenkey = GetSetProperty(W_GuardStat.descr_get_greenkey,
+                  doc="Greenkey of the debug_merge_point before the guard, "
+                      "like DebugMergePoint.greenkey"),
+    location = interp_attrproperty('location', cls=W_GuardStat,
+                  doc="Source location of the guard, as a string",
+                  wrapfn="newtext"),
+    failures = interp_attrproperty('failures', cls=W_GuardStat,
+                  doc="Number of times the guard failed", wrapfn="newint"),
+    bridge_entries = interp_attrproperty('bridge_entries', cls=W_GuardStat,
+                  doc="How many of these failures went to the bridge "
+                      "attached to the guard", wrapfn="newint"),
+    __repr__ = interp2app(W_GuardStat.descr_repr),
+)
+W_GuardStat.typedef.acceptable_as_base_class = False
+
+
+class W_GuardStatsSnapshot(W_Root):
+    def __init__(self, space, w_guards, w_loops, w_bridges):
+        self.w_guards = w_guards
+        self.w_loops = w_loops
+        self.w_bridges = w_bridges
+
+W_GuardStatsSnapshot.typedef = TypeDef(
+    "GuardStatsSnapshot",
+    guards = interp_attrproperty_w("w_guards", cls=W_GuardStatsSnapshot,
+                                   doc="list of GuardStat, one per guard "
+                                       "that failed"),
+    loops = interp_attrproperty_w("w_loops", cls=W_GuardStatsSnapshot,
+                                  doc="dict loop_no -> number of guard "
+                                      "failures in the loop and its bridges"),
+    bridges = interp_attrproperty_w("w_bridges", cls=W_GuardStatsSnapshot,
+                                    doc="dict bridge_no -> number of entries "
+                                        "into the bridge"),
+)
+W_GuardStatsSnapshot.typedef.acceptable_as_base_class = False
+
+def enable_guard_stats(space):
+    """ Start counting how many times each guard fails and how many times
+    each bridge is entered.  Only the bridges compiled from now on are
+    counted, and only the guards compiled from now on get a location.
+    The cost is an increment at the start of each new bridge, plus a
+    dict update when a guard without bridge fails, which is already
+    a slow path.
+    """
+    guard_stats = space.fromcache(GuardStats)
+    if not guard_stats.enabled:
+        guard_stats.start()
+    guard_stats.enabled = True
+    jit_hooks.stats_set_guard_failures(None, True)
+
+def disable_guard_stats(space):
+    """ Stop counting the guard failures and forget the counts and the
+    locations recorded so far.
+    """
+    guard_stats = space.fromcache(GuardStats)
+    guard_stats.enabled = False
+    guard_stats.clear()
+    jit_hooks.stats_set_guard_failures(None, False)
+
+def get_guard_stats(space):
+    """ Get the guard failure counts since enable_guard_stats(), as a
+    GuardStatsSnapshot.  Like get_stats_snapshot(), this is eager; call it
+    again to get new counts.
+    """
+    guard_stats = space.fromcache(GuardStats)
+    guard_stats.prune()
+    failures = {}
+    bridges = {}
+    ll_failures = jit_hooks.stats_get_guard_failures(None)
+    if ll_failures:
+        for i in range(len(ll_failures)):
+            failures[ll_failures[i].number] = ll_failures[i].counter
+    ll_times = jit_hooks.stats_get_loop_run_times(None)
+    if ll_times:
+        for i in range(len(ll_times)):
+            if ll_times[i].type != 'b':
+                continue
+            number = ll_times[i].number
+            if number not in bridges:
+                # only the bridges compiled since enable_guard_stats(); the
+                # others may also be counted because of enable_debug()
+                info = guard_stats.get_bridge(number)
+                if info is None:
+                    continue
+                bridges[number] = -info.baseline
+            bridges[number] += ll_times[i].counter
+    for number, counter in bridges.items():
+        if counter > 0:
+            failures[number] = failures.get(number, 0) + counter
+        else:
+            del bridges[number]
+    guards_w = []
+    loops = {}
+    for number, counter in failures.iteritems():
+        info = guard_stats.get_guard(number)
+        w_stat = W_GuardStat(number, info, counter, bridges.get(number, 0))
+        guards_w.append(w_stat)
+        if w_stat.loop_no >= 0:
+            loops[w_stat.loop_no] = loops.get(w_stat.loop_no, 0) + counter
+    w_loops = space.newdict()
+    for loop_no, counter in loops.iteritems():
+        space.setitem(w_loops, space.newint(loop_no), space.newint(counter))
+    w_bridges = space.newdict()
+    for number, counter in bridges.iteritems():
+        space.setitem(w_bridges, space.newint(number), space.newint(counter))
+    return W_GuardStatsSnapshot(space, space.newlist(guards_w), w_loops,
+                                w_bridges)
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
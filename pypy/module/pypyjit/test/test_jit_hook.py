@@ -1,4 +1,5 @@
 
+import gc
 import py
 from pypy.interpreter.gateway import interp2app
 from pypy.interpreter.pycode import PyCode
@@ -12,6 +13,10 @@ from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.rtyper.rclass import OBJECT
 from pypy.module.pypyjit.interp_jit import pypyjitdriver
 from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit import interp_resop
+from pypy.module.pypyjit.interp_resop import GuardStats
+from rpython.rlib import jit_hooks
+from rpython.rlib.objectmodel import compute_unique_id
 from rpython.jit.tool.oparser import parse
 from rpython.jit.metainterp.typesystem import llhelper
 from rpython.rlib.jit import JitDebugInfo, AsmInfo, Counters
@@ -36,6 +41,33 @@ class MockSD(object):
     jitdrivers_sd = [MockJitDriverSD]
 
 
+class FakeJitHooks(object):
+    """The counters of the JIT backend, for the guard statistics."""
+
+    def __init__(self):
+        self.guard_failures = []     # [(number, counter)]
+        self.loop_runs = []          # [(type, number, counter)]
+
+    def stats_set_guard_failures(self, warmrunnerdesc, flag):
+        pass
+
+    def stats_get_guard_failures(self, warmrunnerdesc):
+        l = lltype.malloc(jit_hooks.GUARD_FAILURE_CONTAINER,
+                          len(self.guard_failures))
+        for i, (number, counter) in enumerate(self.guard_failures):
+            l[i].number = number
+            l[i].counter = counter
+        return l
+
+    def stats_get_loop_run_times(self, warmrunnerdesc):
+        l = lltype.malloc(jit_hooks.LOOP_RUN_CONTAINER, len(self.loop_runs))
+        for i, (tp, number, counter) in enumerate(self.loop_runs):
+            l[i].type = tp
+            l[i].number = number
+            l[i].counter = counter
+        return l
+
+
 class AppTestJitHook(object):
     spaceconfig = dict(usemodules=('pypyjit',))
 
@@ -72,6 +104,8 @@ class AppTestJitHook(object):
 
         oplist[-1].setdescr(FailDescr())
         oplist[-2].setdescr(FailDescr())
+        guard_nonnull_no = compute_unique_id(oplist[-2].getdescr())
+        guard_true_no = compute_unique_id(oplist[-1].getdescr())
 
         token = JitCellToken()
         token.number = 0
@@ -95,6 +129,38 @@ class AppTestJitHook(object):
             di_loop_optimize.oplist = cls.oplist
             pypy_hooks.before_compile(di_loop_optimize)
 
+        def interp_on_compile_guard_stats():
+            # the loop, and a bridge attached to its guard_nonnull
+            pypy_hooks.after_compile(di_loop)
+            pypy_hooks.after_compile_bridge(di_guard_bridge)
+
+        di_guard_bridge = JitDebugInfo(MockJitDriverSD, logger, token,
+                                       parse("[i1]\njump(i1)").operations,
+                                       'bridge',
+                                       fail_descr=oplist[-2].getdescr())
+
+        def interp_on_compile_freed_loop():
+            # a loop whose descrs are freed right after it is compiled
+            ops = parse("[i1]\nguard_true(i1) []").operations
+            ops[0].setdescr(FailDescr())
+            guard_no = compute_unique_id(ops[0].getdescr())
+            looptoken = JitCellToken()
+            looptoken.number = 1
+            di = JitDebugInfo(MockJitDriverSD, logger, looptoken, ops,
+                              'loop', greenkey)
+            pypy_hooks._record_guards(di, is_bridge=False)
+            del ops, di, looptoken
+            gc.collect()
+            return space.newint(guard_no)
+
+        def interp_num_recorded_guards():
+            return space.newint(len(space.fromcache(GuardStats).guards))
+
+        def interp_set_counters(w_guard_failures, w_loop_runs):
+            fake = interp_resop.jit_hooks
+            fake.guard_failures = space.unwrap(w_guard_failures)
+            fake.loop_runs = space.unwrap(w_loop_runs)
+
         def interp_on_abort():
             pypy_hooks.on_abort(Counters.ABORT_TOO_LONG, pypyjitdriver,
                                 greenkey, 'blah', Logger(MockSD), [])
@@ -102,6 +168,15 @@ class AppTestJitHook(object):
         space = cls.space
         cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
         cls.w_on_compile_bridge = space.wrap(interp2app(interp_on_compile_bridge))
+        cls.w_on_compile_guard_stats = space.wrap(
+            interp2app(interp_on_compile_guard_stats))
+        cls.w_on_compile_freed_loop = space.wrap(
+            interp2app(interp_on_compile_freed_loop))
+        cls.w_num_recorded_guards = space.wrap(
+            interp2app(interp_num_recorded_guards))
+        cls.w_set_counters = space.wrap(interp2app(interp_set_counters))
+        cls.w_guard_nonnull_no = space.wrap(guard_nonnull_no)
+        cls.w_guard_true_no = space.wrap(guard_true_no)
         cls.w_on_abort = space.wrap(interp2app(interp_on_abort))
         cls.w_int_add_num = space.wrap(rop.INT_ADD)
         cls.w_dmp_num = space.wrap(rop.DEBUG_MERGE_POINT)
@@ -111,6 +186,15 @@ class AppTestJitHook(object):
 
     def setup_method(self, meth):
         self.__class__.oplist = self.orig_oplist[:]
+        self.orig_jit_hooks = interp_resop.jit_hooks
+        if 'guard_stats' in meth.__name__:
+            interp_resop.jit_hooks = FakeJitHooks()
+
+    def teardown_method(self, meth):
+        interp_resop.jit_hooks = self.orig_jit_hooks
+        guard_stats = self.space.fromcache(GuardStats)
+        guard_stats.enabled = False
+        guard_stats.clear()
 
     def test_on_compile(self):
         import pypyjit
@@ -221,6 +305,77 @@ class AppTestJitHook(object):
         self.on_abort()
         assert l == [('pypyjit', 'ABORT_TOO_LONG', [])]
 
+    def test_get_guard_stats(self):
+        import pypyjit
+        # a freed bridge had the same number and was entered 7 times
+        self.set_counters([], [('b', self.guard_nonnull_no, 7)])
+        pypyjit.enable_guard_stats()
+        self.on_compile_guard_stats()
+        # the guard_true failed 5 times without bridge; the bridge
+        # attached to the guard_nonnull was entered 3 times
+        self.set_counters([(self.guard_true_no, 5)],
+                          [('e', 0, 100), ('b', self.guard_nonnull_no, 7),
+                           ('b', self.guard_nonnull_no, 3)])
+        stats = pypyjit.get_guard_stats()
+        pypyjit.disable_guard_stats()
+        guards = sorted(stats.guards, key=lambda g: g.failures)
+        assert len(guards) == 2
+        nonnull, true = guards
+        assert isinstance(nonnull, pypyjit.GuardStat)
+        assert nonnull.guard_no == self.guard_nonnull_no
+        assert nonnull.name == 'guard_nonnull'
+        assert nonnull.failures == 3
+        assert nonnull.bridge_entries == 3
+        assert true.guard_no == self.guard_true_no
+        assert true.name == 'guard_true'
+        assert true.failures == 5
+        assert true.bridge_entries == 0
+        for guard in guards:
+            assert guard.loop_no == 0
+            assert guard.bridge_no == -1
+            assert guard.location == 'function'
+            assert guard.greenkey == (self.f.func_code, 0, False)
+        assert repr(true) == ('<GuardStat guard_true in loop 0 at function: '
+                              '5 failures>')
+        assert stats.loops == {0: 8}
+        assert stats.bridges == {self.guard_nonnull_no: 3}
+
+    def test_get_guard_stats_unknown_guards(self):
+        import pypyjit
+        # the guards were compiled before enable_guard_stats()
+        pypyjit.enable_guard_stats()
+        self.set_counters([(self.guard_true_no, 5),
+                           (self.guard_nonnull_no, 2)], [])
+        stats = pypyjit.get_guard_stats()
+        assert len(stats.guards) == 2
+        for guard in stats.guards:
+            assert guard.loop_no == -1
+            assert guard.greenkey is None
+            assert guard.location == ''
+        assert stats.loops == {}
+
+    def test_get_guard_stats_old_bridges(self):
+        import pypyjit
+        # a bridge compiled before enable_guard_stats(), and counted
+        # because of enable_debug(), is not reported
+        self.set_counters([], [('b', self.guard_nonnull_no, 4)])
+        pypyjit.enable_guard_stats()
+        self.set_counters([], [('b', self.guard_nonnull_no, 9)])
+        stats = pypyjit.get_guard_stats()
+        assert stats.guards == []
+        assert stats.bridges == {}
+
+    def test_get_guard_stats_freed_loop(self):
+        import pypyjit
+        pypyjit.enable_guard_stats()
+        guard_no = self.on_compile_freed_loop()
+        self.set_counters([(guard_no, 2)], [])
+        stats = pypyjit.get_guard_stats()
+        guard, = stats.guards
+        assert guard.failures == 2
+        assert guard.loop_no == -1      # forgotten with the loop
+        assert self.num_recorded_guards() == 0
+
     def test_creation(self):
         from pypyjit import ResOperation
 
@@ -0,0 +1,100 @@
+from rpython.tool.udir import udir
+from pypy.module.pypyjit.warmup import (WarmupProfile, HEADER, code_key,
+    code_fingerprint)
+
+
+class TestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def make_code(self, source):
+        w_f = self.space.appexec([], """():
+            d = {}
+            exec '''%s''' in d
+            return d['f']
+        """ % (source,))
+        return w_f.code
+
+    def test_save_and_load(self):
+        space = self.space
+        filename = str(udir.join('test_warmup.1'))
+        code = self.make_code("def f():\n    for i in range(10): pass\n")
+        profile = WarmupProfile(space)
+        profile.enable(filename)     # no such file yet
+        assert not profile.pending
+        profile.record(code, 13, 0)
+        profile.save()
+        data = open(filename).read()
+        assert data.startswith(HEADER)
+        assert data.count('\n') == 2
+        #
+        profile = WarmupProfile(space)
+        profile.enable(filename)
+        assert profile.pending.keys() == [code_key(code)]
+        entries = profile.entries_for_code(code)
+        assert len(entries) == 1
+        assert entries[0].next_instr == 13
+        assert entries[0].is_being_profiled == 0
+        assert entries[0].fingerprint == code_fingerprint(code)
+        # the entries loaded are kept, even if not compiled again
+        profile.save()
+        assert open(filename).read() == data
+
+    def test_stale_entries_are_dropped(self):
+        space = self.space
+        filename = str(udir.join('test_warmup.2'))
+        code = self.make_code("def f():\n    for i in range(10): pass\n")
+        profile = WarmupProfile(space)
+        profile.enable(filename)
+        profile.record(code, 13, 0)
+        profile.save()
+        #
+        # same name, file and line, but different bytecode
+        code2 = self.make_code("def f():\n    while True: break\n")
+        assert code_key(code2) == code_key(code)
+        profile = WarmupProfile(space)
+        profile.enable(filename)
+        assert profile.entries_for_code(code2) == []
+        assert not profile.pending
+        profile.save()
+        assert open(filename).read() == HEADER
+
+    def test_invalid_files_are_ignored(self):
+        space = self.space
+        filename = str(udir.join('test_warmup.3'))
+        code = self.make_code("def f():\n    for i in range(10): pass\n")
+        for data in ["garbage\n",
+                     "pypy-jit-warmup-profile 0\n%s\t1\t2\t0\n" % (
+                         code_key(code),),
+                     HEADER + "%s\tx\t2\t0\n" % (code_key(code),),
+                     HEADER + "%s\t1\t-2\t0\n" % (code_key(code),),
+                     HEADER + "%s\t1\n" % (code_key(code),)]:
+            with open(filename, 'w') as f:
+                f.write(data)
+            profile = WarmupProfile(space)
+            profile.enable(filename)
+            assert not profile.pending
+        #
+        # an entry beyond the end of the bytecode
+        with open(filename, 'w') as f:
+            f.write(HEADER + "%s\t%d\t%d\t0\n" % (
+                code_key(code), code_fingerprint(code), 10000))
+        profile = WarmupProfile(space)
+        profile.enable(filename)
+        assert profile.entries_for_code(code) == []
+
+    def test_record_needs_enable(self):
+        code = self.make_code("def f():\n    pass\n")
+        profile = WarmupProfile(self.space)
+        profile.record(code, 0, 0)
+        assert not profile.recorded
+
+
+class AppTestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        cls.w_filename = cls.space.wrap(str(udir.join('test_warmup.4')))
+
+    def test_enable_warmup_profile(self):
+        import pypyjit
+        pypyjit.enable_warmup_profile(self.filename)
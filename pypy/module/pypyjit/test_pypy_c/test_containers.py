@@ -70,18 +70,14 @@ class TestDicts(BaseTestPyPyC):
             i99 = strhash(p10)
             i12 = cond_call_value_i(i99, ConstClass(_ll_strhash__rpy_stringPtr), p10, descr=<Calli . r EF=2>)
             p13 = new(descr=...)
-            p15 = new_array_clear(16, descr=<ArrayU 1>)
             {{{
             setfield_gc(p13, 0, descr=<FieldS dicttable.num_ever_used_items .+>)
-            setfield_gc(p13, p15, descr=<FieldP dicttable.indexes .+>)
             setfield_gc(p13, ConstPtr(0), descr=<FieldP dicttable.entries .+>)
-            }}}
-            i17 = call_i(ConstClass(ll_dict_lookup_trampoline), p13, p10, i12, 1, descr=<Calli . rrii EF=5 OS=4>)
-            {{{
-            setfield_gc(p13, 0, descr=<FieldS dicttable.lookup_function_no .+>)
+            setfield_gc(p13, 5, descr=<FieldS dicttable.lookup_function_no .+>)
             setfield_gc(p13, 0, descr=<FieldS dicttable.num_live_items .+>)
             setfield_gc(p13, 32, descr=<FieldS dicttable.resize_counter .+>)
             }}}
+            i17 = call_i(ConstClass(ll_dict_lookup_small_trampoline), p13, p10, i12, 1, descr=<Calli . rrii EF=5 OS=4>)
             guard_no_exception(descr=...)
             p20 = new_with_vtable(descr=...)
             call_n(ConstClass(_ll_dict_setitem_lookup_done_trampoline), p13, p10, p20, i12, i17, descr=<Callv 0 rrrii EF=5>)
@@ -0,0 +1,179 @@
+"""Persistent JIT warmup profile.
+
+When enabled with pypyjit.enable_warmup_profile(filename) (or the
+PYPY_JIT_WARMUP_PROFILE environment variable), the green keys of all
+the loops compiled by the JIT are written to 'filename' when the
+process exits.  At the next start, the same file is read back, and
+every time a code object listed in it is created, the JIT counters of
+its loops are boosted so that they are traced on the next iteration,
+instead of after 'threshold' iterations.
+
+The file is a text file.  Each line describes one loop:
+
+    filename TAB name TAB firstlineno TAB fingerprint TAB next_instr TAB
+    is_being_profiled
+
+where 'fingerprint' is a hash of co_code.  Entries whose fingerprint
+doesn't match the code object that is actually created are ignored and
+dropped from the file at the next save, so that a profile made with an
+older version of the program is harmless.
+"""
+
+import os
+
+from rpython.rlib import jit_hooks, streamio
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib.streamio import StreamErrors
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+
+from pypy.interpreter.pycode import PyCode
+
+HEADER = "pypy-jit-warmup-profile 1\n"
+
+
+class WarmupEntry(object):
+    def __init__(self, fingerprint, next_instr, is_being_profiled):
+        self.fingerprint = fingerprint
+        self.next_instr = next_instr
+        self.is_being_profiled = is_being_profiled
+
+
+def code_key(pycode):
+    return "%s\t%s\t%d" % (pycode.co_filename, pycode.co_name,
+                           pycode.co_firstlineno)
+
+def code_fingerprint(pycode):
+    # FNV-1a on the bytecode: stable across processes, unlike hash()
+    h = r_uint(2166136261)
+    for c in pycode.co_code:
+        h = ((h ^ r_uint(ord(c))) * r_uint(16777619)) & r_uint(0xffffffff)
+    return intmask(h)
+
+def _is_valid_name(s):
+    return '\t' not in s and '\n' not in s
+
+
+class WarmupProfile(object):
+    """The profile of the current process.  A singleton created by
+    space.fromcache()."""
+
+    def __init__(self, space):
+        self.space = space
+        self.filename = None
+        self.pending = {}     # code key -> [WarmupEntry], read from the file
+        self.recorded = {}    # code key -> [WarmupEntry], compiled by us
+
+    def enable(self, filename):
+        self.filename = filename
+        self.pending = {}
+        self.recorded = {}
+        try:
+            stream = streamio.open_file_as_stream(filename, "rb")
+        except StreamErrors:
+            return      # no profile yet
+        try:
+            try:
+                data = stream.readall()
+            finally:
+                stream.close()
+        except StreamErrors:
+            return
+        self.parse(data)
+
+    def parse(self, data):
+        if not data.startswith(HEADER):
+            return      # not a profile, or written by another version
+        for line in data[len(HEADER):].split("\n"):
+            fields = line.split("\t")
+            if len(fields) != 6:
+                continue
+            try:
+                fingerprint = int(fields[3])
+                next_instr = int(fields[4])
+                is_being_profiled = int(fields[5])
+            except ValueError:
+                continue
+            if next_instr < 0:
+                continue
+            key = "\t".join(fields[:3])
+            entry = WarmupEntry(fingerprint, next_instr, is_being_profiled)
+            self.pending.setdefault(key, []).append(entry)
+
+    def record(self, pycode, next_instr, is_being_profiled):
+        if self.filename is None:
+            return
+        if not (_is_valid_name(pycode.co_filename) and
+                _is_valid_name(pycode.co_name)):
+            return
+        entry = WarmupEntry(code_fingerprint(pycode), next_instr,
+                            is_being_profiled)
+        self.recorded.setdefault(code_key(pycode), []).append(entry)
+
+    def entries_for_code(self, pycode):
+        """Return the profile entries that match the new code object
+        'pycode'.  The entries made for another version of the code are
+        forgotten."""
+        key = code_key(pycode)
+        entries = self.pending.get(key, None)
+        if entries is None:
+            return []
+        fingerprint = code_fingerprint(pycode)
+        result = []
+        for entry in entries:
+            if (entry.fingerprint == fingerprint and
+                    entry.next_instr < len(pycode.co_code)):
+                result.append(entry)
+        if not result:
+            del self.pending[key]    # stale
+        return result
+
+    def dumps(self):
+        lines = {}
+        self._dump_entries(lines, self.pending)
+        self._dump_entries(lines, self.recorded)
+        return HEADER + "".join(lines.keys())
+
+    def _dump_entries(self, lines, entries_by_key):
+        for key, entries in entries_by_key.iteritems():
+            for entry in entries:
+                line = "%s\t%d\t%d\t%d\n" % (key, entry.fingerprint,
+                                             entry.next_instr,
+                                             entry.is_being_profiled)
+                lines[line] = None
+
+    def save(self):
+        filename = self.filename
+        if filename is None:
+            return
+        # write to a temporary file and rename it, so that several
+        # processes sharing the same profile don't see a partial file
+        tmpname = "%s.%d.tmp" % (filename, os.getpid())
+        try:
+            stream = streamio.open_file_as_stream(tmpname, "wb")
+            try:
+                stream.write(self.dumps())
+            finally:
+                stream.close()
+            os.rename(tmpname, filename)
+        except (OSError, StreamErrors):
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+
+
+def _init_warmup(pycode):
+    profile = pycode.space.fromcache(WarmupProfile)
+    if not profile.pending:
+        return
+    entries = profile.entries_for_code(pycode)
+    if entries and we_are_translated():
+        ll_pycode = cast_instance_to_gcref(pycode)
+        for entry in entries:
+            jit_hooks.trace_next_iteration('pypyjit',
+                                           r_uint(entry.next_instr),
+                                           entry.is_being_profiled,
+                                           ll_pycode)
+
+PyCode._init_warmup = _init_warmup
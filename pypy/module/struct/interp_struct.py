@@ -1,8 +1,11 @@
+from collections import OrderedDict
+
 from rpython.rlib import jit
 from rpython.rlib.buffer import SubBuffer
 from rpython.rlib.mutbuffer import MutableStringBuffer
+from rpython.rlib.objectmodel import move_to_end
 from rpython.rlib.rstruct.error import StructError, StructOverflowError
-from rpython.rlib.rstruct.formatiterator import CalcSizeFormatIterator
+from rpython.rlib.rstruct.formatiterator import compile_format
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.gateway import interp2app, unwrap_spec
@@ -22,15 +25,50 @@ def get_error(space):
     return space.fromcache(Cache).error
 
 
-def _calcsize(space, format):
-    fmtiter = CalcSizeFormatIterator()
+class FormatCache(object):
+    """The compiled formats used by the module-level functions, with the
+    most recently used ones at the end."""
+    MAXCACHE = 100
+
+    def __init__(self, space):
+        self.formats = OrderedDict()
+
+    def clear(self):
+        self.formats = OrderedDict()
+
+
+@jit.elidable
+def _compile_cached(cache, format):
+    try:
+        compiled = cache.formats[format]
+    except KeyError:
+        compiled = compile_format(format)
+        if len(cache.formats) >= cache.MAXCACHE:
+            for oldest in cache.formats:
+                break
+            else:
+                oldest = None
+            if oldest is not None:
+                del cache.formats[oldest]
+        cache.formats[format] = compiled
+    else:
+        move_to_end(cache.formats, format)
+    return compiled
+
+
+def _compile(space, format, cached=True):
     try:
-        fmtiter.interpret(format)
+        if cached:
+            return _compile_cached(space.fromcache(FormatCache), format)
+        return compile_format(format)
     except StructOverflowError as e:
         raise OperationError(space.w_OverflowError, space.newtext(e.msg))
     except StructError as e:
         raise OperationError(get_error(space), space.newtext(e.msg))
-    return fmtiter.totalsize
+
+
+def _calcsize(space, format):
+    return _compile(space, format).size
 
 
 @unwrap_spec(format='text')
@@ -39,13 +77,12 @@ def calcsize(space, format):
     return space.newint(_calcsize(space, format))
 
 
-def _pack(space, format, args_w):
+def _pack(space, compiled, args_w):
     """Return string containing values v1, v2, ... packed according to fmt."""
-    size = _calcsize(space, format)
-    wbuf = MutableStringBuffer(size)
+    wbuf = MutableStringBuffer(compiled.size)
     fmtiter = PackFormatIterator(space, wbuf, args_w)
     try:
-        fmtiter.interpret(format)
+        fmtiter.interpret_compiled(compiled)
     except StructOverflowError as e:
         raise OperationError(space.w_OverflowError, space.newtext(e.msg))
     except StructError as e:
@@ -56,7 +93,8 @@ def _pack(space, format, args_w):
 
 @unwrap_spec(format='text')
 def pack(space, format, args_w):
-    return space.newbytes(_pack(space, format, args_w))
+    compiled = _compile(space, format)
+    return space.newbytes(_pack(space, compiled, args_w))
 
 
 @unwrap_spec(format='text', offset=int)
@@ -64,7 +102,11 @@ def pack_into(space, format, w_buffer, offset, args_w):
     """ Pack the values v1, v2, ... according to fmt.
 Write the packed bytes into the writable buffer buf starting at offset
     """
-    size = _calcsize(space, format)
+    _pack_into(space, _compile(space, format), w_buffer, offset, args_w)
+
+
+def _pack_into(space, compiled, w_buffer, offset, args_w):
+    size = compiled.size
     buf = space.getarg_w('w*', w_buffer)
     if offset < 0:
         offset += buf.getlength()
@@ -76,17 +118,17 @@ Write the packed bytes into the writable buffer buf starting at offset
     wbuf = SubBuffer(buf, offset, size)
     fmtiter = PackFormatIterator(space, wbuf, args_w)
     try:
-        fmtiter.interpret(format)
+        fmtiter.interpret_compiled(compiled)
     except StructOverflowError as e:
         raise OperationError(space.w_OverflowError, space.newtext(e.msg))
     except StructError as e:
         raise OperationError(get_error(space), space.newtext(e.msg))
 
 
-def _unpack(space, format, buf):
+def _unpack(space, compiled, buf):
     fmtiter = UnpackFormatIterator(space, buf)
     try:
-        fmtiter.interpret(format)
+        fmtiter.interpret_compiled(compiled)
     except StructOverflowError as e:
         raise OperationError(space.w_OverflowError, space.newtext(e.msg))
     except StructError as e:
@@ -97,14 +139,18 @@ def _unpack(space, format, buf):
 @unwrap_spec(format='text')
 def unpack(space, format, w_str):
     buf = space.getarg_w('s*', w_str)
-    return _unpack(space, format, buf)
+    return _unpack(space, _compile(space, format), buf)
 
 
 @unwrap_spec(format='text', offset=int)
 def unpack_from(space, format, w_buffer, offset=0):
     """Unpack the buffer, containing packed C structure data, according to
 fmt, starting at offset. Requires len(buffer[offset:]) >= calcsize(fmt)."""
-    size = _calcsize(space, format)
+    return _unpack_from(space, _compile(space, format), w_buffer, offset)
+
+
+def _unpack_from(space, compiled, w_buffer, offset):
+    size = compiled.size
     buf = space.getarg_w('z*', w_buffer)
     if buf is None:
         raise oefmt(get_error(space), "unpack_from requires a buffer argument")
@@ -115,14 +161,68 @@ fmt, starting at offset. Requires len(buffer[offset:]) >= calcsize(fmt)."""
                     "unpack_from requires a buffer of at least %d bytes",
                     size)
     buf = SubBuffer(buf, offset, size)
-    return _unpack(space, format, buf)
+    return _unpack(space, compiled, buf)
+
+
+@unwrap_spec(format='text')
+def iter_unpack(space, format, w_buffer):
+    """Return an iterator yielding the tuples unpacked from the buffer
+according to fmt, one struct at a time.  The size of the buffer must be a
+multiple of calcsize(fmt)."""
+    return W_UnpackIter(space, _compile(space, format), w_buffer)
+
+
+class W_UnpackIter(W_Root):
+    def __init__(self, space, compiled, w_buffer):
+        size = compiled.size
+        if size == 0:
+            raise oefmt(get_error(space),
+                        "cannot iteratively unpack with a struct of length 0")
+        buf = space.getarg_w('s*', w_buffer)
+        if buf.getlength() % size != 0:
+            raise oefmt(get_error(space),
+                        "iterative unpacking requires a buffer of a "
+                        "multiple of %d bytes", size)
+        self.compiled = compiled
+        self.buf = buf
+        self.index = 0
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        buf = self.buf
+        if buf is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        compiled = jit.promote(self.compiled)
+        size = compiled.size
+        if self.index + size > buf.getlength():
+            self.buf = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        w_res = _unpack(space, compiled, SubBuffer(buf, self.index, size))
+        self.index += size
+        return w_res
+
+    def descr_length_hint(self, space):
+        if self.buf is None:
+            return space.newint(0)
+        length = (self.buf.getlength() - self.index) // self.compiled.size
+        return space.newint(length)
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __iter__=interp2app(W_UnpackIter.descr_iter),
+    next=interp2app(W_UnpackIter.descr_next),
+    __length_hint__=interp2app(W_UnpackIter.descr_length_hint),
+)
+W_UnpackIter.typedef.acceptable_as_base_class = False
 
 
 class W_Struct(W_Root):
-    _immutable_fields_ = ["format", "size"]
+    _immutable_fields_ = ["format", "size", "compiled"]
 
     format = ""
     size = -1
+    compiled = compile_format("")
 
     def descr__new__(space, w_subtype, __args__):
         return space.allocate_instance(W_Struct, w_subtype)
@@ -130,21 +230,30 @@ class W_Struct(W_Root):
     @unwrap_spec(format='text')
     def descr__init__(self, space, format):
         self.format = format
-        self.size = _calcsize(space, format)
+        self.compiled = _compile(space, format, cached=False)
+        self.size = self.compiled.size
+
+    def _get_compiled(self, space):
+        return jit.promote(self.compiled)
 
     def descr_pack(self, space, args_w):
-        return pack(space, jit.promote_string(self.format), args_w)
+        compiled = self._get_compiled(space)
+        return space.newbytes(_pack(space, compiled, args_w))
 
     @unwrap_spec(offset=int)
     def descr_pack_into(self, space, w_buffer, offset, args_w):
-        return pack_into(space, jit.promote_string(self.format), w_buffer, offset, args_w)
+        _pack_into(space, self._get_compiled(space), w_buffer, offset, args_w)
 
     def descr_unpack(self, space, w_str):
-        return unpack(space, jit.promote_string(self.format), w_str)
+        buf = space.getarg_w('s*', w_str)
+        return _unpack(space, self._get_compiled(space), buf)
 
     @unwrap_spec(offset=int)
     def descr_unpack_from(self, space, w_buffer, offset=0):
-        return unpack_from(space, jit.promote_string(self.format), w_buffer, offset)
+        return _unpack_from(space, self._get_compiled(space), w_buffer, offset)
+
+    def descr_iter_unpack(self, space, w_buffer):
+        return W_UnpackIter(space, self._get_compiled(space), w_buffer)
 
 W_Struct.typedef = TypeDef("Struct",
     __new__=interp2app(W_Struct.descr__new__.im_func),
@@ -156,7 +265,9 @@ W_Struct.typedef = TypeDef("Struct",
     unpack=interp2app(W_Struct.descr_unpack),
     pack_into=interp2app(W_Struct.descr_pack_into),
     unpack_from=interp2app(W_Struct.descr_unpack_from),
+    iter_unpack=interp2app(W_Struct.descr_iter_unpack),
 )
 
 def clearcache(space):
-    """No-op on PyPy"""
+    """Clear the internal cache of compiled formats."""
+    space.fromcache(FormatCache).clear()
@@ -3,6 +3,19 @@ Tests for the struct module implemented at interp-level in pypy/module/struct.
 """
 
 from rpython.rlib.rstruct.nativefmttable import native_is_bigendian
+from pypy.module.struct.interp_struct import FormatCache, _compile_cached
+
+
+def test_format_cache_lru():
+    cache = FormatCache(None)
+    cache.MAXCACHE = 3
+    c1 = _compile_cached(cache, 'i')
+    assert c1.size == 4
+    _compile_cached(cache, 'h')
+    _compile_cached(cache, 'b')
+    assert _compile_cached(cache, 'i') is c1
+    _compile_cached(cache, 'q')
+    assert cache.formats.keys() == ['b', 'i', 'q']
 
 
 class AppTestStruct(object):
@@ -443,6 +456,29 @@ class AppTestStruct(object):
     def test_overflow(self):
         raises(self.struct.error, self.struct.pack, 'i', 1<<65)
 
+    def test_iter_unpack(self):
+        data = self.struct.pack('<hh', 1, 2) * 3
+        it = self.struct.iter_unpack('<hh', data)
+        assert it.__length_hint__() == 3
+        assert iter(it) is it
+        assert list(it) == [(1, 2)] * 3
+        assert it.__length_hint__() == 0
+        raises(StopIteration, next, it)
+        s = self.struct.Struct('<i')
+        assert list(s.iter_unpack(buffer('\x01\x00\x00\x00' * 2))) == [
+            (1,), (1,)]
+        assert list(s.iter_unpack('')) == []
+        raises(self.struct.error, s.iter_unpack, 'abc')
+        raises(self.struct.error, self.struct.iter_unpack, '', 'abc')
+
+    def test_clearcache(self):
+        import struct
+        assert struct.calcsize('ii') == 8
+        struct._clearcache()
+        assert struct.pack('<h', 1) == '\x01\x00'
+        raises(struct.error, struct.pack, 'z', 1)
+        raises(struct.error, struct.pack, 'z', 1)
+
     def test_unpack_fits_into_int(self):
         import sys
         for fmt in 'ILQq':
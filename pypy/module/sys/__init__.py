@@ -16,6 +16,7 @@ class Module(MixedModule):
             del self.__class__.interpleveldefs['pypy_getudir']
         super(Module, self).__init__(space, w_name)
         self.recursionlimit = 1000
+        self.switchinterval = 0.0
         self.w_default_encoder = None
         self.defaultencoding = "ascii"
         self.filesystemencoding = None
@@ -60,6 +61,8 @@ class Module(MixedModule):
         'pypy_get_track_resources' : 'vm.get_track_resources',
         'setcheckinterval'      : 'vm.setcheckinterval',
         'getcheckinterval'      : 'vm.getcheckinterval',
+        'setswitchinterval'     : 'vm.setswitchinterval',
+        'getswitchinterval'     : 'vm.getswitchinterval',
         'exc_info'              : 'vm.exc_info',
         'exc_clear'             : 'vm.exc_clear',
         'settrace'              : 'vm.settrace',
@@ -395,6 +395,21 @@ class AppTestSysModulePortedFromCPython:
             sys.setcheckinterval(n)
             assert sys.getcheckinterval() == n
 
+    def test_setswitchinterval(self):
+        import sys
+        orig = sys.getcheckinterval()
+        assert sys.getswitchinterval() == 0.0
+        raises(ValueError, sys.setswitchinterval, 0.0)
+        raises(ValueError, sys.setswitchinterval, -1)
+        sys.setswitchinterval(0.005)
+        assert sys.getswitchinterval() == 0.005
+        sys.setswitchinterval(1)
+        assert sys.getswitchinterval() == 1.0
+        # setcheckinterval() goes back to the instruction-based mode
+        sys.setcheckinterval(orig)
+        assert sys.getswitchinterval() == 0.0
+        assert sys.getcheckinterval() == orig
+
     def test_recursionlimit(self):
         import sys
         raises(TypeError, sys.getrecursionlimit, 42)
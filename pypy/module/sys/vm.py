@@ -72,6 +72,10 @@ def get_track_resources(space):
 def setcheckinterval(space, interval):
     """Tell the Python interpreter to check for asynchronous events every
     n instructions.  This also affects how often thread switches occur."""
+    if space.sys.switchinterval > 0.0:
+        # go back to switching threads every 'interval' instructions
+        space.sys.switchinterval = 0.0
+        space.threadlocals.set_switch_interval(space, 0.0)
     space.actionflag.setcheckinterval(interval)
 
 def getcheckinterval(space):
@@ -86,6 +90,24 @@ def getcheckinterval(space):
         result = 0
     return space.newint(result)
 
+@unwrap_spec(interval=float)
+def setswitchinterval(space, interval):
+    """Set the ideal thread switching delay inside the interpreter, in
+    seconds.  A thread that waits for the GIL for longer than that makes
+    the running thread release it, regardless of how many instructions
+    it executed.  This replaces the instruction-based switching of
+    setcheckinterval(), until setcheckinterval() is called again."""
+    if interval <= 0.0:
+        raise oefmt(space.w_ValueError,
+                    "switch interval must be strictly positive")
+    space.sys.switchinterval = interval
+    space.threadlocals.set_switch_interval(space, interval)
+
+def getswitchinterval(space):
+    """Return the current thread switch interval; see setswitchinterval().
+    Returns 0.0 if threads are switched according to setcheckinterval()."""
+    return space.newfloat(space.sys.switchinterval)
+
 def exc_info(space):
     """Return the (type, value, traceback) of the most recent exception
 caught by an except clause in the current stack frame or in an older stack
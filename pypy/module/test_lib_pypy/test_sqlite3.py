@@ -300,6 +300,81 @@ class BaseTestSQLite:
         gc.collect()
         assert SQLiteBackend.success
 
+    def test_fetchmany_fetchall(self, con):
+        cur = con.cursor()
+        cur.execute("create table test(a, b)")
+        cur.executemany("insert into test values (?, ?)",
+                        [(i, str(i)) for i in range(10)])
+        cur.execute("select * from test order by a")
+        assert cur.fetchone() == (0, u'0')
+        assert cur.fetchmany(3) == [(1, u'1'), (2, u'2'), (3, u'3')]
+        cur.arraysize = 2
+        assert cur.fetchmany() == [(4, u'4'), (5, u'5')]
+        assert cur.fetchall() == [(i, unicode(i)) for i in range(6, 10)]
+        assert cur.fetchall() == []
+        assert cur.fetchmany(5) == []
+        cur.row_factory = lambda cur, row: row[0]
+        cur.execute("select * from test order by a")
+        assert cur.fetchmany(3) == [0, 1, 2]
+        assert cur.fetchall() == range(3, 10)
+
+    def test_converters(self, con):
+        con = _sqlite3.connect(":memory:",
+                               detect_types=_sqlite3.PARSE_DECLTYPES |
+                                            _sqlite3.PARSE_COLNAMES)
+        con.execute("create table test(a point, b integer)")
+        con.execute("insert into test values ('1;2', 3)")
+        _sqlite3.register_converter("point", lambda s: tuple(s.split(';')))
+        _sqlite3.register_converter("twice", lambda s: s * 2)
+        try:
+            sql = 'select a, b, b as "c [twice]" from test'
+            assert con.execute(sql).fetchall() == [(('1', '2'), 3, '33')]
+            # the converters are looked up again at each execution
+            _sqlite3.converters["POINT"] = lambda s: s
+            assert con.execute(sql).fetchall() == [('1;2', 3, '33')]
+        finally:
+            del _sqlite3.converters["POINT"]
+            del _sqlite3.converters["TWICE"]
+        con.close()
+
+    def test_converters_schema_change(self, con):
+        con = _sqlite3.connect(":memory:",
+                               detect_types=_sqlite3.PARSE_DECLTYPES)
+        con.execute("create table test(a integer)")
+        con.execute("insert into test values (1)")
+        _sqlite3.register_converter("point", lambda s: tuple(s.split(';')))
+        try:
+            assert con.execute("select * from test").fetchall() == [(1,)]
+            con.execute("alter table test add column b point")
+            con.execute("update test set b = '1;2'")
+            # the cached statement is re-prepared by sqlite
+            assert con.execute("select * from test").fetchall() == [
+                (1, ('1', '2'))]
+        finally:
+            del _sqlite3.converters["POINT"]
+        con.close()
+
+    def test_statement_cache_lru(self):
+        if not hasattr(_sqlite3, '_ffi'):
+            pytest.skip("only works for lib_pypy _sqlite3")
+        con = _sqlite3.connect(':memory:', cached_statements=2)
+        cache = con._statement_cache
+        con.execute("select 1")
+        con.execute("select 2")
+        con.execute("select 1")
+        con.execute("select 3")
+        assert list(cache.cache) == ["select 1", "select 3"]
+        assert (cache.hits, cache.misses) == (1, 3)
+        con.close()
+
+    def test_statement_cache_disabled(self):
+        con = _sqlite3.connect(':memory:', cached_statements=0)
+        assert con.execute("select 1").fetchall() == [(1,)]
+        assert con.execute("select 1").fetchall() == [(1,)]
+        if hasattr(_sqlite3, '_ffi'):
+            assert len(con._statement_cache.cache) == 0
+        con.close()
+
 
 class TestSQLiteHost(BaseTestSQLite):
     def setup_class(cls):
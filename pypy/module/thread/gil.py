@@ -12,6 +12,10 @@ from pypy.module.thread.error import wrap_thread_error
 from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.module.thread.threadlocals import OSThreadLocals
 
+# with sys.setswitchinterval(), the number of bytecodes between two checks
+# of whether another thread has been waiting for too long
+SWITCH_CHECKINTERVAL = 100
+
 class GILThreadLocals(OSThreadLocals):
     """A version of OSThreadLocals that enforces a GIL."""
     gil_ready = False
@@ -19,9 +23,18 @@ class GILThreadLocals(OSThreadLocals):
 
     def initialize(self, space):
         # add the GIL-releasing callback as an action on the space
-        space.actionflag.register_periodic_action(GILReleaseAction(space),
+        self.gil_release_action = GILReleaseAction(space)
+        space.actionflag.register_periodic_action(self.gil_release_action,
                                                   use_bytecode_counter=True)
 
+    def set_switch_interval(self, space, interval):
+        """If 'interval' > 0.0, switch to the time-based mode; otherwise,
+        go back to yielding the GIL every sys.checkinterval bytecodes."""
+        self.gil_release_action.time_based = interval > 0.0
+        rgil.set_switch_interval(interval)
+        if interval > 0.0:
+            space.actionflag.setcheckinterval(SWITCH_CHECKINTERVAL)
+
     def setup_threads(self, space):
         """Enable threads in the object space, if they haven't already been."""
         if not self.gil_ready:
@@ -44,8 +57,14 @@ class GILThreadLocals(OSThreadLocals):
 
 class GILReleaseAction(PeriodicAsyncAction):
     """An action called every sys.checkinterval bytecodes.  It releases
-    the GIL to give some other thread a chance to run.
+    the GIL to give some other thread a chance to run.  In the time-based
+    mode, it only does so if another thread has been waiting for the GIL
+    for longer than sys.getswitchinterval().
     """
+    time_based = False
 
     def perform(self, executioncontext, frame):
-        rgil.yield_thread()
+        if self.time_based:
+            rgil.yield_thread_if_requested()
+        else:
+            rgil.yield_thread()
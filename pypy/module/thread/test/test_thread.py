@@ -47,6 +47,33 @@ class AppTestThread(GenericTestThread):
         self.waitfor(lambda: feedback)
         assert feedback == [42]
 
+    def test_switchinterval(self):
+        import sys, thread, __pypy__
+        orig = sys.getcheckinterval()
+        __pypy__.thread.reset_gil_stats()
+        sys.setswitchinterval(0.001)
+        try:
+            feedback = []
+            def f():
+                total = 0
+                for i in range(10000):
+                    total += i
+                feedback.append(total)
+            for i in range(3):
+                thread.start_new_thread(f, ())
+            self.waitfor(lambda: len(feedback) == 3)
+        finally:
+            sys.setcheckinterval(orig)
+        assert feedback == [49995000] * 3
+        stats = __pypy__.thread.gil_stats()
+        assert sorted(stats) == ["acquisitions", "forced_switches",
+                                 "wait_time", "waits"]
+        assert stats["acquisitions"] > 0
+        assert stats["waits"] >= 0
+        assert stats["wait_time"] >= 0.0
+        __pypy__.thread.reset_gil_stats()
+        assert __pypy__.thread.gil_stats()["waits"] == 0
+
     def test_thread_count(self):
         import thread, time
         feedback = []
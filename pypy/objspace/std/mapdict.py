@@ -1,7 +1,8 @@
 import weakref, sys
 
 from rpython.rlib import jit, objectmodel, debug, rerased
-from rpython.rlib.rarithmetic import intmask, r_uint
+from rpython.rlib.longlong2float import longlong2float, float2longlong
+from rpython.rlib.rarithmetic import intmask, r_uint, r_int64
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.objspace.std.dictmultiobject import (
@@ -9,6 +10,8 @@ from pypy.objspace.std.dictmultiobject import (
     BaseValueIterator, BaseItemIterator, _never_equal_to_string,
     W_DictObject,
 )
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.typeobject import MutableCell
 
 
@@ -25,6 +28,11 @@ NUM_DIGITS_POW2 = 1 << NUM_DIGITS
 # note: we use "x * NUM_DIGITS_POW2" instead of "x << NUM_DIGITS" because
 # we want to propagate knowledge that the result cannot be negative
 
+# the kinds of attributes: ints and floats can be stored unboxed
+KIND_OBJECT = 0
+KIND_INT = 1
+KIND_FLOAT = 2
+
 
 class AbstractAttribute(object):
     _immutable_fields_ = ['terminator']
@@ -40,6 +48,8 @@ class AbstractAttribute(object):
         attr = self.find_map_attr(name, index)
         if attr is None:
             return self.terminator._read_terminator(obj, name, index)
+        if isinstance(attr, UnboxedPlainAttribute):
+            return attr._direct_read(obj)
         if (
             jit.isconstant(attr.storageindex) and
             jit.isconstant(obj) and
@@ -57,9 +67,7 @@ class AbstractAttribute(object):
         attr = self.find_map_attr(name, index)
         if attr is None:
             return self.terminator._write_terminator(obj, name, index, w_value)
-        if not attr.ever_mutated:
-            attr.ever_mutated = True
-        obj._mapdict_write_storage(attr.storageindex, w_value)
+        attr._direct_write(obj, w_value)
         return True
 
     def delete(self, obj, name, index):
@@ -129,13 +137,42 @@ class AbstractAttribute(object):
         return None
 
     @jit.elidable
-    def _get_new_attr(self, name, index):
+    def num_attributes(self):
+        # not the same as length() if unboxed attributes share a slot
+        result = 0
+        attr = self
+        while isinstance(attr, PlainAttribute):
+            result += 1
+            attr = attr.back
+        return result
+
+    def _find_last_unboxed(self):
+        return None
+
+    def _get_attr_kind(self, index, w_value):
+        if (index == SPECIAL or
+                not self.space.config.objspace.std.withunboxedattributes):
+            return KIND_OBJECT
+        if type(w_value) is W_IntObject:
+            return KIND_INT
+        if type(w_value) is W_FloatObject:
+            return KIND_FLOAT
+        return KIND_OBJECT
+
+    @jit.elidable
+    def _get_new_attr(self, name, index, kind):
+        # 'kind' is only used if the attribute is not in the cache yet
         cache = self.cache_attrs
         if cache is None:
             cache = self.cache_attrs = {}
         attr = cache.get((name, index), None)
         if attr is None:
-            attr = PlainAttribute(name, index, self)
+            if kind == KIND_INT:
+                attr = UnboxedIntAttribute(name, index, self)
+            elif kind == KIND_FLOAT:
+                attr = UnboxedFloatAttribute(name, index, self)
+            else:
+                attr = PlainAttribute(name, index, self)
             cache[name, index] = attr
         return attr
 
@@ -146,15 +183,28 @@ class AbstractAttribute(object):
             attr = obj._get_mapdict_map()
             size_est = (oldattr._size_estimate + attr.size_estimate()
                                                - oldattr.size_estimate())
-            assert size_est >= (oldattr.length() * NUM_DIGITS_POW2)
+            # reordering can end up in a map with fewer storage slots, if
+            # more unboxed attributes share a slot: keep size_estimate()
+            # at least length()
+            min_size_est = oldattr.length() * NUM_DIGITS_POW2
+            if size_est < min_size_est:
+                size_est = min_size_est
             oldattr._size_estimate = size_est
 
     def _add_attr_without_reordering(self, obj, name, index, w_value):
-        attr = self._get_new_attr(name, index)
+        kind = self._get_attr_kind(index, w_value)
+        attr = self._get_new_attr(name, index, kind)
         attr._switch_map_and_write_storage(obj, w_value)
 
-    @jit.unroll_safe
     def _switch_map_and_write_storage(self, obj, w_value):
+        self._grow_storage_if_needed(obj)
+        # the order is important here: first change the map, then the storage,
+        # for the benefit of the special subclasses
+        obj._set_mapdict_map(self)
+        obj._mapdict_write_storage(self.storageindex, w_value)
+
+    @jit.unroll_safe
+    def _grow_storage_if_needed(self, obj):
         if self.length() > obj._mapdict_storage_length():
             # note that self.size_estimate() is always at least self.length()
             new_storage = [None] * self.size_estimate()
@@ -162,14 +212,9 @@ class AbstractAttribute(object):
                 new_storage[i] = obj._mapdict_read_storage(i)
             obj._set_mapdict_storage_and_map(new_storage, self)
 
-        # the order is important here: first change the map, then the storage,
-        # for the benefit of the special subclasses
-        obj._set_mapdict_map(self)
-        obj._mapdict_write_storage(self.storageindex, w_value)
-
 
     @jit.elidable
-    def _find_branch_to_move_into(self, name, index):
+    def _find_branch_to_move_into(self, name, index, kind):
         # walk up the map chain to find an ancestor with lower order that
         # already has the current name as a child inserted
         current_order = sys.maxint
@@ -184,7 +229,7 @@ class AbstractAttribute(object):
                 # we reached the top, so we didn't find it anywhere,
                 # just add it to the top attribute
                 if not isinstance(current, PlainAttribute):
-                    return 0, self._get_new_attr(name, index)
+                    return 0, self._get_new_attr(name, index, kind)
 
             else:
                 return number_to_readd, attr
@@ -216,22 +261,24 @@ class AbstractAttribute(object):
 
         # we store the to-be-readded attribute in the stack, with the map and
         # the value paired up those are lazily initialized to a list large
-        # enough to store all current attributes
+        # enough to store all current attributes (not length(), which is
+        # smaller when unboxed attributes share a storage slot)
         stack = None
         stack_index = 0
         while True:
             current = self
-            number_to_readd, attr = self._find_branch_to_move_into(name, index)
+            kind = self._get_attr_kind(index, w_value)
+            number_to_readd, attr = self._find_branch_to_move_into(
+                name, index, kind)
             # we found the attributes further up, need to save the
             # previous values of the attributes we passed
             if number_to_readd:
                 if stack is None:
-                    stack = [erase_map(None)] * (self.length() * 2)
+                    stack = [erase_map(None)] * (self.num_attributes() * 2)
                 current = self
                 for i in range(number_to_readd):
                     assert isinstance(current, PlainAttribute)
-                    w_self_value = obj._mapdict_read_storage(
-                            current.storageindex)
+                    w_self_value = current._direct_read(obj)
                     stack[stack_index] = erase_map(current)
                     stack[stack_index + 1] = erase_item(w_self_value)
                     stack_index += 2
@@ -365,6 +412,14 @@ class PlainAttribute(AbstractAttribute):
         self.ever_mutated = False
         self.order = len(back.cache_attrs) if back.cache_attrs else 0
 
+    def _direct_read(self, obj):
+        return obj._mapdict_read_storage(self.storageindex)
+
+    def _direct_write(self, obj, w_value):
+        if not self.ever_mutated:
+            self.ever_mutated = True
+        obj._mapdict_write_storage(self.storageindex, w_value)
+
     def _copy_attr(self, obj, new_obj):
         w_value = self.read(obj, self.name, self.index)
         new_obj._get_mapdict_map().add_attr(new_obj, self.name, self.index, w_value)
@@ -398,11 +453,16 @@ class PlainAttribute(AbstractAttribute):
             return self
         return self.back.search(attrtype)
 
+    def _find_last_unboxed(self):
+        if isinstance(self, UnboxedPlainAttribute):
+            return self
+        return self.back._find_last_unboxed()
+
     def materialize_r_dict(self, space, obj, dict_w):
         new_obj = self.back.materialize_r_dict(space, obj, dict_w)
         if self.index == DICT:
             w_attr = space.newtext(self.name)
-            dict_w[w_attr] = obj._mapdict_read_storage(self.storageindex)
+            dict_w[w_attr] = self._direct_read(obj)
         else:
             self._copy_attr(obj, new_obj)
         return new_obj
@@ -416,6 +476,163 @@ class PlainAttribute(AbstractAttribute):
     def __repr__(self):
         return "<PlainAttribute %s %s %s %r>" % (self.name, self.index, self.storageindex, self.back)
 
+
+class UnboxedStorage(W_Root):
+    """The values of all the unboxed attributes of an object, which are
+    kept together in a single storage slot.  Ints are stored as floats
+    with the same bits."""
+    _immutable_fields_ = ['values']
+
+    def __init__(self, size):
+        self.values = [0.0] * size
+
+    def grow(self, size):
+        result = UnboxedStorage(size)
+        for i in range(len(self.values)):
+            result.values[i] = self.values[i]
+        return result
+
+
+class UnboxedPlainAttribute(PlainAttribute):
+    """An attribute whose value is always an int, or always a float, which
+    is stored unboxed in the object's UnboxedStorage.  Only the first
+    unboxed attribute of a map takes a storage slot, for the UnboxedStorage;
+    the following ones share it.
+
+    If another kind of value is written to the attribute, the attribute
+    is replaced by a PlainAttribute in the map tree, for the objects
+    created later.  The object itself is converted to a map where the
+    attribute is boxed."""
+    _immutable_fields_ = ['listindex', 'firstunboxed', '_length',
+                          'replacement?', 'unboxed_size_estimate?']
+
+    def __init__(self, name, index, back):
+        previous = back._find_last_unboxed()
+        if previous is None:
+            self._length = back.length() + 1
+        else:
+            self._length = back.length()
+        PlainAttribute.__init__(self, name, index, back)
+        if previous is None:
+            self.firstunboxed = self
+            self.listindex = 0
+        else:
+            self.firstunboxed = previous.firstunboxed
+            self.listindex = previous.listindex + 1
+            self.storageindex = previous.storageindex
+        self.replacement = None
+        self.unboxed_size_estimate = 1
+        first = self.firstunboxed
+        if first.unboxed_size_estimate <= self.listindex:
+            first.unboxed_size_estimate = self.listindex + 1
+
+    def length(self):
+        return self._length
+
+    def _accepts(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def _unbox(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def _box(self, value):
+        raise NotImplementedError("abstract base class")
+
+    def _direct_read(self, obj):
+        if jit.isconstant(obj) and not self.ever_mutated:
+            value = self._pure_read_unboxed(obj)
+        else:
+            value = self._read_unboxed(obj)
+        return self._box(value)
+
+    def _read_unboxed(self, obj):
+        unboxed = obj._mapdict_read_storage(self.storageindex)
+        assert isinstance(unboxed, UnboxedStorage)
+        return unboxed.values[self.listindex]
+
+    @jit.elidable
+    def _pure_read_unboxed(self, obj):
+        return self._read_unboxed(obj)
+
+    def _direct_write(self, obj, w_value):
+        if not self._accepts(w_value):
+            self._write_other_kind(obj, w_value)
+            return
+        if not self.ever_mutated:
+            self.ever_mutated = True
+        unboxed = obj._mapdict_read_storage(self.storageindex)
+        assert isinstance(unboxed, UnboxedStorage)
+        unboxed.values[self.listindex] = self._unbox(w_value)
+
+    def _switch_map_and_write_storage(self, obj, w_value):
+        if self.replacement is not None or not self._accepts(w_value):
+            attr = self._replace_with_boxed()
+            attr._switch_map_and_write_storage(obj, w_value)
+            return
+        self._grow_storage_if_needed(obj)
+        obj._set_mapdict_map(self)
+        if self.listindex == 0:
+            unboxed = UnboxedStorage(self.unboxed_size_estimate)
+            obj._mapdict_write_storage(self.storageindex, unboxed)
+        else:
+            unboxed = obj._mapdict_read_storage(self.storageindex)
+            assert isinstance(unboxed, UnboxedStorage)
+            if self.listindex >= len(unboxed.values):
+                unboxed = unboxed.grow(
+                    self.firstunboxed.unboxed_size_estimate)
+                obj._mapdict_write_storage(self.storageindex, unboxed)
+        unboxed.values[self.listindex] = self._unbox(w_value)
+
+    def _replace_with_boxed(self):
+        attr = self.replacement
+        if attr is None:
+            attr = PlainAttribute(self.name, self.index, self.back)
+            attr.order = self.order
+            self.back.cache_attrs[self.name, self.index] = attr
+            self.replacement = attr
+        return attr
+
+    @jit.dont_look_inside
+    def _write_other_kind(self, obj, w_value):
+        # the attribute changes kind: copy the object, which gives it a map
+        # where the attribute is boxed, and write the new value there
+        self._replace_with_boxed()
+        self.ever_mutated = True
+        new_obj = obj._get_mapdict_map().copy(obj)
+        flag = new_obj._get_mapdict_map().write(new_obj, self.name,
+                                                self.index, w_value)
+        assert flag
+        obj._set_mapdict_storage_and_map(new_obj.storage, new_obj.map)
+
+    def __repr__(self):
+        return "<%s %s %s %s[%s] %r>" % (
+            self.__class__.__name__, self.name, self.index,
+            self.storageindex, self.listindex, self.back)
+
+
+class UnboxedIntAttribute(UnboxedPlainAttribute):
+    def _accepts(self, w_value):
+        return type(w_value) is W_IntObject
+
+    def _unbox(self, w_value):
+        assert isinstance(w_value, W_IntObject)
+        return longlong2float(r_int64(w_value.intval))
+
+    def _box(self, value):
+        return self.space.newint(intmask(float2longlong(value)))
+
+
+class UnboxedFloatAttribute(UnboxedPlainAttribute):
+    def _accepts(self, w_value):
+        return type(w_value) is W_FloatObject
+
+    def _unbox(self, w_value):
+        assert isinstance(w_value, W_FloatObject)
+        return w_value.floatval
+
+    def _box(self, value):
+        return self.space.newfloat(value)
+
 class MapAttrCache(object):
     def __init__(self, space):
         SIZE = 1 << space.config.objspace.std.methodcachesizeexp
@@ -919,6 +1136,7 @@ class MapDictIteratorItems(BaseItemIterator):
 class CacheEntry(object):
     version_tag = None
     storageindex = 0
+    unboxed_attr = None
     w_method = None # for callmethod
     success_counter = 0
     failure_counter = 0
@@ -951,7 +1169,8 @@ def init_mapdict_cache(pycode):
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
 
 @jit.dont_look_inside
-def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None):
+def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None,
+                unboxed_attr=None):
     entry = pycode._mapdict_caches[nameindex]
     if entry is INVALID_CACHE_ENTRY:
         entry = CacheEntry()
@@ -959,6 +1178,7 @@ def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None
     entry.map_wref = weakref.ref(map)
     entry.version_tag = version_tag
     entry.storageindex = storageindex
+    entry.unboxed_attr = unboxed_attr
     entry.w_method = w_method
     if pycode.space.config.objspace.std.withmethodcachecounter:
         entry.failure_counter += 1
@@ -970,6 +1190,8 @@ def LOAD_ATTR_caching(pycode, w_obj, nameindex):
     map = w_obj._get_mapdict_map()
     if entry.is_valid_for_map(map) and entry.w_method is None:
         # everything matches, it's incredibly fast
+        if entry.unboxed_attr is not None:
+            return entry.unboxed_attr._direct_read(w_obj)
         return w_obj._mapdict_read_storage(entry.storageindex)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
 LOAD_ATTR_caching._always_inline_ = True
@@ -1016,8 +1238,12 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
                     # Note that if map.terminator is a DevolvedDictTerminator
                     # or the class provides its own dict, not using mapdict, then:
                     # map.find_map_attr will always return None if index==DICT.
-                    _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex)
-                    return w_obj._mapdict_read_storage(attr.storageindex)
+                    unboxed_attr = None
+                    if isinstance(attr, UnboxedPlainAttribute):
+                        unboxed_attr = attr
+                    _fill_cache(pycode, nameindex, map, version_tag,
+                                attr.storageindex, unboxed_attr=unboxed_attr)
+                    return attr._direct_read(w_obj)
     if space.config.objspace.std.withmethodcachecounter:
         INVALID_CACHE_ENTRY.failure_counter += 1
     return space.getattr(w_obj, w_name)
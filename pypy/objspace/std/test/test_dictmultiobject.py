@@ -1264,6 +1264,7 @@ class Config:
             withcelldict = False
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withunboxedattributes = False
 
 FakeSpace.config = Config()
 
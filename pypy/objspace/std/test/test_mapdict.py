@@ -7,6 +7,7 @@ class Config:
             withcelldict = False
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withunboxedattributes = False
 
 space = FakeSpace()
 space.config = Config
@@ -1324,6 +1325,221 @@ class AppTestGlobalCaching(AppTestWithMapDict):
         else:
             assert 0, "failed: got %r" % ([got[1] for got in seen],)
 
+class AppTestUnboxedAttributes(AppTestWithMapDict):
+    spaceconfig = {"objspace.std.withunboxedattributes": True}
+
+    def test_int_and_float(self):
+        import sys
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        a.y = 1.5
+        a.z = "abc"
+        a.w = -sys.maxint - 1
+        assert a.x == 5
+        assert a.y == 1.5
+        assert a.z == "abc"
+        assert a.w == -sys.maxint - 1
+        assert type(a.x) is int
+        assert type(a.y) is float
+        a.x += 1
+        a.y *= 2
+        assert a.x == 6
+        assert a.y == 3.0
+        assert a.__dict__ == {"x": 6, "y": 3.0, "z": "abc",
+                              "w": -sys.maxint - 1}
+
+    def test_change_type(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        a.y = 6.5
+        b = A()
+        b.x = 7
+        b.y = 8.5
+        a.x = "abc"
+        assert a.x == "abc"
+        assert a.y == 6.5
+        assert b.x == 7
+        assert b.y == 8.5
+        b.y = 9
+        assert type(b.y) is int
+        assert b.y == 9
+        c = A()
+        c.x = 1.5
+        c.y = None
+        assert c.x == 1.5
+        assert c.y is None
+        assert a.x == "abc"
+        assert b.x == 7
+
+    def test_subclasses_of_int_and_float(self):
+        class myint(int):
+            pass
+        class A(object):
+            pass
+        a = A()
+        a.x = myint(5)
+        a.y = True
+        assert type(a.x) is myint
+        assert a.y is True
+
+    def test_many_attributes(self):
+        class A(object):
+            pass
+        a = A()
+        for i in range(30):
+            if i % 3 == 0:
+                setattr(a, "a%d" % i, i)
+            elif i % 3 == 1:
+                setattr(a, "a%d" % i, i + 0.5)
+            else:
+                setattr(a, "a%d" % i, str(i))
+        for i in range(30):
+            if i % 3 == 0:
+                assert getattr(a, "a%d" % i) == i
+            elif i % 3 == 1:
+                assert getattr(a, "a%d" % i) == i + 0.5
+            else:
+                assert getattr(a, "a%d" % i) == str(i)
+
+    def test_delete(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2.5
+        a.z = 3
+        del a.y
+        assert a.x == 1
+        assert a.z == 3
+        assert not hasattr(a, "y")
+        a.y = 4.5
+        assert a.y == 4.5
+        del a.x
+        assert a.__dict__ == {"y": 4.5, "z": 3}
+
+    def test_slots(self):
+        class A(object):
+            __slots__ = ["x", "y"]
+        a = A()
+        a.x = 1
+        a.y = 2.5
+        assert a.x == 1
+        assert a.y == 2.5
+        a.x = "abc"
+        assert a.x == "abc"
+
+    def test_loop_cached(self):
+        class A(object):
+            def __init__(self, x):
+                self.x = x
+                self.y = x * 0.5
+        l = [A(i) for i in range(20)] + [A(1.5)]
+        total = 0
+        for a in l:
+            total += a.x + a.y
+        assert total == 190 * 1.5 + 1.5 * 1.5
+
+
+class TestUnboxedAttributes(object):
+    spaceconfig = {"objspace.std.withunboxedattributes": True}
+
+    def test_maps(self):
+        from pypy.objspace.std.mapdict import (
+            UnboxedIntAttribute, UnboxedFloatAttribute, PlainAttribute)
+        space = self.space
+        w_a, w_b = space.fixedview(space.appexec([], """():
+            class A(object):
+                pass
+            a = A()
+            a.x = 1
+            a.y = 2.5
+            a.z = 3
+            b = A()
+            b.x = 4
+            b.y = 5.5
+            b.z = "abc"
+            return a, b
+        """))
+        map = w_a._get_mapdict_map()
+        assert type(map) is UnboxedIntAttribute
+        assert type(map.back) is UnboxedFloatAttribute
+        assert type(map.back.back) is UnboxedIntAttribute
+        # all three values share the same storage slot
+        assert map.storageindex == map.back.storageindex == 0
+        assert map.length() == 1
+        map = w_b._get_mapdict_map()
+        assert type(map) is PlainAttribute
+        assert map.length() == 2
+        # the next instance of A that gets a float in 'x' switches the
+        # 'x' attribute to a boxed one
+        w_c = space.appexec([w_a], """(a):
+            c = type(a)()
+            c.x = 1.5
+            return c
+        """)
+        assert type(w_c._get_mapdict_map()) is PlainAttribute
+        assert space.float_w(space.getattr(w_c, space.wrap("x"))) == 1.5
+        assert space.int_w(space.getattr(w_a, space.wrap("x"))) == 1
+        w_d = space.appexec([w_a], """(a):
+            d = type(a)()
+            d.x = 2
+            return d
+        """)
+        assert type(w_d._get_mapdict_map()) is PlainAttribute
+        assert space.int_w(space.getattr(w_d, space.wrap("x"))) == 2
+
+    def test_reorder(self):
+        space = self.space
+        w_a = space.appexec([], """():
+            class A(object):
+                pass
+            o1 = A()
+            o1.a = 'x'
+            o2 = A()
+            o2.b = 1
+            o2.c = 2
+            o2.d = 3.5
+            o2.a = 'y'
+            return o2
+        """)
+        assert space.text_w(space.getattr(w_a, space.wrap("a"))) == 'y'
+        assert space.int_w(space.getattr(w_a, space.wrap("b"))) == 1
+        assert space.int_w(space.getattr(w_a, space.wrap("c"))) == 2
+        assert space.float_w(space.getattr(w_a, space.wrap("d"))) == 3.5
+
+    def test_random_attribute_orders(self):
+        import random
+        space = self.space
+        w_cls = space.appexec([], """():
+            class A(object):
+                pass
+            return A
+        """)
+        rnd = random.Random(42)
+        names = "abcdefgh"
+        values = [lambda i: space.wrap(i), lambda i: space.wrap(i + 0.5),
+                  lambda i: space.wrap(str(i))]
+        for n in range(300):
+            w_obj = space.call_function(w_cls)
+            expected = {}
+            for i in range(rnd.randrange(1, 12)):
+                name = rnd.choice(names)
+                w_value = rnd.choice(values)(i)
+                space.setattr(w_obj, space.wrap(name), w_value)
+                expected[name] = w_value
+                map = w_obj._get_mapdict_map()
+                assert map.size_estimate() >= map.length()
+                assert w_obj._mapdict_storage_length() >= map.length()
+            for name, w_value in expected.items():
+                w_res = space.getattr(w_obj, space.wrap(name))
+                assert space.eq_w(w_res, w_value)
+                assert space.type(w_res) is space.type(w_value)
+
+
 class TestDictSubclassShortcutBug(object):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
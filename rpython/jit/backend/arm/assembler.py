@@ -689,7 +689,7 @@ class AssemblerARM(ResOpAssembler):
         self.setup(original_loop_token)
         #self.codemap.inherit_code_from_position(faildescr.adr_jump_offset)
         descr_number = compute_unique_id(faildescr)
-        if log:
+        if log or self._count_bridges:
             operations = self._inject_debugging_code(faildescr, operations,
                                                      'b', descr_number)
 
@@ -43,6 +43,9 @@ class AbstractARMCPU(AbstractLLCPU):
     def set_debug(self, flag):
         return self.assembler.set_debug(flag)
 
+    def set_count_bridges(self, flag):
+        self.assembler.set_count_bridges(flag)
+
     def setup(self):
         self.assembler = AssemblerARM(self, self.translate_support_code)
 
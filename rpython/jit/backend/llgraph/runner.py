@@ -26,6 +26,7 @@ class LLAsmInfo(object):
     def __init__(self, lltrace):
         self.ops_offset = None
         self.lltrace = lltrace
+        self.asmlen = len(lltrace.operations)   # no machine code, a guess
 
 class LLTrace(object):
     has_been_freed = False
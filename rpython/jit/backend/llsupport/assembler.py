@@ -75,6 +75,7 @@ class BaseAssembler(object):
         self.rtyper = cpu.rtyper
         # do not rely on this attribute if you test for jitlog
         self._debug = False
+        self._count_bridges = False
         self.loop_run_counters = []
 
     def stitch_bridge(self, faildescr, target):
@@ -182,6 +183,9 @@ class BaseAssembler(object):
         self._debug = v
         return r
 
+    def set_count_bridges(self, v):
+        self._count_bridges = v
+
     def rebuild_faillocs_from_descr(self, descr, inputargs):
         locs = []
         GPR_REGS = len(self.cpu.gen_regs)
@@ -357,6 +361,11 @@ class BaseAssembler(object):
                     self._append_debugging_code(newoperations, 'l', number,
                                                 op.getdescr())
             operations = newoperations
+        elif self._count_bridges and tp == 'b':
+            # only the entry counter, for the guard failure statistics
+            newoperations = []
+            self._append_debugging_code(newoperations, tp, number, None)
+            operations = newoperations + operations
         return operations
 
     def _append_debugging_code(self, operations, tp, number, token):
@@ -50,6 +50,12 @@ class AbstractCPU(object):
         """
         return False
 
+    def set_count_bridges(self, value):
+        """ Enable or disable counting the entries into the bridges compiled
+        from now on, even without set_debug(True).  They are reported by
+        get_all_loop_runs().  Does nothing by default.
+        """
+
     def compile_loop(self, inputargs, operations, looptoken, jd_id=0,
                      unique_id=0, log=True, name='', logger=None):
         """Assemble the given loop.
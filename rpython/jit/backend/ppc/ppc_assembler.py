@@ -850,7 +850,7 @@ class AssemblerPPC(OpAssembler, BaseAssembler):
 
         self.setup(original_loop_token)
         descr_number = compute_unique_id(faildescr)
-        if log:
+        if log or self._count_bridges:
             operations = self._inject_debugging_code(faildescr, operations,
                                                      'b', descr_number)
 
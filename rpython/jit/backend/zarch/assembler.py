@@ -711,7 +711,7 @@ class AssemblerZARCH(BaseAssembler, OpAssembler,
 
         self.setup(original_loop_token)
         descr_number = compute_unique_id(faildescr)
-        if log:
+        if log or self._count_bridges:
             operations = self._inject_debugging_code(faildescr, operations,
                                                      'b', descr_number)
 
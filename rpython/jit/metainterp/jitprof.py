@@ -7,6 +7,8 @@ from rpython.rlib.debug import debug_print, debug_start, debug_stop
 from rpython.rlib.debug import have_debug_prints
 from rpython.jit.metainterp.jitexc import JitException
 from rpython.rlib.jit import Counters
+from rpython.rlib.objectmodel import compute_unique_id
+from rpython.rtyper.lltypesystem import lltype
 
 
 JITPROF_LINES = Counters.ncounters + 1 + 1
@@ -178,5 +180,37 @@ class Profiler(BaseProfiler):
         debug_print(final)
 
 
+class GuardFailureCounter(object):
+    """Counts how many times each guard failed, by the unique id of its
+    fail descr (the same number as the one of the bridge attached to it).
+    Only the failures that leave the machine code are seen here: once a
+    guard has a bridge, its failures are counted as bridge entries by
+    the backend.  Disabled by default.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.counts = {}
+
+    def set_enabled(self, flag):
+        self.enabled = flag
+        if not flag:
+            self.counts.clear()
+
+    def record(self, descr):
+        key = compute_unique_id(descr)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def get_all(self):
+        from rpython.rlib.jit_hooks import GUARD_FAILURE_CONTAINER
+        l = lltype.malloc(GUARD_FAILURE_CONTAINER, len(self.counts))
+        i = 0
+        for key, value in self.counts.iteritems():
+            l[i].number = key
+            l[i].counter = value
+            i += 1
+        return l
+
+
 class BrokenProfilerData(JitException):
     pass
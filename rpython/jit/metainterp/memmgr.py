@@ -1,6 +1,7 @@
 import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
+from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import we_are_translated
 
 #
@@ -19,6 +20,17 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Additionally, the size of the machine code of each loop and of its
+# bridges is recorded.  If 'max_code_size' is set and the loops in
+# 'alive_loops' use more than that, the least recently entered ones
+# are removed from the set, until only 3/4 of the budget is used.
+#
+
+def _entered_before(looptoken1, looptoken2):
+    return looptoken1.generation < looptoken2.generation
+
+LoopTokenSort = make_timsort_class(lt=_entered_before)
+
 
 class MemoryManager(object):
 
@@ -38,6 +50,11 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        # machine code budget, in bytes; 0 means no limit
+        self.max_code_size = 0
+        self.alive_code_size = 0
+        self.evicted_loops = 0
+        self.evicted_code_size = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +66,40 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_code_size(self, max_code_size):
+        if max_code_size < 0:
+            max_code_size = 0
+        self.max_code_size = max_code_size
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if 0 < self.max_code_size < self.alive_code_size:
+            self._evict_loops_now()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                self.alive_loops[looptoken] = None
+                self.alive_code_size += looptoken.code_size
+
+    def record_code_size(self, looptoken, size):
+        """Record that 'size' more bytes of machine code were produced
+        for 'looptoken', i.e. for the loop itself or for a bridge."""
+        looptoken.code_size += size
+        if looptoken in self.alive_loops:
+            self.alive_code_size += size
+
+    def _forget_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.code_size
+
+    def get_stats(self):
+        return (len(self.alive_loops), self.alive_code_size,
+                self.evicted_loops, self.evicted_code_size)
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -70,7 +111,7 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._forget_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
@@ -81,3 +122,24 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def _evict_loops_now(self):
+        debug_start("jit-mem-evict")
+        debug_print("Code size before:", self.alive_code_size)
+        debug_print("Code size budget:", self.max_code_size)
+        target = self.max_code_size - self.max_code_size // 4
+        looptokens = self.alive_loops.keys()
+        LoopTokenSort(looptokens).sort()
+        for looptoken in looptokens:
+            if self.alive_code_size <= target:
+                break
+            if looptoken.generation >= self.current_generation - 1:
+                # entered during the last generation, like all the next
+                # ones: don't free the loops that are in active use
+                break
+            self._forget_loop(looptoken)
+            self.evicted_loops += 1
+            self.evicted_code_size += looptoken.code_size
+        debug_print("Code size after: ", self.alive_code_size)
+        debug_print("Loop tokens left:", len(self.alive_loops))
+        debug_stop("jit-mem-evict")
@@ -9,7 +9,7 @@ from rpython.jit.metainterp import history, compile, resume, executor, jitexc
 from rpython.jit.metainterp.heapcache import HeapCache
 from rpython.jit.metainterp.history import (Const, ConstInt, ConstPtr,
     ConstFloat, TargetToken, MissingValue, SwitchToBlackhole)
-from rpython.jit.metainterp.jitprof import EmptyProfiler
+from rpython.jit.metainterp.jitprof import EmptyProfiler, GuardFailureCounter
 from rpython.jit.metainterp.logger import Logger
 from rpython.jit.metainterp.optimizeopt.util import args_dict
 from rpython.jit.metainterp.resoperation import rop, OpHelpers, GuardResOp
@@ -1840,6 +1840,7 @@ class MetaInterpStaticData(object):
 
         self.profiler = ProfilerClass()
         self.profiler.cpu = cpu
+        self.guard_failures = GuardFailureCounter()
         self.warmrunnerdesc = warmrunnerdesc
         if warmrunnerdesc:
             self.config = warmrunnerdesc.translator.config
@@ -190,7 +190,8 @@ class DictTests:
         # not cached anyway.
         res = self.meta_interp(f, [100], listops=True)
         assert res == f(50)
-        self.check_resops({'new_array_clear': 2, 'getfield_gc_r': 2,
+        # (no 'new_array_clear': small dicts don't allocate an index)
+        self.check_resops({'getfield_gc_r': 2,
                            'guard_true': 4, 'jump': 1,
                            'new_with_vtable': 2, 'getinteriorfield_gc_i': 2,
                            'setfield_gc': 14, 'int_gt': 2, 'int_sub': 2,
@@ -1,6 +1,7 @@
 
 import py
 from rpython.rlib.jit import JitDriver, JitHookInterface, Counters, dont_look_inside
+from rpython.rlib.jit import set_param
 from rpython.rlib import jit_hooks
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import JitPolicy
@@ -157,6 +158,38 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) == 0
         self.meta_interp(main, [], ProfilerClass=EmptyProfiler)
 
+    def test_guard_failures(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 5 == 0:
+                    s += 1
+                i -= 1
+            return s
+
+        def main(flag):
+            set_param(driver, 'trace_eagerness', 1000)
+            jit_hooks.stats_set_guard_failures(None, flag)
+            loop(100)
+            l = jit_hooks.stats_get_guard_failures(None)
+            if not flag:
+                return -len(l)
+            total = 0
+            for i in range(len(l)):
+                assert l[i].counter > 0
+                total += l[i].counter
+            jit_hooks.stats_set_guard_failures(None, False)
+            assert len(jit_hooks.stats_get_guard_failures(None)) == 0
+            return total
+
+        res = self.meta_interp(main, [True])
+        assert res > 0
+        res = self.meta_interp(main, [False])
+        assert res == 0
+
     def test_get_jitcell_at_key(self):
         driver = JitDriver(greens = ['s'], reds = ['i'], name='jit')
 
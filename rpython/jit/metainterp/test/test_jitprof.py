@@ -97,3 +97,22 @@ class TestProfile(ProfilerMixin):
         assert res == f(6, 7, 2)
         profiler = pyjitpl._warmrunnerdesc.metainterp_sd.profiler
         assert profiler.calls == 1
+
+def test_guard_failure_counter():
+    from rpython.jit.metainterp.jitprof import GuardFailureCounter
+    from rpython.rlib.objectmodel import compute_unique_id
+    class Descr(object):
+        pass
+    d1, d2 = Descr(), Descr()
+    counter = GuardFailureCounter()
+    assert not counter.enabled
+    counter.set_enabled(True)
+    counter.record(d1)
+    counter.record(d2)
+    counter.record(d1)
+    l = counter.get_all()
+    res = sorted([(l[i].number, l[i].counter) for i in range(len(l))])
+    assert res == sorted([(compute_unique_id(d1), 2),
+                          (compute_unique_id(d2), 1)])
+    counter.set_enabled(False)
+    assert len(counter.get_all()) == 0
@@ -21,6 +21,7 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    code_size = 0
 
 
 class _TestMemoryManager:
@@ -78,6 +79,62 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_code_size(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        token = FakeLoopToken()
+        memmgr.keep_loop_alive(token)
+        memmgr.record_code_size(token, 100)
+        memmgr.record_code_size(token, 20)     # a bridge
+        assert token.code_size == 120
+        assert memmgr.get_stats() == (1, 120, 0, 0)
+        memmgr.keep_loop_alive(token)
+        memmgr.next_generation()
+        memmgr.keep_loop_alive(token)
+        assert memmgr.get_stats() == (1, 120, 0, 0)
+
+    def test_max_code_size(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(400)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.record_code_size(token, 100)
+            memmgr.next_generation()
+        # each time the budget is exceeded, the least recently entered
+        # loops are freed until only 300 bytes are left, but never the
+        # loop entered during the last generation
+        assert memmgr.alive_loops == dict.fromkeys(tokens[6:])
+        assert memmgr.get_stats() == (4, 400, 6, 600)
+
+    def test_max_code_size_keeps_recent_loops(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(400)
+        tokens = [FakeLoopToken() for i in range(6)]
+        for i in range(len(tokens)):
+            memmgr.keep_loop_alive(tokens[i])
+            memmgr.record_code_size(tokens[i], 100)
+            memmgr.keep_loop_alive(tokens[0])
+            memmgr.next_generation()
+        assert tokens[0] in memmgr.alive_loops
+        assert memmgr.alive_code_size <= 400
+
+    def test_max_code_size_single_big_loop(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(400)
+        token = FakeLoopToken()
+        memmgr.keep_loop_alive(token)
+        memmgr.record_code_size(token, 1000)
+        memmgr.next_generation()
+        # the loop was entered during the generation that just finished
+        assert memmgr.alive_loops == {token: None}
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {}
+        assert memmgr.get_stats() == (0, 0, 1, 1000)
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -1,6 +1,7 @@
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, rffi
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rlib.debug import ll_assert
+from rpython.rlib import rgc
 from rpython.memory.gcheader import GCHeaderBuilder
 from rpython.memory.support import DEFAULT_CHUNK_SIZE
 from rpython.memory.support import get_address_stack, get_address_deque
@@ -24,7 +25,7 @@ class GCBase(object):
     gcflag_extra = 0   # or a real GC flag that is always 0 when not collecting
 
     def __init__(self, config, chunk_size=DEFAULT_CHUNK_SIZE,
-                 translated_to_c=True):
+                 translated_to_c=True, hooks=None):
         self.gcheaderbuilder = GCHeaderBuilder(self.HDR)
         self.AddressStack = get_address_stack(chunk_size)
         self.AddressDeque = get_address_deque(chunk_size)
@@ -33,6 +34,10 @@ class GCBase(object):
         self.config = config
         assert isinstance(translated_to_c, bool)
         self.translated_to_c = translated_to_c
+        if hooks is None:
+            from rpython.memory.gc.hook import GcHooks
+            hooks = GcHooks()     # the default hooks are empty
+        self.hooks = hooks
 
     def setup(self):
         # all runtime mutable values' setup should happen here
@@ -184,6 +189,27 @@ class GCBase(object):
     def can_move(self, addr):
         return False
 
+    def collect_step(self):
+        """Do a single step of a major collection.  By default, GCs are
+        not incremental and do a full collection.  Returns the states
+        before and after, encoded as explained in rlib/rgc.py."""
+        self.collect()
+        return rgc._encode_states(0, 0)
+
+    def enable(self):
+        pass
+
+    def disable(self):
+        """Disable the automatic major collections.  Ignored by default."""
+
+    def isenabled(self):
+        return True
+
+    def get_stats(self, stat_no):
+        """Return one of the statistics listed in rlib/rgc.py.  By default,
+        GCs don't record any statistics."""
+        return 0
+
     def malloc_fixed_or_varsize_nonmovable(self, typeid, length):
         raise MemoryError
 
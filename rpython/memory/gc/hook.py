@@ -0,0 +1,116 @@
+from rpython.rlib import rgc
+
+
+class GcHooks(object):
+    """
+    Base class for the hooks that the GC calls after its collections.
+    The default instance does nothing.
+
+    Subclasses override the on_*() methods and set the corresponding
+    *_enabled flag.  These methods are called from inside the GC: they
+    must only record the event, e.g. by updating a few counters and
+    setting a flag.  In particular they must not allocate, nor do
+    anything else that could trigger a collection.
+
+    Durations are floats, in the units of rtimer.read_timestamp().
+
+    If 'alloc_sample_period' is set to a positive number of bytes,
+    on_gc_alloc_sample() is called every time the program allocated
+    that many bytes (the GC checks this attribute again after every
+    minor collection, so changes don't take effect immediately).
+    The hooks are annotated together with the program: see
+    annotate_gchooks().
+    """
+
+    def __init__(self):
+        self.gc_minor_enabled = False
+        self.gc_collect_step_enabled = False
+        self.gc_collect_enabled = False
+        self.alloc_sample_period = 0
+
+    def on_gc_minor(self, duration, total_memory_used, promoted,
+                    pinned_objects):
+        """
+        Called after a minor collection.  'promoted' is the number of
+        bytes of objects moved out of the nursery.
+        """
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        """
+        Called after each step of an incremental major collection.  The
+        states are those of incminimark.GC_STATES.
+        """
+
+    def on_gc_collect(self, num_major_collects,
+                      memory_before, memory_after,
+                      rawmalloced_before, rawmalloced_after,
+                      arena_memory, threshold):
+        """
+        Called after a major collection is fully done.  The memory sizes
+        are in bytes and count the objects outside the nursery; 'threshold'
+        is the memory usage at which the next major collection will start.
+        """
+
+    def on_gc_alloc_sample(self, nbytes):
+        """
+        Called from the middle of an allocation that reached the next
+        sampling point.  'nbytes' is the number of bytes that the sample
+        stands for: a multiple of 'alloc_sample_period', larger than it
+        if the allocation crossed several sampling points.  The object
+        being allocated is not initialized yet.
+        """
+
+    # the fire_*() methods are called by the GC and should not be overridden
+
+    @rgc.no_collect
+    def fire_gc_minor(self, duration, total_memory_used, promoted,
+                      pinned_objects):
+        if self.gc_minor_enabled:
+            self.on_gc_minor(duration, total_memory_used, promoted,
+                             pinned_objects)
+
+    @rgc.no_collect
+    def fire_gc_collect_step(self, duration, oldstate, newstate):
+        if self.gc_collect_step_enabled:
+            self.on_gc_collect_step(duration, oldstate, newstate)
+
+    @rgc.no_collect
+    def fire_gc_collect(self, num_major_collects,
+                        memory_before, memory_after,
+                        rawmalloced_before, rawmalloced_after,
+                        arena_memory, threshold):
+        if self.gc_collect_enabled:
+            self.on_gc_collect(num_major_collects,
+                               memory_before, memory_after,
+                               rawmalloced_before, rawmalloced_after,
+                               arena_memory, threshold)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, nbytes):
+        if self.alloc_sample_period > 0:
+            self.on_gc_alloc_sample(nbytes)
+
+
+def annotate_gchooks(annotator, hooks):
+    """NOT_RPYTHON: annotate the calls that the GC makes to 'hooks'.  This
+    must be done together with the rest of the program: the GC transformer
+    comes too late to discover new classes and attributes."""
+    def fire_gc_minor(duration, total_memory_used, promoted, pinned_objects):
+        hooks.fire_gc_minor(duration, total_memory_used, promoted,
+                            pinned_objects)
+    def fire_gc_collect_step(duration, oldstate, newstate):
+        hooks.fire_gc_collect_step(duration, oldstate, newstate)
+    def fire_gc_collect(num_major_collects, memory_before, memory_after,
+                        rawmalloced_before, rawmalloced_after,
+                        arena_memory, threshold):
+        hooks.fire_gc_collect(num_major_collects, memory_before, memory_after,
+                              rawmalloced_before, rawmalloced_after,
+                              arena_memory, threshold)
+    def fire_gc_alloc_sample(nbytes):
+        hooks.fire_gc_alloc_sample(nbytes)
+    annotator.build_types(fire_gc_minor, [float, int, int, int],
+                          complete_now=False)
+    annotator.build_types(fire_gc_collect_step, [float, int, int],
+                          complete_now=False)
+    annotator.build_types(fire_gc_collect, [int] * 7, complete_now=False)
+    annotator.build_types(fire_gc_alloc_sample, [int], complete_now=False)
@@ -69,9 +69,12 @@ from rpython.memory.gc.base import GCBase, MovingGCBase
 from rpython.memory.gc import env
 from rpython.memory.support import mangle_hash
 from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
+from rpython.rlib.rarithmetic import r_longlong
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rtimer import read_timestamp, _is_64_bit
+from rpython.rlib import rgc
 from rpython.memory.gc.minimarkpage import out_of_memory
 
 #
@@ -182,6 +185,11 @@ STATE_FINALIZING = 3
 
 GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING']
 
+if _is_64_bit:
+    timer_size_int = int
+else:
+    timer_size_int = r_longlong
+
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
@@ -292,10 +300,24 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
         self.num_major_collects = 0
+        #
+        # Statistics for get_stats().  Times are in read_timestamp() units.
+        self.num_minor_collects = 0
+        self.num_major_collection_steps = 0
+        self.minor_collections_time = timer_size_int(0)
+        self.minor_collections_max_time = timer_size_int(0)
+        self.major_collection_steps_time = timer_size_int(0)
+        self.major_collection_steps_max_time = timer_size_int(0)
+        self.peak_memory_used = r_uint(0)
+        self.peak_rawmalloced_total_size = r_uint(0)
         self.min_heap_size = 0.0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
         self.max_delta = float(r_uint(-1))
+        #
+        # If False, the major collections don't progress automatically,
+        # but only on explicit calls to collect() or collect_step().
+        self.enabled = True
         self.max_number_of_pinned_objects = 0      # computed later
         #
         self.card_page_indices = card_page_indices
@@ -312,6 +334,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.nursery_free = llmemory.NULL
         self.nursery_top  = llmemory.NULL
         self.debug_tiny_nursery = -1
+        #
+        # Allocation sampling, enabled by 'hooks.alloc_sample_period'.
+        # 'nursery_top' is lowered so that the allocation that crosses
+        # the next sampling point goes to collect_and_reserve().  The
+        # real top is then saved in 'nursery_real_top', which is NULL
+        # if sampling is not active.
+        self.nursery_real_top = llmemory.NULL
+        self.nursery_sample_base = llmemory.NULL
+        self.alloc_sample_countdown = 0
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
@@ -371,6 +402,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_rawmalloced_objects = self.AddressStack()
         self.raw_malloc_might_sweep = self.AddressStack()
         self.rawmalloced_total_size = r_uint(0)
+        self.memory_before_major = r_uint(0)
+        self.rawmalloced_before_major = r_uint(0)
 
         self.gc_state = STATE_SCANNING
         #
@@ -744,20 +777,47 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if gen < 0:
             self._minor_collection()   # dangerous! no major GC cycle progress
         elif gen <= 1:
-            self.minor_collection_with_major_progress()
+            self.minor_collection_with_major_progress(force_enabled=True)
             if gen == 1 and self.gc_state == STATE_SCANNING:
                 self.major_collection_step()
         else:
             self.minor_and_major_collection()
         self.rrc_invoke_callback()
 
+    def collect_step(self):
+        """Do a minor collection and a single step of the current major
+        collection, starting a new one if needed.  This is done even if
+        the GC is disabled.  Returns the states before and after the
+        step, encoded with rgc._encode_states()."""
+        oldstate = self.gc_state
+        self._minor_collection()
+        self.major_collection_step()
+        self.rrc_invoke_callback()
+        return rgc._encode_states(oldstate, self.gc_state)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """Stop doing major collection steps automatically.  Minor
+        collections still occur normally."""
+        self.enabled = False
+
+    def isenabled(self):
+        return self.enabled
 
-    def minor_collection_with_major_progress(self, extrasize=0):
-        """Do a minor collection.  Then, if there is already a major GC
-        in progress, run at least one major collection step.  If there is
-        no major GC but the threshold is reached, start a major GC.
+
+    def minor_collection_with_major_progress(self, extrasize=0,
+                                             force_enabled=False):
+        """Do a minor collection.  Then, if the GC is enabled and there
+        is already a major GC in progress, run at least one major
+        collection step.  If there is no major GC but the threshold is
+        reached, start a major GC.
         """
         self._minor_collection()
+        if not self.enabled and not force_enabled:
+            self.rrc_invoke_callback()
+            return
 
         # If the gc_state is STATE_SCANNING, we're not in the middle
         # of an incremental major collection.  In that case, wait
@@ -797,6 +857,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         major collection, and finally reserve totalsize bytes.
         """
 
+        if self.nursery_real_top and self.nursery_free <= self.nursery_real_top:
+            # Only the allocation sampling window is exhausted.  The
+            # object fits below the real top: it is already reserved
+            # (the caller bumped nursery_free), so just account for it
+            # and re-arm the window, without doing any collection.
+            self.stop_alloc_sampling_window()
+            self.start_alloc_sampling_window()
+            return self.nursery_free - totalsize
+        self.stop_alloc_sampling_window()
         minor_collection_count = 0
         while True:
             self.nursery_free = llmemory.NULL      # debug: don't use me
@@ -862,6 +931,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
             # If this succeeds break out of loop.
+            self.stop_alloc_sampling_window()
             result = self.nursery_free
             if self.nursery_free + totalsize <= self.nursery_top:
                 self.nursery_free = result + totalsize
@@ -873,9 +943,47 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        self.start_alloc_sampling_window()
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def start_alloc_sampling_window(self):
+        """Called after 'nursery_free' and 'nursery_top' are set.  If
+        allocation sampling is enabled, lower 'nursery_top' to the next
+        sampling point."""
+        period = self.hooks.alloc_sample_period
+        if period <= 0:
+            return
+        if (self.alloc_sample_countdown <= 0 or
+                self.alloc_sample_countdown > period):
+            self.alloc_sample_countdown = period
+        self.nursery_sample_base = self.nursery_free
+        self.nursery_real_top = self.nursery_top
+        # the allocation that reaches the sampling point must not fit
+        limit = self.alloc_sample_countdown - 1
+        if limit < self.nursery_top - self.nursery_free:
+            self.nursery_top = self.nursery_free + limit
+
+    def stop_alloc_sampling_window(self):
+        """Restore the real 'nursery_top' and account for the bytes
+        allocated in the nursery since start_alloc_sampling_window()."""
+        if self.nursery_real_top:
+            self.nursery_top = self.nursery_real_top
+            self.nursery_real_top = llmemory.NULL
+            self.count_sampled_allocation(
+                self.nursery_free - self.nursery_sample_base)
+
+    def count_sampled_allocation(self, nbytes):
+        self.alloc_sample_countdown -= nbytes
+        if self.alloc_sample_countdown <= 0:
+            # a large object can cross several sampling points: report
+            # them all in one call, and keep the remainder for the next
+            period = self.hooks.alloc_sample_period
+            overshoot = -self.alloc_sample_countdown
+            self.alloc_sample_countdown = period - overshoot % period
+            self.hooks.fire_gc_alloc_sample(
+                (1 + overshoot // period) * period)
+
 
     # XXX kill alloc_young and make it always True
     def external_malloc(self, typeid, length, alloc_young):
@@ -916,7 +1024,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # to major_collection_step().  If there is really no memory,
         # then when the major collection finishes it will raise
         # MemoryError.
-        if self.threshold_reached(raw_malloc_usage(totalsize)):
+        if self.enabled and self.threshold_reached(raw_malloc_usage(totalsize)):
             self.minor_collection_with_major_progress(
                 raw_malloc_usage(totalsize) + self.nursery_size // 2)
         #
@@ -1009,6 +1117,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.is_varsize(typeid):
             offset_to_length = self.varsize_offset_to_length(typeid)
             (result + size_gc_header + offset_to_length).signed[0] = length
+        if self.hooks.alloc_sample_period > 0:
+            self.count_sampled_allocation(raw_malloc_usage(totalsize))
         return result + size_gc_header
 
 
@@ -1031,6 +1141,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            self.stop_alloc_sampling_window()
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1183,6 +1294,49 @@ class IncrementalMiniMarkGC(MovingGCBase):
         """
         return self.ac.total_memory_used + self.rawmalloced_total_size
 
+    def update_peak_memory(self):
+        # Called after every collection: the peaks are thus sampled, but
+        # memory only grows between two collections by allocating in the
+        # nursery or by raw-mallocing large objects.
+        total = self.get_total_memory_used()
+        if total > self.peak_memory_used:
+            self.peak_memory_used = total
+        if self.rawmalloced_total_size > self.peak_rawmalloced_total_size:
+            self.peak_rawmalloced_total_size = self.rawmalloced_total_size
+
+    def get_stats(self, stat_no):
+        if stat_no == rgc.TOTAL_MEMORY:
+            return intmask(self.get_total_memory_used())
+        elif stat_no == rgc.PEAK_MEMORY:
+            return intmask(max(self.peak_memory_used,
+                               self.get_total_memory_used()))
+        elif stat_no == rgc.TOTAL_ARENA_MEMORY:
+            return intmask(self.ac.total_memory_alloced)
+        elif stat_no == rgc.TOTAL_RAWMALLOCED_MEMORY:
+            return intmask(self.rawmalloced_total_size)
+        elif stat_no == rgc.PEAK_RAWMALLOCED_MEMORY:
+            return intmask(max(self.peak_rawmalloced_total_size,
+                               self.rawmalloced_total_size))
+        elif stat_no == rgc.NURSERY_SIZE:
+            return self.nursery_size
+        elif stat_no == rgc.MAJOR_COLLECTION_THRESHOLD:
+            return int(self.next_major_collection_threshold)
+        elif stat_no == rgc.MINOR_COLLECTIONS:
+            return self.num_minor_collects
+        elif stat_no == rgc.MINOR_COLLECTIONS_TIME:
+            return intmask(self.minor_collections_time)
+        elif stat_no == rgc.MINOR_COLLECTIONS_MAX_TIME:
+            return intmask(self.minor_collections_max_time)
+        elif stat_no == rgc.MAJOR_COLLECTION_STEPS:
+            return self.num_major_collection_steps
+        elif stat_no == rgc.MAJOR_COLLECTION_STEPS_TIME:
+            return intmask(self.major_collection_steps_time)
+        elif stat_no == rgc.MAJOR_COLLECTION_STEPS_MAX_TIME:
+            return intmask(self.major_collection_steps_max_time)
+        elif stat_no == rgc.MAJOR_COLLECTIONS:
+            return self.num_major_collects
+        return 0
+
     def threshold_reached(self, extra=0):
         return (self.next_major_collection_threshold -
                 float(self.get_total_memory_used())) < float(extra)
@@ -1620,6 +1774,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start = read_timestamp()
+        self.stop_alloc_sampling_window()
         #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
@@ -1797,6 +1953,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        self.start_alloc_sampling_window()
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -1815,7 +1972,19 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.root_walker.finished_minor_collection()
         #
+        duration = read_timestamp() - start
+        self.num_minor_collects += 1
+        self.minor_collections_time += duration
+        if duration > self.minor_collections_max_time:
+            self.minor_collections_max_time = duration
+        self.update_peak_memory()
+        #
         debug_stop("gc-minor")
+        self.hooks.fire_gc_minor(
+            duration=float(duration),
+            total_memory_used=intmask(self.get_total_memory_used()),
+            promoted=self.nursery_surviving_size,
+            pinned_objects=self.pinned_objects_in_nursery)
 
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
@@ -2210,6 +2379,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
     # is done before every major collection step
     def major_collection_step(self, reserving_size=0):
         debug_start("gc-collect-step")
+        start = read_timestamp()
+        oldstate = self.gc_state
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
         # Debugging checks
         if self.pinned_objects_in_nursery == 0:
@@ -2263,6 +2434,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.objects_to_trace = self.AddressStack()
             self.collect_roots()
             self.gc_state = STATE_MARKING
+            # remembered for the gc_collect hook
+            self.memory_before_major = self.get_total_memory_used()
+            self.rawmalloced_before_major = self.rawmalloced_total_size
             self.more_objects_to_trace = self.AddressStack()
             #END SCANNING
         elif self.gc_state == STATE_MARKING:
@@ -2401,6 +2575,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     self.gc_state = STATE_SCANNING
                     raise MemoryError
 
+                self.hooks.fire_gc_collect(
+                    num_major_collects=self.num_major_collects,
+                    memory_before=intmask(self.memory_before_major),
+                    memory_after=intmask(self.get_total_memory_used()),
+                    rawmalloced_before=intmask(self.rawmalloced_before_major),
+                    rawmalloced_after=intmask(self.rawmalloced_total_size),
+                    arena_memory=intmask(self.ac.total_memory_alloced),
+                    threshold=int(self.next_major_collection_threshold))
+                #
                 self.gc_state = STATE_FINALIZING
             # FINALIZING not yet incrementalised
             # but it seems safe to allow mutator to run after sweeping and
@@ -2420,8 +2603,17 @@ class IncrementalMiniMarkGC(MovingGCBase):
         else:
             pass #XXX which exception to raise here. Should be unreachable.
 
+        duration = read_timestamp() - start
+        self.num_major_collection_steps += 1
+        self.major_collection_steps_time += duration
+        if duration > self.major_collection_steps_max_time:
+            self.major_collection_steps_max_time = duration
+        self.update_peak_memory()
+        #
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
         debug_stop("gc-collect-step")
+        self.hooks.fire_gc_collect_step(float(duration), oldstate,
+                                        self.gc_state)
 
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
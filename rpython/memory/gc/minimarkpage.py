@@ -140,6 +140,9 @@ class ArenaCollection(object):
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
+        #
+        # the total size of the arenas currently allocated.
+        self.total_memory_alloced = r_uint(0)
 
 
     def _new_page_ptr_list(self, length):
@@ -295,6 +298,7 @@ class ArenaCollection(object):
         arena_base = llarena.arena_malloc(self.arena_size, False)
         if not arena_base:
             out_of_memory("out of memory: couldn't allocate the next arena")
+        self.total_memory_alloced += r_uint(self.arena_size)
         arena_end = arena_base + self.arena_size
         #
         # 'firstpage' points to the first unused page
@@ -398,6 +402,7 @@ class ArenaCollection(object):
                     llarena.arena_reset(arena.base, self.arena_size, 4)
                     llarena.arena_free(arena.base)
                     lltype.free(arena, flavor='raw', track_allocation=False)
+                    self.total_memory_alloced -= r_uint(self.arena_size)
                     #
                 else:
                     # Insert 'arena' in the correct arenas_lists[n]
@@ -21,6 +21,11 @@ class SimpleArenaCollection(object):
         self.all_objects = []
         self.total_memory_used = 0
 
+    @property
+    def total_memory_alloced(self):
+        # every object is allocated individually
+        return self.total_memory_used
+
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
         ll_assert(nsize > 0, "malloc: size is null or negative")
@@ -671,6 +671,70 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
         assert self.stackroots[1].x == 13
 
+    def test_get_stats(self):
+        from rpython.rlib import rgc
+        assert self.gc.get_stats(rgc.MINOR_COLLECTIONS) == 0
+        assert self.gc.get_stats(rgc.NURSERY_SIZE) == self.gc.nursery_size
+        for i in range(10):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        assert self.gc.get_stats(rgc.MINOR_COLLECTIONS) >= 1
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTIONS) == 1
+        steps = self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS)
+        assert steps >= 1
+        total_time = self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS_TIME)
+        max_time = self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS_MAX_TIME)
+        assert 0 <= max_time <= total_time
+        used = self.gc.get_stats(rgc.TOTAL_MEMORY)
+        assert used == self.gc.get_total_memory_used() > 0
+        assert self.gc.get_stats(rgc.PEAK_MEMORY) >= used
+        assert self.gc.get_stats(rgc.TOTAL_ARENA_MEMORY) >= used
+        threshold = self.gc.get_stats(rgc.MAJOR_COLLECTION_THRESHOLD)
+        assert threshold == int(self.gc.next_major_collection_threshold)
+        del self.stackroots[:]
+        self.gc.collect()
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTIONS) == 2
+        assert self.gc.get_stats(rgc.TOTAL_MEMORY) < used
+        assert self.gc.get_stats(rgc.PEAK_MEMORY) >= used
+
+    def test_collect_step(self):
+        from rpython.rlib import rgc
+        for i in range(10):
+            self.stackroots.append(self.malloc(S))
+        states = self.gc.collect_step()
+        assert rgc.old_state(states) == incminimark.STATE_SCANNING
+        assert rgc.new_state(states) == incminimark.STATE_MARKING
+        n = 1
+        while not rgc.is_done(states):
+            states = self.gc.collect_step()
+            n += 1
+        assert n >= 3
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTIONS) == 1
+
+    def test_disable(self):
+        from rpython.rlib import rgc
+        assert self.gc.isenabled()
+        self.gc.disable()
+        assert not self.gc.isenabled()
+        for i in range(10):
+            self.stackroots.append(self.malloc(S))
+        # lower the threshold: normally this would start a major collection
+        self.gc.next_major_collection_threshold = 1.0
+        self.gc.minor_collection_with_major_progress()
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS) == 0
+        # explicit steps are still done
+        states = self.gc.collect_step()
+        assert rgc.new_state(states) == incminimark.STATE_MARKING
+        self.gc.collect()
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        steps = self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS)
+        self.gc.enable()
+        self.gc.next_major_collection_threshold = 1.0
+        self.gc.minor_collection_with_major_progress()
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTION_STEPS) > steps
+
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
     def test_malloc_fixedsize_no_cleanup(self):
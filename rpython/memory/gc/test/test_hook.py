@@ -0,0 +1,164 @@
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S
+from rpython.memory.gc import incminimark
+
+
+class MyGcHooks(GcHooks):
+
+    def __init__(self):
+        GcHooks.__init__(self)
+        self.gc_minor_enabled = True
+        self.gc_collect_step_enabled = True
+        self.gc_collect_enabled = True
+        self.reset()
+
+    def reset(self):
+        self.minors = []
+        self.steps = []
+        self.collects = []
+        self.alloc_samples = []
+        self.alloc_sample_period = 0
+
+    def on_gc_minor(self, duration, total_memory_used, promoted,
+                    pinned_objects):
+        assert duration >= 0
+        self.minors.append({
+            'total_memory_used': total_memory_used,
+            'promoted': promoted,
+            'pinned_objects': pinned_objects})
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        assert duration >= 0
+        self.steps.append((oldstate, newstate))
+
+    def on_gc_collect(self, num_major_collects,
+                      memory_before, memory_after,
+                      rawmalloced_before, rawmalloced_after,
+                      arena_memory, threshold):
+        self.collects.append({
+            'num_major_collects': num_major_collects,
+            'memory_before': memory_before,
+            'memory_after': memory_after,
+            'rawmalloced_before': rawmalloced_before,
+            'rawmalloced_after': rawmalloced_after,
+            'threshold': threshold})
+
+    def on_gc_alloc_sample(self, nbytes):
+        self.alloc_samples.append(nbytes)
+
+
+class TestIncMiniMarkHooks(BaseDirectGCTest):
+    from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
+
+    def setup_class(cls):
+        cls.GC_PARAMS = {'hooks': MyGcHooks()}
+
+    def setup_method(self, m):
+        BaseDirectGCTest.setup_method(self, m)
+        self.gc.hooks.reset()
+
+    def test_default_hooks_are_disabled(self):
+        hooks = GcHooks()
+        assert not hooks.gc_minor_enabled
+        hooks.fire_gc_minor(1, 2, 3, 4)     # does nothing
+
+    def test_on_gc_minor(self):
+        self.stackroots.append(self.malloc(S))
+        self.malloc(S)
+        self.gc._minor_collection()
+        minors = self.gc.hooks.minors
+        assert len(minors) == 1
+        size = llmemory_size_of_S(self.gc)
+        assert minors[0]['promoted'] == size
+        assert minors[0]['total_memory_used'] == size
+        assert minors[0]['pinned_objects'] == 0
+        #
+        self.gc.hooks.gc_minor_enabled = False
+        self.gc._minor_collection()
+        assert len(self.gc.hooks.minors) == 1
+
+    def test_on_gc_collect(self):
+        for i in range(10):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        hooks = self.gc.hooks
+        states = [newstate for (oldstate, newstate) in hooks.steps]
+        assert states[-1] == incminimark.STATE_SCANNING
+        assert incminimark.STATE_SWEEPING in states
+        assert hooks.steps[0][0] == incminimark.STATE_SCANNING
+        assert len(hooks.collects) == 1
+        collect = hooks.collects[0]
+        assert collect['num_major_collects'] == 1
+        assert collect['memory_after'] == self.gc.get_total_memory_used()
+        assert collect['threshold'] == int(
+            self.gc.next_major_collection_threshold)
+        #
+        del self.stackroots[:]
+        hooks.reset()
+        self.gc.collect()
+        collect = hooks.collects[0]
+        assert collect['num_major_collects'] == 2
+        assert collect['memory_after'] < collect['memory_before']
+        assert collect['rawmalloced_after'] == 0
+
+    def test_on_gc_alloc_sample(self):
+        size = llmemory_size_of_S(self.gc)
+        hooks = self.gc.hooks
+        hooks.alloc_sample_period = 3 * size
+        self.gc._minor_collection()     # the period is read from here
+        for i in range(7):
+            self.malloc(S)
+        assert hooks.alloc_samples == [3 * size, 3 * size]
+        # the nursery top is only lowered, never moved past the real one
+        assert self.gc.nursery_top <= self.gc.nursery_real_top
+        #
+        # the bytes allocated before a minor collection are counted too
+        self.malloc(S)
+        self.gc._minor_collection()
+        self.malloc(S)
+        assert hooks.alloc_samples == [3 * size] * 3
+        #
+        hooks.alloc_sample_period = 0
+        self.gc._minor_collection()
+        assert not self.gc.nursery_real_top
+        for i in range(7):
+            self.malloc(S)
+        assert len(hooks.alloc_samples) == 3
+
+    def test_on_gc_alloc_sample_no_extra_minor_collection(self):
+        size = llmemory_size_of_S(self.gc)
+        hooks = self.gc.hooks
+        n = 3 * self.gc.nursery_size // size
+        def count_minors(period):
+            hooks.reset()
+            hooks.alloc_sample_period = period
+            self.gc._minor_collection()
+            before = self.gc.num_minor_collects
+            for i in range(n):
+                self.malloc(S)
+            return self.gc.num_minor_collects - before
+        expected = count_minors(0)
+        assert expected >= 2
+        assert count_minors(5 * size) == expected
+        assert len(hooks.alloc_samples) >= n // 5 - 1
+
+    def test_on_gc_alloc_sample_large_object(self):
+        from rpython.memory.gc.test.test_direct import VAR
+        from rpython.memory.gc.incminimark import WORD
+        hooks = self.gc.hooks
+        hooks.alloc_sample_period = 1000
+        self.gc._minor_collection()
+        self.malloc(VAR, 1000)
+        assert len(hooks.alloc_samples) == 1
+        # the array crosses several sampling points: the sample stands
+        # for all of them, and the rest counts towards the next one
+        nbytes = hooks.alloc_samples[0]
+        assert nbytes % 1000 == 0
+        assert nbytes >= 1000 * WORD
+        assert 0 < self.gc.alloc_sample_countdown <= 1000
+
+
+def llmemory_size_of_S(gc):
+    from rpython.rtyper.lltypesystem import llmemory, llarena
+    size = gc.gcheaderbuilder.size_gc_header + llmemory.sizeof(S)
+    return llmemory.raw_malloc_usage(llarena.round_up_for_allocation(size))
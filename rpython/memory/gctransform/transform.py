@@ -387,6 +387,23 @@ class BaseGCTransformer(object):
         return hop.cast_result(rmodel.inputconst(lltype.Ptr(ARRAY_TYPEID_MAP),
                                         lltype.nullptr(ARRAY_TYPEID_MAP)))
 
+    def gct_gc_get_stats(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Signed, 0))
+
+    def gct_gc__collect_step(self, hop):
+        # not an incremental GC: do a full collection
+        hop.genop('gc__collect', [])
+        return hop.cast_result(rmodel.inputconst(lltype.Signed, 0))
+
+    def gct_gc__enable(self, hop):
+        pass
+
+    def gct_gc__disable(self, hop):
+        pass
+
+    def gct_gc__isenabled(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Bool, True))
+
 
 class MinimalGCTransformer(BaseGCTransformer):
     def __init__(self, parenttransformer):
@@ -135,9 +135,24 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def collect_step(self):
+        return self.gc.collect_step()
+
+    def enable(self):
+        self.gc.enable()
+
+    def disable(self):
+        self.gc.disable()
+
+    def isenabled(self):
+        return self.gc.isenabled()
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
+    def get_stats(self, stat_no):
+        return self.gc.get_stats(stat_no)
+
     def pin(self, addr):
         return self.gc.pin(addr)
 
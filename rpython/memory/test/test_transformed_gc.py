@@ -7,6 +7,7 @@ from rpython.annotator import model as annmodel
 from rpython.rtyper.llannotation import SomePtr
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi, llgroup
 from rpython.memory.gctransform import framework, shadowstack
+from rpython.memory.gc.hook import GcHooks
 from rpython.rtyper.lltypesystem.lloperation import llop, void
 from rpython.rlib.objectmodel import compute_unique_id, we_are_translated
 from rpython.rlib.debug import ll_assert
@@ -21,7 +22,7 @@ WORD = LONG_BIT // 8
 
 
 def rtype(func, inputtypes, specialize=True, gcname='ref',
-          backendopt=False, **extraconfigopts):
+          backendopt=False, gchooks=None, **extraconfigopts):
     from rpython.translator.translator import TranslationContext
     t = TranslationContext()
     # XXX XXX XXX mess
@@ -29,6 +30,10 @@ def rtype(func, inputtypes, specialize=True, gcname='ref',
     t.config.translation.gcremovetypeptr = True
     t.config.set(**extraconfigopts)
     ann = t.buildannotator()
+    if gchooks is not None:
+        from rpython.memory.gc.hook import annotate_gchooks
+        annotate_gchooks(ann, gchooks)
+        t._gchooks = gchooks
     ann.build_types(func, inputtypes)
     rtyper = t.buildrtyper()
     rtyper.backend = llinterp_backend
@@ -48,6 +53,7 @@ class GCTest(object):
     gcpolicy = None
     GC_CAN_MOVE = False
     taggedpointers = False
+    gchooks = None
 
     def setup_class(cls):
         cls.marker = lltype.malloc(rffi.CArray(lltype.Signed), 1,
@@ -105,7 +111,7 @@ class GCTest(object):
 
         s_args = SomePtr(lltype.Ptr(ARGS))
         t = rtype(entrypoint, [s_args], gcname=cls.gcname,
-                  taggedpointers=cls.taggedpointers)
+                  taggedpointers=cls.taggedpointers, gchooks=cls.gchooks)
 
         for fixup in mixlevelstuff:
             if fixup:
@@ -1388,8 +1394,34 @@ class TestMiniMarkGC(TestHybridGC):
         assert res([]) == 0
 
 
+class MyGcHooks(GcHooks):
+    def __init__(self):
+        GcHooks.__init__(self)
+        self.minors = 0
+        self.steps = 0
+        self.collects = 0
+        self.alloc_samples = 0
+
+    def on_gc_minor(self, duration, total_memory_used, promoted,
+                    pinned_objects):
+        self.minors += 1
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.steps += 1
+
+    def on_gc_collect(self, num_major_collects,
+                      memory_before, memory_after,
+                      rawmalloced_before, rawmalloced_after,
+                      arena_memory, threshold):
+        self.collects += 1
+
+    def on_gc_alloc_sample(self, nbytes):
+        self.alloc_samples += 1
+
+
 class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     gcname = "incminimark"
+    gchooks = MyGcHooks()
 
     class gcpolicy(gc.BasicFrameworkGcPolicy):
         class transformerclass(shadowstack.ShadowStackFrameworkGCTransformer):
@@ -1438,6 +1470,103 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         res = run([])
         assert res
 
+    def define_get_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            # the counters are not reset between the tests: only look at the
+            # difference, or the earlier tests overflow the encoding
+            before = rgc.get_stats(rgc.MAJOR_COLLECTIONS)
+            minor_before = rgc.get_stats(rgc.MINOR_COLLECTIONS)
+            for i in range(100):
+                lltype.malloc(S)
+            rgc.collect()
+            after = rgc.get_stats(rgc.MAJOR_COLLECTIONS)
+            minor = rgc.get_stats(rgc.MINOR_COLLECTIONS) - minor_before
+            nursery = rgc.get_stats(rgc.NURSERY_SIZE)
+            return (after - before) * 1000000 + minor * 1000 + nursery // WORD
+        return f
+
+    def test_get_stats(self):
+        run = self.runner("get_stats")
+        res = run([])
+        assert res // 1000000 == 1
+        assert (res // 1000) % 1000 > 0
+        assert res % 1000 == 32
+
+    def define_collect_step(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            rgc.collect()
+            rgc.disable()
+            before = rgc.get_stats(rgc.MAJOR_COLLECTION_STEPS)
+            for i in range(100):
+                lltype.malloc(S)
+            automatic = rgc.get_stats(rgc.MAJOR_COLLECTION_STEPS) - before
+            n = 0
+            states = rgc.collect_step()
+            while not rgc.is_done(states):
+                states = rgc.collect_step()
+                n += 1
+            enabled = rgc.isenabled()
+            rgc.enable()
+            return automatic * 1000 + n * 10 + enabled
+        return f
+
+    def test_collect_step(self):
+        run = self.runner("collect_step")
+        res = run([])
+        assert res // 1000 == 0     # no automatic step while disabled
+        assert (res // 10) % 100 > 0
+        assert res % 10 == 0
+
+    def define_gc_hooks(cls):
+        hooks = cls.gchooks
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+
+        def f():
+            hooks.gc_minor_enabled = True
+            hooks.gc_collect_step_enabled = True
+            hooks.gc_collect_enabled = True
+            for i in range(100):
+                lltype.malloc(S)
+            rgc.collect()
+            hooks.gc_minor_enabled = False
+            hooks.gc_collect_step_enabled = False
+            hooks.gc_collect_enabled = False
+            return ((hooks.collects > 0) * 1000000 + (hooks.steps > 0) * 1000 +
+                    (hooks.minors > 0))
+
+        return f
+
+    def test_gc_hooks(self):
+        run = self.runner("gc_hooks")
+        res = run([])
+        assert res == 1001001
+
+    def define_gc_alloc_sample(cls):
+        hooks = cls.gchooks
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        A = lltype.GcArray(lltype.Signed)
+
+        def f():
+            hooks.alloc_sample_period = 100 * WORD
+            rgc.collect()
+            for i in range(100):
+                lltype.malloc(S)
+            small = hooks.alloc_samples
+            lltype.malloc(A, 1000)     # a large object
+            large = hooks.alloc_samples - small
+            hooks.alloc_sample_period = 0
+            return small * 1000 + large
+
+        return f
+
+    def test_gc_alloc_sample(self):
+        run = self.runner("gc_alloc_sample")
+        res = run([])
+        assert 2 <= res // 1000 <= 4
+        assert res % 1000 == 1
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -129,6 +129,22 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
 
+GUARD_FAILURE_CONTAINER = lltype.GcArray(lltype.Struct('elem',
+                                                      ('number', lltype.Signed),
+                                                      ('counter', lltype.Signed)))
+
+@register_helper(annmodel.s_None)
+def stats_set_guard_failures(warmrunnerdesc, flag):
+    # count the guard failures, and the entries into bridges compiled
+    # from now on; disabling forgets the guard failures counted so far
+    metainterp_sd = warmrunnerdesc.metainterp_sd
+    metainterp_sd.guard_failures.set_enabled(flag)
+    metainterp_sd.cpu.set_count_bridges(flag)
+
+@register_helper(lltype.Ptr(GUARD_FAILURE_CONTAINER))
+def stats_get_guard_failures(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.guard_failures.get_all()
+
 @register_helper(annmodel.SomeInteger(unsigned=True))
 def stats_asmmemmgr_allocated(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[0]
@@ -137,6 +153,22 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_alive_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.get_stats()[0]
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_alive_code_size(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.get_stats()[1]
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.get_stats()[2]
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_code_size(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.get_stats()[3]
+
 # ---------------------- jitcell interface ----------------------
 
 def _new_hook(name, resulttype):
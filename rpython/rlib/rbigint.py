@@ -83,6 +83,21 @@ else:
 
 KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
+# For long division, use the O(N**2) school algorithm unless both the
+# divisor and the quotient contain more than DIV_LIMIT digits.  In that
+# case, use the recursive algorithm of Burnikel and Ziegler, which
+# replaces most of the work with multiplications (and so Karatsuba).
+
+DIV_LIMIT = 32 * KARATSUBA_CUTOFF
+
+# For converting a string of digits in a base which is not a power of
+# two, the string is cut into groups (see BASE_MAX).  If there are more
+# than STR2INT_LIMIT groups, the halves of the string are converted
+# recursively and combined with a multiplication by a power of the base,
+# instead of adding one group at a time.
+
+STR2INT_LIMIT = 4 * KARATSUBA_CUTOFF
+
 # For exponentiation, use the binary left-to-right algorithm
 # unless the exponent contains more than FIVEARY_CUTOFF digits.
 # In that case, do 5 bits at a time.  The potential drawback is that
@@ -2069,6 +2084,8 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0), 1)
+    elif size_b > DIV_LIMIT and size_a - size_b > DIV_LIMIT:
+        z, rem = _divrem_recursive(a, b)
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -2081,6 +2098,99 @@ def _divrem(a, b):
         rem.sign = - rem.sign
     return z, rem
 
+def _digits_slice(a, start, stop):
+    """ Return the non-negative bigint made of the digits a[start:stop],
+    i.e. (|a| >> (start * SHIFT)) % (BASE ** (stop - start)). """
+    assert start >= 0
+    stop = min(stop, a.numdigits())
+    if start >= stop:
+        return rbigint()
+    z = rbigint(a._digits[start:stop], 1, stop - start)
+    z._normalize()
+    return z
+
+def _digits_concat(hi, lo, n):
+    """ Return the non-negative bigint |hi| * BASE**n + |lo|,
+    where |lo| < BASE**n. """
+    size_hi = hi.numdigits() if hi.sign != 0 else 0
+    size_lo = lo.numdigits() if lo.sign != 0 else 0
+    assert size_lo <= n
+    z = rbigint(lo._digits[:size_lo] + [NULLDIGIT] * (n - size_lo) +
+                hi._digits[:size_hi], 1, n + size_hi)
+    z._normalize()
+    return z
+
+def _divrem_recursive(a, b):
+    """ Unsigned bigint division with remainder, for large a and b.
+    Divide-and-conquer algorithm from Burnikel and Ziegler, "Fast
+    Recursive Division" (1998): the quotient is computed by chunks of
+    as many digits as b, each one with _div2n1n(). """
+    n = b.numdigits()
+    # normalize: shift b left so that its top digit is >= BASE/2,
+    # and shift a by the same amount.  The remainder is shifted back.
+    d = SHIFT - bits_in_digit(b.digit(n - 1))
+    b = b.abs().lshift(d)
+    a = a.abs().lshift(d)
+    assert b.numdigits() == n
+    nchunks = (a.numdigits() + n - 1) // n
+    q_digits = [NULLDIGIT] * (nchunks * n)
+    r = NULLRBIGINT
+    i = nchunks - 1
+    while i >= 0:
+        a_chunk = _digits_slice(a, i * n, (i + 1) * n)
+        q, r = _div2n1n(_digits_concat(r, a_chunk, n), b, n)
+        if q.sign != 0:
+            size_q = q.numdigits()
+            assert size_q <= n
+            j = 0
+            while j < size_q:
+                q_digits[i * n + j] = q._digits[j]
+                j += 1
+        i -= 1
+    z = rbigint(q_digits, 1, nchunks * n)
+    z._normalize()
+    if d != 0:
+        r = r.rshift(d)
+    return z, r
+
+def _div2n1n(a, b, n):
+    """ Divide a by b, where b has exactly n digits and is normalized
+    (see _divrem_recursive) and 0 <= a < b * BASE**n.  Returns the
+    quotient, which has at most n digits, and the remainder. """
+    if a.numdigits() - n <= DIV_LIMIT:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        # make n even by multiplying a and b by BASE
+        a = _digits_concat(a, NULLRBIGINT, 1)
+        b = _digits_concat(b, NULLRBIGINT, 1)
+        n += 1
+    half_n = n >> 1
+    b1 = _digits_slice(b, half_n, n)
+    b2 = _digits_slice(b, 0, half_n)
+    q1, r = _div3n2n(_digits_slice(a, n, a.numdigits()),
+                     _digits_slice(a, half_n, n), b, b1, b2, half_n)
+    q2, r = _div3n2n(r, _digits_slice(a, 0, half_n), b, b1, b2, half_n)
+    if pad:
+        r = _digits_slice(r, 1, r.numdigits())
+    return _digits_concat(q1, q2, half_n), r
+
+def _div3n2n(a12, a3, b, b1, b2, n):
+    """ Helper for _div2n1n: divide a12 * BASE**n + a3 by b, where
+    b = b1 * BASE**n + b2, and b1 has n digits. """
+    if _digits_slice(a12, n, a12.numdigits()).eq(b1):
+        # the estimate would be BASE**n, which is at least one too much
+        q = rbigint([_store_digit(MASK)] * n, 1, n)
+        r = a12.sub(_digits_concat(b1, NULLRBIGINT, n)).add(b1)
+    else:
+        q, r = _div2n1n(a12, b1, n)
+    r = _digits_concat(r, a3, n).sub(q.mul(b2))
+    # the estimate of q is too large by at most 2
+    while r.sign < 0:
+        q = q.int_sub(1)
+        r = r.add(b)
+    return q, r
+
 # ______________ conversions to double _______________
 
 def _AsScaledDouble(v):
@@ -2416,6 +2526,7 @@ class _PartsCache(object):
         # and 2 is handled differently
         self.parts_cache = [None] * 34
         self.mindigits = [0] * 34
+        self.group_powers = [None] * 34
 
         for i in range(34):
             base = i + 3
@@ -2438,6 +2549,17 @@ class _PartsCache(object):
     def get_mindigits(self, base):
         return self.mindigits[base - 3]
 
+    def get_group_power(self, base, k):
+        # BASE_MAX[base] ** (2 ** k)
+        index = base - 3
+        res = self.group_powers[index]
+        if res is None:
+            res = [rbigint.fromint(BASE_MAX[base])]
+            self.group_powers[index] = res
+        while len(res) <= k:
+            res.append(res[-1].mul(res[-1]))
+        return res[k]
+
 _parts_cache = _PartsCache()
 
 def _format_int_general(val, digits):
@@ -2784,7 +2906,7 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
-    a = rbigint()
+    groups = []
     tens = 1
     dig = 0
     ord0 = ord('0')
@@ -2792,12 +2914,15 @@ def _decimalstr_to_bigint(s):
         dig = dig * 10 + ord(s[p]) - ord0
         p += 1
         tens *= 10
-        if tens == DEC_MAX or p == lim:
-            a = _muladd1(a, tens, dig)
+        if tens == DEC_MAX:
+            groups.append(dig)
             tens = 1
             dig = 0
-    if sign and a.sign == 1:
-        a.sign = -1
+    a = _groups_to_bigint(groups, 10)
+    if tens > 1:
+        a = _muladd1(a, tens, dig)
+    if sign:
+        a = a.neg()
     return a
 
 def parse_digit_string(parser):
@@ -2805,23 +2930,50 @@ def parse_digit_string(parser):
     base = parser.base
     if (base & (base - 1)) == 0:
         return parse_string_from_binary_base(parser)
-    a = rbigint()
+    groups = []
     digitmax = BASE_MAX[base]
     tens, dig = 1, 0
     while True:
         digit = parser.next_digit()
-        if tens == digitmax or digit < 0:
-            a = _muladd1(a, tens, dig)
-            if digit < 0:
-                break
-            dig = digit
-            tens = base
-        else:
-            dig = dig * base + digit
-            tens *= base
-    a.sign *= parser.sign
+        if digit < 0:
+            break
+        dig = dig * base + digit
+        tens *= base
+        if tens == digitmax:
+            groups.append(dig)
+            tens, dig = 1, 0
+    a = _groups_to_bigint(groups, base)
+    if tens > 1:
+        a = _muladd1(a, tens, dig)
+    if parser.sign < 0:
+        a = a.neg()
     return a
 
+def _groups_to_bigint(groups, base):
+    """ Turn a list of groups of digits, each one in base BASE_MAX[base],
+    into a non-negative bigint. """
+    return _groups_to_bigint_rec(groups, 0, len(groups), base)
+
+def _groups_to_bigint_rec(groups, start, stop, base):
+    n = stop - start
+    if n <= STR2INT_LIMIT:
+        a = rbigint()
+        digitmax = BASE_MAX[base]
+        for i in range(start, stop):
+            a = _muladd1(a, digitmax, groups[i])
+        return a
+    # the low part gets 2**k groups, so that the power of the base
+    # by which to multiply the high part can be cached
+    k = 0
+    n_low = 1
+    while n_low * 2 < n:
+        n_low *= 2
+        k += 1
+    mid = stop - n_low
+    hi = _groups_to_bigint_rec(groups, start, mid, base)
+    lo = _groups_to_bigint_rec(groups, mid, stop, base)
+    return hi.mul(_parts_cache.get_group_power(base, k)).add(lo)
+
 def parse_string_from_binary_base(parser):
     # The point to this routine is that it takes time linear in the number of
     # string characters.
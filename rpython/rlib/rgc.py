@@ -124,6 +124,89 @@ class CollectEntry(ExtRegistryEntry):
             args_v = hop.inputargs(lltype.Signed)
         return hop.genop('gc__collect', args_v, resulttype=hop.r_result)
 
+def collect_step():
+    """If the GC is incremental, run a single step of the current major
+    collection, starting a new one if needed.  Otherwise, do a full
+    collection.  Returns the states before and after the step, encoded
+    in a single integer: see old_state(), new_state() and is_done().
+    """
+    gc.collect()
+    return _encode_states(0, 0)
+
+def _encode_states(oldstate, newstate):
+    return (oldstate << 8) | newstate
+
+def old_state(states):
+    return states >> 8
+
+def new_state(states):
+    return states & 0xFF
+
+def is_done(states):
+    """Return True if the major collection is now finished.  The state 0
+    is the one of the GC when no major collection is in progress."""
+    return new_state(states) == 0
+
+class CollectStepEntry(ExtRegistryEntry):
+    _about_ = collect_step
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc__collect_step', [], resulttype=hop.r_result)
+
+# Support for disabling the automatic major collections.  Minor
+# collections still occur; the major ones only happen on explicit calls
+# to collect() or collect_step().
+
+_enabled = [True]
+
+def enable():
+    """Re-enable the automatic major collections."""
+    _enabled[0] = True
+
+def disable():
+    """Disable the automatic major collections: the program must call
+    collect() or collect_step() itself, or the memory will keep growing."""
+    _enabled[0] = False
+
+def isenabled():
+    return _enabled[0]
+
+class EnableEntry(ExtRegistryEntry):
+    _about_ = enable
+
+    def compute_result_annotation(self):
+        pass
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        hop.genop('gc__enable', [])
+
+class DisableEntry(ExtRegistryEntry):
+    _about_ = disable
+
+    def compute_result_annotation(self):
+        pass
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        hop.genop('gc__disable', [])
+
+class IsEnabledEntry(ExtRegistryEntry):
+    _about_ = isenabled
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_Bool
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc__isenabled', [], resulttype=hop.r_result)
+
 class SetMaxHeapSizeEntry(ExtRegistryEntry):
     _about_ = set_max_heap_size
 
@@ -615,6 +698,44 @@ class AddMemoryPressureEntry(ExtRegistryEntry):
         return hop.genop('gc_add_memory_pressure', [v_size],
                          resulttype=lltype.Void)
 
+# ____________________________________________________________
+# Statistics, for get_stats().  Memory sizes are in bytes; times are in
+# the units of rtimer.read_timestamp().
+
+(TOTAL_MEMORY,
+ PEAK_MEMORY,
+ TOTAL_ARENA_MEMORY,
+ TOTAL_RAWMALLOCED_MEMORY,
+ PEAK_RAWMALLOCED_MEMORY,
+ NURSERY_SIZE,
+ MAJOR_COLLECTION_THRESHOLD,
+ MINOR_COLLECTIONS,
+ MINOR_COLLECTIONS_TIME,
+ MINOR_COLLECTIONS_MAX_TIME,
+ MAJOR_COLLECTION_STEPS,
+ MAJOR_COLLECTION_STEPS_TIME,
+ MAJOR_COLLECTION_STEPS_MAX_TIME,
+ MAJOR_COLLECTIONS,
+ ) = range(14)
+
+def get_stats(stat_no):
+    """Return one of the statistics of the GC, selected by 'stat_no'
+    (one of the constants above).  GCs that don't record a statistic
+    return 0 for it.  Not meaningful when running on top of CPython."""
+    return 0
+
+class GetStatsEntry(ExtRegistryEntry):
+    _about_ = get_stats
+
+    def compute_result_annotation(self, s_stat_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        [v_stat_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', [v_stat_no], resulttype=lltype.Signed)
+
 
 @not_rpython
 def get_rpy_memory_usage(gcref):
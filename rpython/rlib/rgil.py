@@ -34,6 +34,30 @@ _gil_acquire      = llexternal('RPyGilAcquire', [], lltype.Void,
                               _nowrapper=True, sandboxsafe=True,
                               compilation_info=eci)
 
+_gil_yield_thread_if_requested = llexternal(
+                               'RPyGilYieldThreadIfRequested', [],
+                               lltype.Signed,
+                               _nowrapper=True, sandboxsafe=True,
+                               compilation_info=eci)
+
+_gil_set_switch_interval = llexternal('RPyGilSetSwitchInterval',
+                               [rffi.DOUBLE], lltype.Void,
+                               _nowrapper=True, sandboxsafe=True,
+                               compilation_info=eci)
+
+_gil_get_stat     = llexternal('RPyGilGetStat', [lltype.Signed],
+                               lltype.Signed,
+                               _nowrapper=True, sandboxsafe=True,
+                               compilation_info=eci)
+
+_gil_get_wait_time = llexternal('RPyGilGetWaitTime', [], rffi.DOUBLE,
+                               _nowrapper=True, sandboxsafe=True,
+                               compilation_info=eci)
+
+_gil_reset_stats  = llexternal('RPyGilResetStats', [], lltype.Void,
+                               _nowrapper=True, sandboxsafe=True,
+                               compilation_info=eci)
+
 gil_fetch_fastgil = llexternal('RPyFetchFastGil', [], llmemory.Address,
                                _nowrapper=True, sandboxsafe=True,
                                compilation_info=eci)
@@ -144,3 +168,35 @@ yield_thread._dont_inline_ = True
 # yield_thread() needs a different hint: _gctransformer_hint_close_stack_.
 # The *_external_call() functions are themselves called only from the rffi
 # module from a helper function that also has this hint.
+
+def yield_thread_if_requested():
+    # like yield_thread(), but only if another thread has been waiting
+    # for the GIL for longer than the switch interval
+    if _gil_yield_thread_if_requested():
+        from rpython.rlib import rthread
+        rthread.gc_thread_run()
+        _after_thread_switch()
+yield_thread_if_requested._gctransformer_hint_close_stack_ = True
+yield_thread_if_requested._dont_reach_me_in_del_ = True
+yield_thread_if_requested._dont_inline_ = True
+
+def set_switch_interval(interval):
+    """Set the time in seconds after which a thread waiting for the GIL
+    asks for it with yield_thread_if_requested().  0.0 disables that."""
+    _gil_set_switch_interval(interval)
+
+# indexes for get_stat()
+STAT_ACQUISITIONS = 0        # times the GIL was acquired via RPyGilAcquire()
+                             # (not counted: the JIT's inline fast reacquire)
+STAT_WAITS = 1               # times a thread had to wait for the GIL
+STAT_FORCED_SWITCHES = 2     # times yield_thread*() gave it to another thread
+
+def get_stat(index):
+    return _gil_get_stat(index)
+
+def get_wait_time():
+    """Total time in seconds spent by threads waiting for the GIL."""
+    return _gil_get_wait_time()
+
+def reset_stats():
+    _gil_reset_stats()
@@ -5,6 +5,7 @@ from rpython.rlib.rsre import rsre_char
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.objectmodel import we_are_translated, not_rpython
 from rpython.rlib import jit
+from rpython.rlib.runicode import MAXUNICODE
 from rpython.rlib.rsre.rsre_jit import install_jitdriver, install_jitdriver_spec
 
 
@@ -91,6 +92,7 @@ class AbstractMatchContext(object):
     match_marks = None
     match_marks_flat = None
     fullmatch_only = False
+    prefilter = None      # a Prefilter, see search_context()
 
     def __init__(self, pattern, match_start, end, flags):
         # 'match_start' and 'end' must be known to be non-negative
@@ -196,8 +198,18 @@ class BufMatchContext(AbstractMatchContext):
         return rsre_char.getlower(c, self.flags)
 
     def fresh_copy(self, start):
-        return BufMatchContext(self.pattern, self._buffer, start,
-                               self.end, self.flags)
+        ctx = BufMatchContext(self.pattern, self._buffer, start,
+                              self.end, self.flags)
+        ctx.prefilter = self.prefilter
+        return ctx
+
+    def find_literal(self, prefilter, start):
+        assert start >= 0
+        return find_literal_generic(self, prefilter.literal, start)
+
+    def rfind_literal(self, prefilter, start):
+        assert start >= 0
+        return rfind_literal_generic(self, prefilter.literal, start)
 
 class StrMatchContext(AbstractMatchContext):
     """Concrete subclass for matching in a plain string."""
@@ -219,8 +231,26 @@ class StrMatchContext(AbstractMatchContext):
         return rsre_char.getlower(c, self.flags)
 
     def fresh_copy(self, start):
-        return StrMatchContext(self.pattern, self._string, start,
-                               self.end, self.flags)
+        ctx = StrMatchContext(self.pattern, self._string, start,
+                              self.end, self.flags)
+        ctx.prefilter = self.prefilter
+        return ctx
+
+    def find_literal(self, prefilter, start):
+        assert start >= 0
+        if not we_are_translated() and isinstance(self._string, unicode):
+            return find_literal_generic(self, prefilter.literal, start)
+        if prefilter.literal_str is None:
+            return -1     # contains characters that are not bytes
+        return self._string.find(prefilter.literal_str, start, self.end)
+
+    def rfind_literal(self, prefilter, start):
+        assert start >= 0
+        if not we_are_translated() and isinstance(self._string, unicode):
+            return rfind_literal_generic(self, prefilter.literal, start)
+        if prefilter.literal_str is None:
+            return -1     # contains characters that are not bytes
+        return self._string.rfind(prefilter.literal_str, start, self.end)
 
 class UnicodeMatchContext(AbstractMatchContext):
     """Concrete subclass for matching in a unicode string."""
@@ -240,8 +270,22 @@ class UnicodeMatchContext(AbstractMatchContext):
         return rsre_char.getlower(c, self.flags)
 
     def fresh_copy(self, start):
-        return UnicodeMatchContext(self.pattern, self._unicodestr, start,
-                                   self.end, self.flags)
+        ctx = UnicodeMatchContext(self.pattern, self._unicodestr, start,
+                                  self.end, self.flags)
+        ctx.prefilter = self.prefilter
+        return ctx
+
+    def find_literal(self, prefilter, start):
+        assert start >= 0
+        if prefilter.literal_uni is None:
+            return find_literal_generic(self, prefilter.literal, start)
+        return self._unicodestr.find(prefilter.literal_uni, start, self.end)
+
+    def rfind_literal(self, prefilter, start):
+        assert start >= 0
+        if prefilter.literal_uni is None:
+            return rfind_literal_generic(self, prefilter.literal, start)
+        return self._unicodestr.rfind(prefilter.literal_uni, start, self.end)
 
 # ____________________________________________________________
 
@@ -1051,6 +1095,7 @@ def fullmatch(pattern, string, start=0, end=sys.maxint, flags=0):
 def search(pattern, string, start=0, end=sys.maxint, flags=0):
     start, end = _adjust(start, end, len(string))
     ctx = StrMatchContext(pattern, string, start, end, flags)
+    ctx.prefilter = compute_prefilter(pattern)
     if search_context(ctx):
         return ctx
     else:
@@ -1067,6 +1112,128 @@ def match_context(ctx):
     ctx.jitdriver_Match.jit_merge_point(ctx=ctx)
     return sre_match(ctx, 0, ctx.match_start, None) is not None
 
+class Prefilter(object):
+    """A literal string that every match must contain.  If a match starts
+    at 'start', the literal is found at a position between
+    'start + minprefix' and 'start + maxprefix', or anywhere after
+    'start + minprefix' if 'maxprefix' is -1."""
+    _immutable_fields_ = ['literal[*]', 'literal_str', 'literal_uni',
+                          'minprefix', 'maxprefix']
+
+    def __init__(self, literal, minprefix, maxprefix):
+        self.literal = literal
+        self.literal_str = None
+        self.literal_uni = None
+        maxchar = 0
+        for c in literal:
+            maxchar = max(maxchar, c)
+        if maxchar <= 255:
+            self.literal_str = ''.join([chr(c) for c in literal])
+        if maxchar <= MAXUNICODE and maxchar <= sys.maxunicode:
+            self.literal_uni = u''.join([unichr(c) for c in literal])
+        self.minprefix = minprefix
+        self.maxprefix = maxprefix
+
+def _add_width(width, extra):
+    if width < 0 or extra < 0:
+        return -1
+    return width + extra
+
+def _getcode(pattern, ppos):
+    # the pattern may come from the user: don't crash if it is invalid
+    if 0 <= ppos < len(pattern):
+        return pattern[ppos]
+    return OPCODE_FAILURE
+
+def compute_prefilter(pattern):
+    """Look for the longest sequence of LITERALs that is part of every
+    match of the pattern, i.e. that is not inside a branch or a repeat.
+    Returns a Prefilter, or None if there is no such literal or if
+    search_context() can already use the prefix from the INFO block."""
+    ppos = 0
+    if _getcode(pattern, 0) == OPCODE_INFO:
+        if ((_getcode(pattern, 2) & rsre_char.SRE_INFO_PREFIX) and
+                _getcode(pattern, 5) > 1):
+            return None
+        ppos += 1 + _getcode(pattern, 1)
+    best = []
+    best_min = best_max = 0
+    literal = []
+    literal_min = literal_max = 0
+    # the minimal and maximal length of the string matched so far
+    minwidth = maxwidth = 0
+    while True:
+        op = _getcode(pattern, ppos)
+        if op == OPCODE_LITERAL and _getcode(pattern, ppos + 1) >= 0:
+            # <LITERAL> <code>
+            if not literal:
+                literal_min = minwidth
+                literal_max = maxwidth
+            literal.append(_getcode(pattern, ppos + 1))
+            minwidth += 1
+            maxwidth = _add_width(maxwidth, 1)
+            ppos += 2
+            continue
+        if op == OPCODE_MARK:
+            # <MARK> <gid>: doesn't interrupt the sequence of literals
+            ppos += 2
+            continue
+        if len(literal) > len(best):
+            best = literal
+            best_min = literal_min
+            best_max = literal_max
+        literal = []
+        skip = _getcode(pattern, ppos + 1)
+        if op == OPCODE_ANY or op == OPCODE_ANY_ALL:
+            minwidth += 1
+            maxwidth = _add_width(maxwidth, 1)
+            ppos += 1
+        elif (op == OPCODE_LITERAL_IGNORE or op == OPCODE_NOT_LITERAL or
+              op == OPCODE_NOT_LITERAL_IGNORE or op == OPCODE_CATEGORY):
+            minwidth += 1
+            maxwidth = _add_width(maxwidth, 1)
+            ppos += 2
+        elif op == OPCODE_IN or op == OPCODE_IN_IGNORE:
+            # <IN> <skip> <set>
+            minwidth += 1
+            maxwidth = _add_width(maxwidth, 1)
+            if skip <= 0:
+                break
+            ppos += 1 + skip
+        elif op == OPCODE_AT:
+            # <AT> <code>
+            ppos += 2
+        elif op == OPCODE_REPEAT_ONE or op == OPCODE_MIN_REPEAT_ONE:
+            # <REPEAT_ONE> <skip> <1=min> <2=max> item <SUCCESS> tail
+            # where the item always matches exactly one character
+            minwidth += max(0, _getcode(pattern, ppos + 2))
+            if _getcode(pattern, ppos + 3) == rsre_char.MAXREPEAT:
+                maxwidth = -1
+            else:
+                maxwidth = _add_width(maxwidth, _getcode(pattern, ppos + 3))
+            if skip <= 0:
+                break
+            ppos += 1 + skip
+        elif op == OPCODE_REPEAT:
+            # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+            maxwidth = -1
+            if skip <= 0:
+                break
+            ppos += 1 + skip + 1
+        elif op == OPCODE_BRANCH:
+            # <BRANCH> <0=skip> code <JUMP> ... <NULL> tail
+            maxwidth = -1
+            ppos += 1
+            while _getcode(pattern, ppos) > 0:
+                ppos += _getcode(pattern, ppos)
+            ppos += 1
+        else:
+            # SUCCESS, or an opcode that we don't try to understand
+            break
+    if not best:
+        return None
+    return Prefilter(best[:], best_min, best_max)
+
 def search_context(ctx):
     ctx.original_pos = ctx.match_start
     if ctx.end < ctx.match_start:
@@ -1081,22 +1248,39 @@ def search_context(ctx):
         else:
             charset = (flags & rsre_char.SRE_INFO_CHARSET)
         base += 1 + ctx.pat(1)
+    last = ctx.end      # the last position where a match can start
+    prefilter = ctx.prefilter
+    if prefilter is not None:
+        if prefilter.maxprefix >= 0:
+            # the literal gives a small range of possible starts
+            return prefilter_search(ctx, base, prefilter)
+        # the literal can be anywhere after the start: a match can only
+        # start before its last occurrence, but otherwise use the usual
+        # searches
+        if ctx.match_start + prefilter.minprefix > ctx.end:
+            return False
+        litpos = ctx.rfind_literal(prefilter,
+                                   ctx.match_start + prefilter.minprefix)
+        if litpos < 0:
+            return False
+        last = litpos - prefilter.minprefix
     if ctx.pat(base) == OPCODE_LITERAL:
-        return literal_search(ctx, base)
+        return literal_search(ctx, base, last)
     if charset:
-        return charset_search(ctx, base)
-    return regular_search(ctx, base)
+        return charset_search(ctx, base, last)
+    return regular_search(ctx, base, last)
 
 install_jitdriver('RegularSearch',
                   greens=['base', 'ctx.pattern'],
-                  reds=['start', 'ctx'],
+                  reds=['start', 'last', 'ctx'],
                   debugprint=(1, 0))
 
-def regular_search(ctx, base):
+def regular_search(ctx, base, last):
+    # 'last' is the last position where a match can start
     start = ctx.match_start
-    while start <= ctx.end:
+    while start <= last:
         ctx.jitdriver_RegularSearch.jit_merge_point(ctx=ctx, start=start,
-                                                    base=base)
+                                                    last=last, base=base)
         if sre_match(ctx, base, start, None) is not None:
             ctx.match_start = start
             return True
@@ -1105,18 +1289,20 @@ def regular_search(ctx, base):
 
 install_jitdriver_spec("LiteralSearch",
                        greens=['base', 'character', 'ctx.pattern'],
-                       reds=['start', 'ctx'],
+                       reds=['start', 'last', 'ctx'],
                        debugprint=(2, 0, 1))
 @specializectx
-def literal_search(ctx, base):
+def literal_search(ctx, base, last):
     # pattern starts with a literal character.  this is used
     # for short prefixes, and if fast search is disabled
     character = ctx.pat(base + 1)
     base += 2
     start = ctx.match_start
-    while start < ctx.end:
+    if last >= ctx.end:
+        last = ctx.end - 1
+    while start <= last:
         ctx.jitdriver_LiteralSearch.jit_merge_point(ctx=ctx, start=start,
-                                          base=base, character=character)
+                                last=last, base=base, character=character)
         if ctx.str(start) == character:
             if sre_match(ctx, base, start + 1, None) is not None:
                 ctx.match_start = start
@@ -1126,15 +1312,17 @@ def literal_search(ctx, base):
 
 install_jitdriver_spec("CharsetSearch",
                        greens=['base', 'ctx.pattern'],
-                       reds=['start', 'ctx'],
+                       reds=['start', 'last', 'ctx'],
                        debugprint=(1, 0))
 @specializectx
-def charset_search(ctx, base):
+def charset_search(ctx, base, last):
     # pattern starts with a character from a known set
     start = ctx.match_start
-    while start < ctx.end:
+    if last >= ctx.end:
+        last = ctx.end - 1
+    while start <= last:
         ctx.jitdriver_CharsetSearch.jit_merge_point(ctx=ctx, start=start,
-                                                    base=base)
+                                                    last=last, base=base)
         if rsre_char.check_charset(ctx, 5, ctx.str(start)):
             if sre_match(ctx, base, start, None) is not None:
                 ctx.match_start = start
@@ -1142,6 +1330,66 @@ def charset_search(ctx, base):
         start += 1
     return False
 
+install_jitdriver_spec("PrefilterSearch",
+                       greens=['base', 'ctx.pattern'],
+                       reds=['start', 'litpos', 'prefilter', 'ctx'],
+                       debugprint=(1, 0))
+@specializectx
+def prefilter_search(ctx, base, prefilter):
+    # the pattern contains a literal string at a bounded distance from
+    # the start: look for it with a fast substring search, and only try
+    # to match at the positions from where the literal can be reached
+    assert prefilter.maxprefix >= 0
+    start = ctx.match_start
+    litpos = -1
+    while start <= ctx.end:
+        ctx.jitdriver_PrefilterSearch.jit_merge_point(ctx=ctx, start=start,
+                                base=base, litpos=litpos, prefilter=prefilter)
+        if litpos < start + prefilter.minprefix:
+            litpos = ctx.find_literal(prefilter, start + prefilter.minprefix)
+            if litpos < 0:
+                return False
+        if start < litpos - prefilter.maxprefix:
+            start = litpos - prefilter.maxprefix
+            assert start >= 0
+        if sre_match(ctx, base, start, None) is not None:
+            ctx.match_start = start
+            return True
+        start += 1
+    return False
+
+@specializectx
+def find_literal_generic(ctx, literal, start):
+    assert start >= 0
+    length = len(literal)
+    first = literal[0]
+    last = ctx.end - length
+    while start <= last:
+        if ctx.str(start) == first:
+            i = 1
+            while i < length and ctx.str(start + i) == literal[i]:
+                i += 1
+            if i == length:
+                return start
+        start += 1
+    return -1
+
+@specializectx
+def rfind_literal_generic(ctx, literal, start):
+    assert start >= 0
+    length = len(literal)
+    first = literal[0]
+    pos = ctx.end - length
+    while pos >= start:
+        if ctx.str(pos) == first:
+            i = 1
+            while i < length and ctx.str(pos + i) == literal[i]:
+                i += 1
+            if i == length:
+                return pos
+        pos -= 1
+    return -1
+
 install_jitdriver_spec('FastSearch',
                        greens=['i', 'prefix_len', 'ctx.pattern'],
                        reds=['string_position', 'ctx'],
@@ -0,0 +1,559 @@
+"""
+A matcher whose running time is linear in the length of the string.
+
+rsre_core.sre_match() is a backtracking matcher: patterns like '(a|aa)*b'
+can make it try an exponential number of ways to match the string.  Here
+we translate the sre code into a small NFA program, which is run by
+simulating all the possible paths in parallel, one character at a time
+(a "Pike VM").  The threads are kept in priority order, which gives the
+same result as backtracking, including the groups.  The time is
+O(len(string) * len(program)) and the memory is O(len(program)).
+
+Patterns with backreferences, lookahead or lookbehind assertions, or
+conditional groups cannot be translated; compile_nfa() returns None for
+them.  So does it for patterns with so many counted repetitions that the
+program would become too large, like 'a{1000}(b{1000})*', and for the
+repetitions of something that can match the empty string, like '(a*)*':
+rsre_core stops repeating them after an empty match, and the groups
+depend on the exact order in which it tries the choices.
+"""
+import sys
+from rpython.rlib import jit
+from rpython.rlib.rsre import rsre_char
+from rpython.rlib.rsre.rsre_core import (
+    OPCODE_FAILURE, OPCODE_SUCCESS, OPCODE_ANY, OPCODE_ANY_ALL,
+    OPCODE_AT, OPCODE_BRANCH, OPCODE_CATEGORY, OPCODE_IN, OPCODE_IN_IGNORE,
+    OPCODE_INFO, OPCODE_JUMP, OPCODE_LITERAL, OPCODE_LITERAL_IGNORE,
+    OPCODE_MARK, OPCODE_MAX_UNTIL, OPCODE_MIN_UNTIL, OPCODE_NOT_LITERAL,
+    OPCODE_NOT_LITERAL_IGNORE, OPCODE_REPEAT, OPCODE_REPEAT_ONE,
+    OPCODE_MIN_REPEAT_ONE, Mark, StrMatchContext, specializectx, sre_at,
+    unroll_char_checker, _adjust)
+
+
+# the instructions of the NFA program
+NFA_CHAR = 0        # <arg>=position of the single-char opcode in the pattern
+NFA_AT = 1          # <arg>=at code
+NFA_MARK = 2        # <arg>=gid
+NFA_SPLIT = 3       # <arg>=first choice, <arg2>=second choice
+NFA_JUMP = 4        # <arg>=target
+NFA_MATCH = 5
+
+# the maximal number of instructions, to bound the size of the program
+# for patterns like 'a{1000}' where the repeated item must be copied
+MAX_PROGRAM_SIZE = 10000
+
+# above this, two sets of single-char opcodes are assumed to overlap
+# without checking them all
+MAX_OVERLAP_CHECKS = 1000
+
+
+class Unsupported(Exception):
+    pass
+
+
+class NFAProgram(object):
+    """The result of compile_nfa()."""
+    _immutable_fields_ = ['ops[*]', 'args[*]', 'args2[*]', 'nested_repeat']
+
+    def __init__(self, ops, args, args2, nested_repeat):
+        self.ops = ops
+        self.args = args
+        self.args2 = args2
+        # True if the pattern repeats something that can match a string
+        # in several ways, like '(a|aa)*' or '(a+)+': these are the
+        # patterns for which backtracking can take exponential time
+        self.nested_repeat = nested_repeat
+
+
+class SeqInfo(object):
+    """What the compiler found out about the strings matched by a piece
+    of the pattern.  The characters are described by the positions of
+    the single-char opcodes in the pattern that can match them."""
+
+    def __init__(self, nullable=True, length=0):
+        self.nullable = nullable
+        self.length = length        # or -1 if not always the same
+        self.ambiguous = False      # if a string can match in several ways
+        self.first = []             # for the first character
+        self.chars = []             # for all the characters
+        # for the characters after the last delimiter: a single-char
+        # opcode that cannot match any of the characters before it (in
+        # the variable-length part).  If this is empty, where the match
+        # ends only depends on where it starts.
+        self.open = []
+
+
+class _NFACompiler(object):
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.ops = []
+        self.args = []
+        self.args2 = []
+        self.nested_repeat = False
+        self.charset_ctx = None
+
+    def pat(self, ppos):
+        if not (0 <= ppos < len(self.pattern)):
+            raise Unsupported
+        return self.pattern[ppos]
+
+    def emit(self, op, arg=0, arg2=0):
+        if len(self.ops) >= MAX_PROGRAM_SIZE:
+            raise Unsupported
+        self.ops.append(op)
+        self.args.append(arg)
+        self.args2.append(arg2)
+        return len(self.ops) - 1
+
+    def compile(self):
+        ppos, info = self.compile_seq(0)
+        if self.pat(ppos) != OPCODE_SUCCESS:
+            raise Unsupported
+        self.emit(NFA_MATCH)
+        return NFAProgram(self.ops[:], self.args[:], self.args2[:],
+                          self.nested_repeat)
+
+    def compile_seq(self, ppos):
+        """Compile the code starting at 'ppos' up to the next SUCCESS,
+        JUMP, MAX_UNTIL or MIN_UNTIL, and return the position of that
+        opcode and the SeqInfo of the code."""
+        info = SeqInfo()
+        while True:
+            op = self.pat(ppos)
+            if (op == OPCODE_SUCCESS or op == OPCODE_JUMP or
+                    op == OPCODE_MAX_UNTIL or op == OPCODE_MIN_UNTIL):
+                return ppos, info
+
+            elif op == OPCODE_FAILURE:
+                # <FAILURE>: never produced by sre_compile
+                raise Unsupported
+
+            elif (op == OPCODE_ANY or op == OPCODE_ANY_ALL or
+                  op == OPCODE_LITERAL or op == OPCODE_LITERAL_IGNORE or
+                  op == OPCODE_NOT_LITERAL or
+                  op == OPCODE_NOT_LITERAL_IGNORE or
+                  op == OPCODE_IN or op == OPCODE_IN_IGNORE or
+                  op == OPCODE_CATEGORY):
+                self.emit(NFA_CHAR, ppos)
+                item = SeqInfo(False, 1)
+                item.first = [ppos]
+                item.chars = [ppos]
+                self.concat(info, item)
+                ppos = self.skip_char(ppos)
+
+            elif op == OPCODE_AT:
+                # <AT> <code>
+                self.emit(NFA_AT, self.pat(ppos + 1))
+                ppos += 2
+
+            elif op == OPCODE_MARK:
+                # <MARK> <gid>
+                self.emit(NFA_MARK, self.pat(ppos + 1))
+                ppos += 2
+
+            elif op == OPCODE_INFO:
+                # <INFO> <skip> ...: only an optimization
+                ppos += 1 + self.pat(ppos + 1)
+
+            elif op == OPCODE_BRANCH:
+                ppos, item = self.compile_branch(ppos)
+                self.concat(info, item)
+
+            elif op == OPCODE_REPEAT:
+                # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+                untilppos = ppos + 1 + self.pat(ppos + 1)
+                until = self.pat(untilppos)
+                if until != OPCODE_MAX_UNTIL and until != OPCODE_MIN_UNTIL:
+                    raise Unsupported
+                item = self.compile_repeat(
+                    ppos + 4, untilppos, self.pat(ppos + 2),
+                    self.pat(ppos + 3), until == OPCODE_MAX_UNTIL)
+                self.concat(info, item)
+                ppos = untilppos + 1
+
+            elif op == OPCODE_REPEAT_ONE or op == OPCODE_MIN_REPEAT_ONE:
+                # <REPEAT_ONE> <skip> <1=min> <2=max> item <SUCCESS> tail
+                tailppos = ppos + 1 + self.pat(ppos + 1)
+                item = self.compile_repeat(
+                    ppos + 4, tailppos - 1, self.pat(ppos + 2),
+                    self.pat(ppos + 3), op == OPCODE_REPEAT_ONE)
+                self.concat(info, item)
+                ppos = tailppos
+
+            else:
+                # backreferences, assertions, conditionals, unknown opcodes
+                raise Unsupported
+
+    def skip_char(self, ppos):
+        op = self.pat(ppos)
+        if op == OPCODE_ANY or op == OPCODE_ANY_ALL:
+            return ppos + 1
+        elif op == OPCODE_IN or op == OPCODE_IN_IGNORE:
+            # <IN> <skip> <set>
+            return ppos + 1 + self.pat(ppos + 1)
+        else:
+            return ppos + 2
+
+    def concat(self, info, item):
+        """Update 'info' for the code followed by 'item'."""
+        if info.nullable:
+            info.first = info.first + item.first
+        info.nullable = info.nullable and item.nullable
+        if item.ambiguous:
+            info.ambiguous = True
+        if item.length < 0:
+            # the boundary between the two can move if the characters
+            # at the end of the code can also be matched by 'item'
+            if self.overlap(info.open, item.chars):
+                info.ambiguous = True
+            info.open = info.open + item.chars
+            info.length = -1
+        else:
+            if info.length >= 0:
+                info.length += item.length
+            if len(item.chars) == 1 and item.length == 1:
+                if not self.overlap(info.open, item.chars):
+                    info.open = []
+                else:
+                    info.open = info.open + item.chars
+            elif info.open:
+                info.open = info.open + item.chars
+        info.chars = info.chars + item.chars
+
+    def overlap(self, charlist1, charlist2):
+        """Check if a character can be matched by both a single-char
+        opcode of 'charlist1' and one of 'charlist2'.  Conservative: it
+        may return True if it cannot tell."""
+        if not charlist1 or not charlist2:
+            return False
+        if len(charlist1) * len(charlist2) > MAX_OVERLAP_CHECKS:
+            return True
+        for ppos1 in charlist1:
+            for ppos2 in charlist2:
+                if not self.disjoint_chars(ppos1, ppos2):
+                    return True
+        return False
+
+    def disjoint_chars(self, ppos1, ppos2):
+        op1 = self.pat(ppos1)
+        op2 = self.pat(ppos2)
+        if op1 == OPCODE_LITERAL_IGNORE and op2 == OPCODE_LITERAL_IGNORE:
+            # both contain the lower-case version of the character
+            return self.pat(ppos1 + 1) != self.pat(ppos2 + 1)
+        if op1 == OPCODE_LITERAL:
+            return not self.char_matches(ppos2, self.pat(ppos1 + 1))
+        if op2 == OPCODE_LITERAL:
+            return not self.char_matches(ppos1, self.pat(ppos2 + 1))
+        return False
+
+    def char_matches(self, ppos, char_code):
+        """Check if the single-char opcode at 'ppos' can match the
+        character.  Conservative: it may return True if it cannot tell."""
+        op = self.pat(ppos)
+        if op == OPCODE_LITERAL:
+            return self.pat(ppos + 1) == char_code
+        elif op == OPCODE_NOT_LITERAL:
+            return self.pat(ppos + 1) != char_code
+        elif op == OPCODE_ANY:
+            return not rsre_char.is_linebreak(char_code)
+        elif op == OPCODE_CATEGORY:
+            return rsre_char.category_dispatch(self.pat(ppos + 1), char_code)
+        elif op == OPCODE_IN:
+            if self.charset_ctx is None:
+                self.charset_ctx = StrMatchContext(self.pattern, "", 0, 0, 0)
+            return rsre_char.check_charset(self.charset_ctx, ppos + 2,
+                                           char_code)
+        else:
+            # the *_IGNORE opcodes depend on the flags
+            return True
+
+    def compile_branch(self, ppos):
+        # <BRANCH> <0=skip> code <JUMP> ... <NULL>
+        ppos += 1
+        splits = []
+        jumps = []
+        alternatives = []
+        tailppos = -1
+        while self.pat(ppos):
+            if self.pat(ppos + self.pat(ppos)):
+                splits.append(self.emit(NFA_SPLIT))
+            endppos, alternative = self.compile_seq(ppos + 1)
+            if self.pat(endppos) != OPCODE_JUMP:
+                raise Unsupported
+            tail1 = endppos + 1 + self.pat(endppos + 1)
+            if tailppos == -1:
+                tailppos = tail1
+            elif tailppos != tail1:
+                raise Unsupported
+            jumps.append(self.emit(NFA_JUMP))
+            alternatives.append(alternative)
+            if splits and len(splits) == len(jumps):
+                # the second choice of the SPLIT is the next alternative
+                self.args[splits[-1]] = splits[-1] + 1
+                self.args2[splits[-1]] = len(self.ops)
+            ppos += self.pat(ppos)
+        if tailppos == -1:
+            raise Unsupported
+        for j in jumps:
+            self.args[j] = len(self.ops)
+        info = SeqInfo(False, alternatives[0].length)
+        for i in range(len(alternatives)):
+            alternative = alternatives[i]
+            if alternative.ambiguous:
+                info.ambiguous = True
+            # two alternatives can only match the same string if they
+            # can start with the same character, or are both empty
+            for j in range(i):
+                if ((alternative.nullable and alternatives[j].nullable) or
+                        self.overlap(alternative.first,
+                                     alternatives[j].first)):
+                    info.ambiguous = True
+            if alternative.nullable:
+                info.nullable = True
+            if alternative.length != info.length:
+                info.length = -1
+            info.first = info.first + alternative.first
+            info.chars = info.chars + alternative.chars
+        if info.length < 0:
+            info.open = info.chars
+        return tailppos, info
+
+    def compile_item(self, itemppos, endppos):
+        ppos, info = self.compile_seq(itemppos)
+        if ppos != endppos:
+            raise Unsupported
+        return info
+
+    def compile_repeat(self, itemppos, endppos, min, max, greedy):
+        """Compile 'item{min,max}' by copying the item.  The item's code
+        starts at 'itemppos' and must stop at 'endppos'."""
+        if min > MAX_PROGRAM_SIZE or (max != rsre_char.MAXREPEAT and
+                                      max - min > MAX_PROGRAM_SIZE):
+            raise Unsupported
+        item = SeqInfo()
+        for i in range(min):
+            item = self.compile_item(itemppos, endppos)
+        if max != min:
+            splits = []
+            if max == rsre_char.MAXREPEAT:
+                count = 1
+            else:
+                count = max - min
+            for i in range(count):
+                splits.append(self.emit(NFA_SPLIT))
+                item = self.compile_item(itemppos, endppos)
+                if item.nullable:
+                    # rsre_core stops repeating after an empty match
+                    raise Unsupported
+                if max == rsre_char.MAXREPEAT:
+                    self.emit(NFA_JUMP, splits[0])
+            exitpos = len(self.ops)
+            for split in splits:
+                if greedy:
+                    self.args[split] = split + 1
+                    self.args2[split] = exitpos
+                else:
+                    self.args[split] = exitpos
+                    self.args2[split] = split + 1
+        if max <= 1:
+            if max == min:
+                return item
+            info = SeqInfo(True, -1)
+            info.ambiguous = item.ambiguous
+        else:
+            # the item is repeated: if it can match a string in several
+            # ways, or if where it stops is not fixed, then so can
+            # several copies of it, in exponentially many ways
+            if item.ambiguous or item.open:
+                self.nested_repeat = True
+            info = SeqInfo(min == 0 or item.nullable, -1)
+            if max == min and item.length >= 0:
+                info.length = item.length * min
+            info.ambiguous = item.ambiguous or len(item.open) > 0
+        info.first = item.first
+        info.chars = item.chars
+        if info.length < 0:
+            info.open = item.chars
+        return info
+
+
+def compile_nfa(pattern):
+    """Translate the sre code 'pattern' into an NFAProgram, or return None
+    if it contains constructs that the linear-time matcher cannot handle.
+    """
+    try:
+        return _NFACompiler(pattern).compile()
+    except Unsupported:
+        return None
+
+# ____________________________________________________________
+
+
+class ThreadList(object):
+    """The threads at one position of the string, in priority order.
+    Only the threads that wait for a character or that have matched are
+    recorded: the other instructions are followed immediately."""
+
+    def __init__(self, size):
+        self.pcs = [0] * size
+        self.starts = [0] * size
+        self.marks = [None] * size
+        self.count = 0
+
+    def append(self, pc, start, marks):
+        i = self.count
+        self.pcs[i] = pc
+        self.starts[i] = start
+        self.marks[i] = marks
+        self.count = i + 1
+
+
+class NFAState(object):
+    """The working memory of the Pike VM, whose size only depends on the
+    size of the program."""
+
+    def __init__(self, prog):
+        size = len(prog.ops)
+        self.clist = ThreadList(size)
+        self.nlist = ThreadList(size)
+        # see add_thread()
+        self.visited = [-1] * size
+        # stack for the second choices of the SPLITs
+        self.stack_pcs = [0] * size
+        self.stack_marks = [None] * size
+
+    def swap(self):
+        self.clist, self.nlist = self.nlist, self.clist
+        self.nlist.count = 0
+
+
+@specializectx
+def add_thread(ctx, prog, state, tlist, pc, ptr, start, marks):
+    """Add the thread at 'pc' to 'tlist', following all the instructions
+    that don't consume a character, in priority order.
+
+    A thread is dropped if it reaches an instruction that a thread with a
+    higher priority already reached at the same position, because it
+    would do the same from there on.  There are no loops that don't
+    consume a character, because the repeated items cannot match the
+    empty string."""
+    depth = 0
+    while True:
+        if state.visited[pc] != ptr:
+            state.visited[pc] = ptr
+            op = prog.ops[pc]
+            if op == NFA_CHAR or op == NFA_MATCH:
+                tlist.append(pc, start, marks)
+            elif op == NFA_JUMP:
+                pc = prog.args[pc]
+                continue
+            elif op == NFA_SPLIT:
+                state.stack_pcs[depth] = prog.args2[pc]
+                state.stack_marks[depth] = marks
+                depth += 1
+                pc = prog.args[pc]
+                continue
+            elif op == NFA_MARK:
+                marks = Mark(prog.args[pc], ptr, marks)
+                pc += 1
+                continue
+            elif op == NFA_AT:
+                if sre_at(ctx, prog.args[pc], ptr):
+                    pc += 1
+                    continue
+        # this thread is finished, continue with the next choice
+        if depth == 0:
+            return
+        depth -= 1
+        pc = state.stack_pcs[depth]
+        marks = state.stack_marks[depth]
+        state.stack_marks[depth] = None
+
+@specializectx
+def check_char(ctx, ptr, ppos):
+    assert ppos >= 0
+    op = ctx.pat(ppos)
+    for op1, checkerfn in unroll_char_checker:
+        if op1 == op:
+            return checkerfn(ctx, ptr, ppos)
+    assert op == OPCODE_CATEGORY
+    return rsre_char.category_dispatch(ctx.pat(ppos + 1), ctx.str(ptr))
+
+@specializectx
+@jit.dont_look_inside
+def nfa_run(ctx, prog, search):
+    """Run the program.  Returns True if a match was found, and then fills
+    'ctx.match_start', 'ctx.match_end' and 'ctx.match_marks'."""
+    state = NFAState(prog)
+    ptr = ctx.match_start
+    end = ctx.end
+    found = False
+    while True:
+        if not found and (search or ptr == ctx.match_start):
+            # start a new thread here, with the lowest priority
+            add_thread(ctx, prog, state, state.clist, 0, ptr, ptr, None)
+        clist = state.clist
+        if clist.count == 0 and (found or not search or ptr >= end):
+            break
+        i = 0
+        while i < clist.count:
+            pc = clist.pcs[i]
+            if prog.ops[pc] == NFA_MATCH:
+                if not ctx.fullmatch_only or ptr == end:
+                    found = True
+                    ctx.match_start = clist.starts[i]
+                    ctx.match_end = ptr
+                    ctx.match_marks = clist.marks[i]
+                    # the remaining threads have a lower priority
+                    break
+            elif ptr < end and check_char(ctx, ptr, prog.args[pc]):
+                add_thread(ctx, prog, state, state.nlist, pc + 1, ptr + 1,
+                           clist.starts[i], clist.marks[i])
+            i += 1
+        if ptr >= end:
+            break
+        ptr += 1
+        state.swap()
+    return found
+
+def nfa_match_context(ctx, prog):
+    ctx.original_pos = ctx.match_start
+    if ctx.end < ctx.match_start:
+        return False
+    return nfa_run(ctx, prog, False)
+
+def nfa_search_context(ctx, prog):
+    ctx.original_pos = ctx.match_start
+    if ctx.end < ctx.match_start:
+        return False
+    return nfa_run(ctx, prog, True)
+
+# ____________________________________________________________
+
+def match(pattern, string, start=0, end=sys.maxint, flags=0,
+          fullmatch=False):
+    prog = compile_nfa(pattern)
+    if prog is None:
+        raise Unsupported
+    start, end = _adjust(start, end, len(string))
+    ctx = StrMatchContext(pattern, string, start, end, flags)
+    ctx.fullmatch_only = fullmatch
+    if nfa_match_context(ctx, prog):
+        return ctx
+    else:
+        return None
+
+def fullmatch(pattern, string, start=0, end=sys.maxint, flags=0):
+    return match(pattern, string, start, end, flags, fullmatch=True)
+
+def search(pattern, string, start=0, end=sys.maxint, flags=0):
+    prog = compile_nfa(pattern)
+    if prog is None:
+        raise Unsupported
+    start, end = _adjust(start, end, len(string))
+    ctx = StrMatchContext(pattern, string, start, end, flags)
+    if nfa_search_context(ctx, prog):
+        return ctx
+    else:
+        return None
@@ -0,0 +1,133 @@
+import re, time
+from rpython.rlib.rsre import rsre_core, rsre_nfa
+from rpython.rlib.rsre.test.test_match import get_code
+
+
+def same_result(r1, r2):
+    if r1 is None or r2 is None:
+        return r1 is None and r2 is None
+    return r1.flatten_marks() == r2.flatten_marks()
+
+def check(regexp, strings):
+    code = get_code(regexp)
+    assert rsre_nfa.compile_nfa(code) is not None
+    for s in strings:
+        for start in range(len(s) + 1):
+            for fn in ['match', 'fullmatch', 'search']:
+                r1 = getattr(rsre_core, fn)(code, s, start)
+                r2 = getattr(rsre_nfa, fn)(code, s, start)
+                assert same_result(r1, r2), (fn, regexp, s, start)
+
+
+class TestNFA:
+
+    def test_simple(self):
+        check(r"abc", ["abc", "xabcx", "ab", ""])
+        check(r"a.c", ["abc", "a\nc", "xaxcx"])
+        check(r"[a-c]+d", ["abcd", "xxbbdd", "abc"])
+        check(r"(?i)aBc", ["ABC", "abc", "xAbC"])
+
+    def test_branch(self):
+        check(r"a|bc|def", ["a", "bc", "def", "xdefx", "ghij"])
+        check(r"(a|ab)(c|bcd)(d*)", ["abcd", "abcdd", "acd"])
+
+    def test_repeat(self):
+        check(r"a*", ["", "aaa", "baaa"])
+        check(r"a*?b", ["aab", "b", "xaab"])
+        check(r"(ab)+", ["ab", "abab", "aba", "xababx"])
+        check(r"(ab)+?", ["ab", "abab"])
+        check(r"(a|b){2,3}c", ["abc", "ababc", "ac", "abbbc"])
+        check(r"(a|b){2,3}?c", ["abc", "ababc", "ac"])
+        check(r"x(ab){2}", ["xabab", "xab", "xababab"])
+        check(r"(\w+\.)+com", ["a.com", "a.b.com", "a.b.org", "a..com"])
+        check(r"(\d+,)+", ["1,", "12,3,", "1,x", ",1,"])
+
+    def test_empty_repeat(self):
+        check(r"(a*){2}", ["", "b", "aa"])
+        check(r"(a*|b){3}c", ["c", "bc", "aabac"])
+        check(r"(a|)b", ["b", "ab"])
+
+    def test_empty_repeat_unsupported(self):
+        # rsre_core stops repeating an item after it matched the empty
+        # string, which decides the groups
+        for regexp in [r"(a*)*", r"(a*)+", r"(a*|b)*", r"(a*)*?b",
+                       r"(a|)*b", r"(?:a*?)*c", r"(a*){1,2}",
+                       r"|([ab]??()*?|((^|)?c{0,3}?|)){1,2}"]:
+            assert rsre_nfa.compile_nfa(get_code(regexp)) is None
+
+    def test_at(self):
+        check(r"^a|b$", ["a", "xb", "xa", "b\n"])
+        check(r"(?m)^a$", ["x\na\n", "xa"])
+        check(r"\bfoo\b", ["foo", "a foo b", "afoob"])
+        check(r"\Bo\B", ["foo", "o"])
+
+    def test_groups_last_index(self):
+        code = get_code(r"(a)|(b)")
+        r1 = rsre_core.match(code, "b")
+        r2 = rsre_nfa.match(code, "b")
+        r1.flatten_marks()
+        r2.flatten_marks()
+        assert r2.match_lastindex == r1.match_lastindex == 3
+
+    def test_external(self):
+        from rpython.rlib.rsre.test.re_tests import tests, SYNTAX_ERROR
+        num_supported = 0
+        for t in tests:
+            pattern, s, outcome = t[:3]
+            if outcome == SYNTAX_ERROR:
+                continue
+            try:
+                code = get_code(pattern)
+            except re.error:
+                continue
+            if rsre_nfa.compile_nfa(code) is None:
+                continue
+            num_supported += 1
+            for fn in ['match', 'search']:
+                r1 = getattr(rsre_core, fn)(code, s)
+                r2 = getattr(rsre_nfa, fn)(code, s)
+                assert same_result(r1, r2), (fn, pattern, s)
+        assert num_supported > 400
+
+    def test_unsupported(self):
+        for regexp in [r"(a)\1", r"a(?=b)", r"a(?!b)", r"(?<=a)b",
+                       r"(?<!a)b", r"(a)?(?(1)b|c)", r"a{5000}b{5001}"]:
+            assert rsre_nfa.compile_nfa(get_code(regexp)) is None
+
+    def test_nested_repeat(self):
+        for regexp in [r"(a|aa)*", r"(a+)+", r"(\w+\s?)*$", r"(a+a)+",
+                       r"(x+x+)+y", r"(a*a*b)+", r"(.*,)+", r"(a|ab)*"]:
+            assert rsre_nfa.compile_nfa(get_code(regexp)).nested_repeat
+        for regexp in [r"a*b", r"(ab)+", r"\d+-\d+", r"(a|b)c",
+                       r"(\w+\.)+com", r"(\d+,)+", r"([^,]*,)+",
+                       r"(foo|bar)+", r"(ab|cd)*", r"(a|b){2,3}c"]:
+            assert not rsre_nfa.compile_nfa(get_code(regexp)).nested_repeat
+
+    def test_linear_time(self):
+        # with backtracking, this takes longer than the age of the universe
+        code = get_code(r"(a|aa)*b")
+        s = "a" * 300
+        t = time.time()
+        assert rsre_nfa.match(code, s) is None
+        assert rsre_nfa.search(code, s) is None
+        r = rsre_nfa.search(code, s + "b")
+        assert r.span() == (0, 301)
+        assert time.time() - t < 60.0
+
+    def test_unicode(self):
+        code = get_code(u"(\u1234|b)+c")
+        ctx = rsre_core.UnicodeMatchContext(code, u"x\u1234bc", 0, 4, 0)
+        assert rsre_nfa.nfa_search_context(ctx, rsre_nfa.compile_nfa(code))
+        assert ctx.span() == (1, 4)
+
+    def test_translates(self):
+        from rpython.rtyper.test.test_llinterp import interpret
+        code = get_code(r"(a|aa)*(b)")
+        def f(n):
+            assert n >= 0
+            prog = rsre_nfa.compile_nfa(code)
+            ctx = rsre_core.StrMatchContext(code, "a" * n + "b", 0, n + 1, 0)
+            if not rsre_nfa.nfa_search_context(ctx, prog):
+                return -1
+            return ctx.match_end * 10 + ctx.get_mark(2)
+        assert interpret(f, [5]) == 65
@@ -209,3 +209,101 @@ class TestSearch:
                 else:
                     assert match is None
                     assert res is None
+
+    def test_compute_prefilter(self):
+        prefilter = rsre_core.compute_prefilter(get_code(r'\w+@example\.com'))
+        assert prefilter.literal_str == '@example.com'
+        assert prefilter.minprefix == 1
+        assert prefilter.maxprefix == -1
+        prefilter = rsre_core.compute_prefilter(get_code(r'.*ERROR.*'))
+        assert prefilter.literal_str == 'ERROR'
+        assert prefilter.minprefix == 0
+        assert prefilter.maxprefix == -1
+        prefilter = rsre_core.compute_prefilter(get_code(r'\d\d?-(ab)c\s'))
+        assert prefilter.literal_str == '-abc'
+        assert prefilter.minprefix == 1
+        assert prefilter.maxprefix == 2
+        prefilter = rsre_core.compute_prefilter(get_code(r'(x|yz)[abc]abcd'))
+        assert prefilter.literal_str == 'abcd'
+        assert prefilter.minprefix == 1     # the branch counts as 0
+        assert prefilter.maxprefix == -1
+        # the INFO prefix is used for these
+        assert rsre_core.compute_prefilter(get_code(r'abc\w+')) is None
+        # no required literal
+        assert rsre_core.compute_prefilter(get_code(r'\w+(abc)*')) is None
+        assert rsre_core.compute_prefilter(get_code(r'abc|def')) is None
+
+    def test_prefilter_search(self):
+        for pattern in [r'\w+@example\.com', r'.*ERROR.*', r'\d\d?-(ab)c\s',
+                        r'(x|yz)[abc]abcd', r'(?<=a)bc', r'\bfoo\b',
+                        r'[xy]*-+abc']:
+            r_code, r = get_code_and_re(pattern)
+            for s in ['', 'abc', 'joe@example.com', 'a joe@example.co',
+                      'foo ERROR', 'ERROR foo', 'ERRO', '1-abc 12-abc ',
+                      '123-abc\n', 'yzbabcd xcabcd', 'foobar foo',
+                      'ab bc abc', 'xyxy--abc', 'xy-ab--abc']:
+                for start in range(len(s) + 1):
+                    for end in [len(s), len(s) - 1, start + 3]:
+                        match = r.search(s, start, end)
+                        res = rsre_core.search(r_code, s, start, end)
+                        if match is None:
+                            assert res is None
+                        else:
+                            assert res is not None
+                            assert res.span() == match.span()
+                u = unicode(s)
+                res = rsre_core.search(r_code, u)
+                match = r.search(u)
+                assert (res is None) == (match is None)
+
+    def test_prefilter_skips_to_literal(self):
+        r_code = get_code(r'\d\d?-abc')
+        seen = []
+        orig_sre_match = rsre_core.sre_match
+        def sre_match(ctx, ppos, ptr, marks):
+            seen.append(ptr)
+            return orig_sre_match(ctx, ppos, ptr, marks)
+        rsre_core.sre_match = sre_match
+        try:
+            res = rsre_core.search(r_code, 'x' * 100 + '12-abc')
+        finally:
+            rsre_core.sre_match = orig_sre_match
+        assert res.span() == (100, 106)
+        assert seen[0] == 100
+
+    def test_prefilter_keeps_fast_paths(self):
+        # with a literal that can be anywhere after the start, the usual
+        # fast paths are used, but only up to the last occurrence of the
+        # literal
+        seen = []
+        def wrap(name):
+            orig = getattr(rsre_core, name)
+            def search(ctx, base, last):
+                seen.append((name, last))
+                return orig(ctx, base, last)
+            return orig, search
+        names = ['literal_search', 'charset_search', 'regular_search']
+        origs = {}
+        for name in names:
+            origs[name], search = wrap(name)
+            setattr(rsre_core, name, search)
+        try:
+            for pattern, name in [(r'a\d+ERROR', 'literal_search'),
+                                  (r'[xy].*ERROR', 'charset_search'),
+                                  (r'\w+@example\.com', 'regular_search')]:
+                r_code = get_code(pattern)
+                prefilter = rsre_core.compute_prefilter(r_code)
+                assert prefilter.maxprefix == -1
+                del seen[:]
+                s = 'xa1 ' * 50 + 'joe@example.com a12ERROR ERROR' + ' ' * 50
+                res = rsre_core.search(r_code, s)
+                assert res.span() == re.search(pattern, s).span()
+                last = s.rfind(prefilter.literal_str) - prefilter.minprefix
+                assert seen == [(name, last)]
+                # the literal is missing: no search at all
+                del seen[:]
+                assert rsre_core.search(r_code, 'xa1 ' * 50) is None
+                assert seen == []
+        finally:
+            for name in names:
+                setattr(rsre_core, name, origs[name])
@@ -79,6 +79,32 @@ class FormatIterator(object):
                 self.operate(fmtdesc, repetitions)
         self.finished()
 
+    @jit.look_inside_iff(lambda self, compiled: jit.isconstant(compiled))
+    def interpret_compiled(self, compiled):
+        """Same as interpret(), but for a format which was already parsed
+        by compile_format()."""
+        table = unroll_native_fmtdescs
+        if compiled.standard:
+            table = unroll_standard_fmtdescs
+        self.bigendian = compiled.bigendian
+        for index in range(len(compiled.codes)):
+            c = compiled.codes[index]
+            repetitions = compiled.counts[index]
+            for fmtdesc in table:
+                if c == fmtdesc.fmtchar:
+                    if self._operate_is_specialized_:
+                        if fmtdesc.alignment > 1:
+                            self.align(fmtdesc.mask)
+                        self.operate(fmtdesc, repetitions)
+                    break
+            else:
+                raise StructError("bad char in struct format")
+            if not self._operate_is_specialized_:
+                if fmtdesc.alignment > 1:
+                    self.align(fmtdesc.mask)
+                self.operate(fmtdesc, repetitions)
+        self.finished()
+
     def finished(self):
         pass
 
@@ -101,6 +127,47 @@ class CalcSizeFormatIterator(FormatIterator):
             raise StructError("total struct size too long")
 
 
+class CompileFormatIterator(CalcSizeFormatIterator):
+    def __init__(self):
+        self.codes = []
+        self.counts = []
+
+    def operate(self, fmtdesc, repetitions):
+        CalcSizeFormatIterator.operate(self, fmtdesc, repetitions)
+        self.codes.append(fmtdesc.fmtchar)
+        self.counts.append(repetitions)
+
+
+class CompiledFormat(object):
+    """
+    A format string parsed once and for all: the list of format units with
+    their repetition counts, the byte order and the total size.  Packing or
+    unpacking with interpret_compiled() does not need to parse it again.
+    """
+    _immutable_fields_ = ['standard', 'bigendian', 'size', 'codes[*]',
+                          'counts[*]']
+
+    def __init__(self, standard, bigendian, size, codes, counts):
+        self.standard = standard
+        self.bigendian = bigendian
+        self.size = size
+        self.codes = codes
+        self.counts = counts
+
+
+def compile_format(fmt):
+    """Parse 'fmt' into a CompiledFormat.  Raises StructError if the
+    format is invalid."""
+    fmtiter = CompileFormatIterator()
+    fmtiter.interpret(fmt)
+    standard = False
+    if len(fmt) > 0:
+        c = fmt[0]
+        standard = c == '=' or c == '<' or c == '>' or c == '!'
+    return CompiledFormat(standard, fmtiter.bigendian, fmtiter.totalsize,
+                          fmtiter.codes[:], fmtiter.counts[:])
+
+
 class FmtDesc(object):
     def __init__(self, fmtchar, attrs):
         self.fmtchar = fmtchar
@@ -35,6 +35,12 @@ def get_unique_id(code):
 def enable(fileno, interval, memory=0, native=0, real_time=0):
     _get_vmprof().enable(fileno, interval, memory, native, real_time)
 
+def enable_allocation_sampling(fileno, period, memory=0):
+    _get_vmprof().enable_allocation_sampling(fileno, period, memory)
+
+def sample_allocation(nbytes):
+    _get_vmprof().sample_allocation(nbytes)
+
 def disable():
     _get_vmprof().disable()
 
@@ -117,6 +117,16 @@ def setup():
     vmprof_start_sampling = rffi.llexternal("vmprof_start_sampling", [],
                                               lltype.Void, compilation_info=eci,
                                               _nowrapper=True)
+    vmprof_enable_allocation_sampling = rffi.llexternal(
+                                    "vmprof_enable_allocation_sampling",
+                                    [rffi.INT], rffi.INT,
+                                    compilation_info=eci,
+                                    save_err=rffi.RFFI_SAVE_ERRNO)
+    # called from inside the GC: must not release the GIL or collect
+    vmprof_sample_allocation = rffi.llexternal("vmprof_sample_allocation",
+                                               [lltype.Signed], lltype.Void,
+                                               compilation_info=eci,
+                                               _nowrapper=True)
 
     return CInterface(locals())
 
@@ -50,6 +50,7 @@ class VMProf(object):
 
     def _cleanup_(self):
         self.is_enabled = False
+        self.alloc_period = 0
 
     @jit.dont_look_inside
     @specialize.argtype(1)
@@ -148,6 +149,45 @@ class VMProf(object):
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
         self.is_enabled = True
 
+    @jit.dont_look_inside
+    def enable_allocation_sampling(self, fileno, period, memory=0):
+        """Enable vmprof in allocation sampling mode.  There is no timer:
+        instead, the GC should call sample_allocation() every 'period'
+        allocated bytes, and each call writes the current stack as a
+        sample of weight nbytes / period.  The file has the usual vmprof
+        format.
+        Raises VMProfError if something goes wrong.
+        """
+        assert fileno >= 0
+        if self.is_enabled:
+            raise VMProfError("vmprof is already enabled")
+        if period <= 0:
+            raise VMProfError("the allocation period must be positive")
+
+        # the interval written in the header is only nominal here
+        p_error = self.cintf.vmprof_init(fileno, 0.001, 0, memory, "pypy",
+                                         0, 0)
+        if p_error:
+            raise VMProfError(rffi.charp2str(p_error))
+
+        self._gather_all_code_objs()
+        res = self.cintf.vmprof_enable_allocation_sampling(memory)
+        if res < 0:
+            raise VMProfError(os.strerror(rposix.get_saved_errno()))
+        self.alloc_period = period
+        self.is_enabled = True
+
+    def sample_allocation(self, nbytes):
+        """Write the current stack as a sample standing for 'nbytes'
+        allocated bytes, if vmprof is enabled in allocation sampling mode.
+        Called from inside the GC: doesn't allocate."""
+        if self.alloc_period > 0:
+            # a large allocation counts as several samples
+            count = nbytes // self.alloc_period
+            if count < 1:
+                count = 1
+            self.cintf.vmprof_sample_allocation(count)
+
     @jit.dont_look_inside
     def disable(self):
         """Disable vmprof.
@@ -156,6 +196,7 @@ class VMProf(object):
         if not self.is_enabled:
             raise VMProfError("vmprof is not enabled")
         self.is_enabled = False
+        self.alloc_period = 0
         res = self.cintf.vmprof_disable()
         if res < 0:
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
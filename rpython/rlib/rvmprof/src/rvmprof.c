@@ -45,3 +45,74 @@ void vmprof_start_sampling(void)
 {
     vmprof_ignore_signals(0);
 }
+
+#ifdef VMPROF_UNIX
+int vmprof_enable_allocation_sampling(int memory)
+{
+    /* like vmprof_enable(), but without installing the timer: the only
+       samples are the ones written by vmprof_sample_allocation() */
+    assert(vmp_profile_fileno() >= 0);
+    if (memory && setup_rss() == -1)
+        goto error;
+    if (install_pthread_atfork_hooks() == -1)
+        goto error;
+    vmprof_ignore_signals(0);
+    return 0;
+
+ error:
+    vmp_set_profile_fileno(-1);
+    return -1;
+}
+
+void vmprof_sample_allocation(long count)
+{
+    /* Called by the GC, every time the program allocated the number of
+       bytes given to vmprof_enable_allocation_sampling().  Writes the
+       current stack as a regular sample, counted 'count' times: more
+       than once for an allocation that spans several periods.  Must
+       not allocate. */
+    long val = vmprof_enter_signal();
+
+    if ((val & 1) == 0) {
+        int fd = vmp_profile_fileno();
+        struct profbuf_s *p = reserve_buffer(fd);
+        if (p != NULL) {
+            int depth;
+            struct prof_stacktrace_s *st = (struct prof_stacktrace_s *)p->data;
+            st->marker = MARKER_STACKTRACE;
+            st->count = count;
+            /* signal == 0: there is no signal frame to skip */
+            depth = vmp_walk_and_record_stack(get_vmprof_stack(), st->stack,
+                                              MAX_STACK_DEPTH-1, 0, 0);
+            if (depth > 0) {
+                st->depth = depth;
+                st->stack[depth++] = NULL;     /* thread state */
+                long rss = get_current_proc_rss();
+                if (rss >= 0)
+                    st->stack[depth++] = (void*)rss;
+                p->data_offset = offsetof(struct prof_stacktrace_s, marker);
+                p->data_size = (depth * sizeof(void *) +
+                                sizeof(struct prof_stacktrace_s) -
+                                offsetof(struct prof_stacktrace_s, marker));
+                commit_buffer(fd, p);
+            }
+            else {
+                cancel_buffer(p);
+            }
+        }
+    }
+    vmprof_exit_signal();
+}
+#else
+#include <errno.h>
+
+int vmprof_enable_allocation_sampling(int memory)
+{
+    errno = ENOSYS;
+    return -1;
+}
+
+void vmprof_sample_allocation(long nbytes)
+{
+}
+#endif
@@ -150,6 +150,62 @@ def test_enable():
         assert os.path.exists(tmpfilename)
         os.unlink(tmpfilename)
 
+def test_enable_allocation_sampling():
+
+    class MyCode:
+        pass
+    def get_name(code):
+        return 'py:code:52:x'
+    try:
+        rvmprof.register_code_object_class(MyCode, get_name)
+    except rvmprof.VMProfPlatformUnsupported as e:
+        py.test.skip(str(e))
+
+    @rvmprof.vmprof_execute_code("xcode1", lambda code, num: code)
+    def main(code, num):
+        for i in range(num):
+            # what the GC does every 'period' allocated bytes
+            rvmprof.sample_allocation(4096)
+        # an allocation that spans 10 periods
+        rvmprof.sample_allocation(40960)
+        return num
+
+    tmpfilename = str(udir.join('test_rvmprof_alloc'))
+
+    def f():
+        if NonConstant(False):
+            # Hack to give os.open() the correct annotation
+            os.open('foo', 1, 1)
+        code = MyCode()
+        rvmprof.register_code(code, get_name)
+        fd = os.open(tmpfilename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                     0666)
+        rvmprof.enable_allocation_sampling(fd, 4096)
+        main(code, 100)
+        rvmprof.disable()
+        rvmprof.sample_allocation(4096)     # ignored
+        os.close(fd)
+        return 0
+
+    def check_profile(filename):
+        from vmprof import read_profile
+
+        prof = read_profile(filename)
+        assert prof.get_tree().name.startswith("py:")
+        assert prof.get_tree().count == 110
+
+    fn = compile(f, [], gcpolicy="minimark")
+    assert fn() == 0
+    try:
+        import vmprof
+    except ImportError:
+        py.test.skip("vmprof unimportable")
+    else:
+        check_profile(tmpfilename)
+    finally:
+        assert os.path.exists(tmpfilename)
+        os.unlink(tmpfilename)
+
 def test_native():
     eci = ExternalCompilationInfo(compile_extra=['-g','-O0'],
             separate_module_sources=["""
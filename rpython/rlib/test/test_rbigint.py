@@ -236,6 +236,14 @@ class Test_rbigint(object):
         assert x.tolong() == 0
         assert x.tobool() is False
 
+    def test_fromdecimalstr_huge(self, monkeypatch):
+        # more than STR2INT_LIMIT groups of digits
+        monkeypatch.setattr(lobj, 'STR2INT_LIMIT', 2)
+        for n in [1, 2 * 19, 90 + 7, 1000]:
+            for s in ["7" * n, "1" + "0" * n, "".join([str(i % 7) for i in range(n)])]:
+                assert rbigint.fromdecimalstr(s).tolong() == long(s)
+                assert rbigint.fromdecimalstr("-" + s).tolong() == -long(s)
+
     def test_fromstr(self):
         from rpython.rlib.rstring import ParseStringError
         assert rbigint.fromstr('123L').tolong() == 123
@@ -253,6 +261,14 @@ class Test_rbigint(object):
         parser = NumberStringParser("1231231241", "1231231241", 10, "long")
         assert rbigint._from_numberstring_parser(parser).tolong() == 1231231241
 
+    def test_fromstr_huge(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'STR2INT_LIMIT', 2)
+        n = 500 + 3
+        for base in [3, 10, 36]:
+            s = "".join([str(i % 3) for i in range(n)])
+            assert rbigint.fromstr(s, base).tolong() == long(s, base)
+            assert rbigint.fromstr("-" + s, base).tolong() == -long(s, base)
+
     def test_add(self):
         x = 123456789123456789000000L
         y = 123858582373821923936744221L
@@ -758,6 +774,36 @@ class TestInternalFunctions(object):
                 assert div.tolong() == _div
                 assert rem.tolong() == _rem
 
+    def test__divrem_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'DIV_LIMIT', 3)
+        seed(42)
+        bits = 3 * SHIFT
+        for size_a, size_b in [(5 * bits, 2 * bits), (3 * bits, bits + 1),
+                               (9 * bits + 5, 3 * bits + 7)]:
+            for i in range(10):
+                x = long(randint(1, 1 << size_a))
+                y = long(randint(1 << (size_b - 1), 1 << size_b))
+                f1 = rbigint.fromlong(x)
+                f2 = rbigint.fromlong(y)
+                div, rem = lobj._divrem_recursive(f1, f2)
+                assert (div.tolong(), rem.tolong()) == divmod(x, y)
+        # cases where the estimate of the quotient is too large
+        y = (1 << (3 * bits)) - 1
+        for x in [y << (5 * bits), (y << (5 * bits)) - 1,
+                  (y + 1) * (y - 1) << bits]:
+            div, rem = lobj._divrem_recursive(rbigint.fromlong(x),
+                                              rbigint.fromlong(y))
+            assert (div.tolong(), rem.tolong()) == divmod(x, y)
+
+    def test_divmod_huge(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'DIV_LIMIT', 3)
+        bits = 3 * SHIFT
+        x = 3 ** (bits * 2) + 12345
+        y = 7 ** (bits // 2)
+        for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+            div, rem = rbigint.fromlong(sx * x).divmod(rbigint.fromlong(sy * y))
+            assert (div.tolong(), rem.tolong()) == divmod(sx * x, sy * y)
+
     # testing Karatsuba stuff
     def test__v_iadd(self):
         f1 = bigint([lobj.MASK] * 10, 1)
@@ -39,6 +39,42 @@ def test_collect_0():
 
     assert res is None
 
+def test_collect_step():
+    def f():
+        return rgc.collect_step()
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc__collect_step'
+
+    res = interpret(f, [])
+    assert rgc.is_done(res)
+
+def test_encode_states():
+    states = rgc._encode_states(1, 2)
+    assert rgc.old_state(states) == 1
+    assert rgc.new_state(states) == 2
+    assert not rgc.is_done(states)
+    assert rgc.is_done(rgc._encode_states(3, 0))
+
+def test_enable_disable():
+    def f():
+        rgc.disable()
+        a = rgc.isenabled()
+        rgc.enable()
+        return a * 10 + rgc.isenabled()
+
+    t, typer, graph = gengraph(f, [])
+    opnames = [op.opname for block, op in graph.iterblockops()]
+    assert 'gc__disable' in opnames
+    assert 'gc__enable' in opnames
+    assert 'gc__isenabled' in opnames
+
+    res = interpret(f, [])
+    assert res == 1
+
 def test_can_move():
     T0 = lltype.GcStruct('T')
     T1 = lltype.GcArray(lltype.Float)
@@ -37,6 +37,25 @@ class BaseTestGIL(StandaloneTests):
         data = cbuilder.cmdexec('')
         assert data == "Test\n1\n2\n"
 
+    def test_stats(self):
+        def main(argv):
+            rgil.reset_stats()
+            rgil.release()
+            rgil.acquire()
+            rgil.set_switch_interval(0.005)
+            rgil.yield_thread_if_requested()   # no other thread: no-op
+            print rgil.get_stat(rgil.STAT_ACQUISITIONS) >= 1
+            print rgil.get_stat(rgil.STAT_WAITS)
+            print rgil.get_stat(rgil.STAT_FORCED_SWITCHES)
+            print rgil.get_wait_time()
+            rgil.reset_stats()
+            print rgil.get_stat(rgil.STAT_ACQUISITIONS)
+            return 0
+
+        t, cbuilder = self.compile(main)
+        data = cbuilder.cmdexec('')
+        assert data == "1\n0\n0\n0.000000\n0\n"
+
 
 class TestGILAsmGcc(BaseTestGIL):
     gc = 'minimark'
@@ -816,9 +816,24 @@ class LLFrame(object):
     def op_gc__collect(self, *gen):
         self.heap.collect(*gen)
 
+    def op_gc__collect_step(self):
+        return self.heap.collect_step()
+
+    def op_gc__enable(self):
+        self.heap.enable()
+
+    def op_gc__disable(self):
+        self.heap.disable()
+
+    def op_gc__isenabled(self):
+        return self.heap.isenabled()
+
     def op_gc_heap_stats(self):
         raise NotImplementedError
 
+    def op_gc_get_stats(self, stat_no):
+        return self.heap.get_stats(stat_no)
+
     def op_gc_obtain_free_space(self, size):
         raise NotImplementedError
 
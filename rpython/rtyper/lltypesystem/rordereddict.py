@@ -41,6 +41,11 @@ from rpython.rtyper.annlowlevel import llhelper
 #        (Function DICTKEY -> int) *fnkeyhash;
 #    }
 #
+#  Small dicts, with at most SMALL_DICT_SIZE entries, don't have any
+#  'indexes' at all (lookup_function_no is FUNC_SMALL): a lookup is a
+#  linear search in 'entries'.  Most dicts in a typical program are
+#  small, and this saves the memory of the index, which is a separate
+#  object of about the size of the entries of such a small dict.
 #
 
 @jit.look_inside_iff(lambda d, key, hash, flag: jit.isvirtual(d))
@@ -54,6 +59,8 @@ def ll_call_lookup_function(d, key, hash, flag):
         # It sounds minor, but it is worth 6-7% on a PyPy microbenchmark.
         if likely(fun == FUNC_BYTE):
             return ll_dict_lookup(d, key, hash, flag, TYPE_BYTE)
+        elif fun == FUNC_SMALL:
+            return ll_dict_lookup_small(d, key, hash, flag)
         elif fun == FUNC_SHORT:
             return ll_dict_lookup(d, key, hash, flag, TYPE_SHORT)
         elif IS_64BIT and fun == FUNC_INT:
@@ -479,14 +486,13 @@ DICTINDEX_BYTE = lltype.Ptr(lltype.GcArray(rffi.UCHAR))
 
 IS_64BIT = sys.maxint != 2 ** 31 - 1
 
+FUNC_SHIFT = 3
+FUNC_MASK  = 0x07  # three bits
 if IS_64BIT:
-    FUNC_SHIFT = 3
-    FUNC_MASK  = 0x07  # three bits
-    FUNC_BYTE, FUNC_SHORT, FUNC_INT, FUNC_LONG, FUNC_MUST_REINDEX = range(5)
+    (FUNC_BYTE, FUNC_SHORT, FUNC_INT, FUNC_LONG, FUNC_MUST_REINDEX,
+     FUNC_SMALL) = range(6)
 else:
-    FUNC_SHIFT = 2
-    FUNC_MASK  = 0x03  # two bits
-    FUNC_BYTE, FUNC_SHORT, FUNC_LONG, FUNC_MUST_REINDEX = range(4)
+    FUNC_BYTE, FUNC_SHORT, FUNC_LONG, FUNC_MUST_REINDEX, FUNC_SMALL = range(5)
 TYPE_BYTE  = rffi.UCHAR
 TYPE_SHORT = rffi.USHORT
 TYPE_INT   = rffi.UINT
@@ -503,6 +509,16 @@ def ll_no_initial_index(d):
     d.lookup_function_no = FUNC_MUST_REINDEX
     d.indexes = lltype.nullptr(llmemory.GCREF.TO)
 
+def ll_no_index_small(d):
+    # Make 'd' a small dict, without index.  The 'resize_counter' is
+    # computed as if there was an index of size DICT_INITSIZE, which
+    # is what we get when the dict grows beyond SMALL_DICT_SIZE.
+    ll_assert(len(d.entries) <= SMALL_DICT_SIZE,
+              "ll_no_index_small(): dict too big")
+    d.lookup_function_no = FUNC_SMALL
+    d.indexes = lltype.nullptr(llmemory.GCREF.TO)
+    d.resize_counter = DICT_INITSIZE * 2 - d.num_live_items * 3
+
 def ll_malloc_indexes_and_choose_lookup(d, n):
     # keep in sync with ll_clear_indexes() below
     if n <= 256:
@@ -552,6 +568,8 @@ def ll_call_insert_clean_function(d, hash, i):
         ll_dict_store_clean(d, hash, i, TYPE_INT)
     elif fun == FUNC_LONG:
         ll_dict_store_clean(d, hash, i, TYPE_LONG)
+    elif fun == FUNC_SMALL:
+        pass     # no index
     else:
         # can't be still FUNC_MUST_REINDEX here
         ll_assert(False, "ll_call_insert_clean_function(): invalid lookup_fun")
@@ -569,6 +587,8 @@ def ll_call_delete_by_entry_index(d, hash, i, replace_with):
         ll_dict_delete_by_entry_index(d, hash, i, replace_with, TYPE_INT)
     elif fun == FUNC_LONG:
         ll_dict_delete_by_entry_index(d, hash, i, replace_with, TYPE_LONG)
+    elif fun == FUNC_SMALL:
+        pass     # no index
     else:
         # can't be still FUNC_MUST_REINDEX here
         ll_assert(False, "ll_call_delete_by_entry_index(): invalid lookup_fun")
@@ -708,6 +728,9 @@ def _ll_len_of_d_indexes(d):
     # xxx Haaaack: returns len(d.indexes).  Works independently of
     # the exact type pointed to by d, using a forced cast...
     # Must only be called by @jit.dont_look_inside functions.
+    # Returns 0 for small dicts, which have no index.
+    if not d.indexes:
+        return 0
     return lltype.length_of_simple_gcarray_from_opaque(d.indexes)
 
 def _overallocate_entries_len(baselen):
@@ -746,7 +769,16 @@ def ll_dict_grow(d):
     # at least 1/3rd items in 'd.entries' are free.
     fun = d.lookup_function_no & FUNC_MASK
     toobig = False
-    if fun == FUNC_BYTE:
+    if fun == FUNC_SMALL:
+        # Small dicts are compacted as soon as they contain deleted
+        # entries, which is cheap.  They don't grow beyond
+        # SMALL_DICT_SIZE entries without getting an index.
+        if d.num_live_items < d.num_ever_used_items:
+            ll_dict_remove_deleted_items(d)
+            return True
+        if len(d.entries) < SMALL_DICT_SIZE:
+            new_allocated = SMALL_DICT_SIZE
+    elif fun == FUNC_BYTE:
         assert d.num_live_items < ((1 << 8) - MIN_INDEXES_MINUS_ENTRIES)
         toobig = new_allocated > ((1 << 8) - MIN_INDEXES_MINUS_ENTRIES)
     elif fun == FUNC_SHORT:
@@ -763,12 +795,19 @@ def ll_dict_grow(d):
 
     newitems = lltype.malloc(lltype.typeOf(d).TO.entries.TO, new_allocated)
     rgc.ll_arraycopy(d.entries, newitems, 0, 0, len(d.entries))
+    if fun == FUNC_SMALL and new_allocated > SMALL_DICT_SIZE:
+        # the dict is no longer small: give it an index.  Done before
+        # we replace 'd.entries', so that a MemoryError leaves 'd' small.
+        ll_dict_reindex(d, DICT_INITSIZE)
+        d.entries = newitems
+        return True
     d.entries = newitems
     return False
 
 @jit.dont_look_inside
 def ll_dict_remove_deleted_items(d):
-    if d.num_live_items < len(d.entries) // 4:
+    if (d.num_live_items < len(d.entries) // 4 and
+            len(d.entries) > SMALL_DICT_SIZE):
         # At least 75% of the allocated entries are dead, so shrink the memory
         # allocated as well as doing a compaction.
         new_allocated = _overallocate_entries_len(d.num_live_items)
@@ -884,6 +923,9 @@ def ll_dict_resize(d):
     # (Quadrupling comes from '(d.num_live_items + d.num_live_items + 1) * 2'
     # as long as num_live_items is not too large.)
     num_extra = min(d.num_live_items + 1, 30000)
+    if (d.lookup_function_no & FUNC_MASK) == FUNC_SMALL:
+        # a small dict is only compacted, if it has room for one more
+        num_extra = 1
     _ll_dict_resize_to(d, num_extra)
 ll_dict_resize.oopspec = 'odict.resize(d)'
 
@@ -895,6 +937,9 @@ def _ll_dict_resize_to(d, num_extra):
 
     if new_size < _ll_len_of_d_indexes(d):
         ll_dict_remove_deleted_items(d)
+    elif (_ll_len_of_d_indexes(d) == 0 and
+              d.num_live_items + num_extra <= SMALL_DICT_SIZE):
+        ll_dict_remove_deleted_items(d)     # a small dict stays small
     else:
         ll_dict_reindex(d, new_size)
 
@@ -913,8 +958,7 @@ def ll_dict_create_initial_index(d):
     entries.  The common case must be seen by the JIT.
     """
     if d.num_live_items == 0:
-        ll_malloc_indexes_and_choose_lookup(d, DICT_INITSIZE)
-        d.resize_counter = DICT_INITSIZE * 2
+        ll_no_index_small(d)
     else:
         ll_dict_rehash_after_translation(d)
 
@@ -936,13 +980,23 @@ def ll_dict_rehash_after_translation(d):
             d_entry.f_hash = h
         #else: purely for the side-effect it can have on d_entry.key
     #
-    # Use the smallest acceptable size for ll_dict_reindex
-    new_size = DICT_INITSIZE
-    while new_size * 2 - d.num_live_items * 3 <= 0:
-        new_size *= 2
+    # Use the smallest acceptable size for ll_dict_reindex, which is
+    # no index at all for small dicts
+    new_size = 0
+    if d.num_live_items > SMALL_DICT_SIZE:
+        new_size = DICT_INITSIZE
+        while new_size * 2 - d.num_live_items * 3 <= 0:
+            new_size *= 2
     ll_dict_reindex(d, new_size)
 
 def ll_dict_reindex(d, new_size):
+    # 'new_size' is 0 for small dicts: they stay without index, unless
+    # 'entries' has grown too big
+    if new_size == 0:
+        if len(d.entries) <= SMALL_DICT_SIZE:
+            ll_no_index_small(d)
+            return
+        new_size = DICT_INITSIZE
     if bool(d.indexes) and _ll_len_of_d_indexes(d) == new_size:
         ll_clear_indexes(d, new_size)   # hack: we can reuse the same array
     else:
@@ -1110,6 +1164,49 @@ def ll_dict_delete_by_entry_index(d, hash, locate_index, replace_with, T):
         perturb >>= PERTURB_SHIFT
     indexes[i] = rffi.cast(T, replace_with)
 
+@jit.look_inside_iff(lambda d, key, hash, store_flag:
+                     jit.isvirtual(d) and jit.isconstant(key))
+@jit.oopspec('ordereddict.lookup(d, key, hash, store_flag)')
+def ll_dict_lookup_small(d, key, hash, store_flag):
+    # The lookup in a small dict, which has no index: a linear search
+    # in 'entries'.  There is nothing to reserve if 'store_flag' is
+    # FLAG_STORE; the new entry is simply added at the end.
+    entries = d.entries
+    ENTRIES = lltype.typeOf(entries).TO
+    direct_compare = not hasattr(ENTRIES, 'no_direct_compare')
+    # if the hashes are stored, compare them first: a missing key then
+    # costs only one integer comparison per entry
+    cached_hash = hasattr(ENTRIES.OF, 'f_hash')
+    # most dicts don't have deleted entries: then we don't need to call
+    # valid(), which may compare the value with a dummy
+    all_valid = d.num_live_items == d.num_ever_used_items
+    i = 0
+    while i < d.num_ever_used_items:
+        if cached_hash and entries.hash(i) != hash:
+            pass
+        elif all_valid or entries.valid(i):
+            checkingkey = entries[i].key
+            if direct_compare and checkingkey == key:
+                return i   # found the entry
+            if d.keyeq is not None and (cached_hash or
+                                        entries.hash(i) == hash):
+                # correct hash, maybe the key is e.g. a different pointer to
+                # an equal object
+                found = d.keyeq(checkingkey, key)
+                if d.paranoia:
+                    if (entries != d.entries or
+                        (d.lookup_function_no & FUNC_MASK) != FUNC_SMALL or
+                        not entries.valid(i) or
+                        entries[i].key != checkingkey):
+                        # the compare did major nasty stuff to the dict:
+                        # start over, maybe the dict has got an index now
+                        return ll_call_lookup_function(d, key, hash,
+                                                       store_flag)
+                if found:
+                    return i
+        i += 1
+    return -1
+
 # ____________________________________________________________
 #
 #  Irregular operations.
@@ -1118,6 +1215,12 @@ def ll_dict_delete_by_entry_index(d, hash, locate_index, replace_with, T):
 # it is only an array of bytes
 DICT_INITSIZE = 16
 
+# Dicts with up to this number of entries have no index.  This is also
+# the size of 'entries' after the first growth of a small dict, see
+# ll_dict_grow().  Kept low because looking up a missing key must read
+# the entries, while with an index it usually only reads an empty slot.
+SMALL_DICT_SIZE = 4
+
 
 @specialize.memo()
 def _ll_empty_array(DICT):
@@ -1131,20 +1234,23 @@ def ll_newdict(DICT):
     # program contains tons of empty dicts, so this might be a memory win.
     d.num_live_items = 0
     d.num_ever_used_items = 0
-    ll_no_initial_index(d)
+    ll_no_index_small(d)
     return d
 OrderedDictRepr.ll_newdict = staticmethod(ll_newdict)
 
 def ll_newdict_size(DICT, orig_length_estimate):
+    d = DICT.allocate()
+    d.entries = DICT.entries.TO.allocate(orig_length_estimate)
+    d.num_live_items = 0
+    d.num_ever_used_items = 0
+    if orig_length_estimate <= SMALL_DICT_SIZE:
+        ll_no_index_small(d)
+        return d
     length_estimate = (orig_length_estimate // 2) * 3
     n = DICT_INITSIZE
     while n < length_estimate:
         n *= 2
-    d = DICT.allocate()
-    d.entries = DICT.entries.TO.allocate(orig_length_estimate)
     ll_malloc_indexes_and_choose_lookup(d, n)
-    d.num_live_items = 0
-    d.num_ever_used_items = 0
     d.resize_counter = n * 2
     return d
 
@@ -1291,14 +1397,19 @@ def ll_dict_clear(d):
     DICT = lltype.typeOf(d).TO
     old_entries = d.entries
     d.entries = _ll_empty_array(DICT)
+    d.num_live_items = 0
+    d.num_ever_used_items = 0
     # note: we can't remove the index here, because it is possible that
     # crazy Python code calls d.clear() from the method __eq__() called
     # from ll_dict_lookup(d).  Instead, stick to the rule that once a
-    # dictionary has got an index, it will always have one.
-    ll_malloc_indexes_and_choose_lookup(d, DICT_INITSIZE)
-    d.num_live_items = 0
-    d.num_ever_used_items = 0
-    d.resize_counter = DICT_INITSIZE * 2
+    # dictionary has got an index, it will always have one.  Small
+    # dicts, and prebuilt dicts that were never used, stay without one.
+    fun = d.lookup_function_no & FUNC_MASK
+    if fun == FUNC_SMALL or fun == FUNC_MUST_REINDEX:
+        ll_no_index_small(d)
+    else:
+        ll_malloc_indexes_and_choose_lookup(d, DICT_INITSIZE)
+        d.resize_counter = DICT_INITSIZE * 2
     # old_entries.delete() XXX
 ll_dict_clear.oopspec = 'odict.clear(d)'
 
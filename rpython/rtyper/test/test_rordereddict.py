@@ -30,6 +30,10 @@ def count_items(ll_d, ITEM):
             c += 1
     return c
 
+def newdict_with_index(DICT):
+    # small dicts have no index: make one that has it from the start
+    return rordereddict.ll_newdict_size(DICT, rordereddict.SMALL_DICT_SIZE + 1)
+
 
 class TestRDictDirect(object):
     dummykeyobj = None
@@ -47,7 +51,7 @@ class TestRDictDirect(object):
 
     def test_dict_creation(self):
         DICT = self._get_str_dict()
-        ll_d = rordereddict.ll_newdict(DICT)
+        ll_d = newdict_with_index(DICT)
         lls = llstr("abc")
         rordereddict.ll_dict_setitem(ll_d, lls, 13)
         assert count_items(ll_d, rordereddict.FREE) == rordereddict.DICT_INITSIZE - 1
@@ -93,7 +97,7 @@ class TestRDictDirect(object):
 
     def test_dict_del_lastitem(self):
         DICT = self._get_str_dict()
-        ll_d = rordereddict.ll_newdict(DICT)
+        ll_d = newdict_with_index(DICT)
         py.test.raises(KeyError, rordereddict.ll_dict_delitem, ll_d, llstr("abc"))
         rordereddict.ll_dict_setitem(ll_d, llstr("abc"), 13)
         py.test.raises(KeyError, rordereddict.ll_dict_delitem, ll_d, llstr("def"))
@@ -104,7 +108,7 @@ class TestRDictDirect(object):
 
     def test_dict_del_not_lastitem(self):
         DICT = self._get_str_dict()
-        ll_d = rordereddict.ll_newdict(DICT)
+        ll_d = newdict_with_index(DICT)
         rordereddict.ll_dict_setitem(ll_d, llstr("abc"), 13)
         rordereddict.ll_dict_setitem(ll_d, llstr("def"), 15)
         rordereddict.ll_dict_delitem(ll_d, llstr("abc"))
@@ -202,10 +206,10 @@ class TestRDictDirect(object):
         ll_key = ll_d.entries[num].key
         assert hlstr(ll_key) == "j"
         assert ll_d.lookup_function_no == (   # 1 free item found at the start
-            (1 << rordereddict.FUNC_SHIFT) | rordereddict.FUNC_BYTE)
+            (1 << rordereddict.FUNC_SHIFT) | rordereddict.FUNC_SMALL)
         rordereddict.ll_dict_delitem(ll_d, llstr("j"))
         assert ll_d.num_ever_used_items == 0
-        assert ll_d.lookup_function_no == rordereddict.FUNC_BYTE   # reset
+        assert ll_d.lookup_function_no == rordereddict.FUNC_SMALL   # reset
 
     def _get_int_dict(self):
         def eq(a, b):
@@ -218,7 +222,7 @@ class TestRDictDirect(object):
 
     def test_direct_enter_and_del(self):
         DICT = self._get_int_dict()
-        ll_d = rordereddict.ll_newdict(DICT)
+        ll_d = newdict_with_index(DICT)
         numbers = [i * rordereddict.DICT_INITSIZE + 1 for i in range(8)]
         for num in numbers:
             rordereddict.ll_dict_setitem(ll_d, num, 1)
@@ -313,7 +317,7 @@ class TestRDictDirect(object):
 
     def test_bug_resize_counter(self):
         DICT = self._get_int_dict()
-        ll_d = rordereddict.ll_newdict(DICT)
+        ll_d = newdict_with_index(DICT)
         rordereddict.ll_dict_setitem(ll_d, 0, 0)
         rordereddict.ll_dict_delitem(ll_d, 0)
         rordereddict.ll_dict_setitem(ll_d, 0, 0)
@@ -342,6 +346,78 @@ class TestRDictDirect(object):
             num_nonfrees += (got > 0)
         assert d.resize_counter <= idx.getlength() * 2 - num_nonfrees * 3
 
+    def test_small_dict_has_no_index(self):
+        DICT = self._get_str_dict()
+        ll_d = rordereddict.ll_newdict(DICT)
+        for i in range(rordereddict.SMALL_DICT_SIZE):
+            rordereddict.ll_dict_setitem(ll_d, llstr(str(i)), i)
+            assert not ll_d.indexes
+            assert ll_d.lookup_function_no == rordereddict.FUNC_SMALL
+        for i in range(rordereddict.SMALL_DICT_SIZE):
+            assert rordereddict.ll_dict_getitem(ll_d, llstr(str(i))) == i
+        assert not rordereddict.ll_dict_contains(ll_d, llstr("x"))
+        # one more item: the dict gets an index
+        rordereddict.ll_dict_setitem(ll_d, llstr("x"), 42)
+        assert len(get_indexes(ll_d)) == rordereddict.DICT_INITSIZE
+        assert count_items(ll_d, rordereddict.FREE) == (
+            rordereddict.DICT_INITSIZE - rordereddict.SMALL_DICT_SIZE - 1)
+        for i in range(rordereddict.SMALL_DICT_SIZE):
+            assert rordereddict.ll_dict_getitem(ll_d, llstr(str(i))) == i
+        assert rordereddict.ll_dict_getitem(ll_d, llstr("x")) == 42
+
+    def test_small_dict_stays_small(self):
+        DICT = self._get_int_dict()
+        ll_d = rordereddict.ll_newdict(DICT)
+        n = rordereddict.SMALL_DICT_SIZE - 2
+        for i in range(n):
+            rordereddict.ll_dict_setitem(ll_d, i, i)
+        # deleting and adding keys compacts the entries instead of
+        # giving the dict an index
+        for i in range(n, 100):
+            rordereddict.ll_dict_setitem(ll_d, i, i)
+            rordereddict.ll_dict_delitem(ll_d, i - n)
+            rordereddict.ll_dict_setitem(ll_d, 1000, i)
+            rordereddict.ll_dict_delitem(ll_d, 1000)
+        assert not ll_d.indexes
+        assert ll_d.num_live_items == n
+        assert len(ll_d.entries) == rordereddict.SMALL_DICT_SIZE
+        for i in range(100 - n, 100):
+            assert rordereddict.ll_dict_getitem(ll_d, i) == i
+        # so does clear()
+        rordereddict.ll_dict_clear(ll_d)
+        assert not ll_d.indexes
+        assert ll_d.lookup_function_no == rordereddict.FUNC_SMALL
+
+    def test_small_dict_copy(self):
+        DICT = self._get_str_dict()
+        ll_d = rordereddict.ll_newdict(DICT)
+        rordereddict.ll_dict_setitem(ll_d, llstr("k"), 1)
+        rordereddict.ll_dict_setitem(ll_d, llstr("j"), 2)
+        rordereddict.ll_dict_delitem(ll_d, llstr("k"))
+        ll_d2 = rordereddict.ll_dict_copy(ll_d)
+        assert not ll_d2.indexes
+        assert ll_d2.lookup_function_no == rordereddict.FUNC_SMALL
+        assert rordereddict.ll_dict_getitem(ll_d2, llstr("j")) == 2
+        assert not rordereddict.ll_dict_contains(ll_d2, llstr("k"))
+
+    def test_small_dict_update_presizes(self):
+        DICT = self._get_int_dict()
+        ll_d = rordereddict.ll_newdict(DICT)
+        rordereddict.ll_prepare_dict_update(ll_d, 3)
+        assert not ll_d.indexes
+        rordereddict.ll_prepare_dict_update(ll_d, 20)
+        assert len(get_indexes(ll_d)) == 64
+
+    def test_prebuilt_small_dict(self):
+        DICT = self._get_str_dict()
+        ll_d = rordereddict.ll_newdict_size(DICT, 3)
+        for key in ["a", "b", "c"]:
+            rordereddict._ll_dict_insert_no_index(ll_d, llstr(key), ord(key))
+        rordereddict.ll_no_initial_index(ll_d)
+        assert rordereddict.ll_dict_getitem(ll_d, llstr("b")) == ord("b")
+        assert not ll_d.indexes
+        assert ll_d.lookup_function_no == rordereddict.FUNC_SMALL
+
     @given(strategies.lists(strategies.integers(min_value=1, max_value=5)))
     def test_direct_move_to_end(self, lst):
         DICT = self._get_int_dict()
@@ -510,6 +586,10 @@ class ODictSpace(MappingSpace):
         fun = d.lookup_function_no & rordereddict.FUNC_MASK
         if fun == rordereddict.FUNC_MUST_REINDEX:
             assert not d.indexes
+        elif fun == rordereddict.FUNC_SMALL:
+            assert not d.indexes
+            assert len(d.entries) <= rordereddict.SMALL_DICT_SIZE
+            assert d.resize_counter > 0
         else:
             assert d.indexes
             idx = d.indexes._obj.container
@@ -31,6 +31,11 @@ typedef enum RPyLockStatus {
 RPY_EXTERN void RPyGilAllocate(void);
 RPY_EXTERN long RPyGilYieldThread(void);
 RPY_EXTERN void RPyGilAcquireSlowPath(long);
+RPY_EXTERN long RPyGilYieldThreadIfRequested(void);
+RPY_EXTERN void RPyGilSetSwitchInterval(double);
+RPY_EXTERN long RPyGilGetStat(long);
+RPY_EXTERN double RPyGilGetWaitTime(void);
+RPY_EXTERN void RPyGilResetStats(void);
 #define RPyGilAcquire _RPyGilAcquire
 #define RPyGilRelease _RPyGilRelease
 #define RPyFetchFastGil _RPyFetchFastGil
@@ -42,11 +47,17 @@ RPY_EXTERN void RPyGilAcquireSlowPath(long);
 #endif
 
 RPY_EXTERN long rpy_fastgil;
+RPY_EXTERN long rpy_gil_acquisitions;
 
 static inline void _RPyGilAcquire(void) {
     long old_fastgil = pypy_lock_test_and_set(&rpy_fastgil, 1);
     if (old_fastgil != 0)
         RPyGilAcquireSlowPath(old_fastgil);
+    /* we hold the GIL now.  Note that the JIT's inline reacquire after a
+       call_release_gil doesn't come here when it finds the GIL free, so
+       this counts only the acquisitions done by C code or by the JIT's
+       slow path (see jit/backend/llsupport/assembler.py) */
+    rpy_gil_acquisitions++;
 }
 static inline void _RPyGilRelease(void) {
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
@@ -34,6 +34,12 @@
      explicitly yield the GIL to thread 2: it does so by releasing
      'mutex_gil' (which is otherwise not released) but keeping the
      value of 'rpy_fastgil' to 1.
+
+   - If a switch interval is set, the thread that waits as the stealer
+     for longer than this interval sets 'rpy_gil_drop_request'.  The
+     thread with the GIL checks it periodically and only yields if it
+     is set, in RPyGilYieldThreadIfRequested().  This makes the time
+     slices independent of how fast the bytecodes run.
 */
 
 
@@ -48,6 +54,17 @@ static volatile int rpy_early_poll_n = 0;
 static mutex1_t mutex_gil_stealer;
 static mutex2_t mutex_gil;
 
+static double rpy_gil_switch_interval = 0.0;    /* 0.0: disabled */
+static volatile long rpy_gil_drop_request = 0;
+
+/* statistics, only modified by the thread that holds the GIL.
+   'rpy_gil_acquisitions' is not bumped by the JIT's inline fast path
+   that reacquires a free GIL after a call_release_gil. */
+long rpy_gil_acquisitions = 0;
+static long rpy_gil_waits = 0;
+static long rpy_gil_forced_switches = 0;
+static double rpy_gil_wait_time = 0.0;
+
 
 static void rpy_init_mutexes(void)
 {
@@ -106,6 +123,7 @@ void RPyGilAcquireSlowPath(long old_fastgil)
         /* Otherwise, another thread is busy with the GIL. */
         int n;
         long old_waiting_threads;
+        double start_time = rpy_gil_now();
 
         if (rpy_waiting_threads < 0) {
             /* <arigo> I tried to have RPyGilAllocate() called from
@@ -204,11 +222,22 @@ void RPyGilAcquireSlowPath(long old_fastgil)
                 old_fastgil = 0;
                 break;
             }
+            /* Ask the thread with the GIL to yield it if we waited for
+               too long.
+            */
+            if (rpy_gil_switch_interval > 0.0 && !rpy_gil_drop_request &&
+                    rpy_gil_now() - start_time >= rpy_gil_switch_interval)
+                rpy_gil_drop_request = 1;
             /* Loop back. */
         }
         atomic_decrement(&rpy_waiting_threads);
         mutex2_loop_stop(&mutex_gil);
         mutex1_unlock(&mutex_gil_stealer);
+
+        /* We have the GIL now. */
+        rpy_gil_drop_request = 0;
+        rpy_gil_waits++;
+        rpy_gil_wait_time += rpy_gil_now() - start_time;
     }
     check_and_save_old_fastgil(old_fastgil);
 }
@@ -233,9 +262,48 @@ long RPyGilYieldThread(void)
        unlikely, because we tested above that 'rpy_waiting_threads > 0'.
      */
     RPyGilAcquire();
+    rpy_gil_forced_switches++;
     return 1;
 }
 
+long RPyGilYieldThreadIfRequested(void)
+{
+    /* like RPyGilYieldThread(), but only if a thread waited for longer
+       than the switch interval */
+    if (!rpy_gil_drop_request)
+        return 0;
+    return RPyGilYieldThread();
+}
+
+void RPyGilSetSwitchInterval(double interval)
+{
+    rpy_gil_switch_interval = interval;
+    rpy_gil_drop_request = 0;
+}
+
+long RPyGilGetStat(long index)
+{
+    switch (index) {
+    case 0: return rpy_gil_acquisitions;
+    case 1: return rpy_gil_waits;
+    case 2: return rpy_gil_forced_switches;
+    default: return -1;
+    }
+}
+
+double RPyGilGetWaitTime(void)
+{
+    return rpy_gil_wait_time;
+}
+
+void RPyGilResetStats(void)
+{
+    rpy_gil_acquisitions = 0;
+    rpy_gil_waits = 0;
+    rpy_gil_forced_switches = 0;
+    rpy_gil_wait_time = 0.0;
+}
+
 /********** for tests only **********/
 
 /* These functions are usually defined as a macros RPyXyz() in thread.h
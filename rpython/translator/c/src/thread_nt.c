@@ -208,6 +208,19 @@ long RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 
 typedef HANDLE mutex2_t;   /* a semaphore, on Windows */
 
+static inline double rpy_gil_now(void)
+{
+    /* a clock in seconds, only used to measure durations */
+    static double frequency = 0.0;
+    LARGE_INTEGER t;
+    if (frequency == 0.0) {
+        QueryPerformanceFrequency(&t);
+        frequency = (double)t.QuadPart;
+    }
+    QueryPerformanceCounter(&t);
+    return (double)t.QuadPart / frequency;
+}
+
 static void gil_fatal(const char *msg) {
     fprintf(stderr, "Fatal error in the GIL: %s\n", msg);
     abort();
@@ -481,6 +481,20 @@ long RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
         abort();                                        \
     }
 
+static inline double rpy_gil_now(void)
+{
+    /* a clock in seconds, only used to measure durations */
+#ifdef CLOCK_MONOTONIC
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+#else
+    struct timeval tv;
+    RPY_GETTIMEOFDAY(&tv);
+    return tv.tv_sec + tv.tv_usec * 1e-6;
+#endif
+}
+
 static inline void timespec_delay(struct timespec *t, double incr)
 {
 #ifdef CLOCK_REALTIME
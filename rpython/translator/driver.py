@@ -193,6 +193,10 @@ class TranslationDriver(SimpleTaskEngine):
         else:
             translator = TranslationContext(config=self.config)
 
+        if 'get_gchooks' in self.extra:
+            # an instance of rpython.memory.gc.hook.GcHooks, called by the GC
+            translator._gchooks = self.extra['get_gchooks']()
+
         self.entry_point = entry_point
         self.translator = translator
         self.libdef = None
@@ -305,6 +309,10 @@ class TranslationDriver(SimpleTaskEngine):
 
         annotator = translator.buildannotator(policy=policy)
 
+        if hasattr(translator, '_gchooks'):
+            from rpython.memory.gc.hook import annotate_gchooks
+            annotate_gchooks(annotator, translator._gchooks)
+
         if self.secondary_entrypoints is not None:
             for func, inputtypes in self.secondary_entrypoints:
                 if inputtypes == Ellipsis:
@@ -2,7 +2,7 @@
 
 import sys
 from time import time
-from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rbigint import rbigint, _x_divrem, _muladd1, DEC_MAX
 
 # __________  Entry point  __________
 
@@ -252,9 +252,66 @@ def entry_point(argv):
     print "v = v + v", _time
     
     print "Sum: ", sumTime
-    
+
+    bench_huge()
     return 0
 
+def _decimalstr_to_bigint_schoolbook(s):
+    # the conversion used before the recursive one, for comparison
+    a = rbigint()
+    tens = 1
+    dig = 0
+    for c in s:
+        dig = dig * 10 + ord(c) - ord('0')
+        tens *= 10
+        if tens == DEC_MAX:
+            a = _muladd1(a, tens, dig)
+            tens = 1
+            dig = 0
+    if tens > 1:
+        a = _muladd1(a, tens, dig)
+    return a
+
+def bench_huge():
+    """
+        Huge numbers (decimal digits), the recursive algorithms vs. the
+        schoolbook ones.  The divmod by 1000 digits is below DIV_LIMIT and
+        so uses the schoolbook division in both cases.
+
+        divmod, 200000 by 100000 digits:  0.039246 vs. 0.077434
+        divmod, 1000000 by 500000 digits:  0.268737 vs. 2.266616
+        divmod, 100000 by 1000 digits:  0.001156 vs. 0.001126
+        str -> long, 100000 digits:  0.019689 vs. 0.048029
+        str -> long, 1000000 digits:  0.749915 vs. 5.470798
+        long -> str, 100000 digits:  0.032963
+    """
+    for na, nb in [(200000, 100000), (1000000, 500000), (100000, 1000)]:
+        a = rbigint.fromint(7).pow(rbigint.fromint(int(na * 1.1833)))
+        b = rbigint.fromint(3).pow(rbigint.fromint(int(nb * 2.0959)))
+        t = time()
+        rbigint.divmod(a, b)
+        _time = time() - t
+        t = time()
+        _x_divrem(a, b)
+        _time2 = time() - t
+        print "divmod, %d by %d digits: " % (na, nb), _time, "vs.", _time2
+
+    for n in [100000, 1000000]:
+        s = "1234567890" * (n // 10)
+        t = time()
+        rbigint.fromdecimalstr(s)
+        _time = time() - t
+        t = time()
+        _decimalstr_to_bigint_schoolbook(s)
+        _time2 = time() - t
+        print "str -> long, %d digits: " % n, _time, "vs.", _time2
+
+    num = rbigint.fromdecimalstr("1234567890" * 10000)
+    t = time()
+    num.str()
+    _time = time() - t
+    print "long -> str, 100000 digits: ", _time
+
 # _____ Define and setup target ___
 
 def target(*args):
@@ -0,0 +1,174 @@
+#! /usr/bin/env python
+"""
+Memory and speed of RPython dicts, over a distribution of sizes close
+to the one seen in PyPy's heap: most dicts have between 1 and 8 items.
+
+Usage:  targetdictbench-c [num_dicts [repeat]]
+
+Results on x86-64, 200000 dicts (85% with at most 8 items), translated
+with -O2, before and after small dicts without index (SMALL_DICT_SIZE in
+rordereddict.py):
+
+                                    index always   no index if small
+    memory, str keys:                  86.8 MB           80.0 MB
+    memory, int keys:                  86.8 MB           80.0 MB
+    build + 3 lookups, str keys:       0.128 s           0.127 s
+    build + 3 lookups, int keys:       0.119 s           0.117 s
+    lookups of missing keys:           0.0021 s          0.0035 s
+    iteration:                         0.0075 s          0.0080 s
+
+A missing key costs a scan of all the entries of a small dict, instead
+of usually a single probe in the index.  This is why SMALL_DICT_SIZE is
+only 4: with 8, missing keys took 0.0045 s and the bigger entries of
+the dicts with 1 to 4 items made everything else slower.
+"""
+
+import time
+from rpython.rlib import rgc
+from rpython.rlib.rarithmetic import intmask
+
+# (percentage, minimum size, maximum size)
+SIZE_DISTRIBUTION = [(35, 1, 2),
+                     (30, 3, 5),
+                     (20, 6, 8),
+                     (12, 9, 32),
+                     (3, 33, 500)]
+
+
+class Random(object):
+    # a small LCG, so that all runs use the same dict sizes
+    def __init__(self, seed):
+        self.state = seed
+
+    def next(self, n):
+        self.state = intmask(self.state * 1103515245 + 12345) & 0x7fffffff
+        return (self.state >> 8) % n
+
+def make_sizes(num_dicts):
+    rnd = Random(42)
+    sizes = [0] * num_dicts
+    for i in range(num_dicts):
+        p = rnd.next(100)
+        for percentage, lo, hi in SIZE_DISTRIBUTION:
+            if p < percentage:
+                sizes[i] = lo + rnd.next(hi - lo + 1)
+                break
+            p -= percentage
+    return sizes
+
+KEYS = ["key%d" % i for i in range(500)]
+
+
+def build_str_dicts(sizes):
+    dicts = []
+    for size in sizes:
+        d = {}
+        for j in range(size):
+            d[KEYS[j]] = j
+        dicts.append(d)
+    return dicts
+
+def build_int_dicts(sizes):
+    dicts = []
+    for size in sizes:
+        d = {}
+        for j in range(size):
+            d[j * 7] = j
+        dicts.append(d)
+    return dicts
+
+def lookup_str_dicts(dicts, sizes):
+    total = 0
+    for i in range(len(dicts)):
+        d = dicts[i]
+        for j in range(sizes[i]):
+            total += d[KEYS[j]]
+    return total
+
+def lookup_int_dicts(dicts, sizes):
+    total = 0
+    for i in range(len(dicts)):
+        d = dicts[i]
+        for j in range(sizes[i]):
+            total += d[j * 7]
+    return total
+
+def lookup_missing(dicts):
+    total = 0
+    for d in dicts:
+        if "missing" in d:
+            total += 1
+    return total
+
+def iterate(dicts):
+    total = 0
+    for d in dicts:
+        for value in d.itervalues():
+            total += value
+    return total
+
+
+def memory_used():
+    rgc.collect()
+    return rgc.get_stats(rgc.TOTAL_MEMORY)
+
+def bench(num_dicts, repeat):
+    sizes = make_sizes(num_dicts)
+    small = 0
+    for size in sizes:
+        if size <= 8:
+            small += 1
+    print "%d dicts, %d of them with at most 8 items" % (num_dicts, small)
+    #
+    m0 = memory_used()
+    str_dicts = build_str_dicts(sizes)
+    m1 = memory_used()
+    int_dicts = build_int_dicts(sizes)
+    m2 = memory_used()
+    # (the dicts must still be alive when measuring m2)
+    assert len(str_dicts) == len(int_dicts) == num_dicts
+    print "memory, str keys (KB):", (m1 - m0) // 1024
+    print "memory, int keys (KB):", (m2 - m1) // 1024
+    #
+    t_str = t_int = t_missing = t_iter = 0.0
+    for r in range(repeat):
+        t0 = time.time()
+        str_dicts = build_str_dicts(sizes)
+        for k in range(3):
+            lookup_str_dicts(str_dicts, sizes)
+        t1 = time.time()
+        int_dicts = build_int_dicts(sizes)
+        for k in range(3):
+            lookup_int_dicts(int_dicts, sizes)
+        t2 = time.time()
+        lookup_missing(str_dicts)
+        t3 = time.time()
+        iterate(int_dicts)
+        t4 = time.time()
+        t_str += t1 - t0
+        t_int += t2 - t1
+        t_missing += t3 - t2
+        t_iter += t4 - t3
+    print "build + 3 lookups, str keys:", t_str / repeat
+    print "build + 3 lookups, int keys:", t_int / repeat
+    print "lookups of missing keys:", t_missing / repeat
+    print "iteration:", t_iter / repeat
+
+def entry_point(argv):
+    num_dicts = 200000
+    repeat = 10
+    if len(argv) > 1:
+        num_dicts = int(argv[1])
+    if len(argv) > 2:
+        repeat = int(argv[2])
+    bench(num_dicts, repeat)
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    import sys
+    entry_point(sys.argv)
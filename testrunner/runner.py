@@ -188,6 +188,7 @@ def worker(num, n, run_param, testdirs, result_queue):
         one_output = sessdir.join("%d-%s-output" % (num, basename))
         num += n
 
+        t0 = time.time()
         try:
             test_driver = get_test_driver(test)
             exitcode = execute_test(root, test, one_output, logfname,
@@ -200,6 +201,7 @@ def worker(num, n, run_param, testdirs, result_queue):
             import traceback
             traceback.print_exc()
             exitcode = EXECUTEFAILED
+        duration = time.time() - t0
 
         if one_output.check(file=1):
             output = one_output.read(READ_MODE)
@@ -215,7 +217,7 @@ def worker(num, n, run_param, testdirs, result_queue):
         if extralog:
             logdata += extralog
 
-        result_queue.put(('done', test, failure, logdata, output))
+        result_queue.put(('done', test, failure, logdata, output, duration))
 
 invoke_in_thread = thread.start_new_thread
 
@@ -227,7 +229,7 @@ def start_workers(n, run_param, testdirs):
     return result_queue
 
 
-def execute_tests(run_param, testdirs, logfile, out):
+def execute_tests(run_param, testdirs, logfile, out, timings=None):
     sessdir = py.path.local.make_numbered_dir(prefix='usession-testrunner-',
                                               keep=4)
     run_param.sessdir = sessdir
@@ -269,12 +271,14 @@ def execute_tests(run_param, testdirs, logfile, out):
                                                                   started))
             continue
 
-        testname, somefailed, logdata, output = res[1:]
+        testname, somefailed, logdata, output, duration = res[1:]
         done += 1
+        if timings is not None and not run_param.dry_run:
+            timings[testname] = duration
         failure = failure or somefailed
 
-        heading = "__ %s [%d done in total, somefailed=%s] " % (
-            testname, done, somefailed)
+        heading = "__ %s [%d done in total, somefailed=%s, %.1fs] " % (
+            testname, done, somefailed, duration)
 
         out.write(heading + (79-len(heading))*'_'+'\n')
 
@@ -286,6 +290,85 @@ def execute_tests(run_param, testdirs, logfile, out):
 
     return failure
 
+# ____________________________________________________________
+# durations of the test dirs from previous runs, used to start the
+# slow ones first and to split a run into balanced shards
+
+def load_timings(fname):
+    timings = {}
+    if not os.path.exists(fname):
+        return timings
+    f = open(fname, READ_MODE)
+    try:
+        for line in f:
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                continue
+            try:
+                duration = float(parts[0])
+            except ValueError:
+                continue
+            timings[parts[1].strip()] = duration
+    finally:
+        f.close()
+    return timings
+
+def save_timings(fname, timings):
+    f = open(fname + '.tmp', WRITE_MODE)
+    try:
+        for testdir in sorted(timings):
+            f.write("%.3f %s\n" % (timings[testdir], testdir))
+    finally:
+        f.close()
+    if os.path.exists(fname) and sys.platform == 'win32':
+        os.unlink(fname)
+    os.rename(fname + '.tmp', fname)
+
+def estimate_durations(testdirs, timings):
+    # test dirs that were never run before are assumed to take the
+    # average time of the known ones
+    known = [timings[testdir] for testdir in testdirs if testdir in timings]
+    if known:
+        default = sum(known) / len(known)
+    else:
+        default = 1.0
+    return [timings.get(testdir, default) for testdir in testdirs]
+
+def order_by_duration(testdirs, timings):
+    """Return the test dirs sorted longest-first, so that the workers
+    don't end up waiting for a slow dir that was started last.  Dirs
+    with the same expected duration keep their collection order."""
+    durations = estimate_durations(testdirs, timings)
+    order = sorted(range(len(testdirs)), key=lambda i: -durations[i])
+    return [testdirs[i] for i in order]
+
+def select_shard(testdirs, timings, index, count):
+    """Split the test dirs into 'count' shards of about the same total
+    duration, and return the ones of shard 'index' (0-based).  The split
+    only depends on the arguments, so every member of a CI fan-out
+    computes the same shards from the same timings file."""
+    durations = estimate_durations(testdirs, timings)
+    order = sorted(range(len(testdirs)), key=lambda i: -durations[i])
+    totals = [0.0] * count
+    shards = [[] for i in range(count)]
+    for i in order:
+        j = totals.index(min(totals))
+        totals[j] += durations[i]
+        shards[j].append(i)
+    return [testdirs[i] for i in sorted(shards[index])]
+
+def parse_shard(shard):
+    # "i/N", with i counting from 1
+    try:
+        index, count = shard.split('/')
+        index = int(index)
+        count = int(count)
+    except ValueError:
+        raise ValueError("--shard expects i/N, got %r" % (shard,))
+    if not 1 <= index <= count:
+        raise ValueError("--shard %s: index out of range" % (shard,))
+    return index - 1, count
+
 
 class RunParam(object):
     dry_run = False
@@ -299,6 +382,7 @@ class RunParam(object):
     parallel_runs = 1
     timeout = None
     cherrypick = None
+    timings_file = None
 
     def __init__(self, root):
         self.root = root
@@ -372,9 +456,22 @@ def main(args):
     parser.add_option("--timeout", dest="timeout", default=None,
                       type="int",
                       help="timeout in secs for test processes")
+    parser.add_option("--timings", dest="timings", default=None,
+                      help="file recording the duration of each test dir; "
+                           "read to schedule the slowest dirs first, and "
+                           "updated after the run")
+    parser.add_option("--shard", dest="shard", default=None,
+                      help="only run part i/N of the test dirs, balanced "
+                           "by their recorded durations")
 
     opts, args = parser.parse_args(args)
 
+    if opts.shard is not None:
+        try:
+            shard = parse_shard(opts.shard)
+        except ValueError, e:
+            parser.error(str(e))
+
     if opts.logfile is None:
         print "no logfile specified"
         sys.exit(2)
@@ -413,12 +510,28 @@ def main(args):
     if opts.timeout:
         run_param.timeout = opts.timeout
     run_param.dry_run = opts.dry_run
+    if opts.timings:
+        run_param.timings_file = opts.timings
+
+    if run_param.timings_file:
+        timings = load_timings(run_param.timings_file)
+    else:
+        timings = {}
+    if opts.shard is not None:
+        ntotal = len(testdirs)
+        testdirs = select_shard(testdirs, timings, shard[0], shard[1])
+        print >>out, "shard %s: %d of %d test dirs" % (opts.shard,
+                                                       len(testdirs), ntotal)
+    testdirs = order_by_duration(testdirs, timings)
 
     if run_param.dry_run:
         print >>out, '\n'.join([str((k, getattr(run_param, k))) \
                         for k in dir(run_param) if k[:2] != '__'])
 
-    res = execute_tests(run_param, testdirs, logfile, out)
+    res = execute_tests(run_param, testdirs, logfile, out, timings)
+
+    if run_param.timings_file and not run_param.dry_run:
+        save_timings(run_param.timings_file, timings)
 
     if res:
         sys.exit(1)
@@ -53,6 +53,48 @@ def test_should_report_failure():
     assert not should_report_failure("F Def\n. Ghi\n. Jkl\n")
 
 
+def test_timings_roundtrip(tmpdir):
+    fname = str(tmpdir.join('timings'))
+    assert runner.load_timings(fname) == {}
+    timings = {'module/foo/test': 12.5, 'interpreter/test': 0.25}
+    runner.save_timings(fname, timings)
+    assert runner.load_timings(fname) == timings
+    # garbage lines are ignored
+    tmpdir.join('timings').write("3.0 a/test\nxyz\n\nnan? b/test\n")
+    assert runner.load_timings(fname) == {'a/test': 3.0}
+
+def test_order_by_duration():
+    timings = {'a': 1.0, 'b': 10.0, 'c': 5.0, 'd': 5.0}
+    res = runner.order_by_duration(['a', 'b', 'c', 'd'], timings)
+    assert res == ['b', 'c', 'd', 'a']
+    # unknown dirs are assumed to take the average time
+    res = runner.order_by_duration(['a', 'b', 'x', 'd'], timings)
+    assert res == ['b', 'x', 'd', 'a']
+    # without timings, the collection order is kept
+    assert runner.order_by_duration(['c', 'a', 'b'], {}) == ['c', 'a', 'b']
+
+def test_select_shard():
+    testdirs = ['t%d' % i for i in range(10)]
+    timings = dict([('t%d' % i, float(i + 1)) for i in range(10)])
+    shards = [runner.select_shard(testdirs, timings, i, 3) for i in range(3)]
+    assert sorted(sum(shards, [])) == sorted(testdirs)
+    totals = [sum([timings[t] for t in shard]) for shard in shards]
+    assert max(totals) - min(totals) <= 1.0
+    for shard in shards:
+        assert shard == [t for t in testdirs if t in shard]
+    assert runner.select_shard(testdirs, timings, 0, 1) == testdirs
+    # without timings, the dirs are spread evenly
+    shards = [runner.select_shard(testdirs, {}, i, 4) for i in range(4)]
+    assert sorted(map(len, shards)) == [2, 2, 3, 3]
+
+def test_parse_shard():
+    assert runner.parse_shard('1/4') == (0, 4)
+    assert runner.parse_shard('4/4') == (3, 4)
+    py.test.raises(ValueError, runner.parse_shard, '0/4')
+    py.test.raises(ValueError, runner.parse_shard, '5/4')
+    py.test.raises(ValueError, runner.parse_shard, '1')
+    py.test.raises(ValueError, runner.parse_shard, 'a/b')
+
 
 class TestRunHelper(object):
     def pytest_funcarg__out(self, request):
@@ -329,6 +371,28 @@ class RunnerTests(object):
 
         assert set(cleanedup) == set(alltestdirs)
 
+    def test_timings(self):
+        test_driver = [pytest_script]
+
+        log = cStringIO.StringIO()
+        out = cStringIO.StringIO()
+
+        run_param = runner.RunParam(self.manydir)
+        run_param.test_driver = test_driver
+        run_param.parallel_runs = 3
+
+        testdirs = []
+        run_param.collect_testdirs(testdirs)
+        alltestdirs = testdirs[:]
+
+        timings = {'old/test': 42.0}
+        runner.execute_tests(run_param, testdirs, log, out, timings)
+
+        assert set(timings) == set(alltestdirs) | set(['old/test'])
+        assert timings['old/test'] == 42.0
+        for testdir in alltestdirs:
+            assert timings[testdir] > 0.0
+
     def test_timeout(self):
         test_driver = [pytest_script]
 